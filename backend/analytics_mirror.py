@@ -0,0 +1,376 @@
+"""Columnar mirror of the production tables for the reporting endpoints.
+
+The statistics endpoints aggregate whole tables, and running them on the
+MySQL primary competes with form writes. This module keeps a copy of every
+delta sync table in an embedded DuckDB file, where those scans and joins
+read only the columns they need.
+
+Refreshes are incremental. Each table's watermark is the delta sync
+``row_version`` it was last copied at, and each refresh asks
+``delta_sync.changes`` for the rows and tombstones after it. The watermark
+is committed in the same DuckDB transaction as the rows. A reset from delta
+sync, or a change to the table's columns in MySQL, reloads that table from
+scratch.
+
+DuckDB lets one process write a file, or several processes read it, but not
+both. The scheduler leader (or ``python analytics_mirror.py refresh``)
+therefore writes ``mirror.duckdb`` and publishes a copy under a new name,
+then atomically points the ``snapshot.duckdb`` symlink at it. The workers
+open the snapshot read-only and reopen it when the link moves. A refresh
+that changes nothing only touches the snapshot, so its mtime is the time
+of the last successful refresh. When the snapshot is older than
+ANALYTICS_MAX_LAG, or duckdb is not installed, ``fetch_all``/``fetch_one``
+run the query on MySQL instead. Report queries must therefore be written in
+SQL both engines accept, e.g. ``CAST(x AS DATE)`` instead of ``DATE(x)``.
+
+Usage:
+    python analytics_mirror.py refresh [--table feeding_schedule ...]
+    python analytics_mirror.py status
+    python analytics_mirror.py query "SELECT tray_batch_id, SUM(feed_quantity_kg) FROM feeding_schedule GROUP BY 1"
+"""
+import argparse
+import csv
+import logging
+import os
+import shutil
+import sys
+import threading
+import time
+from datetime import date, datetime, timedelta
+
+from config import ANALYTICS_BATCH_ROWS, ANALYTICS_DIR, ANALYTICS_ENABLED, ANALYTICS_MAX_LAG
+from database import DatabaseConnection
+import delta_sync
+
+logger = logging.getLogger(__name__)
+
+ANALYTICS_TABLES = tuple(delta_sync.SYNC_TABLES)
+WORKING_FILE = 'mirror.duckdb'
+SNAPSHOT_FILE = 'snapshot.duckdb'
+NULL = '\\N'
+
+COLUMNS_QUERY = """
+    SELECT TABLE_NAME AS table_name, COLUMN_NAME AS column_name, DATA_TYPE AS data_type,
+           COLUMN_TYPE AS column_type, NUMERIC_PRECISION AS numeric_precision, NUMERIC_SCALE AS numeric_scale
+    FROM information_schema.COLUMNS
+    WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN ({placeholders})
+    ORDER BY TABLE_NAME, ORDINAL_POSITION
+"""
+
+CREATE_WATERMARKS = """
+    CREATE TABLE IF NOT EXISTS mirror_watermarks (
+        table_name VARCHAR NOT NULL,
+        version UBIGINT NOT NULL,
+        columns VARCHAR NOT NULL,
+        row_count BIGINT NOT NULL,
+        synced_at TIMESTAMP NOT NULL
+    )
+"""
+
+_duckdb_module = None
+_reader = None  # (snapshot file, read-only connection)
+_reader_lock = threading.Lock()
+
+
+def _duckdb():
+    """The duckdb module, imported on first use; None when it is not installed."""
+    global _duckdb_module
+    if _duckdb_module is None:
+        try:
+            import duckdb
+            _duckdb_module = duckdb
+        except ImportError:
+            logger.warning("duckdb is not installed; reports read from MySQL")
+            _duckdb_module = False
+    return _duckdb_module or None
+
+
+def _path(name):
+    return os.path.join(ANALYTICS_DIR, name)
+
+
+def _quote(identifier):
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+def _duck_type(column):
+    """DuckDB type for a MySQL information_schema column."""
+    data_type = column['data_type'].lower()
+    unsigned = 'unsigned' in column['column_type'].lower()
+    if data_type in ('tinyint', 'smallint', 'mediumint', 'int', 'integer', 'year'):
+        return 'BIGINT' if unsigned else 'INTEGER'
+    if data_type in ('bigint', 'bit'):
+        return 'UBIGINT' if unsigned or data_type == 'bit' else 'BIGINT'
+    if data_type == 'decimal':
+        return f"DECIMAL({min(column['numeric_precision'], 38)}, {column['numeric_scale']})"
+    if data_type in ('float', 'double'):
+        return 'DOUBLE'
+    if data_type == 'date':
+        return 'DATE'
+    if data_type in ('datetime', 'timestamp'):
+        return 'TIMESTAMP'
+    if data_type == 'time':
+        # The connector returns TIME as timedelta, and MySQL allows more than 24 hours
+        return 'INTERVAL'
+    return 'VARCHAR'
+
+
+def _mysql_columns(db, tables):
+    """{table: [(column, duckdb type), ...]} in column order."""
+    placeholders = ', '.join(['%s'] * len(tables))
+    columns = {}
+    for row in db.fetch_all(COLUMNS_QUERY.format(placeholders=placeholders), tuple(tables)):
+        columns.setdefault(row['table_name'], []).append((row['column_name'], _duck_type(row)))
+    return columns
+
+
+def _cell(value):
+    if value is None:
+        return NULL
+    if isinstance(value, timedelta):
+        return f"{value.total_seconds()} seconds"
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if isinstance(value, (bytes, bytearray)):
+        return value.decode('utf-8', errors='replace')
+    if isinstance(value, set):
+        return ','.join(sorted(value))
+    return value
+
+
+def _insert(conn, table, columns, rows):
+    """Bulk insert through a CSV file; DuckDB binds parameters one row at a time."""
+    staging = _path(f"{table}.{os.getpid()}.csv")
+    names = [name for name, _ in columns]
+    try:
+        with open(staging, 'w', newline='', encoding='utf-8') as fh:
+            writer = csv.writer(fh)
+            for row in rows:
+                writer.writerow([_cell(row.get(name)) for name in names])
+        conn.execute(
+            f"INSERT INTO {_quote(table)} SELECT * FROM read_csv(?, header = false, nullstr = ?, "
+            f"quote = '\"', escape = '\"', columns = ?)",
+            [staging, NULL, dict(columns)])
+    finally:
+        os.remove(staging)
+
+
+def _sync_table(conn, db, table, columns):
+    """Apply the changes to ``table`` since its watermark; returns the number applied."""
+    pk_col = delta_sync.SYNC_TABLES[table]
+    signature = ','.join(f"{name} {duck_type}" for name, duck_type in columns)
+    state = conn.execute("SELECT version, columns FROM mirror_watermarks WHERE table_name = ?", [table]).fetchone()
+    version = state[0] if state and state[1] == signature else 0
+    if version == 0:
+        # First load, or the MySQL columns changed: start the table again
+        conn.execute(f"DROP TABLE IF EXISTS {_quote(table)}")
+        conn.execute(f"CREATE TABLE {_quote(table)} ("
+                     + ', '.join(f"{_quote(name)} {duck_type}" for name, duck_type in columns) + ")")
+    applied = 0
+    while True:
+        batch = delta_sync.changes(db, {table: version}, tables=[table], limit=ANALYTICS_BATCH_ROWS,
+                                   serialize=False)[table]
+        conn.begin()
+        try:
+            if batch['reset']:
+                conn.execute(f"DELETE FROM {_quote(table)}")
+            stale = batch['deleted'] + [row[pk_col] for row in batch['rows']]
+            if version and stale:
+                conn.execute(f"DELETE FROM {_quote(table)} WHERE {_quote(pk_col)} IN (SELECT UNNEST(?))", [stale])
+            if batch['rows']:
+                _insert(conn, table, columns, batch['rows'])
+            row_count = conn.execute(f"SELECT COUNT(*) FROM {_quote(table)}").fetchone()[0]
+            conn.execute("DELETE FROM mirror_watermarks WHERE table_name = ?", [table])
+            conn.execute("INSERT INTO mirror_watermarks VALUES (?, ?, ?, ?, ?)",
+                         [table, batch['version'], signature, row_count, datetime.now()])
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        applied += len(batch['rows']) + len(batch['deleted'])
+        version = batch['version']
+        if not batch['has_more']:
+            return applied
+
+
+def _publish(changed):
+    link = _path(SNAPSHOT_FILE)
+    if changed or not os.path.exists(link):
+        # A new name per snapshot: duckdb.connect hands back the database already
+        # open for a path, so a file replaced in place would never be seen
+        target = f"snapshot-{time.time_ns()}.duckdb"
+        partial = _path(f"{target}.tmp")
+        shutil.copyfile(_path(WORKING_FILE), partial)
+        os.replace(partial, _path(target))
+        partial_link = f"{link}.{os.getpid()}.tmp"
+        os.symlink(target, partial_link)
+        os.replace(partial_link, link)
+        # Workers still reading an older snapshot keep it open until they move on
+        for name in os.listdir(ANALYTICS_DIR):
+            if name.startswith('snapshot-') and name.endswith('.duckdb') and name != target:
+                os.remove(_path(name))
+    else:
+        os.utime(link)
+
+
+def refresh(db, tables=None):
+    """Copy the changes since the last refresh and publish the snapshot; returns {table: changes applied}.
+
+    Raises RuntimeError when duckdb is missing, another process is refreshing,
+    or a table failed. In that case the snapshot is left as it was and ages
+    until a later refresh succeeds.
+    """
+    duckdb = _duckdb()
+    if duckdb is None:
+        raise RuntimeError("duckdb is not installed")
+    tables = list(tables or ANALYTICS_TABLES)
+    unknown = [t for t in tables if t not in delta_sync.SYNC_TABLES]
+    if unknown:
+        raise ValueError(f"tables must be from: {', '.join(delta_sync.SYNC_TABLES)}")
+    os.makedirs(ANALYTICS_DIR, exist_ok=True)
+    schema = _mysql_columns(db, tables)
+    try:
+        conn = duckdb.connect(_path(WORKING_FILE))
+    except duckdb.IOException as e:
+        # DuckDB locks the file, so a second writer fails here instead of corrupting it
+        raise RuntimeError(f"the mirror is being refreshed by another process: {e}")
+    applied, failed = {}, []
+    try:
+        conn.execute(CREATE_WATERMARKS)
+        for table in tables:
+            columns = schema.get(table)
+            if not columns or 'row_version' not in {name for name, _ in columns}:
+                logger.warning(f"Not mirroring {table}: missing from MySQL or without the delta sync columns")
+                continue
+            try:
+                applied[table] = _sync_table(conn, db, table, columns)
+            except Exception as e:
+                logger.error(f"Analytics mirror refresh of {table} failed: {e}")
+                failed.append(table)
+        conn.execute("CHECKPOINT")
+    finally:
+        conn.close()
+    if failed:
+        raise RuntimeError(f"could not mirror {', '.join(failed)}")
+    _publish(any(applied.values()))
+    total = sum(applied.values())
+    if total:
+        logger.info(f"Analytics mirror applied {total} change(s) across {len(applied)} table(s)")
+    return applied
+
+
+def _snapshot():
+    """Read-only connection to the published snapshot, or None if there is no fresh one."""
+    global _reader
+    if not ANALYTICS_ENABLED or _duckdb() is None:
+        return None
+    target = os.path.realpath(_path(SNAPSHOT_FILE))
+    try:
+        if time.time() - os.stat(target).st_mtime > ANALYTICS_MAX_LAG:
+            return None
+    except FileNotFoundError:
+        return None
+    with _reader_lock:
+        if _reader is None or _reader[0] != target:
+            try:
+                _reader = (target, _duckdb().connect(target, read_only=True))
+            except Exception as e:
+                # Replaced and removed between the stat and here; the next request opens the new one
+                logger.warning(f"Could not open analytics snapshot {target}: {e}")
+                return None
+        return _reader[1]
+
+
+def _query(conn, query, params):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(query.replace('%s', '?'), list(params or ()))
+        names = [column[0] for column in cursor.description]
+        return [dict(zip(names, row)) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+
+
+def fetch_all(db, query, params=None):
+    """Rows of ``query`` from the snapshot while it is fresh, otherwise from MySQL through ``db``.
+
+    ``query`` uses %s placeholders and must be valid in both MySQL and DuckDB.
+    """
+    conn = _snapshot()
+    if conn is not None:
+        try:
+            return _query(conn, query, params)
+        except Exception as e:
+            logger.warning(f"Analytics mirror could not run a report query, using MySQL: {e}")
+    return db.fetch_all(query, params)
+
+
+def fetch_one(db, query, params=None):
+    rows = fetch_all(db, query, params)
+    return rows[0] if rows else None
+
+
+def warm_up():
+    """Import duckdb and open the snapshot before the first report asks for it."""
+    _snapshot()
+
+
+def status():
+    """Snapshot age and the watermark, row count and last sync of each mirrored table."""
+    duckdb = _duckdb()
+    snapshot = os.path.realpath(_path(SNAPSHOT_FILE))
+    if duckdb is None or not os.path.exists(snapshot):
+        return {'age_seconds': None, 'fresh': False, 'tables': []}
+    age = time.time() - os.stat(snapshot).st_mtime
+    tables = _query(_snapshot() or duckdb.connect(snapshot, read_only=True),
+                    "SELECT table_name, version, row_count, synced_at FROM mirror_watermarks ORDER BY table_name", ())
+    return {'age_seconds': round(age, 1), 'fresh': ANALYTICS_ENABLED and age <= ANALYTICS_MAX_LAG, 'tables': tables}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Columnar analytics mirror of the production tables')
+    sub = parser.add_subparsers(dest='command', required=True)
+    refresh_parser = sub.add_parser('refresh', help='copy the changes since the last refresh')
+    refresh_parser.add_argument('--table', action='append', choices=ANALYTICS_TABLES,
+                                help='only this table (repeatable)')
+    sub.add_parser('status', help='watermarks and snapshot age')
+    query_parser = sub.add_parser('query', help='run a read-only query on the snapshot')
+    query_parser.add_argument('sql')
+    args = parser.parse_args(argv)
+
+    if args.command == 'refresh':
+        try:
+            applied = refresh(DatabaseConnection(), tables=args.table)
+        except RuntimeError as e:
+            print(f"Refresh failed: {e}")
+            return 1
+        for table, count in applied.items():
+            print(f"  {table:<36} {count:>8} change(s)")
+        print(f"Snapshot published to {_path(SNAPSHOT_FILE)}")
+    elif args.command == 'status':
+        report = status()
+        if report['age_seconds'] is None:
+            print('No snapshot yet; run: python analytics_mirror.py refresh')
+            return 1
+        print(f"Snapshot age {report['age_seconds']} s ({'fresh' if report['fresh'] else 'stale, reports use MySQL'})")
+        for row in report['tables']:
+            print(f"  {row['table_name']:<36} version {row['version']:>10}  rows {row['row_count']:>9}  "
+                  f"synced {row['synced_at']:%Y-%m-%d %H:%M:%S}")
+    else:
+        duckdb = _duckdb()
+        if duckdb is None or not os.path.exists(_path(SNAPSHOT_FILE)):
+            print('No snapshot to query')
+            return 1
+        conn = duckdb.connect(os.path.realpath(_path(SNAPSHOT_FILE)), read_only=True)
+        rows = _query(conn, args.sql, ())
+        if rows:
+            print('\t'.join(rows[0]))
+        for row in rows:
+            print('\t'.join('' if value is None else str(value) for value in row.values()))
+        print(f"({len(rows)} row(s))")
+    return 0
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
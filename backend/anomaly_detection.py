@@ -0,0 +1,231 @@
+"""Streaming anomaly detection on environmental readings.
+
+Every (source, unit, metric) stream -- e.g. ('cage', 'C-3', 'humidity') --
+keeps an exponentially weighted mean and variance plus a faster EWMA in
+``environment_stream_state``. A new reading updates that one row in O(1),
+inside the transaction that stores the reading, and raises alerts for:
+
+    range  value outside the absolute limits for the source and metric
+    spike  value more than ANOMALY_SPIKE_SIGMA deviations from the mean
+    drift  fast EWMA more than ANOMALY_DRIFT_SIGMA deviations from the slow one
+
+History is never rescanned, so the cost follows the ingestion rate rather
+than the table size. The state lives in MySQL rather than in process memory
+because every gunicorn worker takes inserts; the row is read FOR UPDATE so
+concurrent readings of one stream are applied one after the other.
+
+An open alert is kept per stream and kind: repeats bump its count and last
+value until it is acknowledged.
+"""
+import logging
+import math
+from datetime import date, datetime
+
+from config import ANOMALY_ALPHA, ANOMALY_FAST_ALPHA, ANOMALY_WARMUP, ANOMALY_SPIKE_SIGMA, ANOMALY_DRIFT_SIGMA
+
+logger = logging.getLogger(__name__)
+
+SOURCES = ('cage', 'tray', 'hatchery', 'waste', 'sensor')
+
+# (source, metric) -> (low, high) absolute limits for black soldier fly stages
+RANGES = {
+    ('cage', 'temperature'): (25.0, 32.0),
+    ('cage', 'humidity'): (50.0, 80.0),
+    ('tray', 'temperature'): (24.0, 35.0),
+    ('tray', 'humidity'): (40.0, 80.0),
+    ('hatchery', 'temperature'): (25.0, 30.0),
+    ('hatchery', 'humidity'): (60.0, 80.0),
+    ('waste', 'temperature'): (10.0, 45.0),
+    ('waste', 'humidity'): (30.0, 90.0),
+    ('sensor', 'temperature'): (20.0, 35.0),
+    ('sensor', 'humidity'): (40.0, 85.0),
+}
+
+# Deviations below this are never treated as anomalous, so a stream that has
+# been perfectly steady does not alert on the first small change
+MIN_STD = {'temperature': 0.5, 'humidity': 2.0}
+
+SELECT_STATE_QUERY = """
+    SELECT source, unit_id, metric, reading_count, mean, variance, fast_mean, last_reading_at
+    FROM environment_stream_state
+    WHERE (source, unit_id, metric) IN ({placeholders})
+    FOR UPDATE
+"""
+
+UPSERT_STATE_QUERY = """
+    INSERT INTO environment_stream_state
+        (source, unit_id, metric, reading_count, mean, variance, fast_mean, last_reading, last_reading_at)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        reading_count = VALUES(reading_count), mean = VALUES(mean), variance = VALUES(variance),
+        fast_mean = VALUES(fast_mean), last_reading = VALUES(last_reading),
+        last_reading_at = VALUES(last_reading_at)
+"""
+
+# is_open is 1 while unacknowledged and NULL afterwards; the unique key only
+# covers open alerts because MySQL allows repeated NULLs
+RAISE_ALERT_QUERY = """
+    INSERT INTO environment_alerts
+        (source, unit_id, metric, kind, first_reading, last_reading, expected, threshold,
+         occurrences, first_seen_at, last_seen_at, is_open)
+    VALUES (%s, %s, %s, %s, %s, %s, %s, %s, 1, %s, %s, 1)
+    ON DUPLICATE KEY UPDATE
+        last_reading = VALUES(last_reading), expected = VALUES(expected),
+        threshold = VALUES(threshold), occurrences = occurrences + 1,
+        last_seen_at = VALUES(last_seen_at)
+"""
+
+
+def _value(raw):
+    try:
+        value = float(raw)
+    except (TypeError, ValueError):
+        return None
+    return value if math.isfinite(value) else None
+
+
+def update(state, value, source, metric):
+    """Fold one value into ``state`` in place; returns [(kind, expected, threshold)].
+
+    Spikes are judged against the statistics before the value is added.
+    """
+    alerts = []
+    limits = RANGES.get((source, metric))
+    if limits and not limits[0] <= value <= limits[1]:
+        alerts.append(('range', sum(limits) / 2, limits[1] if value > limits[1] else limits[0]))
+
+    count = state['reading_count']
+    if count == 0:
+        state.update(reading_count=1, mean=value, variance=0.0, fast_mean=value)
+        return alerts
+
+    std = max(math.sqrt(state['variance']), MIN_STD.get(metric, 0.0))
+    warm = count >= ANOMALY_WARMUP
+    if warm and abs(value - state['mean']) > ANOMALY_SPIKE_SIGMA * std:
+        alerts.append(('spike', state['mean'], ANOMALY_SPIKE_SIGMA * std))
+
+    delta = value - state['mean']
+    state['mean'] += ANOMALY_ALPHA * delta
+    state['variance'] = (1 - ANOMALY_ALPHA) * (state['variance'] + ANOMALY_ALPHA * delta * delta)
+    state['fast_mean'] += ANOMALY_FAST_ALPHA * (value - state['fast_mean'])
+    state['reading_count'] = count + 1
+
+    if warm and abs(state['fast_mean'] - state['mean']) > ANOMALY_DRIFT_SIGMA * std:
+        alerts.append(('drift', state['mean'], ANOMALY_DRIFT_SIGMA * std))
+    return alerts
+
+
+def _as_datetime(value):
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime(value.year, value.month, value.day)
+    try:
+        return datetime.fromisoformat(str(value).strip())
+    except ValueError:
+        return None
+
+
+def observe_many(db, source, readings, monotonic=False):
+    """Apply readings of one source; returns the number of alerts raised.
+
+    ``readings`` is a list of (unit_id, observed_at, {metric: value}). With
+    ``monotonic`` a reading not newer than the stream's last one is ignored,
+    which drops sensor retransmissions and late arrivals. Call inside the
+    transaction that stores the readings.
+    """
+    if source not in SOURCES:
+        raise ValueError(f"source must be one of: {', '.join(SOURCES)}")
+    points = []
+    for unit_id, observed_at, values in readings:
+        observed_at = _as_datetime(observed_at) or datetime.now()
+        for metric, raw in values.items():
+            value = _value(raw)
+            if value is not None:
+                points.append((str(unit_id).strip(), metric, observed_at, value))
+    if not points:
+        return 0
+    points.sort(key=lambda p: p[2])
+    keys = sorted({(source, unit_id, metric) for unit_id, metric, _, _ in points})
+
+    with db.transaction():
+        rows = db.fetch_all(
+            SELECT_STATE_QUERY.format(placeholders=', '.join(['(%s, %s, %s)'] * len(keys))),
+            tuple(part for key in keys for part in key))
+        states = {(r['source'], r['unit_id'], r['metric']): {
+            'reading_count': r['reading_count'], 'mean': r['mean'], 'variance': r['variance'],
+            'fast_mean': r['fast_mean'], 'last_reading_at': r['last_reading_at'],
+        } for r in rows}
+        alerts = {}
+        for unit_id, metric, observed_at, value in points:
+            key = (source, unit_id, metric)
+            state = states.setdefault(key, {'reading_count': 0, 'mean': 0.0, 'variance': 0.0,
+                                            'fast_mean': 0.0, 'last_reading_at': None})
+            last = state['last_reading_at']
+            if monotonic and last is not None and observed_at <= last:
+                continue
+            for kind, expected, threshold in update(state, value, source, metric):
+                previous = alerts.get(key + (kind,))
+                first_reading, first_seen = (previous[4], previous[8]) if previous else (value, observed_at)
+                alerts[key + (kind,)] = key + (kind, first_reading, value, expected, threshold,
+                                               first_seen, observed_at)
+            state['last_reading'] = value
+            state['last_reading_at'] = observed_at if last is None else max(last, observed_at)
+
+        changed = [k + (s['reading_count'], s['mean'], s['variance'], s['fast_mean'],
+                        s['last_reading'], s['last_reading_at'])
+                   for k, s in states.items() if 'last_reading' in s]
+        if changed:
+            db.execute_many(UPSERT_STATE_QUERY, changed)
+        if alerts:
+            db.execute_many(RAISE_ALERT_QUERY, list(alerts.values()))
+    if alerts:
+        logger.warning(f"{len(alerts)} environmental alert(s) raised for {source}")
+    return len(alerts)
+
+
+def observe(db, source, unit_id, observed_at, **values):
+    """Apply one reading, e.g. ``observe(db, 'cage', 'C-3', '2024-05-01', temperature=29.5)``."""
+    return observe_many(db, source, [(unit_id, observed_at, values)])
+
+
+def list_alerts(db, source=None, unit_id=None, open_only=True, limit=100):
+    where, params = [], []
+    if source:
+        where.append("source = %s")
+        params.append(source)
+    if unit_id:
+        where.append("unit_id = %s")
+        params.append(unit_id)
+    if open_only:
+        where.append("is_open = 1")
+    sql = f"""
+        SELECT alert_id, source, unit_id, metric, kind, first_reading, last_reading, expected, threshold,
+               occurrences, first_seen_at, last_seen_at, is_open = 1 AS open,
+               acknowledged_by, acknowledged_at
+        FROM environment_alerts
+        {'WHERE ' + ' AND '.join(where) if where else ''}
+        ORDER BY last_seen_at DESC
+        LIMIT %s
+    """
+    rows = db.fetch_all(sql, tuple(params + [limit]))
+    for row in rows:
+        for key, value in row.items():
+            if isinstance(value, (date, datetime)):
+                row[key] = value.isoformat()
+        row['open'] = bool(row['open'])
+    return rows
+
+
+def acknowledge(db, alert_id, username):
+    """Close an open alert; returns False if it does not exist or is already closed."""
+    with db.transaction():
+        alert = db.fetch_one("SELECT is_open FROM environment_alerts WHERE alert_id = %s FOR UPDATE",
+                             (alert_id,))
+        if not alert or alert['is_open'] is None:
+            return False
+        db.execute_query("""
+            UPDATE environment_alerts SET is_open = NULL, acknowledged_by = %s, acknowledged_at = NOW()
+            WHERE alert_id = %s
+        """, (username, alert_id))
+    return True
@@ -0,0 +1,35 @@
+from flask import Blueprint, request, jsonify
+from flask_login import login_required, current_user
+import logging
+
+from database import DatabaseConnection
+from anomaly_detection import list_alerts, acknowledge, SOURCES
+
+logger = logging.getLogger(__name__)
+
+anomaly_api = Blueprint('anomaly_api', __name__)
+db = DatabaseConnection()
+
+
+@anomaly_api.route('/api/alerts', methods=['GET'])
+@login_required
+def get_alerts():
+    """Environmental alerts, newest first; ?all=1 includes acknowledged ones."""
+    source = request.args.get('source')
+    if source and source not in SOURCES:
+        return jsonify({'success': False, 'message': f"source must be one of: {', '.join(SOURCES)}"}), 400
+    try:
+        limit = min(max(int(request.args.get('limit', 100)), 1), 500)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'limit must be a number'}), 400
+    alerts = list_alerts(db, source=source, unit_id=request.args.get('unit'),
+                         open_only=request.args.get('all') not in ('1', 'true'), limit=limit)
+    return jsonify({'success': True, 'alerts': alerts})
+
+
+@anomaly_api.route('/api/alerts/<int:alert_id>/acknowledge', methods=['POST'])
+@login_required
+def acknowledge_alert(alert_id):
+    if not acknowledge(db, alert_id, current_user.username):
+        return jsonify({'success': False, 'message': 'Alert not found or already acknowledged'}), 404
+    return jsonify({'success': True})
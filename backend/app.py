@@ -1,11 +1,20 @@
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, send_from_directory, abort
+from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, send_from_directory, send_file, abort, session, g
 from flask_cors import CORS
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
-from flask_wtf import FlaskForm
-from wtforms import StringField, PasswordField, BooleanField, SubmitField
-from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError, Regexp
 from werkzeug.security import generate_password_hash, check_password_hash
 from database import DatabaseConnection
+from mysql.connector import errors as mysql_errors, errorcode
+from customer_import import normalize_customer, import_stream as import_customer_stream
+import sales_analytics
+import lineage
+import anomaly_detection
+# Aliased: the /dashboard view below takes the bare name
+import dashboard as dashboard_summary
+import analytics_mirror
+import idempotency
+import images
+import rate_limit
+from lineage import LineageError
 import logging
 from datetime import datetime, timedelta
 import json
@@ -13,10 +22,24 @@ import os
 import re
 import secrets
 from waste_management_routes import waste_management
-import smtplib
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from config import EMAIL_HOST, EMAIL_PORT, EMAIL_HOST_USER, EMAIL_HOST_PASSWORD, ADMIN_EMAIL
+from sensor_routes import sensor_ingestion
+from search_routes import search_api
+from scheduler_routes import scheduler_api
+from lineage_routes import lineage_api
+from anomaly_routes import anomaly_api
+from batch_routes import batch_api
+from sync_routes import sync_api
+from health_routes import health_api
+from fragment_routes import fragment_api
+from health import probe as health_probe
+from scheduler import scheduler
+import atexit
+import importlib
+import startup
+from mailer import send_email
+from harvest_report import (queue_report as queue_harvest_report, get_run as get_harvest_report,
+                            resume_queued as resume_harvest_reports, QueueFull as HarvestReportQueueFull)
+from config import ADMIN_EMAIL, STATS_LOOKBACK_DAYS, SCHEDULER_ENABLED, RATE_LIMIT_PROXY_HOPS, ANALYTICS_ENABLED
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -42,6 +65,145 @@ db = DatabaseConnection()
 
 # Register blueprints
 app.register_blueprint(waste_management)
+app.register_blueprint(sensor_ingestion)
+app.register_blueprint(search_api)
+app.register_blueprint(scheduler_api)
+app.register_blueprint(lineage_api)
+app.register_blueprint(anomaly_api)
+app.register_blueprint(batch_api)
+app.register_blueprint(sync_api)
+app.register_blueprint(health_api)
+app.register_blueprint(fragment_api)
+
+# Every gunicorn worker runs a scheduler; only the one holding the MySQL leader
+# lock executes jobs, and another takes over if it dies
+def start_scheduler():
+    import scheduled_jobs  # noqa: F401 - registers the jobs (and imports numpy)
+    scheduler.start()
+    atexit.register(scheduler.stop)
+
+# /readyz reads the database state this thread caches, never the pool
+health_probe.start()
+atexit.register(health_probe.stop)
+
+# Nothing above connects to MySQL. The pool, the scheduler and numpy start on a
+# background thread once the worker is up, or on first use if that comes sooner
+warmup_tasks = [('database pool', DatabaseConnection.warm_up),
+                ('harvest reports', resume_harvest_reports),
+                ('forecasting', lambda: importlib.import_module('forecasting'))]
+if ANALYTICS_ENABLED:
+    warmup_tasks.append(('analytics mirror', analytics_mirror.warm_up))
+if SCHEDULER_ENABLED:
+    warmup_tasks.append(('scheduler', start_scheduler))
+startup.start_warmup(warmup_tasks)
+
+# Admission control runs first, so a rejected request never touches the
+# database: token buckets per user and route, slots for expensive routes
+def client_ip():
+    route = request.access_route
+    if RATE_LIMIT_PROXY_HOPS and len(route) >= RATE_LIMIT_PROXY_HOPS:
+        return route[-RATE_LIMIT_PROXY_HOPS]
+    return request.remote_addr
+
+@app.before_request
+def admit_request():
+    endpoint = request.endpoint
+    if endpoint in rate_limit.LOGIN_ENDPOINTS:
+        if request.method != 'POST':
+            return None
+        data = request.get_json(silent=True) or request.form
+        account = (data.get('username') or data.get('email') or '').lower().strip() or None
+    elif request.path.startswith('/api/'):
+        account = None
+    else:
+        return None
+    ip = client_ip()
+    user_id = session.get('_user_id')
+    client = f"user:{user_id}" if user_id else f"ip:{ip}"
+    try:
+        g.rate_limit_slot = rate_limit.admit(endpoint, client, ip, account)
+    except rate_limit.Rejected as e:
+        response = jsonify({'success': False, 'message': str(e)})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, e.status
+    return None
+
+@app.teardown_request
+def release_rate_limit_slot(exc):
+    if g.get('batch_subrequest'):
+        return
+    rate_limit.release(g.pop('rate_limit_slot', None))
+
+# Read-your-writes: after a session writes, its reads stay on the primary for a
+# few seconds even across requests, so replica lag never hides a fresh record
+@app.before_request
+def restore_read_your_writes():
+    db.set_primary_until(session.get('_db_primary_until', 0.0))
+
+# One pool checkout per request: statements in a request share the bound
+# connection, which is released when the request is torn down
+@app.before_request
+def bind_request_connection():
+    db.begin_request()
+
+@app.teardown_request
+def release_request_connection(exc):
+    # Sub-requests of /api/batch share the connection of the batch request
+    if g.get('batch_subrequest'):
+        return
+    db.end_request()
+
+@app.after_request
+def record_first_request(response):
+    startup.mark_first_request()
+    return response
+
+@app.after_request
+def persist_read_your_writes(response):
+    primary_until = db.get_primary_until()
+    if primary_until > session.get('_db_primary_until', 0.0):
+        session['_db_primary_until'] = primary_until
+    return response
+
+# Idempotency-Key: a retried POST gets the first response back instead of
+# running its INSERTs and emails again (idempotency.py)
+@app.before_request
+def claim_idempotency_key():
+    key = request.headers.get('Idempotency-Key')
+    if request.method != 'POST' or not key or not current_user.is_authenticated:
+        return None
+    if not idempotency.valid_key(key):
+        return jsonify({'success': False, 'message': 'Invalid Idempotency-Key header'}), 400
+    # Raw uploads (customer import) are read as a stream, so only parsed bodies are hashed
+    hash_body = ((request.is_json or request.mimetype in ('application/x-www-form-urlencoded', 'multipart/form-data'))
+                 and (request.content_length or 0) <= idempotency.MAX_HASHED_BODY)
+    body = request.get_data(cache=True) if hash_body else f"{request.mimetype}:{request.content_length}".encode()
+    request_hash = idempotency.fingerprint(request.method, request.path, request.query_string, body)
+    outcome, claim = idempotency.claim(db, current_user.id, key, request_hash)
+    if outcome == idempotency.CLAIMED:
+        g.idempotency_claim = claim
+        return None
+    if outcome == idempotency.MISMATCH:
+        return jsonify({'success': False, 'message': 'Idempotency-Key was already used for a different request'}), 422
+    if outcome == idempotency.IN_PROGRESS:
+        response = jsonify({'success': False, 'message': 'A request with this Idempotency-Key is still being processed'})
+        response.headers['Retry-After'] = '1'
+        return response, 409
+    response = app.response_class(bytes(claim['response_body']), status=claim['status_code'],
+                                  content_type=claim['content_type'])
+    response.headers['Idempotent-Replayed'] = 'true'
+    return response
+
+@app.after_request
+def store_idempotent_response(response):
+    claim = g.pop('idempotency_claim', None)
+    if claim is not None:
+        body = None if response.is_streamed else response.get_data()
+        try:
+            idempotency.complete(db, claim, response.status_code, response.content_type, body)
+        except Exception as e:
+            logger.error(f"Could not store idempotent response: {e}")
+    return response
 
 # Route to serve static files
 @app.route('/<path:filename>')
@@ -50,10 +212,29 @@ def serve_static(filename):
     # Only serve CSS and JS files
     if filename.endswith(('.css', '.js')):
         return send_from_directory('../frontend', filename)
+    elif images.source_path(filename):
+        return send_image(filename)
     else:
         # For other files, let Flask handle them normally
         return app.send_static_file(filename)
 
+def send_image(filename):
+    """A resized AVIF/WebP/original variant of a frontend image (see images.py)"""
+    width = request.args.get('w', type=int)
+    try:
+        path, mimetype, current = images.variant(filename, width, request.headers.get('Accept'))
+    except (OSError, ValueError) as e:
+        logger.error(f"Could not prepare image {filename}: {e}")
+        return app.send_static_file(filename)
+    response = send_file(path, mimetype=mimetype, conditional=True)
+    response.vary.add('Accept')
+    if request.args.get('v') == current:
+        # The URL names this exact file, so it can be cached for good
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        response.headers['Cache-Control'] = 'public, max-age=3600, must-revalidate'
+    return response
+
 # User class for Flask-Login
 class User(UserMixin):
     def __init__(self, user_id, username, email, password_hash, full_name=None, last_login=None, is_active=True):
@@ -72,53 +253,6 @@ class User(UserMixin):
     def get_id(self):
         return str(self.id)
 
-# Enhanced Login form with security
-class LoginForm(FlaskForm):
-    email = StringField('Email', validators=[
-        DataRequired(), 
-        Email(message='Please enter a valid email address')
-    ])
-    password = PasswordField('Password', validators=[DataRequired()])
-    remember = BooleanField('Remember Me')
-    submit = SubmitField('Login')
-
-# Enhanced Registration form with security
-class RegistrationForm(FlaskForm):
-    username = StringField('Username', validators=[
-        DataRequired(), 
-        Length(min=3, max=20, message='Username must be between 3 and 20 characters'),
-        Regexp(r'^[a-zA-Z0-9_]+$', message='Username can only contain letters, numbers, and underscores')
-    ])
-    full_name = StringField('Full Name', validators=[
-        DataRequired(),
-        Length(min=2, max=100, message='Full name must be between 2 and 100 characters')
-    ])
-    email = StringField('Email', validators=[
-        DataRequired(), 
-        Email(message='Please enter a valid email address')
-    ])
-    password = PasswordField('Password', validators=[
-        DataRequired(),
-        Length(min=8, message='Password must be at least 8 characters long'),
-        Regexp(r'^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&])[A-Za-z\d@$!%*?&]', 
-               message='Password must contain at least one uppercase letter, one lowercase letter, one number, and one special character')
-    ])
-    confirm_password = PasswordField('Confirm Password', validators=[
-        DataRequired(), 
-        EqualTo('password', message='Passwords must match')
-    ])
-    submit = SubmitField('Register')
-
-    def validate_username(self, username):
-        result = db.fetch_one("SELECT user_id FROM users WHERE username = %s", (username.data,))
-        if result:
-            raise ValidationError('Username already taken. Please choose another one.')
-
-    def validate_email(self, email):
-        result = db.fetch_one("SELECT user_id FROM users WHERE email = %s", (email.data,))
-        if result:
-            raise ValidationError('Email already registered. Please use another email.')
-
 # Database helper functions
 def get_user_by_email(email):
     """Get user by email from database"""
@@ -186,6 +320,7 @@ def login():
     if current_user.is_authenticated:
         return redirect(url_for('dashboard'))
     
+    from forms import LoginForm
     form = LoginForm()
     if form.validate_on_submit():
         email = form.email.data.lower().strip()
@@ -213,6 +348,7 @@ def register():
     if current_user.is_authenticated:
         return redirect(url_for('dashboard'))
     
+    from forms import RegistrationForm
     form = RegistrationForm()
     if form.validate_on_submit():
         try:
@@ -533,7 +669,11 @@ def handle_waste_environmental_monitoring():
     )
 
     try:
-        db.execute_query(query, params)
+        with db.transaction():
+            db.execute_query(query, params)
+            anomaly_detection.observe(
+                db, 'waste', 'waste', f"{normalized_data['monitoring_date']} {normalized_data['monitoring_time']}",
+                temperature=normalized_data['temperature'], humidity=normalized_data['humidity'])
         logger.info(f"Waste environmental monitoring data saved for {normalized_data.get('monitoring_date')}")
         return jsonify({'success': True, 'message': 'Environmental monitoring record created successfully'})
     except Exception as e:
@@ -542,21 +682,23 @@ def handle_waste_environmental_monitoring():
 
 
 # --- Statistics & Reporting ---
+# Whole-table aggregates read the DuckDB mirror (analytics_mirror.py) while it is
+# fresh, so they do not compete with form writes; the SQL runs on both engines
 @app.route('/api/statistics/waste-processing', methods=['GET'])
 @login_required
 def get_waste_processing_stats():
     try:
         query = """
             SELECT 
-                DATE(processing_date) as date,
+                CAST(processing_date AS DATE) as date,
                 SUM(waste_processed) as total_processed,
                 SUM(by_products) as total_by_products
             FROM processing_records
-            GROUP BY DATE(processing_date)
+            GROUP BY CAST(processing_date AS DATE)
             ORDER BY date DESC
             LIMIT 30;
         """
-        stats = db.fetch_all(query)
+        stats = analytics_mirror.fetch_all(db, query)
         # Convert decimal and date objects to string/float for JSON serialization
         for row in stats:
             for key, value in row.items():
@@ -576,15 +718,18 @@ def get_environmental_stats():
     try:
         query = """
             SELECT 
-                DATE(monitoring_date) as date,
+                CAST(monitoring_date AS DATE) as date,
                 AVG(temperature) as avg_temp,
                 AVG(humidity) as avg_humidity
             FROM environmental_monitoring_waste
-            GROUP BY DATE(monitoring_date)
+            WHERE monitoring_date >= %s
+            GROUP BY CAST(monitoring_date AS DATE)
             ORDER BY date DESC
             LIMIT 30;
         """
-        stats = db.fetch_all(query)
+        # Bounding the scan lets the monthly partitions be pruned
+        since = datetime.now().date() - timedelta(days=STATS_LOOKBACK_DAYS)
+        stats = analytics_mirror.fetch_all(db, query, (since,))
         for row in stats:
             for key, value in row.items():
                 if isinstance(value, (datetime,)):
@@ -602,15 +747,15 @@ def get_larval_growth_stats():
     try:
         query = """
             SELECT 
-                DATE(feeding_date) as date,
+                CAST(feeding_date AS DATE) as date,
                 AVG(larvae_weight) as avg_weight,
                 AVG(consumption) as avg_consumption
             FROM feeding_schedule
-            GROUP BY DATE(feeding_date)
+            GROUP BY CAST(feeding_date AS DATE)
             ORDER BY date DESC
             LIMIT 30;
         """
-        stats = db.fetch_all(query)
+        stats = analytics_mirror.fetch_all(db, query)
         for row in stats:
             for key, value in row.items():
                 if isinstance(value, (datetime,)):
@@ -622,27 +767,51 @@ def get_larval_growth_stats():
         logger.error(f"Error fetching larval growth stats: {e}")
         return jsonify([]), 500
 
+@app.route('/api/statistics/larval-growth/forecast', methods=['GET'])
+@login_required
+def get_larval_growth_forecast():
+    """Predicted harvest date, weight and yield for every active tray"""
+    # numpy is only needed here and by the nightly job; the warmup thread usually loaded it already
+    import forecasting
+    try:
+        # The scheduler's larval_forecast_refresh job keeps the cache current, so a
+        # GET only writes when asked to (?refresh=1) or when no scheduler runs
+        if request.args.get('refresh') == '1' or not SCHEDULER_ENABLED:
+            forecasting.refresh(db)
+        return jsonify({'success': True, 'forecasts': forecasting.get_forecasts(db)})
+    except Exception as e:
+        logger.error(f"Error computing larval growth forecast: {e}")
+        return jsonify({'success': False, 'message': 'Could not compute forecasts'}), 500
+
+@app.route('/api/dashboard', methods=['GET'])
+@login_required
+def get_dashboard():
+    """Totals, KPIs, monthly series and recent drying batches in one small payload"""
+    try:
+        months = min(max(int(request.args.get('months', 12)), 1), 36)
+        batches = min(max(int(request.args.get('batches', 30)), 1), 200)
+    except ValueError:
+        return jsonify({'success': False, 'message': 'months and batches must be numbers'}), 400
+    try:
+        return jsonify({'success': True, **dashboard_summary.build(db, months=months, batches=batches)})
+    except Exception as e:
+        logger.error(f"Error building dashboard: {e}")
+        return jsonify({'success': False, 'message': 'Could not load the dashboard'}), 500
+
 @app.route('/api/statistics/system-efficiency', methods=['GET'])
 @login_required
 def get_system_efficiency():
     try:
-        query_waste = """
-            SELECT SUM(waste_weight) as total_waste_in
-            FROM waste_sourcing;
-        """
-        total_waste_in = db.fetch_one(query_waste)['total_waste_in'] or 0
-
-        query_larvae = """
-            SELECT SUM(larvae_collected_kg) as total_larvae_out
-            FROM feeding_harvest_yield;
-        """
-        total_larvae_out = db.fetch_one(query_larvae)['total_larvae_out'] or 0
-        
-        query_compost = """
-            SELECT SUM(by_products) as total_compost_out
-            FROM processing_records;
+        query = """
+            SELECT
+                (SELECT SUM(waste_weight) FROM waste_sourcing) as total_waste_in,
+                (SELECT SUM(larvae_collected_kg) FROM feeding_harvest_yield) as total_larvae_out,
+                (SELECT SUM(by_products) FROM processing_records) as total_compost_out;
         """
-        total_compost_out = db.fetch_one(query_compost)['total_compost_out'] or 0
+        totals = analytics_mirror.fetch_one(db, query)
+        total_waste_in = totals['total_waste_in'] or 0
+        total_larvae_out = totals['total_larvae_out'] or 0
+        total_compost_out = totals['total_compost_out'] or 0
 
         efficiency = (total_larvae_out + total_compost_out) / total_waste_in if total_waste_in > 0 else 0
 
@@ -662,20 +831,20 @@ def get_daily_report():
     today = datetime.now().date()
     try:
         # Waste Sourced Today
-        waste_sourced_query = "SELECT SUM(waste_weight) as total FROM waste_sourcing WHERE DATE(collection_date) = %s"
-        waste_sourced = db.fetch_one(waste_sourced_query, (today,))['total'] or 0
+        waste_sourced_query = "SELECT SUM(waste_weight) as total FROM waste_sourcing WHERE collection_date >= %s AND collection_date < %s"
+        waste_sourced = db.fetch_one(waste_sourced_query, day_bounds(today))['total'] or 0
 
         # Larvae Harvested Today
-        larvae_harvested_query = "SELECT SUM(larvae_collected_kg) as total FROM feeding_harvest_yield WHERE DATE(harvest_date) = %s"
-        larvae_harvested = db.fetch_one(larvae_harvested_query, (today,))['total'] or 0
+        larvae_harvested_query = "SELECT SUM(larvae_collected_kg) as total FROM feeding_harvest_yield WHERE harvest_date >= %s AND harvest_date < %s"
+        larvae_harvested = db.fetch_one(larvae_harvested_query, day_bounds(today))['total'] or 0
 
         # Feed Given Today
-        feed_given_query = "SELECT SUM(feed_quantity_kg) as total FROM feeding_schedule WHERE DATE(feeding_date) = %s"
-        feed_given = db.fetch_one(feed_given_query, (today,))['total'] or 0
+        feed_given_query = "SELECT SUM(feed_quantity_kg) as total FROM feeding_schedule WHERE feeding_date >= %s AND feeding_date < %s"
+        feed_given = db.fetch_one(feed_given_query, day_bounds(today))['total'] or 0
 
         # Eggs Collected Today
-        eggs_collected_query = "SELECT SUM(eggs_collected) as total FROM fly_facility_egg_collection WHERE DATE(collection_date) = %s"
-        eggs_collected = db.fetch_one(eggs_collected_query, (today,))['total'] or 0
+        eggs_collected_query = "SELECT SUM(eggs_collected) as total FROM fly_facility_egg_collection WHERE collection_date >= %s AND collection_date < %s"
+        eggs_collected = db.fetch_one(eggs_collected_query, day_bounds(today))['total'] or 0
 
         return jsonify({
             'waste_sourced_today': float(waste_sourced),
@@ -691,18 +860,27 @@ def get_daily_report():
 @login_required
 def get_harvest_efficiency():
     try:
+        # Each side is summed per batch before the join, so a batch with several
+        # inputs and outputs is not counted once per pair
         query = """
             SELECT
                 di.batch_id,
-                MAX(do.created_at) as output_date,
-                SUM(di.wet_placed) AS total_wet_weight,
-                SUM(do.dried_produced) AS total_dried_weight
-            FROM drying_input di
-            JOIN drying_output do ON di.batch_id = do.batch_id
-            GROUP BY di.batch_id
-            ORDER BY output_date ASC;
+                dout.output_date,
+                di.total_wet_weight,
+                dout.total_dried_weight
+            FROM (
+                SELECT batch_id, SUM(wet_placed_for_drying_kg) AS total_wet_weight
+                FROM drying_input
+                GROUP BY batch_id
+            ) di
+            JOIN (
+                SELECT batch_id, MAX(created_at) AS output_date, SUM(dried_produced_kg) AS total_dried_weight
+                FROM drying_output
+                GROUP BY batch_id
+            ) dout ON di.batch_id = dout.batch_id
+            ORDER BY dout.output_date ASC;
         """
-        results = db.fetch_all(query)
+        results = analytics_mirror.fetch_all(db, query)
         
         efficiency_data = []
         target_ratio = 3.0
@@ -746,6 +924,10 @@ def normalize_keys(data):
     else:
         return data
 
+def day_bounds(day):
+    """Half-open [day, day + 1) range for sargable date filters."""
+    return (day, day + timedelta(days=1))
+
 def validate_fields(data, required_fields):
     missing_fields = [field for field in required_fields if field not in data]
     return missing_fields
@@ -767,9 +949,14 @@ def create_drying_batch():
         query = """INSERT INTO drying_batches (batch_id, drying_date, drying_method, personnel, status) 
                    VALUES (%s, %s, %s, %s, %s)"""
         params = (data['batch_id'], data['drying_date'], data['drying_method'], data['personnel'], data['status'])
-        db.execute_query(query, params)
+        with db.transaction():
+            db.execute_query(query, params)
+            # source_tray_batch_ids: trays whose larvae went into this batch
+            lineage.record(db, 'drying', data['batch_id'], tray=data.get('source_tray_batch_ids'))
         logger.info(f"Drying batch {data['batch_id']} created.")
         return jsonify({'success': True, 'message': 'Drying batch created successfully'}), 201
+    except LineageError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         logger.error(f"Error creating drying batch: {e}")
         return jsonify({'success': False, 'message': str(e)}), 500
@@ -791,7 +978,16 @@ def create_drying_input():
         data['batch_id'], data['wet_harvested'], data['wet_placed'], 
         data['dried_by_personnel'], data['sand_used'], data.get('sand_reused'), data.get('notes'), current_user.username
     )
-    db.execute_query(query, params)
+    try:
+        with db.transaction():
+            db.execute_query(query, params)
+            dashboard_summary.apply(db, 'wet', datetime.now().date(), data['wet_placed'], batch_id=data['batch_id'])
+            lineage.record(db, 'drying', data['batch_id'], tray=data.get('source_tray_batch_ids'))
+    except LineageError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error recording drying input: {e}")
+        return jsonify({'success': False, 'message': 'Failed to record drying input'}), 500
     return jsonify({'success': True, 'message': 'Drying input recorded successfully.'})
 
 @app.route('/api/drying/output', methods=['POST'])
@@ -805,28 +1001,30 @@ def create_drying_output():
 
     try:
         # Fetch the wet weight from drying_input to calculate ratio and yield
-        input_query = "SELECT SUM(wet_placed_for_drying_kg) as total_wet FROM drying_input WHERE batch_id = %s"
-        input_result = db.fetch_one(input_query, (data['batch_id'],))
-        total_wet_weight = input_result['total_wet'] if input_result and input_result['total_wet'] else 0
-
-        dried_produced = float(data['dried_produced'])
-        actual_ratio = f"{total_wet_weight}:{dried_produced}" if dried_produced > 0 else "N/A"
-        yield_percentage = (dried_produced / total_wet_weight) * 100 if total_wet_weight > 0 else 0
-
-        query = """INSERT INTO drying_output (batch_id, dried_produced_kg, solar_drying_taken_kg, stored_in_silo_bag_kg, sold_kg, actual_ratio, yield_percentage, notes, recorded_by) 
-                   VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"""
-        params = (
-            data['batch_id'],
-            dried_produced,
-            data.get('solar_drying_taken'),
-            data.get('silo_bag_stored'),
-            data.get('dried_sold'),
-            actual_ratio,
-            yield_percentage,
-            data.get('notes'),
-            current_user.username
-        )
-        db.execute_query(query, params)
+        with db.transaction():
+            input_query = "SELECT SUM(wet_placed_for_drying_kg) as total_wet FROM drying_input WHERE batch_id = %s"
+            input_result = db.fetch_one(input_query, (data['batch_id'],))
+            total_wet_weight = input_result['total_wet'] if input_result and input_result['total_wet'] else 0
+
+            dried_produced = float(data['dried_produced'])
+            actual_ratio = f"{total_wet_weight}:{dried_produced}" if dried_produced > 0 else "N/A"
+            yield_percentage = (dried_produced / float(total_wet_weight)) * 100 if total_wet_weight > 0 else 0
+
+            query = """INSERT INTO drying_output (batch_id, dried_produced_kg, solar_drying_taken_kg, stored_in_silo_bag_kg, sold_kg, actual_ratio, yield_percentage, notes, recorded_by) 
+                       VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)"""
+            params = (
+                data['batch_id'],
+                dried_produced,
+                data.get('solar_drying_taken'),
+                data.get('silo_bag_stored'),
+                data.get('dried_sold'),
+                actual_ratio,
+                yield_percentage,
+                data.get('notes'),
+                current_user.username
+            )
+            db.execute_query(query, params)
+            dashboard_summary.apply(db, 'dried', datetime.now().date(), dried_produced, batch_id=data['batch_id'])
         logger.info(f"Drying output recorded for batch {data['batch_id']}")
         return jsonify({'success': True, 'message': 'Drying output recorded successfully', 'actual_ratio': actual_ratio, 'yield_percentage': yield_percentage}), 201
     except Exception as e:
@@ -959,7 +1157,11 @@ def create_feeding_environmental_monitoring():
             data['temperature'], data['humidity'], data['ammonia_odor'],
             data.get('notes'), current_user.username
         )
-        db.execute_query(query, params)
+        with db.transaction():
+            db.execute_query(query, params)
+            anomaly_detection.observe(
+                db, 'tray', data['tray_facility_id'], f"{data['monitoring_date']} {data['monitoring_time']}",
+                temperature=data['temperature'], humidity=data['humidity'])
         logger.info(f"Larval env monitoring recorded for {data['tray_facility_id']}")
         return jsonify({'success': True, 'message': 'Environmental monitoring data saved successfully'}), 201
     except Exception as e:
@@ -1011,9 +1213,14 @@ def create_feeding_harvest_yield():
             VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
         """
         params = (data['harvest_date'], data['tray_batch_id'], data['instar_stage'], data['larvae_collected_kg'], data['processing_method'], data.get('storage_temperature_celsius'), data.get('notes'), current_user.username)
-        db.execute_query(query, params)
+        with db.transaction():
+            db.execute_query(query, params)
+            dashboard_summary.apply(db, 'larvae', data['harvest_date'], data['larvae_collected_kg'])
+            lineage.record(db, 'tray', data['tray_batch_id'], hatchery=data.get('hatchery_batch_number'))
         logger.info(f"Harvest/yield recorded for {data['tray_batch_id']}")
         return jsonify({'success': True, 'message': 'Harvest & Yield data saved successfully'}), 201
+    except LineageError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         logger.error(f"Error saving harvest/yield data: {e}")
         return jsonify({'success': False, 'message': 'An internal error occurred.'}), 500
@@ -1051,10 +1258,14 @@ def create_feeding_schedule():
             current_user.username
         )
         logger.debug(f"About to execute feeding schedule insert with params: {params}")
-        db.execute_query(query, params)
+        with db.transaction():
+            db.execute_query(query, params)
+            lineage.record(db, 'tray', data['tray_batch_id'], hatchery=data.get('hatchery_batch_number'))
         logger.debug("Feeding schedule insert executed successfully.")
         logger.info(f"Feeding schedule recorded for {data['tray_batch_id']}")
         return jsonify({'success': True, 'message': 'Feeding schedule saved successfully'}), 201
+    except LineageError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
     except Exception as e:
         logger.error(f"Error saving feeding schedule: {e}")
         return jsonify({'success': False, 'message': 'An internal error occurred.'}), 500
@@ -1085,7 +1296,10 @@ def create_cage_monitoring():
             data['ventilation_ok'], data['cage_cleaned'], data['dead_flies_removed'], data['cage_damage'],
             data.get('damage_notes'), data.get('additional_notes'), current_user.username
         )
-        db.execute_query(query, params)
+        with db.transaction():
+            db.execute_query(query, params)
+            anomaly_detection.observe(db, 'cage', data['cage_id'], data['date'],
+                                      temperature=data['temperature'], humidity=data['humidity'])
         logger.info(f"Cage monitoring recorded for {data['cage_id']}")
         return jsonify({'success': True, 'message': 'Cage monitoring data saved successfully'}), 201
     except Exception as e:
@@ -1284,9 +1498,10 @@ def get_records_by_date_and_section():
     all_records = {}
     try:
         for display_name, (table_name, date_col) in tables_to_query.items():
-            # The DATE() function is used to ignore the time part of datetime columns
-            query = f"SELECT * FROM {table_name} WHERE DATE({date_col}) = %s"
-            records = db.fetch_all(query, (target_date,))
+            # A half-open range instead of DATE(col) = %s keeps the predicate
+            # sargable, so indexes and partition pruning apply to datetime columns too
+            query = f"SELECT * FROM {table_name} WHERE {date_col} >= %s AND {date_col} < %s"
+            records = db.fetch_all(query, day_bounds(target_date))
             if records:
                 # Convert datetime and timedelta objects to strings for JSON serialization
                 for record in records:
@@ -1325,7 +1540,9 @@ def create_hatchery_batch():
             data.get('actual_hatch_date'), data.get('hatch_days'),
             data['supervisor_name'], data.get('notes')
         )
-        db.execute_query(query, params)
+        with db.transaction():
+            db.execute_query(query, params)
+            lineage.record(db, 'hatchery', data['batch_number'])
         return jsonify({'message': 'Batch information saved successfully'}), 201
     except Exception as e:
         logger.error(f'Error saving hatchery batch: {e}')
@@ -1373,7 +1590,10 @@ def create_hatchery_monitoring():
         params = (
             data['monitoring_date'], float(data['temperature_c']), float(data['humidity_percent']), data.get('adjustments_made')
         )
-        db.execute_query(query, params)
+        with db.transaction():
+            db.execute_query(query, params)
+            anomaly_detection.observe(db, 'hatchery', 'hatchery', data['monitoring_date'],
+                                      temperature=params[1], humidity=params[2])
         return jsonify({'message': 'Monitoring record saved successfully'}), 201
     except Exception as e:
         logger.error(f'Error saving monitoring record: {e}')
@@ -1484,20 +1704,51 @@ def get_customers():
 @login_required
 def add_customer():
     data = request.get_json()
-    # Check for existing customer with same name and email
-    existing = db.fetch_one("SELECT id FROM customers WHERE name=%s AND email=%s", (data['name'], data.get('email')))
-    if existing:
-        return jsonify({'success': False, 'error': 'Customer with this name and email already exists.'}), 409
+    try:
+        customer = normalize_customer(data or {})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    # The customer_key unique index rejects duplicates in the same round-trip
     query = "INSERT INTO customers (name, contact, email, address) VALUES (%s, %s, %s, %s)"
-    customer_id = db.execute_query(query, (data['name'], data.get('contact'), data.get('email'), data.get('address')))
+    try:
+        customer_id = db.execute_query(query, customer)
+    except mysql_errors.IntegrityError as e:
+        if e.errno != errorcode.ER_DUP_ENTRY:
+            raise
+        return jsonify({'success': False, 'error': 'Customer with this name and email (or contact) already exists.'}), 409
     return jsonify({'success': True, 'id': customer_id})
 
+@app.route('/api/customers/import', methods=['POST'])
+@login_required
+def import_customers_file():
+    """Bulk import customers from an uploaded CSV/JSON file or a raw request body"""
+    upload = request.files.get('file')
+    try:
+        if upload:
+            report = import_customer_stream(upload.stream, filename=upload.filename, mimetype=upload.mimetype)
+        else:
+            report = import_customer_stream(request.stream, mimetype=request.mimetype)
+    except (ValueError, UnicodeDecodeError) as e:
+        return jsonify({'success': False, 'error': f'Could not read import file: {e}'}), 400
+    logger.info(f"Customer import by {current_user.username}: {report['inserted']} inserted, "
+                f"{report['updated']} updated, {report['rejected']} rejected")
+    return jsonify({'success': True, **report})
+
 @app.route('/api/customers/<int:customer_id>', methods=['PUT'])
 @login_required
 def edit_customer(customer_id):
     data = request.get_json()
+    try:
+        name, contact, email, address = normalize_customer(data or {})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     query = "UPDATE customers SET name=%s, contact=%s, email=%s, address=%s WHERE id=%s"
-    db.execute_query(query, (data['name'], data.get('contact'), data.get('email'), data.get('address'), customer_id))
+    try:
+        db.execute_query(query, (name, contact, email, address, customer_id))
+    except mysql_errors.IntegrityError as e:
+        if e.errno != errorcode.ER_DUP_ENTRY:
+            raise
+        return jsonify({'success': False, 'error': 'Customer with this name and email (or contact) already exists.'}), 409
     return jsonify({'success': True})
 
 # --- Sales CRUD ---
@@ -1516,10 +1767,21 @@ def add_sale():
     if not customer_id:
         print("[DEBUG] customer_id missing in request data (sales):", data)
         return jsonify({'success': False, 'error': 'customer_id is required'}), 400
-    query = "INSERT INTO sales (date, customer_id, product, quantity, amount) VALUES (%s, %s, %s, %s, %s)"
-    sale_id = db.execute_query(query, (data['date'], customer_id, data.get('product'), data.get('quantity'), data['amount']))
+    try:
+        sales_analytics.check_sale({**data, 'customer_id': customer_id})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    try:
+        with db.transaction():
+            query = "INSERT INTO sales (date, customer_id, product, quantity, amount) VALUES (%s, %s, %s, %s, %s)"
+            sale_id = db.execute_query(query, (data['date'], customer_id, data.get('product'), data.get('quantity'), data['amount']))
+            sales_analytics.apply_sale(db, {**data, 'customer_id': customer_id})
+            # Optional sources for batch lineage (lists or comma-separated ids)
+            lineage.record(db, 'sale', sale_id, drying=data.get('drying_batch_ids'), tray=data.get('source_tray_batch_ids'))
+            customer = db.fetch_one("SELECT name, email, address FROM customers WHERE id=%s", (customer_id,))
+    except LineageError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
     # Send email notification for sale
-    customer = db.fetch_one("SELECT name, email, address FROM customers WHERE id=%s", (customer_id,))
     print("[DEBUG] Customer fetched from DB (sale):", customer)
     if customer and customer.get('email'):
         subject = f"Sale Confirmation for {customer['name']}"
@@ -1545,10 +1807,38 @@ def edit_sale(sale_id):
     if not customer_id:
         print("[DEBUG] customer_id missing in request data (sales):", data)
         return jsonify({'success': False, 'error': 'customer_id is required'}), 400
-    query = "UPDATE sales SET date=%s, customer_id=%s, product=%s, quantity=%s, amount=%s WHERE id=%s"
-    db.execute_query(query, (data['date'], customer_id, data.get('product'), data.get('quantity'), data['amount'], sale_id))
+    try:
+        sales_analytics.check_sale({**data, 'customer_id': customer_id})
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    with db.transaction():
+        previous = db.fetch_one("SELECT date, customer_id, product, quantity, amount FROM sales WHERE id=%s FOR UPDATE", (sale_id,))
+        query = "UPDATE sales SET date=%s, customer_id=%s, product=%s, quantity=%s, amount=%s WHERE id=%s"
+        db.execute_query(query, (data['date'], customer_id, data.get('product'), data.get('quantity'), data['amount'], sale_id))
+        if previous:
+            # Retract the old version before adding the new one
+            sales_analytics.apply_sale(db, previous, sign=-1)
+            sales_analytics.apply_sale(db, {**data, 'customer_id': customer_id})
     return jsonify({'success': True})
 
+@app.route('/api/sales/analytics', methods=['GET'])
+@login_required
+def get_sales_analytics():
+    """Revenue and quantity by any of customer, product, day, week, month"""
+    group_by = [g.strip() for g in request.args.get('group_by', 'month').split(',') if g.strip()]
+    try:
+        groups = sales_analytics.sales_summary(
+            db, group_by, date_from=request.args.get('from'), date_to=request.args.get('to'))
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify({'success': True, 'group_by': group_by, 'groups': groups})
+
+@app.route('/api/sales/analytics/feedback', methods=['GET'])
+@login_required
+def get_feedback_analytics():
+    """Average feedback rating per customer"""
+    return jsonify({'success': True, 'customers': sales_analytics.feedback_summary(db)})
+
 # --- Deliveries CRUD ---
 @app.route('/api/deliveries', methods=['GET'])
 @login_required
@@ -1593,15 +1883,20 @@ def edit_delivery(delivery_id):
     if not customer_id:
         print("[DEBUG] customer_id missing in request data:", data)
         return jsonify({'success': False, 'error': 'customer_id is required'}), 400
-    # Fetch previous status
-    prev = db.fetch_one("SELECT status FROM deliveries WHERE id=%s", (delivery_id,))
-    prev_status = prev['status'] if prev else None
-    query = "UPDATE deliveries SET date=%s, customer_id=%s, product=%s, quantity=%s, status=%s, notes=%s WHERE id=%s"
-    db.execute_query(query, (data['date'], customer_id, data.get('product'), data.get('quantity'), data['status'], data.get('notes'), delivery_id))
-    print("[DEBUG] Delivery status received:", data['status'])
+    newly_delivered = False
+    customer = None
+    with db.transaction():
+        # Fetch previous status, locking the row so two edits cannot both send the email
+        prev = db.fetch_one("SELECT status FROM deliveries WHERE id=%s FOR UPDATE", (delivery_id,))
+        prev_status = prev['status'] if prev else None
+        query = "UPDATE deliveries SET date=%s, customer_id=%s, product=%s, quantity=%s, status=%s, notes=%s WHERE id=%s"
+        db.execute_query(query, (data['date'], customer_id, data.get('product'), data.get('quantity'), data['status'], data.get('notes'), delivery_id))
+        print("[DEBUG] Delivery status received:", data['status'])
+        newly_delivered = data['status'].strip().lower() == 'delivered' and (not prev_status or prev_status.strip().lower() != 'delivered')
+        if newly_delivered:
+            customer = db.fetch_one("SELECT name, email, address FROM customers WHERE id=%s", (customer_id,))
     # Send email if status is Delivered and was not previously Delivered
-    if data['status'].strip().lower() == 'delivered' and (not prev_status or prev_status.strip().lower() != 'delivered'):
-        customer = db.fetch_one("SELECT name, email, address FROM customers WHERE id=%s", (customer_id,))
+    if newly_delivered:
         print("[DEBUG] Customer fetched from DB:", customer)
         if customer and customer.get('email'):
             subject = f"Delivery Confirmation for {customer['name']}"
@@ -1628,16 +1923,31 @@ def get_feedback():
 @login_required
 def add_feedback():
     data = request.get_json()
-    query = "INSERT INTO customer_feedback (date, customer_id, feedback, rating) VALUES (%s, %s, %s, %s)"
-    feedback_id = db.execute_query(query, (data['date'], data['customer_id'], data['feedback'], data['rating']))
+    try:
+        sales_analytics.check_feedback(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    with db.transaction():
+        query = "INSERT INTO customer_feedback (date, customer_id, feedback, rating) VALUES (%s, %s, %s, %s)"
+        feedback_id = db.execute_query(query, (data['date'], data['customer_id'], data['feedback'], data['rating']))
+        sales_analytics.apply_feedback(db, data)
     return jsonify({'success': True, 'id': feedback_id})
 
 @app.route('/api/feedback/<int:feedback_id>', methods=['PUT'])
 @login_required
 def edit_feedback(feedback_id):
     data = request.get_json()
-    query = "UPDATE customer_feedback SET date=%s, customer_id=%s, feedback=%s, rating=%s WHERE id=%s"
-    db.execute_query(query, (data['date'], data['customer_id'], data['feedback'], data['rating'], feedback_id))
+    try:
+        sales_analytics.check_feedback(data)
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    with db.transaction():
+        previous = db.fetch_one("SELECT customer_id, rating FROM customer_feedback WHERE id=%s FOR UPDATE", (feedback_id,))
+        query = "UPDATE customer_feedback SET date=%s, customer_id=%s, feedback=%s, rating=%s WHERE id=%s"
+        db.execute_query(query, (data['date'], data['customer_id'], data['feedback'], data['rating'], feedback_id))
+        if previous:
+            sales_analytics.apply_feedback(db, previous, sign=-1)
+            sales_analytics.apply_feedback(db, data)
     return jsonify({'success': True})
 
 @app.errorhandler(400)
@@ -1667,53 +1977,39 @@ def handle_general_exception(e):
     logger.error(f"An unhandled exception occurred: {e}")
     return jsonify(error="An unexpected error occurred", success=False), 500
 
-def send_email(subject, body, to_emails):
-    print(f"[DEBUG] Preparing to send email to: {to_emails}")
-    msg = MIMEMultipart()
-    msg['From'] = EMAIL_HOST_USER
-    msg['To'] = ', '.join(to_emails) if isinstance(to_emails, list) else to_emails
-    msg['Subject'] = subject
-    msg.attach(MIMEText(body, 'plain'))
-    try:
-        server = smtplib.SMTP(EMAIL_HOST, EMAIL_PORT)
-        server.starttls()
-        server.login(EMAIL_HOST_USER, EMAIL_HOST_PASSWORD)
-        print("[DEBUG] Logged in to SMTP server.")
-        server.sendmail(EMAIL_HOST_USER, to_emails, msg.as_string())
-        print("[DEBUG] Email sent successfully.")
-        server.quit()
-        logger.info(f"Email sent to {to_emails}")
-    except Exception as e:
-        print(f"[DEBUG] Failed to send email: {e}")
-        logger.error(f"Failed to send email: {e}")
-
 @app.route('/api/send-harvest-report', methods=['POST'])
 @login_required
 def send_harvest_report():
-    # Perform the same analysis as /api/statistics/harvest-efficiency
+    """Queue a harvest report email.
+
+    Without a body only rows added since the last sent report are included;
+    {"from": "YYYY-MM-DD", "to": "YYYY-MM-DD"} reports a date range instead.
+    """
+    data = request.get_json(silent=True) or {}
     try:
-        # Query to get harvest yield data with correct column names
-        query = "SELECT tray_batch_id, harvest_date, larvae_collected_kg, processing_method, storage_temperature_celsius FROM feeding_harvest_yield ORDER BY harvest_date DESC"
-        data = db.fetch_all(query)
-        if not data:
-            summary = "No harvest yield records found."
-        else:
-            summary = f"Harvest Yield Report ({datetime.now().date()}):\n\n"
-            for item in data:
-                summary += (
-                    f"Tray/Batch ID: {item.get('tray_batch_id', '')}, "
-                    f"Date: {item.get('harvest_date', '')}, "
-                    f"Larvae Collected: {item.get('larvae_collected_kg', '')} kg, "
-                    f"Processing Method: {item.get('processing_method', '')}, "
-                    f"Storage Temp: {item.get('storage_temperature_celsius', 'N/A')}°C\n"
-                )
-        subject = f"Harvest Yield Report ({datetime.now().date()})"
-        send_email(subject, summary, ADMIN_EMAIL)
-        return jsonify({'success': True, 'message': 'Harvest report sent to admin.'})
+        date_from = datetime.strptime(data['from'], '%Y-%m-%d').date() if data.get('from') else None
+        date_to = datetime.strptime(data['to'], '%Y-%m-%d').date() if data.get('to') else None
+    except ValueError:
+        return jsonify({'success': False, 'message': 'Invalid date format. Please use YYYY-MM-DD.'}), 400
+    try:
+        run_id = queue_harvest_report(current_user.id, date_from, date_to)
+        return jsonify({'success': True, 'run_id': run_id, 'message': 'Harvest report queued for admin.'}), 202
+    except HarvestReportQueueFull as e:
+        response = jsonify({'success': False, 'message': 'Other harvest reports are still being prepared, please retry later'})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
     except Exception as e:
-        print(f"[DEBUG] Failed to send harvest report: {e}")
+        logger.error(f"Failed to queue harvest report: {e}")
         return jsonify({'success': False, 'error': str(e)}), 500
 
+@app.route('/api/harvest-reports/<int:run_id>', methods=['GET'])
+@login_required
+def get_harvest_report_run(run_id):
+    run = get_harvest_report(run_id)
+    if not run:
+        return jsonify({'success': False, 'message': 'Report not found'}), 404
+    return jsonify({'success': True, 'run': run})
+
 if __name__ == '__main__':
     # It's recommended to use a production-ready WSGI server like Gunicorn or Waitress
     # For development, Flask's built-in server is fine.
@@ -0,0 +1,736 @@
+"""Parallel logical backup and restore of the farm database.
+
+Usage:
+    python backup.py dump DIR [--workers 4] [--chunk-rows 100000] [--tables a,b]
+    python backup.py verify DIR
+    python backup.py restore DIR --yes [--workers 4]
+    python backup.py import-legacy bsf_farm.sql --yes [--workers 4]
+    python backup.py transcode bsf_farm.sql bsf_farm.utf8.sql.gz
+
+``dump`` writes every table as gzipped tab-separated chunks (LOAD DATA
+format) split on primary key ranges, so one large table is spread over the
+workers too. All workers read the same point in time: tables are locked
+with FLUSH TABLES WITH READ LOCK just long enough for each worker to open a
+consistent-snapshot transaction. ``manifest.json`` holds the table
+definitions, triggers and views, and every chunk with its row count and
+SHA-256.
+
+``restore`` creates the tables with their primary keys only, loads the
+chunks in parallel with LOAD DATA LOCAL INFILE (multi-row INSERTs when the
+server refuses local files), then adds secondary indexes, foreign keys,
+views and triggers. Triggers come last so loading does not fire them.
+
+``import-legacy`` replays an old mysqldump file such as bsf_farm.sql,
+decoding UTF-16 (as written by mysqldump on Windows) or UTF-8 while
+reading, with the INSERT statements spread over the worker connections
+and indexes deferred the same way. ``transcode`` only rewrites such a file
+as UTF-8 for the mysql client.
+"""
+import argparse
+import gzip
+import hashlib
+import io
+import json
+import logging
+import math
+import os
+import queue
+import re
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import mysql.connector
+from mysql.connector import errorcode
+
+from config import DB_CONFIG
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+MANIFEST = 'manifest.json'
+FORMAT_VERSION = 1
+FETCH_SIZE = 5000
+INSERT_BATCH = 1000
+COMPRESS_LEVEL = 3
+
+DUMP_SESSION = ("SET NAMES utf8mb4", "SET time_zone = '+00:00'")
+LOAD_SESSION = DUMP_SESSION + (
+    "SET SESSION sql_mode = 'NO_AUTO_VALUE_ON_ZERO'",
+    "SET SESSION foreign_key_checks = 0",
+    "SET SESSION unique_checks = 0",
+)
+
+INTEGER_TYPES = {'tinyint', 'smallint', 'mediumint', 'int', 'bigint'}
+# Written as hex and loaded through UNHEX() so the chunks stay valid UTF-8
+BINARY_TYPES = {'binary', 'varbinary', 'tinyblob', 'blob', 'mediumblob', 'longblob', 'bit',
+                'geometry', 'point', 'linestring', 'polygon'}
+# Errors meaning the server or client does not allow LOAD DATA LOCAL INFILE
+LOCAL_INFILE_ERRNOS = {errorcode.ER_NOT_ALLOWED_COMMAND, 3948, 2068}
+
+DEFERRED_DEFINITION = re.compile(r'^(UNIQUE KEY|KEY|FULLTEXT KEY|SPATIAL KEY|CONSTRAINT `[^`]+` FOREIGN KEY)\b')
+DEFINER = re.compile(r'\s*DEFINER=`[^`]*`@`[^`]*`')
+UNESCAPE = re.compile(rb'\\(.)', re.DOTALL)
+UNESCAPED = {b'0': b'\0', b'n': b'\n', b't': b'\t', b'r': b'\r', b'Z': b'\x1a', b'N': b'\\N'}
+
+
+class BackupError(Exception):
+    pass
+
+
+def connect(session=LOAD_SESSION):
+    conn = mysql.connector.connect(**DB_CONFIG, allow_local_infile=True)
+    cursor = conn.cursor()
+    for statement in session:
+        cursor.execute(statement)
+    cursor.close()
+    return conn
+
+
+def quote(name):
+    return '`' + name.replace('`', '``') + '`'
+
+
+# --- Table definitions ---
+
+def split_create(create):
+    """Split SHOW CREATE TABLE output into the table with its primary key only
+    and the definitions added after loading.
+
+    Returns (create_sql, indexes, fulltext, foreign_keys). A secondary key
+    stays in place when it is the only index on the AUTO_INCREMENT column,
+    which MySQL requires.
+    """
+    lines = create.split('\n')
+    end = next(i for i in range(1, len(lines)) if lines[i].startswith(')'))
+    definitions = [line.strip().rstrip(',') for line in lines[1:end]]
+    auto_column = next((d.split('`')[1] for d in definitions
+                        if d.startswith('`') and ' AUTO_INCREMENT' in d), None)
+    primary = next((d for d in definitions if d.startswith('PRIMARY KEY')), '')
+    auto_indexed = auto_column is None or primary.startswith(f'PRIMARY KEY (`{auto_column}`')
+
+    kept, indexes, fulltext, foreign_keys = [], [], [], []
+    for definition in definitions:
+        if not DEFERRED_DEFINITION.match(definition):
+            kept.append(definition)
+        elif ' FOREIGN KEY ' in definition:
+            foreign_keys.append(definition)
+        elif not auto_indexed and f'(`{auto_column}`' in definition:
+            kept.append(definition)
+            auto_indexed = True
+        elif definition.startswith(('FULLTEXT', 'SPATIAL')):
+            fulltext.append(definition)
+        else:
+            indexes.append(definition)
+    body = ',\n  '.join(kept)
+    create_sql = f"{lines[0]}\n  {body}\n" + '\n'.join(lines[end:])
+    return create_sql, indexes, fulltext, foreign_keys
+
+
+def add_indexes(conn, table, indexes, fulltext):
+    """Build the deferred secondary indexes: one ALTER for the B-tree ones,
+    one per FULLTEXT index since InnoDB builds those one at a time."""
+    cursor = conn.cursor()
+    try:
+        if indexes:
+            cursor.execute(f"ALTER TABLE {quote(table)} " + ', '.join(f"ADD {d}" for d in indexes))
+        for definition in fulltext:
+            cursor.execute(f"ALTER TABLE {quote(table)} ADD {definition}")
+    finally:
+        cursor.close()
+    return table
+
+
+def _finish_tables(pool, main, deferred):
+    """Indexes in parallel, then foreign keys, once every row is loaded."""
+    started = time.time()
+    for table, (_, indexes, fulltext, _) in deferred.items():
+        if indexes or fulltext:
+            pool.submit(add_indexes, table, indexes, fulltext)
+    pool.wait()
+    cursor = main.cursor()
+    for table, (_, _, _, foreign_keys) in deferred.items():
+        if foreign_keys:
+            # foreign_key_checks = 0, so existing rows are not re-validated
+            cursor.execute(f"ALTER TABLE {quote(table)} " + ', '.join(f"ADD {d}" for d in foreign_keys))
+    cursor.close()
+    logger.info(f"Indexes and foreign keys added in {time.time() - started:.1f}s")
+
+
+# --- Worker pool ---
+
+class LoadPool:
+    """Threads with one loading connection each and a bound on queued work."""
+
+    def __init__(self, workers):
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='backup')
+        self._slots = threading.BoundedSemaphore(workers * 2)
+        self._futures = []
+        self._results = []
+        self._error = None
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = connect()
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def _call(self, fn, args):
+        try:
+            result = fn(self._connection(), *args)
+            self._local.conn.commit()
+            with self._lock:
+                self._results.append(result)
+        except Exception as e:
+            self._error = self._error or e
+            raise
+        finally:
+            self._slots.release()
+
+    def submit(self, fn, *args):
+        """Queue fn(connection, *args); blocks while the workers are saturated."""
+        self._slots.acquire()
+        if self._error is not None:
+            self._slots.release()
+            raise self._error
+        if len(self._futures) >= 1000:
+            self._futures = [f for f in self._futures if not f.done() or f.exception()]
+        self._futures.append(self._executor.submit(self._call, fn, args))
+
+    def wait(self):
+        """Results of everything queued since the last wait; raises the first error."""
+        for future in self._futures:
+            future.result()
+        with self._lock:
+            results, self._results, self._futures = self._results, [], []
+        return results
+
+    def close(self):
+        self._executor.shutdown(wait=True)
+        for conn in self._connections:
+            try:
+                conn.close()
+            except mysql.connector.Error:
+                pass
+
+
+# --- Dump ---
+
+class _HashingFile:
+    """File wrapper that hashes and counts the bytes written through it."""
+
+    def __init__(self, fileobj):
+        self.fileobj = fileobj
+        self.sha256 = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.size += len(data)
+        return self.fileobj.write(data)
+
+    def flush(self):
+        self.fileobj.flush()
+
+
+def _escape(value):
+    if value is None:
+        return b'\\N'
+    return (bytes(value).replace(b'\\', b'\\\\').replace(b'\t', b'\\t').replace(b'\n', b'\\n')
+            .replace(b'\r', b'\\r').replace(b'\0', b'\\0'))
+
+
+def _table_info(cursor, table):
+    cursor.execute("""
+        SELECT COLUMN_NAME, DATA_TYPE, GENERATION_EXPRESSION FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s ORDER BY ORDINAL_POSITION
+    """, (table,))
+    # Generated columns are recomputed by the server. EXTRA cannot tell them
+    # apart: MySQL 8 also marks DEFAULT CURRENT_TIMESTAMP as DEFAULT_GENERATED
+    columns = [(name, data_type) for name, data_type, expression in cursor.fetchall()
+               if not expression]
+    cursor.execute("""
+        SELECT k.COLUMN_NAME, c.DATA_TYPE FROM information_schema.KEY_COLUMN_USAGE k
+        JOIN information_schema.COLUMNS c
+          ON c.TABLE_SCHEMA = k.TABLE_SCHEMA AND c.TABLE_NAME = k.TABLE_NAME AND c.COLUMN_NAME = k.COLUMN_NAME
+        WHERE k.TABLE_SCHEMA = DATABASE() AND k.TABLE_NAME = %s AND k.CONSTRAINT_NAME = 'PRIMARY'
+        ORDER BY k.ORDINAL_POSITION
+    """, (table,))
+    primary_key = cursor.fetchall()
+    cursor.execute(f"SHOW CREATE TABLE {quote(table)}")
+    return {
+        'create': cursor.fetchone()[1],
+        'columns': [name for name, _ in columns],
+        'hex_columns': [name for name, data_type in columns if data_type in BINARY_TYPES],
+        'order_by': [name for name, _ in primary_key],
+        'range_key': primary_key[0][0] if len(primary_key) >= 1 and primary_key[0][1] in INTEGER_TYPES else None,
+    }
+
+
+def _plan_chunks(cursor, table, info, estimated_rows, chunk_rows):
+    """(low, high) primary key ranges of about chunk_rows rows each; open-ended at both ends."""
+    key = info['range_key']
+    chunks = max(1, math.ceil((estimated_rows or 0) / chunk_rows))
+    if key is None or chunks == 1:
+        return [(None, None)]
+    cursor.execute(f"SELECT MIN({quote(key)}), MAX({quote(key)}) FROM {quote(table)}")
+    low, high = cursor.fetchone()
+    if low is None:
+        return [(None, None)]
+    step = max(1, math.ceil((high - low + 1) / chunks))
+    bounds = list(range(low + step, high + 1, step))
+    return list(zip([None] + bounds, bounds + [None]))
+
+
+def _dump_chunk(conn, directory, table, info, number, low, high):
+    key = info['range_key']
+    where, params = [], []
+    if low is not None:
+        where.append(f"{quote(key)} >= %s")
+        params.append(low)
+    if high is not None:
+        where.append(f"{quote(key)} < %s")
+        params.append(high)
+    select = ', '.join(f"HEX({quote(c)})" if c in info['hex_columns'] else quote(c) for c in info['columns'])
+    sql = f"SELECT {select} FROM {quote(table)}"
+    if where:
+        sql += " WHERE " + ' AND '.join(where)
+    if info['order_by']:
+        sql += " ORDER BY " + ', '.join(quote(c) for c in info['order_by'])
+
+    filename = f"{table}.{number:05d}.tsv.gz"
+    rows = 0
+    cursor = conn.cursor(raw=True)
+    try:
+        cursor.execute(sql, tuple(params))
+        with open(os.path.join(directory, filename), 'wb') as raw_file:
+            hashed = _HashingFile(raw_file)
+            with gzip.GzipFile(fileobj=hashed, mode='wb', compresslevel=COMPRESS_LEVEL) as out:
+                while True:
+                    batch = cursor.fetchmany(FETCH_SIZE)
+                    if not batch:
+                        break
+                    out.write(b''.join(b'\t'.join(_escape(v) for v in row) + b'\n' for row in batch))
+                    rows += len(batch)
+    finally:
+        cursor.close()
+    return table, {'file': filename, 'rows': rows, 'sha256': hashed.sha256.hexdigest(), 'bytes': hashed.size}
+
+
+def _open_snapshots(workers):
+    """Worker connections that all see the same committed data.
+
+    Returns (connections, consistent, binlog position).
+    """
+    coordinator = connect(DUMP_SESSION)
+    cursor = coordinator.cursor()
+    consistent = True
+    try:
+        cursor.execute("FLUSH TABLES WITH READ LOCK")
+    except mysql.connector.Error as e:
+        # Needs the RELOAD privilege; without it each worker snapshot stands alone
+        logger.warning(f"Could not lock tables for a consistent snapshot ({e}); "
+                       f"tables dumped by different workers may differ in time")
+        consistent = False
+    connections = []
+    try:
+        for _ in range(workers + 1):
+            conn = connect(DUMP_SESSION)
+            snapshot = conn.cursor()
+            snapshot.execute("SET SESSION TRANSACTION ISOLATION LEVEL REPEATABLE READ")
+            snapshot.execute("START TRANSACTION WITH CONSISTENT SNAPSHOT")
+            snapshot.close()
+            connections.append(conn)
+        binlog = None
+        for statement in ("SHOW BINARY LOG STATUS", "SHOW MASTER STATUS"):
+            try:
+                cursor.execute(statement)
+                row = cursor.fetchone()
+                binlog = {'file': row[0], 'position': row[1]} if row else None
+                break
+            except mysql.connector.Error:
+                continue
+    finally:
+        if consistent:
+            cursor.execute("UNLOCK TABLES")
+        cursor.close()
+        coordinator.close()
+    return connections, consistent, binlog
+
+
+def dump(directory, workers=4, chunk_rows=100000, tables=None):
+    started = time.time()
+    os.makedirs(directory, exist_ok=True)
+    connections, consistent, binlog = _open_snapshots(workers)
+    planner = connections.pop()
+    try:
+        cursor = planner.cursor()
+        cursor.execute("""
+            SELECT TABLE_NAME, TABLE_TYPE, TABLE_ROWS FROM information_schema.TABLES
+            WHERE TABLE_SCHEMA = DATABASE() ORDER BY TABLE_NAME
+        """)
+        listing = cursor.fetchall()
+        wanted = set(tables) if tables else None
+        manifest = {
+            'format': FORMAT_VERSION,
+            'database': DB_CONFIG['database'],
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'consistent': consistent,
+            'binlog': binlog,
+            'tables': {},
+            'views': [],
+            'triggers': [],
+        }
+        work = []
+        for name, table_type, estimated_rows in listing:
+            if wanted is not None and name not in wanted:
+                continue
+            if table_type == 'VIEW':
+                cursor.execute(f"SHOW CREATE VIEW {quote(name)}")
+                manifest['views'].append({'name': name, 'create': DEFINER.sub('', cursor.fetchone()[1])})
+                continue
+            info = _table_info(cursor, name)
+            info['chunks'] = []
+            manifest['tables'][name] = info
+            for number, (low, high) in enumerate(_plan_chunks(cursor, name, info, estimated_rows, chunk_rows)):
+                work.append((estimated_rows or 0, (name, info, number, low, high)))
+        cursor.execute("SELECT TRIGGER_NAME, EVENT_OBJECT_TABLE FROM information_schema.TRIGGERS "
+                       "WHERE TRIGGER_SCHEMA = DATABASE() ORDER BY TRIGGER_NAME")
+        for trigger, table in cursor.fetchall():
+            if table in manifest['tables']:
+                cursor.execute(f"SHOW CREATE TRIGGER {quote(trigger)}")
+                manifest['triggers'].append({'name': trigger, 'create': DEFINER.sub('', cursor.fetchone()[2])})
+        cursor.close()
+    finally:
+        planner.close()
+
+    # Biggest tables first so their chunks do not all start last
+    work = [unit for _, unit in sorted(work, key=lambda item: -item[0])]
+    available = queue.Queue()
+    for conn in connections:
+        available.put(conn)
+
+    def run(unit):
+        conn = available.get()
+        try:
+            return _dump_chunk(conn, directory, *unit)
+        finally:
+            available.put(conn)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='dump') as executor:
+            for table, chunk in executor.map(run, work):
+                manifest['tables'][table]['chunks'].append(chunk)
+    finally:
+        for conn in connections:
+            conn.close()
+
+    for info in manifest['tables'].values():
+        info['rows'] = sum(chunk['rows'] for chunk in info['chunks'])
+    with open(os.path.join(directory, MANIFEST), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1)
+    total = sum(info['rows'] for info in manifest['tables'].values())
+    logger.info(f"Dumped {len(manifest['tables'])} tables, {total} rows in {len(work)} chunks "
+                f"to {directory} in {time.time() - started:.1f}s")
+    return manifest
+
+
+# --- Verify and restore ---
+
+def load_manifest(directory):
+    with open(os.path.join(directory, MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest.get('format') != FORMAT_VERSION:
+        raise BackupError(f"Unsupported backup format {manifest.get('format')}")
+    return manifest
+
+
+def _check_chunk(directory, chunk):
+    path = os.path.join(directory, chunk['file'])
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    if digest.hexdigest() != chunk['sha256']:
+        raise BackupError(f"Checksum mismatch for {chunk['file']}")
+    return path
+
+
+def verify(directory):
+    manifest = load_manifest(directory)
+    chunks = [chunk for info in manifest['tables'].values() for chunk in info['chunks']]
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda chunk: _check_chunk(directory, chunk), chunks))
+    logger.info(f"{len(chunks)} chunks match the manifest")
+
+
+def _unescape(field):
+    if field == b'\\N':
+        return None
+    return UNESCAPE.sub(lambda m: UNESCAPED.get(m.group(1), m.group(1)), field)
+
+
+def _from_hex(value):
+    # HEX() of a BIT value can have an odd number of digits
+    digits = value.decode('ascii')
+    return bytes.fromhex(digits.rjust(len(digits) + len(digits) % 2, '0'))
+
+
+def _insert_chunk(conn, table, info, path):
+    columns = info['columns']
+    hex_columns = {i for i, c in enumerate(columns) if c in info['hex_columns']}
+    sql = (f"INSERT INTO {quote(table)} ({', '.join(quote(c) for c in columns)}) "
+           f"VALUES ({', '.join(['%s'] * len(columns))})")
+    cursor = conn.cursor()
+    try:
+        batch = []
+        with gzip.open(path, 'rb') as f:
+            for line in f:
+                values = []
+                for i, field in enumerate(line.rstrip(b'\n').split(b'\t')):
+                    value = _unescape(field)
+                    if value is not None:
+                        value = _from_hex(value) if i in hex_columns else value.decode('utf-8')
+                    values.append(value)
+                batch.append(tuple(values))
+                if len(batch) >= INSERT_BATCH:
+                    cursor.executemany(sql, batch)
+                    batch = []
+        if batch:
+            cursor.executemany(sql, batch)
+    finally:
+        cursor.close()
+
+
+_local_infile = {'allowed': True}
+
+
+def _load_chunk(conn, directory, table, info, chunk):
+    path = _check_chunk(directory, chunk)
+    if _local_infile['allowed']:
+        columns, assignments = [], []
+        for column in info['columns']:
+            if column in info['hex_columns']:
+                columns.append(f"@{column}")
+                assignments.append(f"{quote(column)} = UNHEX(@{column})")
+            else:
+                columns.append(quote(column))
+        sql = (f"LOAD DATA LOCAL INFILE %s INTO TABLE {quote(table)} CHARACTER SET utf8mb4 "
+               f"({', '.join(columns)})")
+        if assignments:
+            sql += " SET " + ', '.join(assignments)
+        with tempfile.NamedTemporaryFile(suffix='.tsv', delete=False) as plain:
+            with gzip.open(path, 'rb') as compressed:
+                for block in iter(lambda: compressed.read(1024 * 1024), b''):
+                    plain.write(block)
+        cursor = conn.cursor()
+        try:
+            cursor.execute(sql, (plain.name,))
+            return chunk['rows']
+        except mysql.connector.Error as e:
+            if e.errno not in LOCAL_INFILE_ERRNOS:
+                raise
+            logger.warning(f"LOAD DATA LOCAL INFILE is not allowed ({e}); loading with INSERT")
+            _local_infile['allowed'] = False
+            conn.rollback()
+        finally:
+            cursor.close()
+            os.unlink(plain.name)
+    _insert_chunk(conn, table, info, path)
+    return chunk['rows']
+
+
+def _drop_views(cursor, views):
+    for view in views:
+        cursor.execute(f"DROP VIEW IF EXISTS {quote(view['name'])}")
+
+
+def _create_post_objects(cursor, manifest):
+    for view in manifest['views']:
+        cursor.execute(view['create'])
+    for trigger in manifest['triggers']:
+        cursor.execute(f"DROP TRIGGER IF EXISTS {quote(trigger['name'])}")
+        cursor.execute(trigger['create'])
+
+
+def restore(directory, workers=4):
+    """Replace the tables in the backup with its contents."""
+    started = time.time()
+    manifest = load_manifest(directory)
+    main = connect()
+    pool = LoadPool(workers)
+    try:
+        cursor = main.cursor()
+        _drop_views(cursor, manifest['views'])
+        deferred = {}
+        for table, info in manifest['tables'].items():
+            deferred[table] = split_create(info['create'])
+            cursor.execute(f"DROP TABLE IF EXISTS {quote(table)}")
+            cursor.execute(deferred[table][0])
+        cursor.close()
+
+        chunks = sorted(((table, info, chunk) for table, info in manifest['tables'].items()
+                         for chunk in info['chunks']), key=lambda item: -item[2]['bytes'])
+        for table, info, chunk in chunks:
+            pool.submit(_load_chunk, directory, table, info, chunk)
+        rows = sum(pool.wait())
+        logger.info(f"Loaded {rows} rows from {len(chunks)} chunks in {time.time() - started:.1f}s")
+
+        _finish_tables(pool, main, deferred)
+        cursor = main.cursor()
+        _create_post_objects(cursor, manifest)
+        cursor.close()
+        main.commit()
+    finally:
+        pool.close()
+        main.close()
+    logger.info(f"Restored {len(manifest['tables'])} tables from {directory} in {time.time() - started:.1f}s")
+
+
+# --- Legacy mysqldump files ---
+
+def open_text(path):
+    """Text stream over a dump file, UTF-16 (with or without BOM) or UTF-8."""
+    raw = open(path, 'rb')
+    head = raw.read(4)
+    raw.seek(0)
+    if head[:2] in (b'\xff\xfe', b'\xfe\xff'):
+        encoding = 'utf-16'
+    elif head[:3] == b'\xef\xbb\xbf':
+        encoding = 'utf-8-sig'
+    elif len(head) >= 2 and head[1:2] == b'\x00':
+        encoding = 'utf-16-le'
+    elif len(head) >= 2 and head[0:1] == b'\x00':
+        encoding = 'utf-16-be'
+    else:
+        encoding = 'utf-8'
+    return io.TextIOWrapper(raw, encoding=encoding, newline=None)
+
+
+def dump_statements(text):
+    """Statements of a mysqldump file, honouring DELIMITER changes."""
+    delimiter, lines = ';', []
+    for line in text:
+        line = line.rstrip('\n')
+        if not lines:
+            stripped = line.strip()
+            if not stripped or stripped.startswith('--'):
+                continue
+            if stripped.upper().startswith('DELIMITER '):
+                delimiter = stripped.split(None, 1)[1]
+                continue
+        lines.append(line)
+        if line.rstrip().endswith(delimiter):
+            statement = '\n'.join(lines).rstrip()
+            lines = []
+            yield statement[:-len(delimiter)].rstrip()
+    if lines:
+        yield '\n'.join(lines)
+
+
+def _execute(conn, statement):
+    cursor = conn.cursor()
+    try:
+        cursor.execute(statement)
+    finally:
+        cursor.close()
+
+
+def import_legacy(path, workers=4):
+    """Replay a mysqldump file with INSERTs on the workers and indexes deferred."""
+    started = time.time()
+    main = connect()
+    pool = LoadPool(workers)
+    deferred, triggers = {}, []
+    inserts = 0
+    try:
+        with open_text(path) as text:
+            for statement in dump_statements(text):
+                head = statement.lstrip()[:120].upper()
+                if head.startswith(('LOCK TABLES', 'UNLOCK TABLES', '/*!40000 ALTER TABLE')):
+                    # Table locks would block the worker connections; DISABLE KEYS is MyISAM only
+                    continue
+                if head.startswith('INSERT'):
+                    pool.submit(_execute, statement)
+                    inserts += 1
+                elif 'TRIGGER' in head and 'CREATE' in head:
+                    triggers.append(DEFINER.sub('', statement))
+                elif head.startswith('CREATE TABLE'):
+                    table = statement.split('`')[1]
+                    deferred[table] = split_create(statement)
+                    _execute(main, deferred[table][0])
+                else:
+                    # Definers of views and routines may not exist on this server
+                    _execute(main, DEFINER.sub('', statement) if 'DEFINER' in head else statement)
+        pool.wait()
+        logger.info(f"Replayed {inserts} INSERT statements in {time.time() - started:.1f}s")
+        _finish_tables(pool, main, deferred)
+        for statement in triggers:
+            _execute(main, statement)
+        main.commit()
+    finally:
+        pool.close()
+        main.close()
+    logger.info(f"Imported {path} ({len(deferred)} tables) in {time.time() - started:.1f}s")
+
+
+def transcode(path, out_path):
+    """Rewrite a dump as UTF-8, gzipped when out_path ends in .gz."""
+    opener = gzip.open if out_path.endswith('.gz') else open
+    with open_text(path) as text, opener(out_path, 'wt', encoding='utf-8', newline='\n') as out:
+        for line in text:
+            out.write(line)
+    logger.info(f"Wrote {out_path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_dump = sub.add_parser('dump')
+    p_dump.add_argument('directory')
+    p_dump.add_argument('--chunk-rows', type=int, default=100000)
+    p_dump.add_argument('--tables', help='comma-separated table names (default: all)')
+    p_verify = sub.add_parser('verify')
+    p_verify.add_argument('directory')
+    p_restore = sub.add_parser('restore')
+    p_restore.add_argument('directory')
+    p_legacy = sub.add_parser('import-legacy')
+    p_legacy.add_argument('path')
+    p_transcode = sub.add_parser('transcode')
+    p_transcode.add_argument('path')
+    p_transcode.add_argument('out_path')
+    for p in (p_dump, p_restore, p_legacy):
+        p.add_argument('--workers', type=int, default=4)
+    for p in (p_restore, p_legacy):
+        p.add_argument('--yes', action='store_true', help=f"replace existing tables in {DB_CONFIG['database']}")
+    args = parser.parse_args(argv)
+
+    if args.command in ('restore', 'import-legacy') and not args.yes:
+        parser.error(f"{args.command} drops and recreates tables in {DB_CONFIG['database']}; pass --yes to continue")
+    if args.command == 'dump':
+        tables = [t.strip() for t in args.tables.split(',')] if args.tables else None
+        dump(args.directory, workers=args.workers, chunk_rows=args.chunk_rows, tables=tables)
+    elif args.command == 'verify':
+        verify(args.directory)
+    elif args.command == 'restore':
+        restore(args.directory, workers=args.workers)
+    elif args.command == 'import-legacy':
+        import_legacy(args.path, workers=args.workers)
+    elif args.command == 'transcode':
+        transcode(args.path, args.out_path)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except (BackupError, mysql.connector.Error, OSError) as e:
+        logger.error(f"Backup command failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,130 @@
+"""Several read-only API calls in one round trip.
+
+``POST /api/batch`` takes
+
+    {"requests": [{"id": "sales", "path": "/api/sales"},
+                  {"id": "day", "path": "/api/records", "params": {"date": "2024-05-01", "section": "all"}}],
+     "parallel": false}
+
+and answers ``{"success": true, "responses": [{"id", "status", "body"}, ...]}``
+in request order. Only the GET endpoints in BATCHABLE_ENDPOINTS can be
+called. Sub-requests run under the batch request's login, so the user is
+loaded once, and share its request-scoped connection. With ``parallel``
+they are spread over up to BATCH_MAX_WORKERS threads, each holding one
+connection of its own.
+"""
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit, parse_qsl
+import logging
+
+from flask import Blueprint, request, jsonify, current_app, g
+from flask_login import login_required, current_user
+from werkzeug.exceptions import HTTPException
+
+from config import BATCH_MAX_REQUESTS, BATCH_MAX_WORKERS
+from database import DatabaseConnection
+
+logger = logging.getLogger(__name__)
+
+batch_api = Blueprint('batch_api', __name__)
+db = DatabaseConnection()
+
+# Read-only views that are safe to run side by side
+BATCHABLE_ENDPOINTS = frozenset({
+    'get_customers', 'get_sales', 'get_deliveries', 'get_feedback',
+    'get_sales_analytics', 'get_feedback_analytics',
+    'get_records_by_date_and_section', 'get_dashboard',
+    'get_waste_processing_stats', 'get_environmental_stats', 'get_larval_growth_stats',
+    'get_system_efficiency', 'get_daily_report', 'get_harvest_efficiency',
+    'search_api.search_records', 'anomaly_api.get_alerts', 'lineage_api.get_lineage',
+    'sync_api.get_changes',
+})
+
+
+class BatchError(ValueError):
+    pass
+
+
+def _parse(item):
+    if not isinstance(item, dict) or not isinstance(item.get('path'), str):
+        raise BatchError("each request needs a path")
+    if (item.get('method') or 'GET').upper() != 'GET':
+        raise BatchError("only GET requests can be batched")
+    url = urlsplit(item['path'])
+    if not url.path.startswith('/api/'):
+        raise BatchError(f"{item['path']} is not an API path")
+    params = dict(parse_qsl(url.query))
+    params.update({k: str(v) for k, v in (item.get('params') or {}).items()})
+    return item.get('id'), url.path, params
+
+
+def _dispatch(app, path, params):
+    """Run one whitelisted view in a request context of its own; returns (status, body)."""
+    try:
+        endpoint, view_args = app.url_map.bind('localhost').match(path, method='GET')
+    except HTTPException as e:
+        return e.code or 404, {'success': False, 'message': e.description}
+    if endpoint not in BATCHABLE_ENDPOINTS:
+        return 403, {'success': False, 'message': f"{path} cannot be batched"}
+    with app.test_request_context(path, method='GET', query_string=params):
+        try:
+            response = app.make_response(app.view_functions[endpoint](**view_args))
+        except HTTPException as e:
+            return e.code, {'success': False, 'message': e.description}
+        except Exception as e:
+            logger.error(f"Batched request {path} failed: {e}")
+            return 500, {'success': False, 'message': 'An internal error occurred.'}
+    body = response.get_json(silent=True)
+    return response.status_code, body if body is not None else response.get_data(as_text=True)
+
+
+def _run_chunk(app, user, primary_until, chunk):
+    """Worker thread: one app context and one bound connection for a share of the batch."""
+    with app.app_context():
+        g._login_user = user
+        g.batch_subrequest = True
+        db.begin_request()
+        db.set_primary_until(primary_until)
+        try:
+            return [(index, _dispatch(app, path, params)) for index, path, params in chunk]
+        finally:
+            db.end_request()
+
+
+@batch_api.route('/api/batch', methods=['POST'])
+@login_required
+def run_batch():
+    data = request.get_json(silent=True) or {}
+    items = data.get('requests')
+    if not isinstance(items, list) or not items:
+        return jsonify({'success': False, 'message': 'requests must be a non-empty list'}), 400
+    if len(items) > BATCH_MAX_REQUESTS:
+        return jsonify({'success': False, 'message': f'At most {BATCH_MAX_REQUESTS} requests per batch'}), 400
+    try:
+        parsed = [_parse(item) for item in items]
+    except BatchError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    app = current_app._get_current_object()
+    jobs = [(index, path, params) for index, (_, path, params) in enumerate(parsed)]
+    workers = min(BATCH_MAX_WORKERS, len(jobs)) if data.get('parallel') else 1
+    if workers > 1:
+        chunks = [jobs[i::workers] for i in range(workers)]
+        user = current_user._get_current_object()
+        primary_until = db.get_primary_until()
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='batch') as pool:
+            done = pool.map(lambda chunk: _run_chunk(app, user, primary_until, chunk), chunks)
+            results = dict(pair for chunk_results in done for pair in chunk_results)
+    else:
+        # Sub-request teardown must not release the connection this request holds
+        g.batch_subrequest = True
+        try:
+            results = {index: _dispatch(app, path, params) for index, path, params in jobs}
+        finally:
+            g.batch_subrequest = False
+
+    responses = []
+    for index, (request_id, _, _) in enumerate(parsed):
+        status, body = results[index]
+        responses.append({'id': request_id, 'status': status, 'body': body})
+    return jsonify({'success': True, 'responses': responses})
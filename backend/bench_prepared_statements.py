@@ -0,0 +1,110 @@
+"""Benchmark text-protocol queries against cached server-side prepared statements.
+
+Runs the app's hot statements (user lookup, per-section daily lookups and
+statistics aggregates) the same number of times over one connection in both
+modes and reports wall time, client CPU time and the server counters that
+show how often SQL was parsed.
+
+Usage:
+    python bench_prepared_statements.py [--iterations 2000]
+"""
+import argparse
+import time
+from datetime import date, timedelta
+
+import mysql.connector
+
+from config import DB_CONFIG
+from database import StatementCache
+
+today = date.today()
+HOT_STATEMENTS = [
+    ("SELECT user_id, username, email, password_hash, full_name, last_login, is_active "
+     "FROM users WHERE user_id = %s", (1,)),
+    ("SELECT id FROM customers WHERE customer_key = %s", ('benchmark|bench@example.com|',)),
+    ("SELECT name, email, address FROM customers WHERE id=%s", (1,)),
+    ("SELECT * FROM feeding_harvest_yield WHERE harvest_date >= %s AND harvest_date < %s",
+     (today, today + timedelta(days=1))),
+    ("SELECT SUM(waste_weight) as total FROM waste_sourcing WHERE collection_date >= %s AND collection_date < %s",
+     (today, today + timedelta(days=1))),
+    ("SELECT SUM(larvae_collected_kg) as total_larvae_out FROM feeding_harvest_yield", ()),
+]
+
+SERVER_COUNTERS = ('Com_select', 'Com_stmt_prepare', 'Com_stmt_execute', 'Questions')
+
+
+def server_status(conn):
+    cursor = conn.cursor()
+    cursor.execute("SHOW SESSION STATUS WHERE Variable_name IN (%s, %s, %s, %s)" % tuple(
+        f"'{name}'" for name in SERVER_COUNTERS))
+    values = {name: int(value) for name, value in cursor.fetchall()}
+    cursor.close()
+    return values
+
+
+def server_cpu_seconds(conn):
+    """Total statement CPU time recorded by performance_schema, if available."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT SUM(SUM_CPU_TIME) FROM performance_schema.events_statements_summary_by_thread_by_event_name "
+                       "WHERE THREAD_ID = PS_CURRENT_THREAD_ID()")
+        value = cursor.fetchone()[0]
+        return float(value) / 1e12 if value is not None else None
+    except mysql.connector.Error:
+        return None
+    finally:
+        cursor.close()
+
+
+def run_text(conn, iterations):
+    for _ in range(iterations):
+        for query, params in HOT_STATEMENTS:
+            cursor = conn.cursor(dictionary=True)
+            cursor.execute(query, params or None)
+            cursor.fetchall()
+            cursor.close()
+
+
+def run_prepared(conn, iterations):
+    cache = StatementCache(conn, 64)
+    for _ in range(iterations):
+        for query, params in HOT_STATEMENTS:
+            cursor = cache.get(query, dictionary=True)
+            cursor.execute(query, params)
+            cursor.fetchall()
+    return cache.stats()
+
+
+def measure(label, runner, iterations):
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        before_status, before_cpu = server_status(conn), server_cpu_seconds(conn)
+        wall_start, cpu_start = time.perf_counter(), time.process_time()
+        extra = runner(conn, iterations)
+        wall, cpu = time.perf_counter() - wall_start, time.process_time() - cpu_start
+        after_status, after_cpu = server_status(conn), server_cpu_seconds(conn)
+    finally:
+        conn.close()
+
+    executed = iterations * len(HOT_STATEMENTS)
+    print(f"\n== {label} ({executed} statements) ==")
+    print(f"  wall time:        {wall:.3f}s ({executed / wall:.0f} stmt/s)")
+    print(f"  client CPU:       {cpu:.3f}s")
+    if before_cpu is not None and after_cpu is not None:
+        print(f"  server CPU:       {after_cpu - before_cpu:.3f}s")
+    for name in SERVER_COUNTERS:
+        print(f"  {name + ':':<18}{after_status.get(name, 0) - before_status.get(name, 0)}")
+    if extra:
+        print(f"  cache:            {extra}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--iterations', type=int, default=2000)
+    args = parser.parse_args()
+    measure('text protocol', run_text, args.iterations)
+    measure('prepared + cached', run_prepared, args.iterations)
+
+
+if __name__ == '__main__':
+    main()
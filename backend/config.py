@@ -1,4 +1,5 @@
 import os
+import tempfile
 
 # MySQL Configuration from environment variables
 DB_HOST = os.getenv('DB_HOST', 'localhost')
@@ -14,6 +15,19 @@ DB_CONFIG = {
     'database': DB_NAME,
 }
 
+# Read replicas as a comma-separated list of host[:port]; empty means primary only
+DB_REPLICA_HOSTS = [h.strip() for h in os.getenv('DB_REPLICA_HOSTS', '').split(',') if h.strip()]
+DB_REPLICA_MAX_LAG = float(os.getenv('DB_REPLICA_MAX_LAG', '5'))
+DB_REPLICA_CHECK_INTERVAL = float(os.getenv('DB_REPLICA_CHECK_INTERVAL', '10'))
+# Reads stay on the primary this long after a session writes (read-your-writes)
+DB_STICKY_SECONDS = float(os.getenv('DB_STICKY_SECONDS', '5'))
+# Server-side prepared statements cached per pooled connection
+DB_PREPARED_STATEMENTS = os.getenv('DB_PREPARED_STATEMENTS', 'true').lower() == 'true'
+DB_STATEMENT_CACHE_SIZE = int(os.getenv('DB_STATEMENT_CACHE_SIZE', '64'))
+# Append every distinct statement and its first parameters to this JSON-lines file
+# for index_advisor.py; empty disables the capture
+DB_QUERY_LOG = os.getenv('DB_QUERY_LOG', '')
+
 # API configuration
 API_BASE_URL = os.getenv('API_BASE_URL', 'http://127.0.0.1:5000')
 API_DEBUG = os.getenv('API_DEBUG', 'true').lower() == 'true'
@@ -110,4 +124,89 @@ EMAIL_HOST = os.getenv('EMAIL_HOST', 'smtp.gmail.com')
 EMAIL_PORT = int(os.getenv('EMAIL_PORT', '587'))
 EMAIL_HOST_USER = os.getenv('EMAIL_HOST_USER', '')
 EMAIL_HOST_PASSWORD = os.getenv('EMAIL_HOST_PASSWORD', '')
-ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', '') 
\ No newline at end of file
+ADMIN_EMAIL = os.getenv('ADMIN_EMAIL', '')
+
+# Sensor ingestion settings
+SENSOR_INGEST_TOKEN = os.getenv('SENSOR_INGEST_TOKEN', '')
+SENSOR_TCP_HOST = os.getenv('SENSOR_TCP_HOST', '127.0.0.1')
+SENSOR_TCP_PORT = int(os.getenv('SENSOR_TCP_PORT', '7070'))
+SENSOR_BUFFER_MAX = int(os.getenv('SENSOR_BUFFER_MAX', '20000'))
+SENSOR_FLUSH_BATCH = int(os.getenv('SENSOR_FLUSH_BATCH', '1000'))
+SENSOR_FLUSH_INTERVAL = float(os.getenv('SENSOR_FLUSH_INTERVAL', '1.0'))
+
+# Statistics endpoints only scan this many days back, so partitioned tables are pruned
+STATS_LOOKBACK_DAYS = int(os.getenv('STATS_LOOKBACK_DAYS', '365'))
+
+# Harvest reports attach at most this many rows; the rest go into the next report
+HARVEST_REPORT_MAX_ROWS = int(os.getenv('HARVEST_REPORT_MAX_ROWS', '50000'))
+# Requested reports waiting or running at once; more are refused with 503
+HARVEST_REPORT_MAX_QUEUED = int(os.getenv('HARVEST_REPORT_MAX_QUEUED', '3'))
+
+# Background job scheduler (scheduler.py); one gunicorn worker at a time runs the jobs
+SCHEDULER_ENABLED = os.getenv('SCHEDULER_ENABLED', 'true').lower() == 'true'
+SCHEDULER_LOCK_NAME = os.getenv('SCHEDULER_LOCK_NAME', 'bsf_farm_scheduler')
+SCHEDULER_POLL_INTERVAL = float(os.getenv('SCHEDULER_POLL_INTERVAL', '1.0'))
+SCHEDULER_LEADER_RETRY = float(os.getenv('SCHEDULER_LEADER_RETRY', '15'))
+SCHEDULER_HISTORY_DAYS = int(os.getenv('SCHEDULER_HISTORY_DAYS', '30'))
+# Cron expression for the emailed harvest report; empty disables it
+SCHEDULE_HARVEST_REPORT = os.getenv('SCHEDULE_HARVEST_REPORT', '')
+
+# Larval growth forecasts (forecasting.py)
+FORECAST_ACTIVE_DAYS = int(os.getenv('FORECAST_ACTIVE_DAYS', '60'))
+FORECAST_MAX_AGE_DAYS = int(os.getenv('FORECAST_MAX_AGE_DAYS', '30'))
+FORECAST_DEFAULT_HARVEST_AGE = int(os.getenv('FORECAST_DEFAULT_HARVEST_AGE', '16'))
+
+# Streaming anomaly detection on environmental readings (anomaly_detection.py)
+ANOMALY_ALPHA = float(os.getenv('ANOMALY_ALPHA', '0.05'))
+ANOMALY_FAST_ALPHA = float(os.getenv('ANOMALY_FAST_ALPHA', '0.3'))
+ANOMALY_WARMUP = int(os.getenv('ANOMALY_WARMUP', '10'))
+ANOMALY_SPIKE_SIGMA = float(os.getenv('ANOMALY_SPIKE_SIGMA', '3.0'))
+ANOMALY_DRIFT_SIGMA = float(os.getenv('ANOMALY_DRIFT_SIGMA', '2.0'))
+
+# /api/batch: sub-requests per call, and threads used when a batch asks to run in parallel
+BATCH_MAX_REQUESTS = int(os.getenv('BATCH_MAX_REQUESTS', '20'))
+BATCH_MAX_WORKERS = int(os.getenv('BATCH_MAX_WORKERS', '2'))
+
+# Delta sync (delta_sync.py): changes per table per call, and how long tombstones are kept
+SYNC_MAX_ROWS = int(os.getenv('SYNC_MAX_ROWS', '500'))
+SYNC_TOMBSTONE_DAYS = int(os.getenv('SYNC_TOMBSTONE_DAYS', '90'))
+
+# Idempotency-Key support for POSTs (idempotency.py): how long responses are kept for
+# replay, and how long an unfinished request holds its key
+IDEMPOTENCY_TTL_HOURS = int(os.getenv('IDEMPOTENCY_TTL_HOURS', '24'))
+IDEMPOTENCY_PENDING_SECONDS = int(os.getenv('IDEMPOTENCY_PENDING_SECONDS', '120'))
+
+# Rate limiting and admission control (rate_limit.py). The SQLite file must be on local
+# disk shared by the gunicorn workers; PROXY_HOPS is the number of proxies that append
+# to X-Forwarded-For in front of the app (1 on Render)
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+RATE_LIMIT_DB = os.getenv('RATE_LIMIT_DB', os.path.join(tempfile.gettempdir(), 'bsf_farm_rate_limit.sqlite3'))
+RATE_LIMIT_PER_MINUTE = float(os.getenv('RATE_LIMIT_PER_MINUTE', '120'))
+RATE_LIMIT_BURST = float(os.getenv('RATE_LIMIT_BURST', '40'))
+RATE_LIMIT_HEAVY_CONCURRENCY = int(os.getenv('RATE_LIMIT_HEAVY_CONCURRENCY', '2'))
+RATE_LIMIT_SLOT_TIMEOUT = int(os.getenv('RATE_LIMIT_SLOT_TIMEOUT', '120'))
+RATE_LIMIT_PROXY_HOPS = int(os.getenv('RATE_LIMIT_PROXY_HOPS', '0'))
+
+# /readyz: seconds between background database pings, and their connect timeout
+HEALTH_PROBE_INTERVAL = float(os.getenv('HEALTH_PROBE_INTERVAL', '10'))
+HEALTH_PROBE_TIMEOUT = int(os.getenv('HEALTH_PROBE_TIMEOUT', '3'))
+
+# Cold start (startup.py): start the database pool, scheduler and forecasting on a
+# background thread DELAY seconds after a worker boots; false starts them while app.py
+# is imported. startup_profile.py fails when the first request takes longer than the target
+STARTUP_WARMUP = os.getenv('STARTUP_WARMUP', 'true').lower() == 'true'
+STARTUP_WARMUP_DELAY = float(os.getenv('STARTUP_WARMUP_DELAY', '0'))
+STARTUP_TARGET_SECONDS = float(os.getenv('STARTUP_TARGET_SECONDS', '1.5'))
+
+# Resized WebP/AVIF variants of the frontend images (images.py); kept beside the app so
+# variants generated by the build step survive into the running service
+IMAGE_CACHE_DIR = os.getenv('IMAGE_CACHE_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'image_cache'))
+
+# Columnar mirror of the production tables for the reporting endpoints (analytics_mirror.py).
+# The scheduler leader refreshes it from the delta sync versions; reports fall back to MySQL
+# when it is older than ANALYTICS_MAX_LAG seconds or duckdb is not installed
+ANALYTICS_ENABLED = os.getenv('ANALYTICS_ENABLED', 'true').lower() == 'true'
+ANALYTICS_DIR = os.getenv('ANALYTICS_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'analytics'))
+ANALYTICS_REFRESH_INTERVAL = int(os.getenv('ANALYTICS_REFRESH_INTERVAL', '60'))
+ANALYTICS_MAX_LAG = int(os.getenv('ANALYTICS_MAX_LAG', '600'))
+ANALYTICS_BATCH_ROWS = int(os.getenv('ANALYTICS_BATCH_ROWS', '5000'))
@@ -0,0 +1,184 @@
+"""Bulk customer import from CSV or JSON with batched upserts.
+
+Rows are streamed, normalized, deduplicated within each batch and written
+with one multi-row ``INSERT ... ON DUPLICATE KEY UPDATE`` per batch against
+the ``customer_key`` unique index (migrations/customers_unique_key_migration.sql).
+
+Usage:
+    python customer_import.py customers.csv
+    python customer_import.py customers.json
+"""
+import csv
+import io
+import json
+import logging
+import re
+import sys
+
+from database import DatabaseConnection
+
+logger = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 500
+MAX_REPORTED_ERRORS = 50
+
+EMAIL_PATTERN = re.compile(r'^[^@\s]+@[^@\s]+\.[^@\s]+$')
+WHITESPACE = re.compile(r'\s+')
+
+UPSERT_CUSTOMER_QUERY = """
+    INSERT INTO customers (name, contact, email, address) VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        contact = COALESCE(VALUES(contact), contact),
+        address = COALESCE(VALUES(address), address)
+"""
+
+# Columns accepted from spreadsheets, mapped to customers columns
+FIELD_ALIASES = {
+    'name': 'name', 'customer': 'name', 'customer_name': 'name', 'full_name': 'name',
+    'contact': 'contact', 'phone': 'contact', 'phone_number': 'contact', 'telephone': 'contact',
+    'email': 'email', 'email_address': 'email', 'e-mail': 'email',
+    'address': 'address', 'location': 'address', 'delivery_address': 'address',
+}
+
+
+def _clean(value):
+    if value is None:
+        return None
+    value = WHITESPACE.sub(' ', str(value)).strip()
+    return value or None
+
+
+def normalize_customer(row):
+    """Return (name, contact, email, address) or raise ValueError."""
+    fields = {}
+    for key, value in row.items():
+        column = FIELD_ALIASES.get(str(key).strip().lower().replace(' ', '_'))
+        if column and column not in fields:
+            fields[column] = _clean(value)
+
+    name = fields.get('name')
+    if not name:
+        raise ValueError('name is required')
+    if len(name) > 100:
+        raise ValueError('name is longer than 100 characters')
+    email = fields.get('email')
+    if email:
+        email = email.lower()
+        if not EMAIL_PATTERN.match(email) or len(email) > 100:
+            raise ValueError(f'invalid email: {email}')
+    contact = fields.get('contact')
+    if contact and len(contact) > 50:
+        raise ValueError('contact is longer than 50 characters')
+    address = fields.get('address')
+    if address and len(address) > 255:
+        raise ValueError('address is longer than 255 characters')
+    return (name, contact, email, address)
+
+
+def customer_key(customer):
+    """Same value as the customer_key generated column.
+
+    Without an email the contact tells customers of the same name apart.
+    """
+    name, contact, email, _ = customer
+    return f"{name}|{email or ''}|{'' if email else contact or ''}".lower()
+
+
+def iter_rows(stream, fmt):
+    """Yield dict rows from a text stream; fmt is 'csv', 'json' or 'ndjson'."""
+    if fmt == 'csv':
+        yield from csv.DictReader(stream)
+    elif fmt == 'ndjson':
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+    elif fmt == 'json':
+        data = json.load(stream)
+        yield from (data.get('customers', []) if isinstance(data, dict) else data)
+    else:
+        raise ValueError(f'unsupported format: {fmt}')
+
+
+def detect_format(filename=None, mimetype=None):
+    name = (filename or '').lower()
+    mimetype = (mimetype or '').lower()
+    if name.endswith(('.ndjson', '.jsonl')) or mimetype == 'application/x-ndjson':
+        return 'ndjson'
+    if name.endswith('.json') or mimetype == 'application/json':
+        return 'json'
+    return 'csv'
+
+
+def _write_batch(db, batch):
+    """Upsert one batch; returns (inserted, updated)."""
+    keys = list(batch)
+    placeholders = ', '.join(['%s'] * len(keys))
+    with db.transaction():
+        existing = db.fetch_all(
+            f"SELECT customer_key FROM customers WHERE customer_key IN ({placeholders}) FOR UPDATE", keys)
+        existing_keys = {row['customer_key'] for row in existing}
+        db.execute_many(UPSERT_CUSTOMER_QUERY, list(batch.values()))
+    updated = sum(1 for key in keys if key in existing_keys)
+    return len(keys) - updated, updated
+
+
+def import_customers(rows, db=None, batch_size=IMPORT_BATCH_SIZE):
+    """Normalize and upsert customer rows.
+
+    Returns a report with inserted, updated and rejected counts plus the first
+    few rejection reasons by (1-based) row number.
+    """
+    db = db or DatabaseConnection()
+    report = {'inserted': 0, 'updated': 0, 'rejected': 0, 'duplicates_in_file': 0, 'errors': []}
+    batch = {}
+
+    def flush():
+        inserted, updated = _write_batch(db, batch)
+        report['inserted'] += inserted
+        report['updated'] += updated
+        batch.clear()
+
+    for row_number, row in enumerate(rows, start=1):
+        try:
+            if not isinstance(row, dict):
+                raise ValueError('row is not an object')
+            customer = normalize_customer(row)
+        except ValueError as e:
+            report['rejected'] += 1
+            if len(report['errors']) < MAX_REPORTED_ERRORS:
+                report['errors'].append({'row': row_number, 'error': str(e)})
+            continue
+        key = customer_key(customer)
+        if key in batch:
+            report['duplicates_in_file'] += 1
+        batch[key] = customer
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+    return report
+
+
+def import_stream(binary_stream, filename=None, mimetype=None, db=None):
+    """Import from a binary stream such as an uploaded file or request body."""
+    fmt = detect_format(filename, mimetype)
+    text = io.TextIOWrapper(binary_stream, encoding='utf-8-sig', newline='')
+    try:
+        return import_customers(iter_rows(text, fmt), db=db)
+    finally:
+        text.detach()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    if len(sys.argv) != 2:
+        print(__doc__)
+        sys.exit(1)
+    path = sys.argv[1]
+    try:
+        with open(path, 'rb') as fh:
+            result = import_stream(fh, filename=path)
+        print(json.dumps(result, indent=2))
+    except (OSError, ValueError) as e:
+        print(f"Import failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,201 @@
+"""Precomputed production figures for the dashboard.
+
+``production_daily_summary`` holds kilograms and record counts per
+(day, stage) and ``drying_batch_summary`` wet and dried weight per drying
+batch. The waste sourcing, harvest and drying handlers apply each new row
+inside the transaction that writes it, so ``/api/dashboard`` reads a few
+hundred aggregate rows instead of shipping every row of four tables to the
+browser.
+
+Usage:
+    python dashboard.py rebuild
+"""
+import logging
+import sys
+from datetime import date, datetime, timedelta
+
+from database import DatabaseConnection
+
+logger = logging.getLogger(__name__)
+
+# stage -> (source table, date column, weight column)
+STAGES = {
+    'waste': ('waste_sourcing', 'collection_date', 'waste_weight'),
+    'larvae': ('feeding_harvest_yield', 'harvest_date', 'larvae_collected_kg'),
+    'wet': ('drying_input', 'created_at', 'wet_placed_for_drying_kg'),
+    'dried': ('drying_output', 'created_at', 'dried_produced_kg'),
+}
+
+APPLY_PRODUCTION_QUERY = """
+    INSERT INTO production_daily_summary (summary_date, stage, quantity_kg, record_count)
+    VALUES (%s, %s, %s, 1)
+    ON DUPLICATE KEY UPDATE
+        quantity_kg = quantity_kg + VALUES(quantity_kg),
+        record_count = record_count + 1
+"""
+
+APPLY_DRYING_BATCH_QUERY = """
+    INSERT INTO drying_batch_summary
+        (batch_id, wet_placed_kg, dried_produced_kg, input_count, output_count, last_activity)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        wet_placed_kg = wet_placed_kg + VALUES(wet_placed_kg),
+        dried_produced_kg = dried_produced_kg + VALUES(dried_produced_kg),
+        input_count = input_count + VALUES(input_count),
+        output_count = output_count + VALUES(output_count),
+        last_activity = GREATEST(last_activity, VALUES(last_activity))
+"""
+
+# Larvae harvested from the trays linked to each drying batch (lineage.py)
+BATCH_LARVAE_QUERY = """
+    SELECT d.node_ref AS batch_id, SUM(h.larvae_collected_kg) AS larvae_kg
+    FROM batch_lineage_nodes d
+    JOIN batch_lineage_edges e ON e.child_id = d.node_id
+    JOIN batch_lineage_nodes t ON t.node_id = e.parent_id AND t.node_type = 'tray'
+    JOIN feeding_harvest_yield h ON h.tray_batch_id = t.node_ref
+    WHERE d.node_type = 'drying' AND d.node_ref IN ({placeholders})
+    GROUP BY d.node_ref
+"""
+
+
+def _kg(value):
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def apply(db, stage, day, kg, batch_id=None):
+    """Add one production row; call inside the transaction that writes it.
+
+    ``batch_id`` is the drying batch for the 'wet' and 'dried' stages.
+    """
+    if stage not in STAGES:
+        raise ValueError(f"stage must be one of: {', '.join(STAGES)}")
+    kg = _kg(kg)
+    db.execute_query(APPLY_PRODUCTION_QUERY, (day, stage, kg))
+    if batch_id is not None and stage in ('wet', 'dried'):
+        wet = stage == 'wet'
+        db.execute_query(APPLY_DRYING_BATCH_QUERY, (
+            str(batch_id), kg if wet else 0, 0 if wet else kg, int(wet), int(not wet), day))
+
+
+def _ratio(numerator, denominator):
+    return round(numerator / denominator, 4) if numerator and denominator else None
+
+
+def _month_start(day, months_back):
+    month_index = day.year * 12 + day.month - 1 - months_back
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def build(db, months=12, batches=30):
+    """The dashboard payload: totals, KPIs, a monthly series and recent batches."""
+    today = date.today()
+    since = _month_start(today, months - 1)
+    recent = today - timedelta(days=29)
+    with db.transaction():
+        # One snapshot for every figure on the page
+        totals_rows = db.fetch_all("""
+            SELECT stage, SUM(quantity_kg) AS kg, SUM(record_count) AS records,
+                   SUM(CASE WHEN summary_date >= %s THEN quantity_kg ELSE 0 END) AS recent_kg,
+                   SUM(CASE WHEN summary_date = %s THEN quantity_kg ELSE 0 END) AS today_kg
+            FROM production_daily_summary
+            GROUP BY stage
+        """, (recent, today))
+        monthly_rows = db.fetch_all("""
+            SELECT CONCAT(YEAR(summary_date), '-', LPAD(MONTH(summary_date), 2, '0')) AS month,
+                   stage, SUM(quantity_kg) AS kg
+            FROM production_daily_summary
+            WHERE summary_date >= %s
+            GROUP BY month, stage
+        """, (since,))
+        batch_rows = db.fetch_all("""
+            SELECT batch_id, wet_placed_kg, dried_produced_kg, last_activity
+            FROM drying_batch_summary
+            ORDER BY last_activity DESC, batch_id
+            LIMIT %s
+        """, (batches,))
+        larvae = {}
+        if batch_rows:
+            ids = [row['batch_id'] for row in batch_rows]
+            rows = db.fetch_all(BATCH_LARVAE_QUERY.format(placeholders=', '.join(['%s'] * len(ids))), tuple(ids))
+            larvae = {row['batch_id']: _kg(row['larvae_kg']) for row in rows}
+        sales = db.fetch_one("""
+            SELECT SUM(revenue) AS revenue, SUM(quantity) AS quantity, SUM(sale_count) AS sale_count
+            FROM sales_daily_summary WHERE sale_date >= %s
+        """, (recent,)) or {}
+        alerts = db.fetch_one("SELECT COUNT(*) AS open_alerts FROM environment_alerts WHERE is_open = 1") or {}
+
+    by_stage = {row['stage']: row for row in totals_rows}
+    totals = {stage: _kg(by_stage.get(stage, {}).get('kg')) for stage in STAGES}
+    month_labels = [_month_start(today, back).strftime('%Y-%m') for back in range(months - 1, -1, -1)]
+    series = {stage: [0.0] * len(month_labels) for stage in STAGES}
+    position = {label: i for i, label in enumerate(month_labels)}
+    for row in monthly_rows:
+        if row['month'] in position:
+            series[row['stage']][position[row['month']]] = _kg(row['kg'])
+
+    return {
+        'generated_at': datetime.now().isoformat(timespec='seconds'),
+        'totals': totals,
+        'records': {stage: int(by_stage.get(stage, {}).get('records') or 0) for stage in STAGES},
+        'last_30_days': {stage: _kg(by_stage.get(stage, {}).get('recent_kg')) for stage in STAGES},
+        'today': {stage: _kg(by_stage.get(stage, {}).get('today_kg')) for stage in STAGES},
+        'kpis': {
+            'waste_to_larvae': _ratio(totals['larvae'], totals['waste']),
+            'larvae_to_dried': _ratio(totals['dried'], totals['larvae']),
+            'waste_to_dried': _ratio(totals['dried'], totals['waste']),
+            'drying_yield': _ratio(totals['dried'], totals['wet']),
+            'sales_revenue_30_days': _kg(sales.get('revenue')),
+            'sales_count_30_days': int(sales.get('sale_count') or 0),
+            'open_alerts': int(alerts.get('open_alerts') or 0),
+        },
+        'monthly': {'months': month_labels, **series},
+        'batches': [{
+            'batch_id': row['batch_id'],
+            'last_activity': row['last_activity'].isoformat() if row['last_activity'] else None,
+            'larvae_kg': larvae.get(row['batch_id']),
+            'wet_placed_kg': _kg(row['wet_placed_kg']),
+            'dried_produced_kg': _kg(row['dried_produced_kg']),
+            'larvae_to_dried': _ratio(_kg(row['dried_produced_kg']), larvae.get(row['batch_id'])),
+            'drying_yield': _ratio(_kg(row['dried_produced_kg']), _kg(row['wet_placed_kg'])),
+        } for row in batch_rows],
+    }
+
+
+def rebuild(db):
+    """Recompute both summary tables from the source tables."""
+    with db.transaction():
+        db.execute_query("DELETE FROM production_daily_summary")
+        for stage, (table, date_col, weight_col) in STAGES.items():
+            db.execute_query(f"""
+                INSERT INTO production_daily_summary (summary_date, stage, quantity_kg, record_count)
+                SELECT DATE({date_col}), %s, SUM(IFNULL({weight_col}, 0)), COUNT(*)
+                FROM {table}
+                GROUP BY DATE({date_col})
+            """, (stage,))
+        db.execute_query("DELETE FROM drying_batch_summary")
+        db.execute_query("""
+            INSERT INTO drying_batch_summary
+                (batch_id, wet_placed_kg, dried_produced_kg, input_count, output_count, last_activity)
+            SELECT batch_id, SUM(wet), SUM(dried), SUM(inputs), SUM(outputs), MAX(day)
+            FROM (
+                SELECT batch_id, IFNULL(wet_placed_for_drying_kg, 0) AS wet, 0 AS dried,
+                       1 AS inputs, 0 AS outputs, DATE(created_at) AS day
+                FROM drying_input
+                UNION ALL
+                SELECT batch_id, 0, IFNULL(dried_produced_kg, 0), 0, 1, DATE(created_at)
+                FROM drying_output
+            ) rows_by_batch
+            GROUP BY batch_id
+        """)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    if sys.argv[1:] != ['rebuild']:
+        print(__doc__)
+        sys.exit(1)
+    rebuild(DatabaseConnection())
+    print("Dashboard summary tables rebuilt.")
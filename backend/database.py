@@ -1,99 +1,475 @@
 import mysql.connector
 from mysql.connector import Error
+from mysql.connector import errorcode
 from mysql.connector import pooling
-from config import DB_CONFIG
+from config import (
+    DB_CONFIG, DB_REPLICA_HOSTS, DB_REPLICA_MAX_LAG,
+    DB_REPLICA_CHECK_INTERVAL, DB_STICKY_SECONDS,
+    DB_PREPARED_STATEMENTS, DB_STATEMENT_CACHE_SIZE, DB_QUERY_LOG
+)
+from collections import OrderedDict
+from contextlib import contextmanager
+import itertools
+import json
 import logging
+import threading
+import time
+
+import startup
 
 logger = logging.getLogger(__name__)
 
+# Per-thread routing state; a sync worker thread serves one request at a time
+_routing = threading.local()
+
+# Errors after which a statement is run once more over the text protocol:
+# not preparable (e.g. some DDL/SHOW), or a handle lost to a reconnect
+FALLBACK_ERRNOS = {
+    errorcode.ER_UNSUPPORTED_PS,
+    errorcode.ER_UNKNOWN_STMT_HANDLER,
+    errorcode.ER_NEED_REPREPARE,
+}
+_unpreparable = set()
+
+# Statements already written to DB_QUERY_LOG by this process
+_captured = set()
+_capture_lock = threading.Lock()
+
+
+def _capture(query, params):
+    """Record the first execution of each statement for index_advisor.py."""
+    if query in _captured:
+        return
+    with _capture_lock:
+        if query in _captured:
+            return
+        _captured.add(query)
+        try:
+            with open(DB_QUERY_LOG, 'a', encoding='utf-8') as fh:
+                fh.write(json.dumps({'sql': query, 'params': list(params or ())}, default=str) + '\n')
+        except OSError as e:
+            logger.warning(f"Could not write query log: {e}")
+
+
+# Keep sessions (and their prepared statements) alive across pool checkouts
+POOL_OPTIONS = {'pool_size': 5, 'pool_reset_session': False}
+
+
+class StatementCache:
+    """LRU of prepared cursors for one physical connection, keyed by SQL text.
+
+    A prepared cursor only re-prepares when it is given different SQL, so
+    keeping one open per statement reuses the server-side handle and sends
+    parameters and rows over the binary protocol.
+    """
+
+    def __init__(self, connection, size):
+        self.connection = connection
+        self.size = size
+        self._cursors = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, query, dictionary=False):
+        key = (query, dictionary)
+        cursor = self._cursors.get(key)
+        if cursor is not None:
+            self._cursors.move_to_end(key)
+            self.hits += 1
+            return cursor
+        self.misses += 1
+        cursor = self.connection.cursor(prepared=True, dictionary=dictionary)
+        self._cursors[key] = cursor
+        if len(self._cursors) > self.size:
+            _, evicted = self._cursors.popitem(last=False)
+            self.evictions += 1
+            self._close(evicted)
+        return cursor
+
+    def discard(self, query, dictionary=False):
+        cursor = self._cursors.pop((query, dictionary), None)
+        if cursor is not None:
+            self._close(cursor)
+
+    @staticmethod
+    def _close(cursor):
+        # Closing a prepared cursor deallocates its server-side statement
+        try:
+            cursor.close()
+        except Error:
+            pass
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses,
+                'evictions': self.evictions, 'cached': len(self._cursors)}
+
+
+def _replica_config(host_spec):
+    host, _, port = host_spec.partition(':')
+    config = {**DB_CONFIG, 'host': host}
+    if port:
+        config['port'] = int(port)
+    return config
+
+
+class ReplicaPool:
+    """Connection pool for one read replica plus its cached lag check."""
+
+    def __init__(self, name, config):
+        self.name = name
+        self.pool = mysql.connector.pooling.MySQLConnectionPool(pool_name=name, **POOL_OPTIONS, **config)
+        self.healthy = True
+        self.lag = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def refresh_health(self):
+        """Re-check replication lag at most every DB_REPLICA_CHECK_INTERVAL seconds."""
+        now = time.monotonic()
+        if now - self.checked_at < DB_REPLICA_CHECK_INTERVAL or not self._lock.acquire(blocking=False):
+            return self.healthy
+        try:
+            self.checked_at = now
+            conn = self.pool.get_connection()
+            try:
+                cursor = conn.cursor(dictionary=True)
+                cursor.execute("SHOW REPLICA STATUS")
+                status = cursor.fetchone()
+                cursor.close()
+            finally:
+                conn.close()
+            self.lag = status.get('Seconds_Behind_Source') if status else None
+            self.healthy = self.lag is not None and self.lag <= DB_REPLICA_MAX_LAG
+            if not self.healthy:
+                logger.warning(f"Replica {self.name} out of rotation (lag: {self.lag})")
+        except Error as e:
+            self.healthy = False
+            logger.warning(f"Replica {self.name} health check failed: {e}")
+        finally:
+            self._lock.release()
+        return self.healthy
+
+
 class DatabaseConnection:
     _instance = None
     _pool = None
+    _replicas = []
+    _replica_cycle = None
+    _pool_lock = threading.Lock()
 
     def __new__(cls):
+        # Cheap: modules create this at import, the pools connect on first use
         if cls._instance is None:
             cls._instance = super(DatabaseConnection, cls).__new__(cls)
-            cls._initialize_pool()
         return cls._instance
 
+    @classmethod
+    def warm_up(cls):
+        """Create the pools now rather than on the first query."""
+        if cls._pool is None:
+            with cls._pool_lock:
+                if cls._pool is None:
+                    with startup.timed('database pool'):
+                        cls._initialize_pool()
+
     @classmethod
     def _initialize_pool(cls):
         try:
             pool_config = {
                 'pool_name': 'bsf_farm_pool',
-                'pool_size': 5,
+                **POOL_OPTIONS,
                 **DB_CONFIG
             }
-            cls._pool = mysql.connector.pooling.MySQLConnectionPool(**pool_config)
+            pool = mysql.connector.pooling.MySQLConnectionPool(**pool_config)
         except Error as e:
             print(f"Error creating connection pool: {e}")
             raise
+        replicas = []
+        for index, host_spec in enumerate(DB_REPLICA_HOSTS):
+            try:
+                replicas.append(ReplicaPool(f"bsf_farm_replica_{index}", _replica_config(host_spec)))
+            except Error as e:
+                logger.error(f"Replica {host_spec} unavailable, reads will use the primary: {e}")
+        cls._replicas = replicas
+        cls._replica_cycle = itertools.cycle(replicas) if replicas else None
+        # Published last: other threads only skip warm_up() once the replicas are set too
+        cls._pool = pool
 
-    def get_connection(self):
+    # --- Read-your-writes stickiness ---
+    def mark_write(self):
+        """Keep this thread's reads on the primary for DB_STICKY_SECONDS."""
+        _routing.primary_until = time.time() + DB_STICKY_SECONDS
+
+    def get_primary_until(self):
+        return getattr(_routing, 'primary_until', 0.0)
+
+    def set_primary_until(self, timestamp):
+        """Restore stickiness carried over from a previous request of the same session."""
+        _routing.primary_until = timestamp or 0.0
+
+    def _pick_replica(self):
+        if self._replica_cycle is None or time.time() < self.get_primary_until():
+            return None
+        for _ in range(len(self._replicas)):
+            replica = next(self._replica_cycle)
+            if replica.refresh_health():
+                return replica
+        return None
+
+    def get_connection(self, readonly=False):
+        if self._pool is None:
+            self.warm_up()
+        replica = self._pick_replica() if readonly else None
+        if replica is not None:
+            try:
+                return replica.pool.get_connection()
+            except Error as e:
+                replica.healthy = False
+                logger.warning(f"Replica {replica.name} failed, falling back to primary: {e}")
         try:
             return self._pool.get_connection()
         except Error as e:
             print(f"Error getting connection from pool: {e}")
             raise
 
+    # --- Request-scoped connections and transactions ---
+    def begin_request(self):
+        """Bind connections to this thread until end_request().
+
+        The first statement of each role (primary or replica) checks a
+        connection out and every later statement in the request reuses it.
+        """
+        _routing.bound = {}
+        _routing.tx_depth = 0
+
+    def end_request(self):
+        """Release the connections bound by begin_request()."""
+        bound = getattr(_routing, 'bound', None) or {}
+        _routing.bound = None
+        _routing.tx_depth = 0
+        for conn in bound.values():
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+            except Error as e:
+                logger.warning(f"Rollback on release failed: {e}")
+            finally:
+                conn.close()
+
+    def in_transaction(self):
+        return getattr(_routing, 'tx_depth', 0) > 0
+
+    def _checkout(self, readonly=False):
+        """Connection for one statement: the bound one when a scope is active."""
+        bound = getattr(_routing, 'bound', None)
+        if bound is None:
+            return self.get_connection(readonly)
+        use_replica = (readonly and self._replicas and not self.in_transaction()
+                       and time.time() >= self.get_primary_until())
+        role = 'replica' if use_replica else 'primary'
+        conn = bound.get(role)
+        if conn is None:
+            conn = self.get_connection(readonly=use_replica)
+            bound[role] = conn
+        return conn
+
+    def _is_bound(self, conn):
+        bound = getattr(_routing, 'bound', None)
+        return bool(bound) and any(conn is c for c in bound.values())
+
+    @contextmanager
+    def transaction(self):
+        """Run the enclosed statements on one primary connection with one commit.
+
+        Reads inside the block also go to that connection, so SELECT ... FOR
+        UPDATE can lock rows before they are changed. Nested blocks join the
+        outer transaction. Outside a request scope the connection is bound
+        just for the duration of the block. Only a block that ran a write
+        keeps the session's reads on the primary; one used for a consistent
+        snapshot of several reads does not.
+        """
+        depth = getattr(_routing, 'tx_depth', 0)
+        if depth:
+            _routing.tx_depth = depth + 1
+            try:
+                yield self
+            finally:
+                _routing.tx_depth = depth
+            return
+
+        temporary = getattr(_routing, 'bound', None) is None
+        if temporary:
+            self.begin_request()
+        conn = self._checkout()
+        try:
+            if conn.in_transaction:
+                # End the read snapshot left by earlier statements in this request
+                conn.rollback()
+            conn.start_transaction()
+            _routing.tx_depth = 1
+            _routing.tx_wrote = False
+            try:
+                yield self
+                conn.commit()
+                if _routing.tx_wrote:
+                    self.mark_write()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                _routing.tx_depth = 0
+        finally:
+            if temporary:
+                self.end_request()
+
+    # --- Prepared statement cache ---
+    def _statement_cache(self, conn):
+        # Pooled wrappers are created per checkout; the cache lives on the
+        # physical connection underneath so handles survive across checkouts
+        raw = getattr(conn, '_cnx', conn)
+        cache = getattr(raw, '_statement_cache', None)
+        if cache is None:
+            cache = StatementCache(raw, DB_STATEMENT_CACHE_SIZE)
+            raw._statement_cache = cache
+        return cache
+
+    def _run(self, conn, query, params=None, dictionary=False):
+        """Execute a statement, reusing a prepared handle when possible.
+
+        Returns (cursor, owned); owned cursors must be closed by the caller,
+        cached ones stay open for the next execution of the same SQL.
+        """
+        if DB_QUERY_LOG:
+            _capture(query, params)
+        if DB_PREPARED_STATEMENTS and query not in _unpreparable:
+            cache = self._statement_cache(conn)
+            cursor = cache.get(query, dictionary)
+            try:
+                cursor.execute(query, params or ())
+                return cursor, False
+            except Error as e:
+                cache.discard(query, dictionary)
+                if e.errno not in FALLBACK_ERRNOS:
+                    raise
+                if e.errno == errorcode.ER_UNSUPPORTED_PS:
+                    _unpreparable.add(query)
+        cursor = conn.cursor(dictionary=dictionary)
+        if params:
+            cursor.execute(query, params)
+        else:
+            cursor.execute(query)
+        return cursor, True
+
+    def _release(self, conn, cursor=None, owned=True):
+        """Close an owned cursor and hand the connection back to its pool.
+
+        Sessions are not reset on checkin (that would drop prepared
+        statements), so an open read snapshot is ended here instead.
+        """
+        if self._is_bound(conn):
+            # Bound connections stay checked out until end_request()
+            if cursor is not None and owned:
+                cursor.close()
+            return
+        try:
+            if cursor is not None and owned:
+                cursor.close()
+            if conn.in_transaction:
+                conn.rollback()
+        finally:
+            conn.close()
+
+    def statement_cache_stats(self):
+        """Hit/miss counters summed over the idle connections of every pool."""
+        totals = {'hits': 0, 'misses': 0, 'evictions': 0, 'cached': 0}
+        pools = [self._pool] if self._pool is not None else []
+        for pool in pools + [replica.pool for replica in self._replicas]:
+            for raw in list(pool._cnx_queue.queue):
+                cache = getattr(raw, '_statement_cache', None)
+                if cache is not None:
+                    for key, value in cache.stats().items():
+                        totals[key] += value
+        return totals
+
     def execute_query(self, query, params=None):
-        conn = self.get_connection()
+        conn = self._checkout()
         cursor = None
+        owned = True
+        in_transaction = self.in_transaction()
         try:
-            cursor = conn.cursor()
-            if params:
-                cursor.execute(query, params)
+            cursor, owned = self._run(conn, query, params)
+            if in_transaction:
+                # transaction() commits once at the end and marks the write then
+                _routing.tx_wrote = True
             else:
-                cursor.execute(query)
-            conn.commit()
+                conn.commit()
+                self.mark_write()
             last_id = cursor.lastrowid
             return last_id
         except Exception as e:
-            conn.rollback()
+            if not in_transaction:
+                conn.rollback()
             logger.error(f"Database error: {str(e)}")
             raise e
         finally:
-            if cursor:
-                cursor.close()
-            conn.close()
+            self._release(conn, cursor, owned)
 
-    def fetch_all(self, query, params=None):
-        conn = self.get_connection()
+    def execute_many(self, query, seq_of_params):
+        """Run one statement for many parameter rows in a single transaction.
+
+        Returns the number of affected rows. Uses the text protocol, where the
+        connector rewrites INSERTs into one multi-row statement.
+        """
+        conn = self._checkout()
         cursor = None
+        in_transaction = self.in_transaction()
         try:
-            cursor = conn.cursor(dictionary=True)
-            if params:
-                cursor.execute(query, params)
+            cursor = conn.cursor()
+            cursor.executemany(query, seq_of_params)
+            if in_transaction:
+                _routing.tx_wrote = True
             else:
-                cursor.execute(query)
+                conn.commit()
+                self.mark_write()
+            return cursor.rowcount
+        except Exception as e:
+            if not in_transaction:
+                conn.rollback()
+            logger.error(f"Database error: {str(e)}")
+            raise e
+        finally:
+            self._release(conn, cursor)
+
+    def fetch_all(self, query, params=None):
+        conn = self._checkout(readonly=True)
+        cursor = None
+        owned = True
+        try:
+            cursor, owned = self._run(conn, query, params, dictionary=True)
             results = cursor.fetchall()
             return results
         except Error as e:
             print(f"Error fetching data: {e}")
             raise e
         finally:
-            if cursor:
-                cursor.close()
-            conn.close()
+            self._release(conn, cursor, owned)
 
     def fetch_one(self, query, params=None):
-        conn = self.get_connection()
+        conn = self._checkout(readonly=True)
         cursor = None
+        owned = True
         try:
-            cursor = conn.cursor(dictionary=True)
-            if params:
-                cursor.execute(query, params)
-            else:
-                cursor.execute(query)
-            result = cursor.fetchone()
+            cursor, owned = self._run(conn, query, params, dictionary=True)
+            # Drain the result so a cached cursor can be executed again
+            rows = cursor.fetchall()
+            result = rows[0] if rows else None
             return result
         except Error as e:
             print(f"Error fetching data: {e}")
             raise e
         finally:
-            if cursor:
-                cursor.close()
-            conn.close()
+            self._release(conn, cursor, owned)
 
 # Example usage:
 if __name__ == "__main__":
@@ -0,0 +1,291 @@
+"""Changes-since sync for clients that keep a local copy of the records.
+
+Every table in SYNC_TABLES carries a ``row_version`` and ``row_updated_at``
+column set by BEFORE INSERT/UPDATE triggers, so the POST handlers and the
+PUT handlers for customers, sales, deliveries and feedback are covered
+without touching their queries. Versions come from one counter row per
+table in ``sync_table_versions``. The trigger bumps it with an UPDATE, which
+holds the row lock until commit, so versions of a table are handed out in
+commit order and a reader never sees version N before every version below
+it. Deleted rows leave a tombstone in ``sync_tombstones`` with a version
+from the same counter.
+
+A client sends the version it last saw per table and gets the rows and
+tombstones after it, plus the new watermark. ``reset`` tells it to drop
+its copy of a table and start again from the rows returned, which happens
+when tombstones it never saw were pruned or partitions were archived.
+
+Usage:
+    python delta_sync.py ddl                # print the migration (columns, backfill, triggers)
+    python delta_sync.py prune [--days 90]  # drop old tombstones
+"""
+import argparse
+import logging
+import sys
+from datetime import date, datetime, timedelta
+
+from config import SYNC_MAX_ROWS, SYNC_TOMBSTONE_DAYS
+from database import DatabaseConnection
+
+logger = logging.getLogger(__name__)
+
+# Table -> primary key column
+SYNC_TABLES = {
+    'waste_sourcing': 'sourcing_id',
+    'storage_records': 'record_id',
+    'processing_records': 'processing_id',
+    'environmental_monitoring_waste': 'monitoring_id',
+    'substrate_preparation': 'id',
+    'hatchery_batches': 'batch_id',
+    'hatchery_feeding': 'feeding_id',
+    'hatchery_monitoring': 'monitoring_id',
+    'hatchery_cleaning': 'cleaning_id',
+    'hatchery_problems': 'problem_id',
+    'feeding_environmental_monitoring': 'monitoring_id',
+    'feeding_health_intervention': 'intervention_id',
+    'feeding_harvest_yield': 'harvest_id',
+    'feeding_schedule': 'schedule_id',
+    'drying_batches': 'id',
+    'drying_input': 'input_id',
+    'drying_output': 'output_id',
+    'drying_quality_control': 'qc_id',
+    'fly_facility_cage_monitoring': 'monitoring_id',
+    'fly_facility_maintenance': 'maintenance_id',
+    'fly_facility_pupae_transition': 'transition_id',
+    'fly_facility_egg_collection': 'collection_id',
+    'fly_facility_bait_preparation': 'bait_id',
+    'customers': 'id',
+    'sales': 'id',
+    'deliveries': 'id',
+    'customer_feedback': 'id',
+}
+
+# ON DELETE CASCADE children: MySQL does not fire triggers for rows removed
+# by a foreign key action, so the parent's trigger writes their tombstones
+CASCADES = {
+    'customers': (('sales', 'customer_id'), ('deliveries', 'customer_id'), ('customer_feedback', 'customer_id')),
+}
+
+CREATE_TABLES = [
+    """CREATE TABLE IF NOT EXISTS sync_table_versions (
+    table_name VARCHAR(64) NOT NULL PRIMARY KEY,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    pruned_version BIGINT UNSIGNED NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4""",
+    """CREATE TABLE IF NOT EXISTS sync_tombstones (
+    table_name VARCHAR(64) NOT NULL,
+    row_id INT NOT NULL,
+    row_version BIGINT UNSIGNED NOT NULL,
+    deleted_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    PRIMARY KEY (table_name, row_id),
+    KEY idx_sync_tombstones_version (table_name, row_version)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4""",
+]
+
+TOMBSTONE_UPSERT = "ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at)"
+
+
+def _bump(table, amount='1'):
+    return f"UPDATE sync_table_versions SET version = version + {amount} WHERE table_name = '{table}';"
+
+
+def column_statements(table):
+    """Add the version columns and number the existing rows in primary key order."""
+    pk_col = SYNC_TABLES[table]
+    return [
+        f"ALTER TABLE {table} "
+        f"ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, "
+        f"ADD COLUMN row_updated_at TIMESTAMP(3) NULL, "
+        f"ADD KEY idx_{table}_row_version (row_version)",
+        f"UPDATE {table} t JOIN (SELECT {pk_col} AS id, ROW_NUMBER() OVER (ORDER BY {pk_col}) AS n FROM {table}) r "
+        f"ON t.{pk_col} = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3)",
+        f"INSERT INTO sync_table_versions (table_name, version) SELECT '{table}', COUNT(*) FROM {table} "
+        f"ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version))",
+    ]
+
+
+def trigger_statements(table):
+    """Triggers that version every write to ``table`` and tombstone its deletes.
+
+    The bodies hold several statements; the mysql client needs them wrapped
+    in DELIMITER lines (see ``ddl``), a connector cursor runs them as is.
+    """
+    pk_col = SYNC_TABLES[table]
+    stamp = (f"    {_bump(table)}\n"
+             f"    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = '{table}'),\n"
+             f"        NEW.row_updated_at = CURRENT_TIMESTAMP(3);\n")
+    statements = [
+        f"DROP TRIGGER IF EXISTS trg_{table}_sync_bi",
+        f"CREATE TRIGGER trg_{table}_sync_bi BEFORE INSERT ON {table} FOR EACH ROW\nBEGIN\n{stamp}END",
+        f"DROP TRIGGER IF EXISTS trg_{table}_sync_bu",
+        f"CREATE TRIGGER trg_{table}_sync_bu BEFORE UPDATE ON {table} FOR EACH ROW\nBEGIN\n{stamp}END",
+        f"DROP TRIGGER IF EXISTS trg_{table}_sync_ad",
+        f"CREATE TRIGGER trg_{table}_sync_ad AFTER DELETE ON {table} FOR EACH ROW\nBEGIN\n"
+        f"    {_bump(table)}\n"
+        f"    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)\n"
+        f"        SELECT '{table}', OLD.{pk_col}, version, CURRENT_TIMESTAMP(3)\n"
+        f"        FROM sync_table_versions WHERE table_name = '{table}'\n"
+        f"        {TOMBSTONE_UPSERT};\nEND",
+    ]
+    if table in CASCADES:
+        body = []
+        for child, fk_col in CASCADES[table]:
+            child_pk = SYNC_TABLES[child]
+            # One version per child row: the counter moves by the row count and
+            # the rows take the numbers below the new value
+            body.append(
+                f"    {_bump(child, f'(SELECT COUNT(*) FROM {child} WHERE {fk_col} = OLD.{pk_col})')}\n"
+                f"    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)\n"
+                f"        SELECT '{child}', c.{child_pk}, "
+                f"v.version + 1 - ROW_NUMBER() OVER (ORDER BY c.{child_pk}), CURRENT_TIMESTAMP(3)\n"
+                f"        FROM {child} c JOIN sync_table_versions v ON v.table_name = '{child}'\n"
+                f"        WHERE c.{fk_col} = OLD.{pk_col}\n"
+                f"        {TOMBSTONE_UPSERT};\n")
+        statements += [
+            f"DROP TRIGGER IF EXISTS trg_{table}_sync_bd",
+            f"CREATE TRIGGER trg_{table}_sync_bd BEFORE DELETE ON {table} FOR EACH ROW\nBEGIN\n{''.join(body)}END",
+        ]
+    return statements
+
+
+def migration_statements():
+    statements = list(CREATE_TABLES)
+    for table in SYNC_TABLES:
+        statements.extend(column_statements(table))
+    for table in SYNC_TABLES:
+        statements.extend(trigger_statements(table))
+    return statements
+
+
+def parse_since(text):
+    """``customers:12,sales:40`` -> {'customers': 12, 'sales': 40}; raises ValueError."""
+    since = {}
+    for part in (text or '').split(','):
+        if not part.strip():
+            continue
+        table, sep, version = part.partition(':')
+        table = table.strip()
+        if not sep or table not in SYNC_TABLES:
+            raise ValueError(f"since must be a list of table:version with tables from: {', '.join(SYNC_TABLES)}")
+        since[table] = int(version)
+        if since[table] < 0:
+            raise ValueError("versions cannot be negative")
+    return since
+
+
+def _serialize(row):
+    for key, value in row.items():
+        if isinstance(value, (date, datetime)):
+            row[key] = value.isoformat()
+        elif isinstance(value, timedelta):
+            row[key] = str(value)
+    return row
+
+
+def changes(db, since, tables=None, limit=SYNC_MAX_ROWS, serialize=True):
+    """Rows and tombstones newer than ``since`` ({table: version}), oldest first.
+
+    Returns {table: {'rows', 'deleted', 'version', 'has_more', 'reset'}}.
+    At most ``limit`` changes per table are returned; when ``has_more`` is
+    set the client asks again from the returned version. ``serialize=False``
+    keeps dates and times as Python objects (analytics_mirror.py).
+    """
+    tables = list(tables or SYNC_TABLES)
+    unknown = [t for t in tables if t not in SYNC_TABLES]
+    if unknown:
+        raise ValueError(f"tables must be from: {', '.join(SYNC_TABLES)}")
+    result = {}
+    with db.transaction():
+        # The counters are read first so they fix the snapshot the rows come from
+        counters = db.fetch_all(
+            f"SELECT table_name, version, pruned_version FROM sync_table_versions "
+            f"WHERE table_name IN ({', '.join(['%s'] * len(tables))})", tuple(tables))
+        counters = {row['table_name']: row for row in counters}
+        for table in tables:
+            counter = counters.get(table, {'version': 0, 'pruned_version': 0})
+            start = since.get(table, 0)
+            reset = start > 0 and (start > counter['version'] or start < counter['pruned_version'])
+            if reset:
+                start = 0
+            rows = db.fetch_all(
+                f"SELECT * FROM {table} WHERE row_version > %s ORDER BY row_version LIMIT %s",
+                (start, limit + 1))
+            items = [(row['row_version'], _serialize(row) if serialize else row, None) for row in rows]
+            if start:
+                # A full load has nothing to delete on the client
+                tombstones = db.fetch_all("""
+                    SELECT row_id, row_version FROM sync_tombstones
+                    WHERE table_name = %s AND row_version > %s
+                    ORDER BY row_version
+                    LIMIT %s
+                """, (table, start, limit + 1))
+                items.extend((row['row_version'], None, row['row_id']) for row in tombstones)
+                items.sort(key=lambda item: item[0])
+            has_more = len(items) > limit
+            items = items[:limit]
+            result[table] = {
+                'rows': [row for _, row, _ in items if row is not None],
+                'deleted': [row_id for _, _, row_id in items if row_id is not None],
+                'version': items[-1][0] if has_more else counter['version'],
+                'has_more': has_more,
+                'reset': reset,
+            }
+    return result
+
+
+def force_reset(db, table):
+    """Make clients reload ``table``, e.g. after rows were removed without tombstones."""
+    if table not in SYNC_TABLES:
+        return
+    with db.transaction():
+        # Past every version a client can hold, so even an up-to-date one resets;
+        # pruned_version is assigned first and so reads the old version
+        db.execute_query("UPDATE sync_table_versions SET pruned_version = version + 1, version = version + 1 "
+                         "WHERE table_name = %s", (table,))
+        db.execute_query("DELETE FROM sync_tombstones WHERE table_name = %s", (table,))
+
+
+def prune(db, days=SYNC_TOMBSTONE_DAYS):
+    """Delete tombstones older than ``days``; clients behind them get a reset."""
+    cutoff = datetime.now() - timedelta(days=days)
+    removed = 0
+    for table in SYNC_TABLES:
+        with db.transaction():
+            row = db.fetch_one(
+                "SELECT MAX(row_version) AS version FROM sync_tombstones WHERE table_name = %s AND deleted_at < %s",
+                (table, cutoff))
+            if not row or not row['version']:
+                continue
+            db.execute_query(
+                "UPDATE sync_table_versions SET pruned_version = GREATEST(pruned_version, %s) WHERE table_name = %s",
+                (row['version'], table))
+            removed += db.execute_many(
+                "DELETE FROM sync_tombstones WHERE table_name = %s AND row_version <= %s",
+                [(table, row['version'])])
+    if removed:
+        logger.info(f"Pruned {removed} sync tombstone(s) older than {days} days")
+    return removed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Delta sync versions and tombstones")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('ddl', help="print the migration")
+    prune_parser = sub.add_parser('prune', help="delete old tombstones")
+    prune_parser.add_argument('--days', type=int, default=SYNC_TOMBSTONE_DAYS)
+    args = parser.parse_args(argv)
+
+    if args.command == 'ddl':
+        for statement in migration_statements():
+            if statement.startswith('CREATE TRIGGER'):
+                print(f"DELIMITER $$\n{statement}$$\nDELIMITER ;\n")
+            else:
+                print(statement + ';\n')
+    else:
+        removed = prune(DatabaseConnection(), days=args.days)
+        print(f"Removed {removed} tombstone(s).")
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(main())
@@ -0,0 +1,311 @@
+"""Larval growth and harvest forecasts for active feeding trays.
+
+A tray is active while it has recent feeding_schedule rows and no
+feeding_harvest_yield row. Every active tray's weighings are packed into
+padded NumPy arrays and all trays are fitted in one batched solve of
+
+    ln(larvae_weight_g) = a + b * s + c * s**2,    s = larvae_age_days / AGE_SCALE
+
+with a ridge penalty that pulls each tray towards the pooled fit of already
+harvested trays, so trays with one or two weighings still get a sensible
+curve. Harvested trays also supply the harvest targets: the typical final
+weighing, the typical harvest age and the feed-to-yield factor used for
+``predicted_yield_kg``.
+
+Forecasts are cached per tray in ``larval_growth_forecasts`` together with the
+row count and last schedule_id they were computed from; ``refresh`` only
+refits trays whose feeding rows changed (or every tray when the harvest
+history changed).
+"""
+import logging
+from datetime import date, timedelta
+
+import numpy as np
+
+from config import FORECAST_ACTIVE_DAYS, FORECAST_MAX_AGE_DAYS, FORECAST_DEFAULT_HARVEST_AGE
+from database import DatabaseConnection
+
+logger = logging.getLogger(__name__)
+
+AGE_SCALE = 10.0
+# Weight of the pooled curve, in "equivalent weighings", for every tray fit
+PRIOR_STRENGTH = 2.0
+IN_CHUNK = 500
+# Largest value of the DECIMAL(10, 2) prediction columns
+DECIMAL_MAX = 99999999.99
+# A curve that bends upward grows without limit; no harvest weight is taken
+# to exceed this multiple of the typical final weighing
+MAX_OVER_TARGET = 2.0
+
+SERIES_COLUMNS = "tray_batch_id, feeding_date, larvae_age_days, larvae_weight_g, feed_quantity_kg"
+
+UPSERT_FORECAST_QUERY = """
+    INSERT INTO larval_growth_forecasts (
+        tray_batch_id, row_count, last_schedule_id, model_version, coef_a, coef_b, coef_c, rmse_log,
+        current_age_days, last_weight_g, harvest_age_days, predicted_harvest_date,
+        predicted_weight_g, predicted_feed_kg, predicted_yield_kg, computed_at
+    ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, NOW())
+    ON DUPLICATE KEY UPDATE
+        row_count = VALUES(row_count), last_schedule_id = VALUES(last_schedule_id),
+        model_version = VALUES(model_version), coef_a = VALUES(coef_a), coef_b = VALUES(coef_b),
+        coef_c = VALUES(coef_c), rmse_log = VALUES(rmse_log), current_age_days = VALUES(current_age_days),
+        last_weight_g = VALUES(last_weight_g), harvest_age_days = VALUES(harvest_age_days),
+        predicted_harvest_date = VALUES(predicted_harvest_date), predicted_weight_g = VALUES(predicted_weight_g),
+        predicted_feed_kg = VALUES(predicted_feed_kg), predicted_yield_kg = VALUES(predicted_yield_kg),
+        computed_at = NOW()
+"""
+
+
+def _chunks(items, size=IN_CHUNK):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def load_series(db, trays):
+    """Feeding rows of ``trays`` ordered by tray and age."""
+    rows = []
+    for chunk in _chunks(list(trays)):
+        placeholders = ', '.join(['%s'] * len(chunk))
+        rows.extend(db.fetch_all(f"""
+            SELECT {SERIES_COLUMNS} FROM feeding_schedule
+            WHERE tray_batch_id IN ({placeholders})
+            ORDER BY tray_batch_id, larvae_age_days, schedule_id
+        """, tuple(chunk)))
+    return rows
+
+
+class SeriesBatch:
+    """Feeding rows packed into (trays x max_points) arrays with a validity mask."""
+
+    def __init__(self, rows):
+        n_rows = len(rows)
+        tray_ids = np.array([row['tray_batch_id'] for row in rows], dtype=object)
+        # Rows arrive grouped by tray; group ids and positions come from the run boundaries
+        starts = np.flatnonzero(np.r_[True, tray_ids[1:] != tray_ids[:-1]]) if n_rows else np.array([], int)
+        group = np.cumsum(np.r_[0, tray_ids[1:] != tray_ids[:-1]]) if n_rows else np.array([], int)
+        position = np.arange(n_rows) - starts[group] if n_rows else np.array([], int)
+        counts = np.diff(np.r_[starts, n_rows])
+
+        self.trays = list(tray_ids[starts])
+        shape = (len(self.trays), int(counts.max()) if n_rows else 0)
+        self.counts = counts
+        self.age = np.zeros(shape)
+        self.weight = np.zeros(shape)
+        self.feed = np.zeros(shape)
+        self.mask = np.zeros(shape, dtype=bool)
+        self.age[group, position] = [float(row['larvae_age_days']) for row in rows]
+        self.weight[group, position] = [float(row['larvae_weight_g'] or 0) for row in rows]
+        self.feed[group, position] = [float(row['feed_quantity_kg'] or 0) for row in rows]
+        self.mask[group, position] = True
+        # Weighings of zero cannot be log-transformed; they still count as feedings
+        self.fit_mask = self.mask & (self.weight > 0)
+        last = starts + counts - 1 if n_rows else np.array([], int)
+        self.last_date = [rows[i]['feeding_date'] for i in last]
+        self.last_age = self.age[np.arange(len(self.trays)), counts - 1] if n_rows else np.zeros(0)
+        self.last_weight = self.weight[np.arange(len(self.trays)), counts - 1] if n_rows else np.zeros(0)
+
+    def design(self):
+        s = self.age / AGE_SCALE
+        return np.stack([np.ones_like(s), s, s * s], axis=-1)
+
+
+def fit_curves(batch, prior):
+    """Ridge-regularized quadratic fit of log weight for every tray at once.
+
+    Solves (X'X + kI) beta = X'y + k * prior per tray; returns (coefs, rmse).
+    """
+    X = batch.design() * batch.fit_mask[..., None]
+    y = np.where(batch.fit_mask, np.log(np.where(batch.fit_mask, batch.weight, 1.0)), 0.0)
+    ridge = PRIOR_STRENGTH * np.eye(3)
+    xtx = np.einsum('nmi,nmj->nij', X, X) + ridge
+    xty = np.einsum('nmi,nm->ni', X, y) + PRIOR_STRENGTH * prior
+    coefs = np.linalg.solve(xtx, xty[..., None])[..., 0]
+    residuals = (np.einsum('nmi,ni->nm', X, coefs) - y) * batch.fit_mask
+    points = np.maximum(batch.fit_mask.sum(axis=1), 1)
+    rmse = np.sqrt((residuals ** 2).sum(axis=1) / points)
+    return coefs, rmse
+
+
+def predict_log_weight(coefs, ages):
+    s = np.asarray(ages, dtype=float) / AGE_SCALE
+    return coefs[:, [0]] + coefs[:, [1]] * s + coefs[:, [2]] * s * s
+
+
+class HarvestModel:
+    """Targets learned from harvested trays (or defaults without history)."""
+
+    def __init__(self, prior, target_log_weight, harvest_age, yield_per_feed_kg, version):
+        self.prior = prior
+        self.target_log_weight = target_log_weight
+        self.harvest_age = harvest_age
+        self.yield_per_feed_kg = yield_per_feed_kg
+        self.version = version
+
+
+_model_cache = {}
+
+
+def harvest_model(db):
+    """Fit the pooled prior and harvest targets; cached until the harvest history changes."""
+    stamp = db.fetch_one("SELECT COUNT(*) AS n, MAX(harvest_id) AS last_id FROM feeding_harvest_yield")
+    version = f"{stamp['n']}:{stamp['last_id']}" if stamp else "0:None"
+    if version in _model_cache:
+        return _model_cache[version]
+
+    harvests = db.fetch_all("""
+        SELECT tray_batch_id, SUM(larvae_collected_kg) AS collected_kg
+        FROM feeding_harvest_yield GROUP BY tray_batch_id
+    """)
+    collected = {row['tray_batch_id']: float(row['collected_kg'] or 0) for row in harvests}
+    rows = load_series(db, collected) if collected else []
+    prior = np.array([0.0, 1.0, 0.0])
+    target, age, factor = None, float(FORECAST_DEFAULT_HARVEST_AGE), None
+    if rows:
+        batch = SeriesBatch(rows)
+        fit = batch.fit_mask
+        if fit.sum() >= 3:
+            # Pooled fit of every weighing of every harvested tray
+            X = batch.design()[fit]
+            prior = np.linalg.lstsq(X, np.log(batch.weight[fit]), rcond=None)[0]
+        finals = batch.last_weight[batch.last_weight > 0]
+        if finals.size:
+            target = float(np.median(np.log(finals)))
+        age = float(np.median(batch.last_age))
+        feed_totals = batch.feed.sum(axis=1)
+        yields = np.array([collected[t] for t in batch.trays])
+        if (feed_totals > 0).any():
+            # Least squares through the origin: yield = factor * total feed
+            factor = float((yields * feed_totals).sum() / (feed_totals ** 2).sum())
+
+    model = HarvestModel(prior, target, min(age, FORECAST_MAX_AGE_DAYS), factor, version)
+    _model_cache.clear()
+    _model_cache[version] = model
+    return model
+
+
+def forecast(batch, model):
+    """Forecast rows (dicts) for every tray in ``batch``."""
+    n = len(batch.trays)
+    if not n:
+        return []
+    coefs, rmse = fit_curves(batch, model.prior)
+    grid = np.arange(FORECAST_MAX_AGE_DAYS + 1)
+    curve = predict_log_weight(coefs, grid)
+    not_before = grid[None, :] >= batch.last_age[:, None]
+
+    if model.target_log_weight is not None:
+        reached = (curve >= model.target_log_weight) & not_before
+        harvest_age = np.where(reached.any(axis=1), grid[reached.argmax(axis=1)], np.nan)
+    else:
+        harvest_age = np.full(n, np.nan)
+    # Trays that never reach the target are harvested where growth levels off,
+    # or at the usual harvest age
+    vertex = np.where(coefs[:, 2] < 0, -coefs[:, 1] / (2 * coefs[:, 2]) * AGE_SCALE, np.nan)
+    fallback = np.where(np.isfinite(vertex) & (vertex > batch.last_age), vertex, model.harvest_age)
+    harvest_age = np.where(np.isnan(harvest_age), fallback, harvest_age)
+    harvest_age = np.clip(np.maximum(harvest_age, batch.last_age), 0, FORECAST_MAX_AGE_DAYS).round()
+
+    with np.errstate(over='ignore'):
+        predicted_weight = np.exp(predict_log_weight(coefs, harvest_age[:, None])[:, 0])
+    ceiling = DECIMAL_MAX
+    if model.target_log_weight is not None:
+        ceiling = min(ceiling, np.exp(model.target_log_weight) * MAX_OVER_TARGET)
+    predicted_weight = np.minimum(predicted_weight, np.maximum(ceiling, batch.last_weight))
+    # Remaining feed at the tray's own feeding rate so far
+    feed_so_far = (batch.feed * batch.mask).sum(axis=1)
+    feed_per_day = feed_so_far / (batch.last_age - batch.age[:, 0] + 1)
+    predicted_feed = feed_so_far + feed_per_day * (harvest_age - batch.last_age)
+    predicted_yield = predicted_feed * model.yield_per_feed_kg if model.yield_per_feed_kg is not None else None
+
+    results = []
+    for i, tray in enumerate(batch.trays):
+        last_date = batch.last_date[i]
+        results.append({
+            'tray_batch_id': tray,
+            'coefs': coefs[i],
+            'rmse_log': float(rmse[i]),
+            'current_age_days': int(batch.last_age[i]),
+            'last_weight_g': float(batch.last_weight[i]),
+            'harvest_age_days': int(harvest_age[i]),
+            'predicted_harvest_date': last_date + timedelta(days=int(harvest_age[i] - batch.last_age[i])),
+            'predicted_weight_g': float(predicted_weight[i]),
+            'predicted_feed_kg': float(predicted_feed[i]),
+            'predicted_yield_kg': float(predicted_yield[i]) if predicted_yield is not None else None,
+        })
+    return results
+
+
+def active_signatures(db):
+    """tray -> (row count, last schedule_id) for unharvested trays fed recently."""
+    rows = db.fetch_all("""
+        SELECT s.tray_batch_id, COUNT(*) AS row_count, MAX(s.schedule_id) AS last_schedule_id
+        FROM feeding_schedule s
+        WHERE s.tray_batch_id IN (
+            SELECT tray_batch_id FROM feeding_schedule WHERE feeding_date >= %s
+        )
+        AND NOT EXISTS (SELECT 1 FROM feeding_harvest_yield h WHERE h.tray_batch_id = s.tray_batch_id)
+        GROUP BY s.tray_batch_id
+    """, (date.today() - timedelta(days=FORECAST_ACTIVE_DAYS),))
+    return {row['tray_batch_id']: (int(row['row_count']), int(row['last_schedule_id'])) for row in rows}
+
+
+def _storable(result):
+    """Whether every number of a forecast row fits its column."""
+    decimals = [result[key] for key in ('last_weight_g', 'predicted_weight_g', 'predicted_feed_kg',
+                                         'predicted_yield_kg') if result[key] is not None]
+    return (np.isfinite(result['coefs']).all() and np.isfinite(result['rmse_log'])
+            and all(np.isfinite(value) and abs(value) <= DECIMAL_MAX for value in decimals))
+
+
+def refresh(db=None):
+    """Refit the trays whose feeding rows changed; returns the number refitted."""
+    db = db or DatabaseConnection()
+    model = harvest_model(db)
+    active = active_signatures(db)
+    cached = {row['tray_batch_id']: row for row in db.fetch_all(
+        "SELECT tray_batch_id, row_count, last_schedule_id, model_version FROM larval_growth_forecasts")}
+
+    stale = [tray for tray, signature in active.items()
+             if tray not in cached
+             or (cached[tray]['row_count'], cached[tray]['last_schedule_id']) != signature
+             or cached[tray]['model_version'] != model.version]
+    gone = [tray for tray in cached if tray not in active]
+
+    if stale:
+        results = forecast(SeriesBatch(load_series(db, stale)), model)
+        storable = [r for r in results if _storable(r)]
+        if len(storable) < len(results):
+            # One out-of-range value would fail the whole upsert under strict sql_mode
+            logger.warning(f"Larval forecasts: skipped {len(results) - len(storable)} trays "
+                           f"with non-finite or out-of-range predictions")
+        results = storable
+    if stale and results:
+        db.execute_many(UPSERT_FORECAST_QUERY, [(
+            r['tray_batch_id'], active[r['tray_batch_id']][0], active[r['tray_batch_id']][1], model.version,
+            *(float(c) for c in r['coefs']), r['rmse_log'], r['current_age_days'], r['last_weight_g'],
+            r['harvest_age_days'], r['predicted_harvest_date'], r['predicted_weight_g'],
+            r['predicted_feed_kg'], r['predicted_yield_kg'],
+        ) for r in results])
+    for chunk in _chunks(gone):
+        placeholders = ', '.join(['%s'] * len(chunk))
+        db.execute_query(f"DELETE FROM larval_growth_forecasts WHERE tray_batch_id IN ({placeholders})",
+                         tuple(chunk))
+    if stale or gone:
+        logger.info(f"Larval forecasts: refitted {len(stale)} trays, dropped {len(gone)}")
+    return len(stale)
+
+
+def get_forecasts(db=None):
+    db = db or DatabaseConnection()
+    rows = db.fetch_all("""
+        SELECT tray_batch_id, current_age_days, last_weight_g, harvest_age_days, predicted_harvest_date,
+               predicted_weight_g, predicted_feed_kg, predicted_yield_kg, rmse_log, computed_at
+        FROM larval_growth_forecasts ORDER BY predicted_harvest_date, tray_batch_id
+    """)
+    for row in rows:
+        for key, value in row.items():
+            if isinstance(value, date):
+                row[key] = value.isoformat()
+            elif value is not None and not isinstance(value, (int, float, str)):
+                row[key] = float(value)
+    return rows
@@ -0,0 +1,58 @@
+"""Login and registration forms.
+
+Imported by the /login and /register views on first use, so WTForms and the
+e-mail validator are not loaded while a worker boots.
+"""
+from flask_wtf import FlaskForm
+from wtforms import StringField, PasswordField, BooleanField, SubmitField
+from wtforms.validators import DataRequired, Email, Length, EqualTo, ValidationError, Regexp
+from database import DatabaseConnection
+
+db = DatabaseConnection()
+
+# Enhanced Login form with security
+class LoginForm(FlaskForm):
+    email = StringField('Email', validators=[
+        DataRequired(), 
+        Email(message='Please enter a valid email address')
+    ])
+    password = PasswordField('Password', validators=[DataRequired()])
+    remember = BooleanField('Remember Me')
+    submit = SubmitField('Login')
+
+# Enhanced Registration form with security
+class RegistrationForm(FlaskForm):
+    username = StringField('Username', validators=[
+        DataRequired(), 
+        Length(min=3, max=20, message='Username must be between 3 and 20 characters'),
+        Regexp(r'^[a-zA-Z0-9_]+$', message='Username can only contain letters, numbers, and underscores')
+    ])
+    full_name = StringField('Full Name', validators=[
+        DataRequired(),
+        Length(min=2, max=100, message='Full name must be between 2 and 100 characters')
+    ])
+    email = StringField('Email', validators=[
+        DataRequired(), 
+        Email(message='Please enter a valid email address')
+    ])
+    password = PasswordField('Password', validators=[
+        DataRequired(),
+        Length(min=8, message='Password must be at least 8 characters long'),
+        Regexp(r'^(?=.*[a-z])(?=.*[A-Z])(?=.*\d)(?=.*[@$!%*?&])[A-Za-z\d@$!%*?&]', 
+               message='Password must contain at least one uppercase letter, one lowercase letter, one number, and one special character')
+    ])
+    confirm_password = PasswordField('Confirm Password', validators=[
+        DataRequired(), 
+        EqualTo('password', message='Passwords must match')
+    ])
+    submit = SubmitField('Register')
+
+    def validate_username(self, username):
+        result = db.fetch_one("SELECT user_id FROM users WHERE username = %s", (username.data,))
+        if result:
+            raise ValidationError('Username already taken. Please choose another one.')
+
+    def validate_email(self, email):
+        result = db.fetch_one("SELECT user_id FROM users WHERE email = %s", (email.data,))
+        if result:
+            raise ValidationError('Email already registered. Please use another email.')
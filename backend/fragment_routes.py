@@ -0,0 +1,47 @@
+"""Section fragments of the dashboard (frontend/sections/*.html).
+
+index.html is only the shell; sections.js fetches a section's markup and
+scripts the first time it is shown and prefetches the rest when the tablet
+is idle. Fragments are sent with a content hash as ETag and
+``Cache-Control: no-cache``, so browsers keep them and revalidate: an
+unchanged fragment is answered 304 with no body, by any gunicorn worker.
+"""
+import hashlib
+import os
+import re
+
+from flask import Blueprint, abort, make_response, request
+
+FRAGMENT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend', 'sections')
+
+fragment_api = Blueprint('fragment_api', __name__)
+
+# name -> (mtime_ns, body, etag); reloaded when the file changes
+_cache = {}
+
+
+def _load(name):
+    path = os.path.join(FRAGMENT_DIR, f"{name}.html")
+    mtime = os.stat(path).st_mtime_ns
+    cached = _cache.get(name)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'rb') as fh:
+            body = fh.read()
+        cached = (mtime, body, hashlib.sha256(body).hexdigest()[:32])
+        _cache[name] = cached
+    return cached
+
+
+@fragment_api.route('/sections/<name>.html', methods=['GET'])
+def get_fragment(name):
+    if not re.fullmatch(r'[a-z_]+', name):
+        abort(404)
+    try:
+        _, body, etag = _load(name)
+    except FileNotFoundError:
+        abort(404)
+    response = make_response(body)
+    response.mimetype = 'text/html'
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
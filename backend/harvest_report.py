@@ -0,0 +1,276 @@
+"""Incremental harvest yield reports emailed with a CSV attachment.
+
+Each run is recorded in ``harvest_report_runs``. Without an explicit date
+range a run covers only the harvest rows added since the last sent
+incremental report (tracked by ``harvest_id``), so report time and email size
+depend on new rows rather than the whole history. Rows are streamed from a
+server-side cursor into a CSV attachment and the body carries only aggregated
+totals. Runs execute on a background worker, and every run holds the MySQL
+lock ``harvest_report`` from reading the previous watermark until it records
+its own, so runs from different workers or the scheduler cannot report the
+same rows twice. Runs still queued when a worker stopped are picked up again
+at startup.
+"""
+import csv
+import io
+import logging
+import tempfile
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime
+
+import mysql.connector
+
+from config import ADMIN_EMAIL, DB_CONFIG, HARVEST_REPORT_MAX_ROWS, HARVEST_REPORT_MAX_QUEUED
+from database import DatabaseConnection
+from mailer import send_email
+
+logger = logging.getLogger(__name__)
+
+CSV_COLUMNS = ('harvest_id', 'tray_batch_id', 'harvest_date', 'instar_stage', 'larvae_collected_kg',
+               'processing_method', 'storage_temperature_celsius', 'notes')
+FETCH_SIZE = 1000
+# Spool the CSV in memory up to this size before using a temporary file
+SPOOL_MAX_BYTES = 1024 * 1024
+LOCK_NAME = 'harvest_report'
+# How long a run waits for the one ahead of it (the scheduler job timeout)
+LOCK_WAIT_SECONDS = 1800
+
+# Runs of this process go through one thread; _report_lock orders them with
+# every other process
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='harvest-report')
+
+
+class ReportLockTimeout(Exception):
+    """Raised when another run held the report lock for LOCK_WAIT_SECONDS."""
+
+
+class QueueFull(Exception):
+    """Raised when HARVEST_REPORT_MAX_QUEUED runs are already waiting or running."""
+
+    def __init__(self, retry_after=60):
+        super().__init__(f"{HARVEST_REPORT_MAX_QUEUED} harvest reports are already queued")
+        self.retry_after = retry_after
+
+
+@contextmanager
+def _report_lock():
+    """Hold GET_LOCK(LOCK_NAME) for the block.
+
+    The lock lives on its own connection outside the pool, like the
+    scheduler's leader lock: a run may wait on it for LOCK_WAIT_SECONDS, and
+    a pooled connection parked that long is one requests cannot use.
+    """
+    conn = mysql.connector.connect(**DB_CONFIG)
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, %s)", (LOCK_NAME, LOCK_WAIT_SECONDS))
+        if cursor.fetchone()[0] != 1:
+            raise ReportLockTimeout(f"Another harvest report held the lock for {LOCK_WAIT_SECONDS}s")
+        try:
+            yield
+        finally:
+            cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+            cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _last_reported_id(db):
+    row = db.fetch_one("""
+        SELECT MAX(last_harvest_id) AS last_id FROM harvest_report_runs
+        WHERE incremental = 1 AND status = 'sent'
+    """)
+    return (row or {}).get('last_id') or 0
+
+
+def _row_filter(run):
+    """WHERE clause and params selecting the rows of one run."""
+    if run['incremental']:
+        return "harvest_id > %s", [run['after_id']]
+    where, params = [], []
+    if run['date_from']:
+        where.append("harvest_date >= %s")
+        params.append(run['date_from'])
+    if run['date_to']:
+        where.append("harvest_date <= %s")
+        params.append(run['date_to'])
+    return ' AND '.join(where) or '1=1', params
+
+
+def summarize(db, where, params, last_id):
+    """Totals for the summary; aggregated by MySQL instead of row by row in Python."""
+    totals = db.fetch_one(f"""
+        SELECT COUNT(*) AS row_count, SUM(larvae_collected_kg) AS total_kg,
+               MIN(harvest_date) AS first_date, MAX(harvest_date) AS last_date
+        FROM feeding_harvest_yield WHERE {where} AND harvest_id <= %s
+    """, tuple(params + [last_id]))
+    by_method = db.fetch_all(f"""
+        SELECT IFNULL(processing_method, 'unspecified') AS method, COUNT(*) AS row_count,
+               SUM(larvae_collected_kg) AS total_kg
+        FROM feeding_harvest_yield WHERE {where} AND harvest_id <= %s
+        GROUP BY method ORDER BY total_kg DESC
+    """, tuple(params + [last_id]))
+    return totals, by_method
+
+
+def write_csv(db, where, params, out, limit):
+    """Stream matching rows into ``out``; returns (rows written, last harvest_id)."""
+    conn = db.get_connection()
+    cursor = None
+    written, last_id = 0, 0
+    try:
+        cursor = conn.cursor()
+        cursor.execute(
+            f"SELECT {', '.join(CSV_COLUMNS)} FROM feeding_harvest_yield WHERE {where} "
+            f"ORDER BY harvest_id LIMIT %s", tuple(params + [limit]))
+        writer = csv.writer(out)
+        writer.writerow(CSV_COLUMNS)
+        while True:
+            rows = cursor.fetchmany(FETCH_SIZE)
+            if not rows:
+                break
+            writer.writerows(rows)
+            written += len(rows)
+            last_id = rows[-1][0]
+    finally:
+        if cursor:
+            cursor.close()
+        conn.rollback()
+        conn.close()
+    return written, last_id
+
+
+def format_body(run, totals, by_method, truncated):
+    if run['incremental']:
+        scope = "new harvest records since the previous report"
+    else:
+        scope = f"harvest records from {run['date_from'] or 'the beginning'} to {run['date_to'] or 'today'}"
+    lines = [
+        f"Harvest Yield Report ({date.today()})",
+        "",
+        f"Covers {scope}.",
+        f"Records: {totals['row_count']}",
+        f"Larvae collected: {float(totals['total_kg'] or 0):.2f} kg",
+        f"Harvest dates: {totals['first_date']} to {totals['last_date']}",
+        "",
+        "By processing method:",
+    ]
+    lines.extend(f"  {row['method']}: {float(row['total_kg'] or 0):.2f} kg ({row['row_count']} records)"
+                 for row in by_method)
+    if truncated:
+        rest = "the rest will follow in the next report" if run['incremental'] else "narrow the date range for the rest"
+        lines += ["", f"Only the first {HARVEST_REPORT_MAX_ROWS} records are included; {rest}."]
+    lines += ["", "Full records are attached as CSV."]
+    return '\n'.join(lines)
+
+
+def _finish(db, run_id, status, **fields):
+    fields.update(status=status)
+    assignments = ', '.join(f"{name} = %s" for name in fields)
+    db.execute_query(f"UPDATE harvest_report_runs SET {assignments}, finished_at = NOW() WHERE run_id = %s",
+                     tuple(fields.values()) + (run_id,))
+
+
+def run_report(run_id, db=None):
+    """Build and send one queued report; executed on the worker thread.
+
+    A run that is no longer queued when the lock is granted was finished by
+    another process and is skipped.
+    """
+    db = db or DatabaseConnection()
+    try:
+        with _report_lock():
+            _run_locked(db, run_id)
+    except Exception as e:
+        logger.error(f"Harvest report {run_id} failed: {e}")
+        _finish(db, run_id, 'failed', error=str(e)[:255])
+
+
+def _run_locked(db, run_id):
+    # Read on the primary: the run was inserted moments ago and a replica may lag
+    with db.transaction():
+        run = db.fetch_one("SELECT * FROM harvest_report_runs WHERE run_id = %s", (run_id,))
+        if run is None or run['status'] != 'queued':
+            return
+        if run['incremental']:
+            run['after_id'] = _last_reported_id(db)
+    where, params = _row_filter(run)
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES, mode='w+b') as spool:
+        text = io.TextIOWrapper(spool, encoding='utf-8', newline='')
+        written, last_id = write_csv(db, where, params, text, HARVEST_REPORT_MAX_ROWS)
+        text.flush()
+        text.detach()
+        if not written:
+            _finish(db, run_id, 'empty', row_count=0)
+            return
+        with db.transaction():
+            truncated = db.fetch_one(
+                f"SELECT 1 AS more FROM feeding_harvest_yield WHERE {where} AND harvest_id > %s LIMIT 1",
+                tuple(params + [last_id])) is not None
+            totals, by_method = summarize(db, where, params, last_id)
+        subject = f"Harvest Yield Report ({date.today()})"
+        filename = f"harvest_yield_{datetime.now():%Y%m%d_%H%M}.csv"
+        sent = send_email(subject, format_body(run, totals, by_method, truncated), ADMIN_EMAIL,
+                          attachments=[(filename, spool, 'csv')])
+    if sent:
+        _finish(db, run_id, 'sent', row_count=written, last_harvest_id=last_id)
+    else:
+        _finish(db, run_id, 'failed', error='Email could not be sent')
+
+
+def create_run(requested_by=None, date_from=None, date_to=None, db=None):
+    """Record a queued run; incremental unless a date range is given."""
+    db = db or DatabaseConnection()
+    incremental = not (date_from or date_to)
+    return db.execute_query("""
+        INSERT INTO harvest_report_runs (requested_by, incremental, date_from, date_to, status)
+        VALUES (%s, %s, %s, %s, 'queued')
+    """, (requested_by, int(incremental), date_from, date_to))
+
+
+def queue_report(requested_by=None, date_from=None, date_to=None, db=None):
+    """Record a run and hand it to the worker; returns the run id.
+
+    Runs outlive the request that queued them, so the backlog is bounded
+    here, counting the 'queued' runs of every worker: raises QueueFull when
+    HARVEST_REPORT_MAX_QUEUED are already waiting or running.
+    """
+    db = db or DatabaseConnection()
+    with db.transaction():
+        row = db.fetch_one("SELECT COUNT(*) AS queued FROM harvest_report_runs WHERE status = 'queued'")
+        if (row or {}).get('queued', 0) >= HARVEST_REPORT_MAX_QUEUED:
+            raise QueueFull()
+        run_id = create_run(requested_by, date_from, date_to, db)
+    _executor.submit(run_report, run_id)
+    return run_id
+
+
+def resume_queued(db=None):
+    """Requeue runs left 'queued' by a worker that stopped; called at startup.
+
+    Every worker does this, so a run may be submitted more than once;
+    run_report skips it once one of them has finished it.
+    """
+    db = db or DatabaseConnection()
+    rows = db.fetch_all("SELECT run_id FROM harvest_report_runs WHERE status = 'queued' ORDER BY run_id")
+    for row in rows:
+        _executor.submit(run_report, row['run_id'])
+    if rows:
+        logger.info(f"Resumed {len(rows)} queued harvest reports")
+    return len(rows)
+
+
+def get_run(run_id, db=None):
+    db = db or DatabaseConnection()
+    run = db.fetch_one("""
+        SELECT run_id, incremental, date_from, date_to, status, row_count, last_harvest_id,
+               error, created_at, finished_at
+        FROM harvest_report_runs WHERE run_id = %s
+    """, (run_id,))
+    if run:
+        for key, value in run.items():
+            if isinstance(value, (date, datetime)):
+                run[key] = value.isoformat()
+    return run
@@ -0,0 +1,124 @@
+"""Liveness and readiness state for /healthz and /readyz.
+
+A background thread pings the database every HEALTH_PROBE_INTERVAL seconds
+on a dedicated connection outside the pool, and counts the queued harvest
+report emails while it is there. The probe endpoints only read the cached
+result plus in-process counters, so a probe never waits on MySQL and never
+takes a connection that a request could use.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+
+import mysql.connector
+
+import startup
+from config import DB_CONFIG, HEALTH_PROBE_INTERVAL, HEALTH_PROBE_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+STARTED_AT = time.monotonic()
+STARTED_AT_WALL = datetime.now()
+
+OUTBOX_QUERY = """
+    SELECT COUNT(*), TIMESTAMPDIFF(SECOND, MIN(created_at), NOW())
+    FROM harvest_report_runs WHERE status = 'queued'
+"""
+
+
+class HealthProbe:
+    def __init__(self, interval=HEALTH_PROBE_INTERVAL):
+        self.interval = interval
+        self._state = {'db_ok': None, 'checked_at': None}
+        self._conn = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name='health-probe', daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=HEALTH_PROBE_TIMEOUT + 1)
+            self._thread = None
+        self._disconnect()
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    def _disconnect(self):
+        if self._conn is not None:
+            try:
+                self._conn.close()
+            except mysql.connector.Error:
+                pass
+            self._conn = None
+
+    def refresh(self):
+        """Ping the database and read the outbox backlog; runs on the probe thread."""
+        started = time.monotonic()
+        state = {'db_ok': False, 'checked_at': started}
+        try:
+            if self._conn is None or not self._conn.is_connected():
+                self._disconnect()
+                self._conn = mysql.connector.connect(**DB_CONFIG, connection_timeout=HEALTH_PROBE_TIMEOUT)
+            cursor = self._conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.fetchall()
+            state.update(db_ok=True, db_latency_ms=round((time.monotonic() - started) * 1000, 1))
+            try:
+                cursor.execute(OUTBOX_QUERY)
+                queued, oldest = cursor.fetchone()
+                state.update(outbox_queued=queued, outbox_oldest_seconds=oldest)
+            except mysql.connector.Error as e:
+                state['outbox_error'] = str(e)
+            cursor.close()
+        except mysql.connector.Error as e:
+            if self._state.get('db_ok'):
+                logger.warning(f"Health probe lost the database: {e}")
+            state['db_error'] = str(e)
+            self._disconnect()
+        self._state = state
+
+    def snapshot(self):
+        return dict(self._state)
+
+
+probe = HealthProbe()
+
+
+def uptime_seconds():
+    return round(time.monotonic() - STARTED_AT, 1)
+
+
+def readiness(pool, sensor_buffer=None, report_executor=None):
+    """(ready, payload) from the cached probe and in-process counters only."""
+    state = probe.snapshot()
+    checked_at = state.pop('checked_at')
+    age = None if checked_at is None else round(time.monotonic() - checked_at, 1)
+    # A probe that stopped refreshing is as bad as a failed one
+    ready = bool(state['db_ok']) and age is not None and age <= 3 * probe.interval
+    payload = {
+        'status': 'ready' if ready else ('starting' if checked_at is None else 'unavailable'),
+        'uptime_seconds': uptime_seconds(),
+        'started_at': STARTED_AT_WALL.isoformat(timespec='seconds'),
+        'database': {**state, 'checked_seconds_ago': age},
+        'startup': startup.report(),
+    }
+    if pool is not None:
+        # Connections waiting in the pool's queue are the ones a request can take now
+        queue = getattr(pool, '_cnx_queue', None)
+        payload['pool'] = {'size': pool.pool_size, 'available': queue.qsize() if queue is not None else None}
+    if report_executor is not None:
+        work_queue = getattr(report_executor, '_work_queue', None)
+        payload['report_worker_queue'] = work_queue.qsize() if work_queue is not None else None
+    if sensor_buffer is not None:
+        payload['sensor_buffer'] = sensor_buffer.snapshot()
+    return ready, payload
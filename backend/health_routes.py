@@ -0,0 +1,27 @@
+from flask import Blueprint, jsonify
+
+import harvest_report
+import health
+import sensor_ingestion
+from database import DatabaseConnection
+
+health_api = Blueprint('health_api', __name__)
+
+
+def _no_store(response, status=200):
+    response.headers['Cache-Control'] = 'no-store'
+    return response, status
+
+
+@health_api.route('/healthz', methods=['GET'])
+def healthz():
+    """Liveness: the worker is answering. No I/O."""
+    return _no_store(jsonify({'status': 'ok', 'uptime_seconds': health.uptime_seconds()}))
+
+
+@health_api.route('/readyz', methods=['GET'])
+def readyz():
+    """Readiness: 503 until the background probe has reached the database."""
+    ready, payload = health.readiness(DatabaseConnection._pool, sensor_ingestion._buffer,
+                                      harvest_report._executor)
+    return _no_store(jsonify(payload), 200 if ready else 503)
@@ -0,0 +1,122 @@
+"""Replay-safe POSTs with the ``Idempotency-Key`` header.
+
+The first request with a key claims it in ``idempotency_keys``, runs
+normally, and stores its response. A retry with the same key gets that
+response back without the handler running again, so there is no second
+INSERT and no second confirmation email. Keys are scoped to the user and
+stored as SHA-256 hashes, and they expire after IDEMPOTENCY_TTL_HOURS.
+
+A key that is still being processed answers 409, and one reused with a
+different request answers 422. A claim left by a request that died
+mid-flight lapses after IDEMPOTENCY_PENDING_SECONDS. Server errors are
+not stored, so a request that failed with a 5xx can be retried with the
+same key. A response too large to store is replaced by a short JSON note
+with the same status, since the request did run and must not run again.
+"""
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime, timedelta
+
+from config import IDEMPOTENCY_TTL_HOURS, IDEMPOTENCY_PENDING_SECONDS
+
+logger = logging.getLogger(__name__)
+
+MAX_KEY_LENGTH = 255
+# Larger request bodies are fingerprinted by length only; larger responses are
+# replaced by a short note
+MAX_HASHED_BODY = 1024 * 1024
+MAX_STORED_RESPONSE = 64 * 1024
+
+CLAIMED, REPLAY, IN_PROGRESS, MISMATCH = 'claimed', 'replay', 'in_progress', 'mismatch'
+
+# An expired row is taken over; a live one is left untouched (expires_at is
+# assigned last so every IF sees the old value)
+CLAIM_QUERY = """
+    INSERT INTO idempotency_keys (user_id, key_hash, request_hash, claim_id, created_at, expires_at)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        request_hash = IF(expires_at <= VALUES(created_at), VALUES(request_hash), request_hash),
+        claim_id = IF(expires_at <= VALUES(created_at), VALUES(claim_id), claim_id),
+        status_code = IF(expires_at <= VALUES(created_at), NULL, status_code),
+        content_type = IF(expires_at <= VALUES(created_at), NULL, content_type),
+        response_body = IF(expires_at <= VALUES(created_at), NULL, response_body),
+        created_at = IF(expires_at <= VALUES(created_at), VALUES(created_at), created_at),
+        expires_at = IF(expires_at <= VALUES(created_at), VALUES(expires_at), expires_at)
+"""
+
+
+def valid_key(key):
+    return 0 < len(key) <= MAX_KEY_LENGTH and key.isprintable()
+
+
+def fingerprint(method, path, query_string, body):
+    digest = hashlib.sha256()
+    for part in (method.encode(), path.encode(), query_string, body):
+        digest.update(part)
+        digest.update(b'\0')
+    return digest.digest()
+
+
+def claim(db, user_id, key, request_hash):
+    """Claim ``key`` for this request; returns (outcome, claim) where claim is
+    the token to pass to complete()/release() for CLAIMED and the stored
+    row for REPLAY."""
+    key_hash = hashlib.sha256(key.encode()).digest()
+    claim_id = os.urandom(16)
+    now = datetime.now()
+    with db.transaction():
+        db.execute_query(CLAIM_QUERY, (user_id, key_hash, request_hash, claim_id, now,
+                                       now + timedelta(seconds=IDEMPOTENCY_PENDING_SECONDS)))
+        row = db.fetch_one("""
+            SELECT request_hash, claim_id, status_code, content_type, response_body
+            FROM idempotency_keys WHERE user_id = %s AND key_hash = %s
+        """, (user_id, key_hash))
+    if bytes(row['claim_id']) == claim_id:
+        return CLAIMED, (user_id, key_hash, claim_id)
+    if bytes(row['request_hash']) != request_hash:
+        return MISMATCH, None
+    if row['status_code'] is None:
+        return IN_PROGRESS, None
+    return REPLAY, row
+
+
+def complete(db, claim, status_code, content_type, body):
+    """Store the response of a claimed key; server errors free the key instead."""
+    if status_code >= 500:
+        release(db, claim)
+        return
+    if body is None or len(body) > MAX_STORED_RESPONSE:
+        content_type = 'application/json'
+        body = json.dumps({
+            'success': status_code < 400,
+            'message': 'This request was already processed; its response was too large to keep',
+        }).encode()
+    user_id, key_hash, claim_id = claim
+    db.execute_query("""
+        UPDATE idempotency_keys
+        SET status_code = %s, content_type = %s, response_body = %s, expires_at = %s
+        WHERE user_id = %s AND key_hash = %s AND claim_id = %s
+    """, (status_code, content_type, body, datetime.now() + timedelta(hours=IDEMPOTENCY_TTL_HOURS),
+          user_id, key_hash, claim_id))
+
+
+def release(db, claim):
+    user_id, key_hash, claim_id = claim
+    db.execute_query("DELETE FROM idempotency_keys WHERE user_id = %s AND key_hash = %s AND claim_id = %s",
+                     (user_id, key_hash, claim_id))
+
+
+def purge(db, batch_size=5000):
+    """Delete expired keys in batches; returns the number removed."""
+    removed = 0
+    while True:
+        count = db.execute_many("DELETE FROM idempotency_keys WHERE expires_at < %s LIMIT %s",
+                                [(datetime.now(), batch_size)])
+        removed += count
+        if count < batch_size:
+            break
+    if removed:
+        logger.info(f"Purged {removed} expired idempotency key(s)")
+    return removed
@@ -0,0 +1,213 @@
+"""Resized, re-encoded variants of the frontend images.
+
+The pages ask for ``logo.png?w=96&v=<hash>``. The backend answers with the
+image scaled to that width, as AVIF or WebP when the browser's Accept header
+allows it, or in the original format otherwise. Variants are encoded once
+and kept in IMAGE_CACHE_DIR, either lazily or by ``python images.py build``
+at deploy time. ``v`` is a hash of the source file. A URL whose ``v``
+matches the current file never changes, so it is cached for a year; any
+other URL is revalidated. Static hosts ignore the query string and serve
+the original, so the markup still works there.
+
+After replacing an image, run ``python images.py stamp`` to update the
+``v=`` of every reference in frontend/.
+
+Usage:
+    python images.py build    # encode every variant the frontend references
+    python images.py stamp    # rewrite v=<hash> in frontend/*.html and *.css
+"""
+import argparse
+import glob
+import hashlib
+import logging
+import os
+import re
+import sys
+import threading
+
+from config import IMAGE_CACHE_DIR
+
+logger = logging.getLogger(__name__)
+
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'frontend')
+SOURCE_FORMATS = {'.png': 'png', '.jpg': 'jpeg', '.jpeg': 'jpeg'}
+MIMETYPES = {'avif': 'image/avif', 'webp': 'image/webp', 'png': 'image/png', 'jpeg': 'image/jpeg'}
+# Requested widths are rounded up to one of these, so the cache stays bounded
+WIDTHS = (32, 48, 64, 96, 128, 144, 192, 256, 320, 480, 560, 640, 800, 1000, 1120, 1280, 1600, 1920)
+ENCODE_OPTIONS = {
+    'avif': {'quality': 55, 'speed': 6},
+    'webp': {'quality': 80, 'method': 6},
+    'png': {'optimize': True},
+    'jpeg': {'quality': 80, 'progressive': True, 'optimize': True},
+}
+# References in HTML/CSS: name.ext?w=N with an optional &v=hash
+REFERENCE = re.compile(r'\b([\w-]+\.(?:png|jpe?g))\?w=(\d+)(?:&(?:amp;)?v=[0-9a-f]*)?')
+
+_versions = {}  # name -> ((mtime_ns, size), version)
+_encoding = {}  # variant path -> lock, so two requests never encode the same file
+_encoding_lock = threading.Lock()
+_pillow = None
+
+
+def _image_module():
+    """PIL.Image, imported on first use; None when Pillow is not installed."""
+    global _pillow
+    if _pillow is None:
+        try:
+            from PIL import Image, features
+            _pillow = (Image, {fmt for fmt in ('avif', 'webp') if features.check(fmt)})
+        except ImportError:
+            logger.warning("Pillow is not installed; images are served unresized")
+            _pillow = (None, set())
+    return _pillow
+
+
+def source_path(name):
+    """Path of a frontend image, or None for anything that is not one."""
+    if os.path.splitext(name)[1].lower() not in SOURCE_FORMATS or name != os.path.basename(name):
+        return None
+    path = os.path.join(FRONTEND_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+def version(name):
+    """Short hash of the source file, recomputed only when it changes."""
+    path = os.path.join(FRONTEND_DIR, name)
+    stat = os.stat(path)
+    key = (stat.st_mtime_ns, stat.st_size)
+    cached = _versions.get(name)
+    if cached is None or cached[0] != key:
+        with open(path, 'rb') as fh:
+            cached = (key, hashlib.sha256(fh.read()).hexdigest()[:10])
+        _versions[name] = cached
+    return cached[1]
+
+
+def pick_width(requested, original):
+    if not requested or requested >= original:
+        return original
+    return min(next((w for w in WIDTHS if w >= requested), original), original)
+
+
+def pick_format(accept, source_format):
+    """Best format the browser lists explicitly (wildcards don't count)."""
+    _, supported = _image_module()
+    offered = {}
+    for part in (accept or '').split(','):
+        mimetype, _, params = part.strip().partition(';')
+        quality = 1.0
+        match = re.search(r'q=([\d.]+)', params)
+        if match:
+            quality = float(match.group(1))
+        offered[mimetype.strip().lower()] = quality
+    for fmt in ('avif', 'webp'):
+        if fmt in supported and offered.get(MIMETYPES[fmt], 0) > 0:
+            return fmt
+    return source_format
+
+
+def variant(name, width=None, accept=None):
+    """(path, mimetype, current version) of the variant to send; the original if Pillow is missing."""
+    path = source_path(name)
+    current = version(name)
+    source_format = SOURCE_FORMATS[os.path.splitext(name)[1].lower()]
+    Image, _ = _image_module()
+    if Image is None:
+        return path, MIMETYPES[source_format], current
+    fmt = pick_format(accept, source_format)
+    with Image.open(path) as probe:
+        target_width = pick_width(width, probe.width)
+    stem = os.path.splitext(name)[0]
+    cached = os.path.join(IMAGE_CACHE_DIR, f"{stem}.{current}.{target_width}.{fmt}")
+    if not os.path.exists(cached):
+        with _encoding_lock:
+            lock = _encoding.setdefault(cached, threading.Lock())
+        with lock:
+            if not os.path.exists(cached):
+                _encode(path, cached, target_width, fmt)
+    return cached, MIMETYPES[fmt], current
+
+
+def _encode(source, target, width, fmt):
+    Image, _ = _image_module()
+    with Image.open(source) as image:
+        image.load()
+        # Palette images are converted first so they resize with LANCZOS, not nearest-neighbour
+        if fmt == 'jpeg' and image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        elif image.mode == 'P':
+            image = image.convert('RGBA')
+        if width < image.width:
+            height = max(1, round(image.height * width / image.width))
+            image = image.resize((width, height), Image.LANCZOS)
+        os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+        # Written under a temporary name, so other workers never read half a file
+        partial = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        image.save(partial, format=fmt.upper(), **ENCODE_OPTIONS[fmt])
+    os.replace(partial, target)
+    logger.info(f"Encoded {os.path.basename(target)} ({os.path.getsize(target)} bytes)")
+
+
+def references():
+    """(file, image name, width) for every ?w= reference in the frontend."""
+    files = glob.glob(os.path.join(FRONTEND_DIR, '*.html')) + glob.glob(os.path.join(FRONTEND_DIR, '*.css')) \
+        + glob.glob(os.path.join(FRONTEND_DIR, 'sections', '*.html'))
+    found = []
+    for path in sorted(files):
+        with open(path, encoding='utf-8') as fh:
+            for match in REFERENCE.finditer(fh.read()):
+                found.append((path, match.group(1), int(match.group(2))))
+    return found
+
+
+def stamp():
+    """Point every reference at the current version of its image; returns the files changed."""
+    changed = []
+    for path in sorted({path for path, _, _ in references()}):
+        with open(path, encoding='utf-8') as fh:
+            text = fh.read()
+
+        def restamp(match):
+            name, width = match.group(1), match.group(2)
+            if source_path(name) is None:
+                return match.group(0)
+            return f"{name}?w={width}&v={version(name)}"
+
+        updated = REFERENCE.sub(restamp, text)
+        if updated != text:
+            with open(path, 'w', encoding='utf-8') as fh:
+                fh.write(updated)
+            changed.append(path)
+    return changed
+
+
+def build():
+    """Encode every referenced variant in every format a browser may ask for."""
+    Image, supported = _image_module()
+    if Image is None:
+        return 0
+    count = 0
+    for name, width in sorted({(name, width) for _, name, width in references() if source_path(name)}):
+        for accept in [MIMETYPES[fmt] for fmt in sorted(supported)] + ['']:
+            variant(name, width, accept)
+            count += 1
+    return count
+
+
+def main(argv=None):
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description='Responsive variants of the frontend images')
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('build', help='encode every variant referenced by the frontend')
+    sub.add_parser('stamp', help='update v=<hash> in the frontend references')
+    args = parser.parse_args(argv)
+    if args.command == 'build':
+        print(f"{build()} variants ready in {IMAGE_CACHE_DIR}")
+    else:
+        changed = stamp()
+        print('\n'.join(f"updated {os.path.relpath(path)}" for path in changed) or 'all references current')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
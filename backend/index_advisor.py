@@ -0,0 +1,403 @@
+"""EXPLAIN every statement the app runs and propose the indexes it is missing.
+
+Statements come from two places: the SQL string literals passed to
+``fetch_all``/``fetch_one``/``execute_query``/``execute_many`` in the
+backend sources, and the JSON-lines file that database.py writes when
+DB_QUERY_LOG is set. The log also catches SQL built with f-strings, such as
+the per-section lookups of /api/records, and keeps real parameters. Source
+statements get sample parameters picked from the column types.
+
+Each SELECT, UPDATE and DELETE is EXPLAINed against the configured database,
+which should be seeded (insert_test_data.py) so the plans look like
+production. Full scans, full index scans, filesorts and temporary tables
+are flagged. For each scanned table the advisor proposes an index built
+from the statement's equality, join, range and ORDER BY columns, skipping
+any index that already exists.
+
+``check`` EXPLAINs HOT_QUERIES only and exits 1 if one of them reads a
+table without a usable index. Run it in CI after the migrations.
+
+Usage:
+    python index_advisor.py collect [--log queries.jsonl]
+    python index_advisor.py analyze [--log queries.jsonl] [--min-rows 100] [--ddl]
+    python index_advisor.py check [--max-scan-rows 1000]
+"""
+import argparse
+import ast
+import json
+import os
+import re
+import sys
+from datetime import date, datetime, timedelta
+
+import mysql.connector
+
+from config import DB_CONFIG
+
+DB_METHODS = {'fetch_all', 'fetch_one', 'execute_query', 'execute_many'}
+EXPLAINABLE = re.compile(r'^\s*(SELECT|WITH|UPDATE|DELETE|(INSERT|REPLACE)\b.*\bSELECT\b)', re.I | re.S)
+# Table references: FROM/JOIN/UPDATE/INTO name [AS] alias
+TABLE_REF = re.compile(r'\b(?:FROM|JOIN|UPDATE|INTO)\s+`?(\w+)`?(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|JOIN\b|SET\b|GROUP\b|'
+                       r'ORDER\b|LIMIT\b|LEFT\b|RIGHT\b|INNER\b|CROSS\b|USING\b|FOR\b|VALUES\b)(\w+))?', re.I)
+COLUMN = r'(?:`?(\w+)`?\.)?`?(\w+)`?'
+EQUALITY = re.compile(COLUMN + r'\s*(?:=|<=>|\s+IN\s*\()', re.I)
+# The other side of a join condition: a.x = b.y
+JOIN_EQUALITY = re.compile(r'(?<![<>!])=\s*`?(\w+)`?\.`?(\w+)`?', re.I)
+RANGE = re.compile(COLUMN + r'\s*(?:<=|>=|<|>|\s+BETWEEN\b|\s+LIKE\b)', re.I)
+WRAPPED = re.compile(r'\b(DATE|YEAR|MONTH|LOWER|UPPER|TRIM)\s*\(\s*' + COLUMN + r'\s*\)', re.I)
+CLAUSE_END = r'(?=\bGROUP\s+BY\b|\bORDER\s+BY\b|\bLIMIT\b|\bFOR\s+UPDATE\b|\bUNION\b|$)'
+WHERE_CLAUSE = re.compile(r'\bWHERE\b(.*?)' + CLAUSE_END, re.I | re.S)
+ON_CLAUSE = re.compile(r'\bON\b(.*?)(?=\bJOIN\b|\bLEFT\b|\bINNER\b|\bWHERE\b|\bGROUP\b|\bORDER\b|\bLIMIT\b|$)',
+                       re.I | re.S)
+ORDER_CLAUSE = re.compile(r'\b(?:ORDER|GROUP)\s+BY\b(.*?)(?=\bORDER\s+BY\b|\bLIMIT\b|\bHAVING\b|\bFOR\b|$)',
+                          re.I | re.S)
+PLACEHOLDER_CONTEXT = re.compile(COLUMN + r'\s*\)?\s*(?:=|<=>|<=|>=|<>|!=|<|>|\s+LIKE|\s+IN\s*\((?:%s\s*,\s*)*'
+                                 r'|\s+BETWEEN(?:\s+%s\s+AND)?)\s*$', re.I)
+KEYWORDS = {'and', 'or', 'not', 'null', 'is', 'select', 'where', 'on', 'as', 'case', 'when', 'then', 'else',
+            'end', 'date', 'interval', 'day', 'values'}
+
+# Lookups behind the forms, /api/records, the dashboard and the sales pages.
+# (name, sql, params); params use today's date so range predicates look real
+_today = date.today()
+_day = (_today, _today + timedelta(days=1))
+RECORD_DATE_COLUMNS = {
+    'waste_sourcing': 'collection_date', 'storage_records': 'storage_date',
+    'processing_records': 'processing_date', 'environmental_monitoring_waste': 'monitoring_date',
+    'hatchery_batches': 'batch_date', 'hatchery_feeding': 'feeding_date',
+    'hatchery_monitoring': 'monitoring_date', 'hatchery_cleaning': 'cleaning_date',
+    'hatchery_problems': 'problem_date', 'feeding_environmental_monitoring': 'monitoring_date',
+    'feeding_health_intervention': 'health_check_date', 'feeding_harvest_yield': 'harvest_date',
+    'feeding_schedule': 'feeding_date', 'drying_batches': 'drying_date', 'drying_input': 'created_at',
+    'drying_output': 'created_at', 'drying_quality_control': 'qc_date',
+    'drying_review_approval': 'review_date',
+    'fly_facility_cage_monitoring': 'monitoring_date', 'fly_facility_maintenance': 'maintenance_date',
+    'fly_facility_pupae_transition': 'transition_date', 'fly_facility_egg_collection': 'collection_date',
+    'fly_facility_bait_preparation': 'start_date',
+}
+HOT_QUERIES = [
+    (f"records:{table}", f"SELECT * FROM {table} WHERE {column} >= %s AND {column} < %s", _day)
+    for table, column in RECORD_DATE_COLUMNS.items()
+] + [
+    ('user_by_email', "SELECT user_id, username, email, password_hash, full_name, last_login, is_active "
+                      "FROM users WHERE email = %s", ('admin@example.com',)),
+    ('customer_by_key', "SELECT id FROM customers WHERE customer_key = %s", ('farm|farm@example.com|',)),
+    ('customer_by_id', "SELECT name, email, address FROM customers WHERE id = %s", (1,)),
+    ('sales_with_customer', "SELECT s.*, c.name as customer_name FROM sales s "
+                            "JOIN customers c ON s.customer_id = c.id WHERE s.date >= %s", (_today - timedelta(days=30),)),
+    ('drying_efficiency', "SELECT di.batch_id, MAX(do.created_at) AS output_date FROM drying_input di "
+                          "JOIN drying_output do ON di.batch_id = do.batch_id GROUP BY di.batch_id", ()),
+    ('harvest_by_tray', "SELECT * FROM feeding_harvest_yield WHERE tray_batch_id = %s", ('T-1',)),
+    ('feeding_by_tray', "SELECT * FROM feeding_schedule WHERE tray_batch_id = %s ORDER BY feeding_date", ('T-1',)),
+]
+
+
+def normalize(sql):
+    return ' '.join(sql.split()).rstrip(';').strip()
+
+
+# --- Collecting statements ---
+class _StatementFinder(ast.NodeVisitor):
+    """SQL string literals handed to the DatabaseConnection query methods."""
+
+    def __init__(self, filename):
+        self.filename = filename
+        self.scopes = [{}]
+        self.found = []
+        self.dynamic = 0
+
+    def _literal(self, node):
+        if isinstance(node, ast.Constant) and isinstance(node.value, str):
+            return node.value
+        if isinstance(node, ast.Name):
+            for scope in reversed(self.scopes):
+                if node.id in scope:
+                    return scope[node.id]
+        return None
+
+    def _scoped(self, node):
+        self.scopes.append({})
+        self.generic_visit(node)
+        self.scopes.pop()
+
+    visit_FunctionDef = visit_AsyncFunctionDef = _scoped
+
+    def visit_Assign(self, node):
+        value = self._literal(node.value) if isinstance(node.value, ast.Constant) else None
+        for target in node.targets:
+            if isinstance(target, ast.Name):
+                if value is not None:
+                    self.scopes[-1][target.id] = value
+                else:
+                    self.scopes[-1].pop(target.id, None)
+        self.generic_visit(node)
+
+    def visit_Call(self, node):
+        if isinstance(node.func, ast.Attribute) and node.func.attr in DB_METHODS and node.args:
+            sql = self._literal(node.args[0])
+            if sql is None:
+                self.dynamic += 1
+            else:
+                self.found.append((f"{self.filename}:{node.lineno}", normalize(sql), None))
+        self.generic_visit(node)
+
+
+def collect_source(directory):
+    """(location, sql, None) for every literal statement; plus the count of dynamic ones."""
+    statements, dynamic = [], 0
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.py') or name == os.path.basename(__file__):
+            continue
+        path = os.path.join(directory, name)
+        with open(path, encoding='utf-8') as fh:
+            try:
+                tree = ast.parse(fh.read(), filename=name)
+            except SyntaxError:
+                continue
+        finder = _StatementFinder(name)
+        finder.visit(tree)
+        statements.extend(finder.found)
+        dynamic += finder.dynamic
+    return statements, dynamic
+
+
+def collect_log(path):
+    statements = []
+    with open(path, encoding='utf-8') as fh:
+        for line in fh:
+            if line.strip():
+                entry = json.loads(line)
+                statements.append(('query log', normalize(entry['sql']), tuple(entry.get('params') or ())))
+    return statements
+
+
+def collect(directory, log=None):
+    """Distinct statements; a logged copy (with real parameters) wins over the source one."""
+    source, dynamic = collect_source(directory)
+    distinct = {}
+    for location, sql, params in source + (collect_log(log) if log else []):
+        known = distinct.get(sql)
+        if known is None or (known[2] is None and params is not None):
+            distinct[sql] = (location, sql, params)
+    return list(distinct.values()), dynamic
+
+
+# --- Schema ---
+def load_schema(cursor, database):
+    cursor.execute("""
+        SELECT TABLE_NAME, COLUMN_NAME, DATA_TYPE FROM information_schema.COLUMNS
+        WHERE TABLE_SCHEMA = %s ORDER BY TABLE_NAME, ORDINAL_POSITION
+    """, (database,))
+    columns = {}
+    for table, column, data_type in cursor.fetchall():
+        columns.setdefault(table, {})[column] = data_type
+    cursor.execute("""
+        SELECT TABLE_NAME, INDEX_NAME, COLUMN_NAME FROM information_schema.STATISTICS
+        WHERE TABLE_SCHEMA = %s ORDER BY TABLE_NAME, INDEX_NAME, SEQ_IN_INDEX
+    """, (database,))
+    indexes = {}
+    for table, index, column in cursor.fetchall():
+        indexes.setdefault(table, {}).setdefault(index, []).append(column)
+    return columns, indexes
+
+
+def table_aliases(sql):
+    """{alias or table name: table} for the tables a statement reads."""
+    aliases = {}
+    for table, alias in TABLE_REF.findall(sql):
+        aliases[table] = table
+        if alias and alias.lower() not in KEYWORDS:
+            aliases[alias] = table
+    return aliases
+
+
+def sample_value(data_type):
+    if data_type in ('date',):
+        return _today.isoformat()
+    if data_type in ('datetime', 'timestamp'):
+        return datetime.now().replace(microsecond=0).isoformat(sep=' ')
+    if data_type in ('time',):
+        return '08:00:00'
+    if data_type in ('tinyint', 'smallint', 'mediumint', 'int', 'bigint', 'decimal', 'float', 'double', 'year'):
+        return 1
+    return 'sample'
+
+
+def sample_params(sql, columns):
+    """Plausible parameters for a source statement, typed by the column each %s is compared with."""
+    aliases = table_aliases(sql)
+    params = []
+    for match in re.finditer(r'%s', sql):
+        before = sql[:match.start()]
+        if re.search(r'\b(LIMIT|OFFSET)\s*(\d+\s*,\s*)?$', before, re.I):
+            params.append(10)
+            continue
+        context = PLACEHOLDER_CONTEXT.search(before)
+        data_type = None
+        if context:
+            qualifier, column = context.groups()
+            tables = [aliases[qualifier]] if qualifier in aliases else list(aliases.values()) or list(columns)
+            data_type = next((columns[t][column] for t in tables if column in columns.get(t, {})), None)
+        params.append(sample_value(data_type) if data_type else 1)
+    return tuple(params)
+
+
+# --- Explaining ---
+def explain(cursor, sql, params):
+    cursor.execute("EXPLAIN " + sql, params)
+    names = [d[0] for d in cursor.description]
+    return [dict(zip(names, row)) for row in cursor.fetchall()]
+
+
+def _columns_for(pattern, text, alias, table, table_columns):
+    found = []
+    for qualifier, column in (m[-2:] for m in pattern.findall(text)):
+        if column in table_columns and (not qualifier or qualifier in (alias, table)) and column not in found:
+            found.append(column)
+    return found
+
+
+def propose_index(sql, alias, table, columns, indexes):
+    """(index columns, notes) for a scanned table, or (None, notes) when nothing applies."""
+    table_columns = columns.get(table, {})
+    filters = ' '.join(WHERE_CLAUSE.findall(sql) + ON_CLAUSE.findall(sql))
+    notes = []
+    for function, qualifier, column in WRAPPED.findall(filters):
+        if column in table_columns and (not qualifier or qualifier in (alias, table)):
+            notes.append(f"{function}({column}) cannot use an index; compare {column} with a half-open range")
+    equality = _columns_for(EQUALITY, filters, alias, table, table_columns)
+    equality += [c for c in _columns_for(JOIN_EQUALITY, filters, alias, table, table_columns) if c not in equality]
+    ranges = [c for c in _columns_for(RANGE, filters, alias, table, table_columns) if c not in equality]
+    ranges += [c for _, q, c in WRAPPED.findall(filters)
+               if c in table_columns and c not in equality + ranges and (not q or q in (alias, table))]
+    ordering = [c for c in _columns_for(re.compile(COLUMN + r'(?=\s*(?:,|ASC|DESC|$))', re.I),
+                                        ' '.join(ORDER_CLAUSE.findall(sql)), alias, table, table_columns)
+                if c not in equality]
+    wanted = (equality + ranges[:1] + ([] if ranges else ordering))[:3]
+    if not wanted:
+        return None, notes
+    for name, existing in indexes.get(table, {}).items():
+        if existing[:len(wanted)] == wanted:
+            notes.append(f"index {name} ({', '.join(existing)}) exists but was not used")
+            return None, notes
+    return wanted, notes
+
+
+def index_ddl(table, index_columns):
+    name = f"idx_{table}_{'_'.join(index_columns)}"[:64]
+    return f"ALTER TABLE {table} ADD INDEX {name} ({', '.join(index_columns)});"
+
+
+def analyze_statement(cursor, sql, params, columns, indexes, min_rows=0):
+    """(findings, ddl) for one statement; findings are human-readable lines."""
+    plan = explain(cursor, sql, params)
+    aliases = table_aliases(sql)
+    findings, ddl = [], []
+    for row in plan:
+        alias = row.get('table') or ''
+        table = aliases.get(alias, alias)
+        extra = row.get('Extra') or ''
+        rows = row.get('rows') or 0
+        flags = []
+        if row.get('type') == 'ALL' and rows >= min_rows:
+            flags.append('full scan')
+        elif row.get('type') == 'index' and 'Using index' not in extra and rows >= min_rows:
+            flags.append('full index scan')
+        if 'Using filesort' in extra:
+            flags.append('filesort')
+        if 'Using temporary' in extra:
+            flags.append('temporary table')
+        if not flags:
+            continue
+        findings.append(f"{alias} ({table}): {', '.join(flags)}, ~{rows} rows, key={row.get('key')}, "
+                        f"possible_keys={row.get('possible_keys')}")
+        if table in columns and ('full scan' in flags or 'full index scan' in flags or 'filesort' in flags):
+            index_columns, notes = propose_index(sql, alias, table, columns, indexes)
+            findings.extend(f"  note: {note}" for note in notes)
+            if index_columns:
+                ddl.append(index_ddl(table, index_columns))
+    return findings, ddl
+
+
+def hot_regressions(cursor, max_scan_rows):
+    """HOT_QUERIES that read a table without a usable index."""
+    failures = []
+    for name, sql, params in HOT_QUERIES:
+        try:
+            plan = explain(cursor, sql, params)
+        except mysql.connector.Error as e:
+            failures.append(f"{name}: EXPLAIN failed: {e}")
+            continue
+        for row in plan:
+            if row.get('type') != 'ALL':
+                continue
+            # A scan of a small table is the optimizer's choice; one without candidates is a missing index
+            if not row.get('possible_keys') or (row.get('rows') or 0) > max_scan_rows:
+                failures.append(f"{name}: full scan of {row.get('table')} (~{row.get('rows')} rows, "
+                                f"possible_keys={row.get('possible_keys')})")
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="EXPLAIN the app's statements and propose indexes")
+    sub = parser.add_subparsers(dest='command', required=True)
+    for command in ('collect', 'analyze'):
+        p = sub.add_parser(command)
+        p.add_argument('--log', help="JSON-lines file written with DB_QUERY_LOG")
+    analyze_parser = sub.choices['analyze']
+    analyze_parser.add_argument('--min-rows', type=int, default=100,
+                                help="ignore scans estimated below this many rows")
+    analyze_parser.add_argument('--ddl', action='store_true', help="print only the proposed DDL")
+    check_parser = sub.add_parser('check')
+    check_parser.add_argument('--max-scan-rows', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    directory = os.path.dirname(os.path.abspath(__file__))
+    if args.command == 'collect':
+        statements, dynamic = collect(directory, args.log)
+        for location, sql, params in statements:
+            print(f"-- {location}{'' if params is None else f' params={list(params)}'}\n{sql};\n")
+        print(f"-- {len(statements)} distinct statements, {dynamic} built at runtime "
+              f"(run with DB_QUERY_LOG to capture those)")
+        return 0
+
+    conn = mysql.connector.connect(**DB_CONFIG)
+    try:
+        cursor = conn.cursor()
+        if args.command == 'check':
+            failures = hot_regressions(cursor, args.max_scan_rows)
+            for failure in failures:
+                print(f"FAIL {failure}")
+            print(f"{len(HOT_QUERIES) - len({f.split(':')[0] for f in failures})}/{len(HOT_QUERIES)} hot queries use indexes")
+            return 1 if failures else 0
+
+        columns, indexes = load_schema(cursor, DB_CONFIG['database'])
+        statements, dynamic = collect(directory, args.log)
+        all_ddl, flagged, errors = [], 0, 0
+        for location, sql, params in statements:
+            if not EXPLAINABLE.match(sql):
+                continue
+            try:
+                findings, ddl = analyze_statement(
+                    cursor, sql, params if params is not None else sample_params(sql, columns),
+                    columns, indexes, args.min_rows)
+            except mysql.connector.Error as e:
+                errors += 1
+                if not args.ddl:
+                    print(f"-- {location}: EXPLAIN failed: {e}\n")
+                continue
+            all_ddl.extend(d for d in ddl if d not in all_ddl)
+            if findings:
+                flagged += 1
+                if not args.ddl:
+                    print(f"-- {location}\n{sql}\n" + '\n'.join(f"   {line}" for line in findings) + '\n')
+        if not args.ddl:
+            print(f"-- {flagged} of {len(statements)} statements flagged, {errors} could not be explained, "
+                  f"{dynamic} built at runtime\n-- Proposed indexes:")
+        print('\n'.join(all_ddl) if all_ddl else '-- none')
+        return 0
+    finally:
+        conn.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+"""Batch lineage from hatchery batch to sale.
+
+Batches are nodes identified by (type, ref):
+
+    hatchery  hatchery_batches.batch_number
+    tray      feeding tray_batch_id
+    drying    drying_batches.batch_id
+    sale      sales.id
+
+``batch_lineage_edges`` stores direct parent -> child links and
+``batch_lineage_closure`` every (ancestor, descendant, depth) pair, including
+each node with itself at depth 0. Linking extends the closure with one
+INSERT ... SELECT, so the full upstream or downstream chain of a batch is a
+single indexed range read. The graph may be a DAG (a drying batch from
+several trays, a sale from several drying batches); ALLOWED_LINKS only
+point to later stages, so it cannot contain cycles.
+"""
+import logging
+import sys
+
+from database import DatabaseConnection
+
+logger = logging.getLogger(__name__)
+
+NODE_TYPES = ('hatchery', 'tray', 'drying', 'sale')
+# parent type -> child types it may feed
+ALLOWED_LINKS = {
+    'hatchery': ('tray',),
+    'tray': ('drying', 'sale'),
+    'drying': ('sale',),
+}
+
+ENSURE_NODE_QUERY = """
+    INSERT INTO batch_lineage_nodes (node_type, node_ref) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE node_id = LAST_INSERT_ID(node_id)
+"""
+
+# Every ancestor of the parent (the parent included) becomes an ancestor of
+# every descendant of the child (the child included)
+EXTEND_CLOSURE_QUERY = """
+    INSERT INTO batch_lineage_closure (ancestor_id, descendant_id, depth)
+    SELECT a.ancestor_id, d.descendant_id, a.depth + d.depth + 1
+    FROM batch_lineage_closure a
+    JOIN batch_lineage_closure d ON d.ancestor_id = %s
+    WHERE a.descendant_id = %s
+    ON DUPLICATE KEY UPDATE depth = LEAST(depth, VALUES(depth))
+"""
+
+CHAIN_QUERIES = {
+    'upstream': """
+        SELECT n.node_type, n.node_ref, c.depth
+        FROM batch_lineage_nodes x
+        JOIN batch_lineage_closure c ON c.descendant_id = x.node_id AND c.depth > 0
+        JOIN batch_lineage_nodes n ON n.node_id = c.ancestor_id
+        WHERE x.node_type = %s AND x.node_ref = %s
+        ORDER BY c.depth, n.node_type, n.node_ref
+    """,
+    'downstream': """
+        SELECT n.node_type, n.node_ref, c.depth
+        FROM batch_lineage_nodes x
+        JOIN batch_lineage_closure c ON c.ancestor_id = x.node_id AND c.depth > 0
+        JOIN batch_lineage_nodes n ON n.node_id = c.descendant_id
+        WHERE x.node_type = %s AND x.node_ref = %s
+        ORDER BY c.depth, n.node_type, n.node_ref
+    """,
+}
+
+
+class LineageError(ValueError):
+    pass
+
+
+def _check_type(node_type):
+    if node_type not in NODE_TYPES:
+        raise LineageError(f"type must be one of: {', '.join(NODE_TYPES)}")
+
+
+def ensure_node(db, node_type, node_ref):
+    """Return the node id for (type, ref), creating the node if needed."""
+    _check_type(node_type)
+    node_ref = str(node_ref).strip()
+    if not node_ref:
+        raise LineageError(f"{node_type} reference is empty")
+    node_id = db.execute_query(ENSURE_NODE_QUERY, (node_type, node_ref))
+    db.execute_query(
+        "INSERT IGNORE INTO batch_lineage_closure (ancestor_id, descendant_id, depth) VALUES (%s, %s, 0)",
+        (node_id, node_id))
+    return node_id
+
+
+def link(db, parent_type, parent_ref, child_type, child_ref):
+    """Record that ``child`` was made from ``parent``; idempotent.
+
+    Call inside the transaction that writes the child record.
+    """
+    if child_type not in ALLOWED_LINKS.get(parent_type, ()):
+        raise LineageError(f"a {parent_type} batch cannot feed a {child_type}")
+    with db.transaction():
+        parent_id = ensure_node(db, parent_type, parent_ref)
+        child_id = ensure_node(db, child_type, child_ref)
+        existing = db.fetch_one(
+            "SELECT 1 AS linked FROM batch_lineage_edges WHERE parent_id = %s AND child_id = %s",
+            (parent_id, child_id))
+        if existing:
+            return
+        db.execute_query("INSERT INTO batch_lineage_edges (parent_id, child_id) VALUES (%s, %s)",
+                         (parent_id, child_id))
+        db.execute_query(EXTEND_CLOSURE_QUERY, (child_id, parent_id))
+
+
+def link_sources(db, parent_type, parent_refs, child_type, child_ref):
+    """Link several parents given as a list or comma-separated string."""
+    if isinstance(parent_refs, str):
+        parent_refs = parent_refs.split(',')
+    for parent_ref in parent_refs or []:
+        if str(parent_ref).strip():
+            link(db, parent_type, parent_ref, child_type, child_ref)
+
+
+def record(db, child_type, child_ref, **sources):
+    """Register a batch and link it to its sources.
+
+    ``record(db, 'drying', 'D-7', tray='T-1,T-2')`` links two trays to a
+    drying batch; empty sources only register the batch.
+    """
+    with db.transaction():
+        ensure_node(db, child_type, child_ref)
+        for parent_type, parent_refs in sources.items():
+            link_sources(db, parent_type, parent_refs, child_type, child_ref)
+
+
+def unlink(db, parent_type, parent_ref, child_type, child_ref):
+    """Remove a direct link and recompute the closure.
+
+    With several paths between two batches the closure cannot be patched
+    locally, so it is rebuilt from the edges; unlinking is a rare correction.
+    """
+    with db.transaction():
+        db.execute_query("""
+            DELETE e FROM batch_lineage_edges e
+            JOIN batch_lineage_nodes p ON p.node_id = e.parent_id
+            JOIN batch_lineage_nodes c ON c.node_id = e.child_id
+            WHERE p.node_type = %s AND p.node_ref = %s AND c.node_type = %s AND c.node_ref = %s
+        """, (parent_type, str(parent_ref), child_type, str(child_ref)))
+        rebuild_closure(db)
+
+
+def rebuild_closure(db):
+    """Recompute batch_lineage_closure from the edges, one depth level per pass."""
+    with db.transaction():
+        db.execute_query("DELETE FROM batch_lineage_closure")
+        db.execute_query("""
+            INSERT INTO batch_lineage_closure (ancestor_id, descendant_id, depth)
+            SELECT node_id, node_id, 0 FROM batch_lineage_nodes
+        """)
+        depth = 0
+        while True:
+            # Paths of length depth + 1: a path of length depth followed by one edge
+            db.execute_query("""
+                INSERT IGNORE INTO batch_lineage_closure (ancestor_id, descendant_id, depth)
+                SELECT c.ancestor_id, e.child_id, c.depth + 1
+                FROM batch_lineage_closure c
+                JOIN batch_lineage_edges e ON e.parent_id = c.descendant_id
+                WHERE c.depth = %s
+            """, (depth,))
+            added = db.fetch_one("SELECT COUNT(*) AS n FROM batch_lineage_closure WHERE depth = %s", (depth + 1,))
+            if not added or not added['n']:
+                break
+            depth += 1
+
+
+def chain(db, node_type, node_ref, direction='both'):
+    """Upstream and/or downstream batches of a node, nearest first."""
+    _check_type(node_type)
+    directions = ('upstream', 'downstream') if direction == 'both' else (direction,)
+    if any(d not in CHAIN_QUERIES for d in directions):
+        raise LineageError("direction must be upstream, downstream or both")
+    result = {}
+    for d in directions:
+        rows = db.fetch_all(CHAIN_QUERIES[d], (node_type, str(node_ref)))
+        result[d] = [{'type': r['node_type'], 'ref': r['node_ref'], 'depth': r['depth']} for r in rows]
+    return result
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    if sys.argv[1:] != ['rebuild']:
+        print("Usage: python lineage.py rebuild")
+        sys.exit(1)
+    rebuild_closure(DatabaseConnection())
+    print("Lineage closure rebuilt.")
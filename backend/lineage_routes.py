@@ -0,0 +1,51 @@
+from flask import Blueprint, request, jsonify
+from flask_login import login_required
+import logging
+
+from database import DatabaseConnection
+from lineage import chain, link, unlink, LineageError
+
+logger = logging.getLogger(__name__)
+
+lineage_api = Blueprint('lineage_api', __name__)
+db = DatabaseConnection()
+
+
+@lineage_api.route('/api/lineage/<node_type>/<path:node_ref>', methods=['GET'])
+@login_required
+def get_lineage(node_type, node_ref):
+    """Upstream and downstream batches, e.g. /api/lineage/sale/42?direction=upstream."""
+    try:
+        result = chain(db, node_type, node_ref, request.args.get('direction', 'both'))
+    except LineageError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True, 'type': node_type, 'ref': node_ref, **result})
+
+
+def _link_args():
+    data = request.get_json(silent=True) or {}
+    missing = [f for f in ('parent_type', 'parent_ref', 'child_type', 'child_ref') if not data.get(f)]
+    if missing:
+        raise LineageError(f"Missing required fields: {', '.join(missing)}")
+    return data['parent_type'], data['parent_ref'], data['child_type'], data['child_ref']
+
+
+@lineage_api.route('/api/lineage/links', methods=['POST'])
+@login_required
+def add_lineage_link():
+    """Link two existing batches after the fact."""
+    try:
+        link(db, *_link_args())
+    except LineageError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True}), 201
+
+
+@lineage_api.route('/api/lineage/links', methods=['DELETE'])
+@login_required
+def remove_lineage_link():
+    try:
+        unlink(db, *_link_args())
+    except LineageError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    return jsonify({'success': True})
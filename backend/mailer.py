@@ -0,0 +1,46 @@
+import logging
+
+from config import EMAIL_HOST, EMAIL_PORT, EMAIL_HOST_USER, EMAIL_HOST_PASSWORD
+
+logger = logging.getLogger(__name__)
+
+
+def send_email(subject, body, to_emails, attachments=None):
+    """Send a plain-text email; returns True on success.
+
+    ``attachments`` is a list of (filename, file object or bytes, subtype)
+    tuples, e.g. ('report.csv', fh, 'csv').
+    """
+    # Imported here: most workers never send mail, and smtplib and email.mime take tens of ms to import
+    import smtplib
+    from email.mime.application import MIMEApplication
+    from email.mime.multipart import MIMEMultipart
+    from email.mime.text import MIMEText
+
+    print(f"[DEBUG] Preparing to send email to: {to_emails}")
+    msg = MIMEMultipart()
+    msg['From'] = EMAIL_HOST_USER
+    msg['To'] = ', '.join(to_emails) if isinstance(to_emails, list) else to_emails
+    msg['Subject'] = subject
+    msg.attach(MIMEText(body, 'plain'))
+    for filename, content, subtype in attachments or []:
+        if hasattr(content, 'read'):
+            content.seek(0)
+            content = content.read()
+        part = MIMEApplication(content, _subtype=subtype)
+        part.add_header('Content-Disposition', 'attachment', filename=filename)
+        msg.attach(part)
+    try:
+        server = smtplib.SMTP(EMAIL_HOST, EMAIL_PORT)
+        server.starttls()
+        server.login(EMAIL_HOST_USER, EMAIL_HOST_PASSWORD)
+        print("[DEBUG] Logged in to SMTP server.")
+        server.sendmail(EMAIL_HOST_USER, to_emails, msg.as_string())
+        print("[DEBUG] Email sent successfully.")
+        server.quit()
+        logger.info(f"Email sent to {to_emails}")
+        return True
+    except Exception as e:
+        print(f"[DEBUG] Failed to send email: {e}")
+        logger.error(f"Failed to send email: {e}")
+        return False
@@ -0,0 +1,30 @@
+-- Migration for batch lineage (lineage.py)
+-- Nodes are batches at each stage, edges are direct parent -> child links and
+-- the closure holds every ancestor/descendant pair for single-lookup chains.
+-- Rebuild the closure from the edges with `python lineage.py rebuild`.
+
+CREATE TABLE IF NOT EXISTS batch_lineage_nodes (
+    node_id INT AUTO_INCREMENT PRIMARY KEY,
+    node_type ENUM('hatchery', 'tray', 'drying', 'sale') NOT NULL,
+    node_ref VARCHAR(255) NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_batch_lineage_nodes (node_type, node_ref)
+);
+
+CREATE TABLE IF NOT EXISTS batch_lineage_edges (
+    parent_id INT NOT NULL,
+    child_id INT NOT NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (parent_id, child_id),
+    KEY idx_batch_lineage_edges_child (child_id),
+    FOREIGN KEY (parent_id) REFERENCES batch_lineage_nodes(node_id),
+    FOREIGN KEY (child_id) REFERENCES batch_lineage_nodes(node_id)
+);
+
+CREATE TABLE IF NOT EXISTS batch_lineage_closure (
+    ancestor_id INT NOT NULL,
+    descendant_id INT NOT NULL,
+    depth INT NOT NULL,
+    PRIMARY KEY (ancestor_id, descendant_id),
+    KEY idx_batch_lineage_closure_descendant (descendant_id, ancestor_id, depth)
+);
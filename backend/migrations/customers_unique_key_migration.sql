@@ -0,0 +1,16 @@
+-- Migration: unique key for customer upserts
+-- customer_key is the normalized (name, email) pair the app and the bulk import
+-- use to identify a customer, so duplicates are rejected by the index instead
+-- of a SELECT before every INSERT. A customer without an email is identified
+-- by name and contact instead, so two such customers of the same name stay
+-- apart; the empty middle part keeps those keys from matching any email key.
+-- Resolve existing duplicates first; this lists them:
+--   SELECT LOWER(CONCAT(TRIM(name), '|', IFNULL(TRIM(email), ''), '|',
+--          IF(IFNULL(TRIM(email), '') = '', TRIM(IFNULL(contact, '')), ''))) AS k, COUNT(*)
+--   FROM customers GROUP BY k HAVING COUNT(*) > 1;
+
+ALTER TABLE customers
+ADD COLUMN customer_key VARCHAR(255)
+    GENERATED ALWAYS AS (LOWER(CONCAT(TRIM(name), '|', IFNULL(TRIM(email), ''), '|',
+        IF(IFNULL(TRIM(email), '') = '', TRIM(IFNULL(contact, '')), '')))) STORED,
+ADD UNIQUE KEY uq_customers_customer_key (customer_key);
@@ -0,0 +1,51 @@
+-- Migration for the dashboard summary tables (dashboard.py)
+-- Kept up to date by the waste sourcing, harvest and drying input/output
+-- handlers; the INSERT ... SELECT statements backfill existing data
+-- (same as `python dashboard.py rebuild`).
+
+CREATE TABLE IF NOT EXISTS production_daily_summary (
+    summary_date DATE NOT NULL,
+    stage VARCHAR(20) NOT NULL,
+    quantity_kg DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    record_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (summary_date, stage)
+);
+
+CREATE TABLE IF NOT EXISTS drying_batch_summary (
+    batch_id VARCHAR(255) PRIMARY KEY,
+    wet_placed_kg DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    dried_produced_kg DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    input_count INT NOT NULL DEFAULT 0,
+    output_count INT NOT NULL DEFAULT 0,
+    last_activity DATE NOT NULL,
+    KEY idx_drying_batch_summary_activity (last_activity)
+);
+
+INSERT INTO production_daily_summary (summary_date, stage, quantity_kg, record_count)
+SELECT collection_date, 'waste', SUM(IFNULL(waste_weight, 0)), COUNT(*)
+FROM waste_sourcing GROUP BY collection_date;
+
+INSERT INTO production_daily_summary (summary_date, stage, quantity_kg, record_count)
+SELECT harvest_date, 'larvae', SUM(IFNULL(larvae_collected_kg, 0)), COUNT(*)
+FROM feeding_harvest_yield GROUP BY harvest_date;
+
+INSERT INTO production_daily_summary (summary_date, stage, quantity_kg, record_count)
+SELECT DATE(created_at), 'wet', SUM(IFNULL(wet_placed_for_drying_kg, 0)), COUNT(*)
+FROM drying_input GROUP BY DATE(created_at);
+
+INSERT INTO production_daily_summary (summary_date, stage, quantity_kg, record_count)
+SELECT DATE(created_at), 'dried', SUM(IFNULL(dried_produced_kg, 0)), COUNT(*)
+FROM drying_output GROUP BY DATE(created_at);
+
+INSERT INTO drying_batch_summary
+    (batch_id, wet_placed_kg, dried_produced_kg, input_count, output_count, last_activity)
+SELECT batch_id, SUM(wet), SUM(dried), SUM(inputs), SUM(outputs), MAX(day)
+FROM (
+    SELECT batch_id, IFNULL(wet_placed_for_drying_kg, 0) AS wet, 0 AS dried,
+           1 AS inputs, 0 AS outputs, DATE(created_at) AS day
+    FROM drying_input
+    UNION ALL
+    SELECT batch_id, 0, IFNULL(dried_produced_kg, 0), 0, 1, DATE(created_at)
+    FROM drying_output
+) rows_by_batch
+GROUP BY batch_id;
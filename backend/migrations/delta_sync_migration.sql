@@ -0,0 +1,1155 @@
+-- Migration: delta sync versions and tombstones (delta_sync.py, GET /api/sync)
+-- Generated with `python delta_sync.py ddl`. Adds row_version/row_updated_at
+-- to every synced table, numbers the existing rows, seeds the per-table
+-- counters and creates the triggers that version inserts and updates and
+-- tombstone deletes. Run it from the mysql client (the trigger bodies use
+-- DELIMITER) while no writes are coming in.
+
+CREATE TABLE IF NOT EXISTS sync_table_versions (
+    table_name VARCHAR(64) NOT NULL PRIMARY KEY,
+    version BIGINT UNSIGNED NOT NULL DEFAULT 0,
+    pruned_version BIGINT UNSIGNED NOT NULL DEFAULT 0
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+    table_name VARCHAR(64) NOT NULL,
+    row_id INT NOT NULL,
+    row_version BIGINT UNSIGNED NOT NULL,
+    deleted_at TIMESTAMP(3) NOT NULL DEFAULT CURRENT_TIMESTAMP(3),
+    PRIMARY KEY (table_name, row_id),
+    KEY idx_sync_tombstones_version (table_name, row_version)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+ALTER TABLE waste_sourcing ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_waste_sourcing_row_version (row_version);
+
+UPDATE waste_sourcing t JOIN (SELECT sourcing_id AS id, ROW_NUMBER() OVER (ORDER BY sourcing_id) AS n FROM waste_sourcing) r ON t.sourcing_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'waste_sourcing', COUNT(*) FROM waste_sourcing ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE storage_records ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_storage_records_row_version (row_version);
+
+UPDATE storage_records t JOIN (SELECT record_id AS id, ROW_NUMBER() OVER (ORDER BY record_id) AS n FROM storage_records) r ON t.record_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'storage_records', COUNT(*) FROM storage_records ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE processing_records ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_processing_records_row_version (row_version);
+
+UPDATE processing_records t JOIN (SELECT processing_id AS id, ROW_NUMBER() OVER (ORDER BY processing_id) AS n FROM processing_records) r ON t.processing_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'processing_records', COUNT(*) FROM processing_records ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE environmental_monitoring_waste ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_environmental_monitoring_waste_row_version (row_version);
+
+UPDATE environmental_monitoring_waste t JOIN (SELECT monitoring_id AS id, ROW_NUMBER() OVER (ORDER BY monitoring_id) AS n FROM environmental_monitoring_waste) r ON t.monitoring_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'environmental_monitoring_waste', COUNT(*) FROM environmental_monitoring_waste ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE substrate_preparation ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_substrate_preparation_row_version (row_version);
+
+UPDATE substrate_preparation t JOIN (SELECT id AS id, ROW_NUMBER() OVER (ORDER BY id) AS n FROM substrate_preparation) r ON t.id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'substrate_preparation', COUNT(*) FROM substrate_preparation ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE hatchery_batches ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_hatchery_batches_row_version (row_version);
+
+UPDATE hatchery_batches t JOIN (SELECT batch_id AS id, ROW_NUMBER() OVER (ORDER BY batch_id) AS n FROM hatchery_batches) r ON t.batch_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'hatchery_batches', COUNT(*) FROM hatchery_batches ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE hatchery_feeding ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_hatchery_feeding_row_version (row_version);
+
+UPDATE hatchery_feeding t JOIN (SELECT feeding_id AS id, ROW_NUMBER() OVER (ORDER BY feeding_id) AS n FROM hatchery_feeding) r ON t.feeding_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'hatchery_feeding', COUNT(*) FROM hatchery_feeding ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE hatchery_monitoring ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_hatchery_monitoring_row_version (row_version);
+
+UPDATE hatchery_monitoring t JOIN (SELECT monitoring_id AS id, ROW_NUMBER() OVER (ORDER BY monitoring_id) AS n FROM hatchery_monitoring) r ON t.monitoring_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'hatchery_monitoring', COUNT(*) FROM hatchery_monitoring ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE hatchery_cleaning ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_hatchery_cleaning_row_version (row_version);
+
+UPDATE hatchery_cleaning t JOIN (SELECT cleaning_id AS id, ROW_NUMBER() OVER (ORDER BY cleaning_id) AS n FROM hatchery_cleaning) r ON t.cleaning_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'hatchery_cleaning', COUNT(*) FROM hatchery_cleaning ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE hatchery_problems ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_hatchery_problems_row_version (row_version);
+
+UPDATE hatchery_problems t JOIN (SELECT problem_id AS id, ROW_NUMBER() OVER (ORDER BY problem_id) AS n FROM hatchery_problems) r ON t.problem_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'hatchery_problems', COUNT(*) FROM hatchery_problems ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE feeding_environmental_monitoring ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_feeding_environmental_monitoring_row_version (row_version);
+
+UPDATE feeding_environmental_monitoring t JOIN (SELECT monitoring_id AS id, ROW_NUMBER() OVER (ORDER BY monitoring_id) AS n FROM feeding_environmental_monitoring) r ON t.monitoring_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'feeding_environmental_monitoring', COUNT(*) FROM feeding_environmental_monitoring ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE feeding_health_intervention ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_feeding_health_intervention_row_version (row_version);
+
+UPDATE feeding_health_intervention t JOIN (SELECT intervention_id AS id, ROW_NUMBER() OVER (ORDER BY intervention_id) AS n FROM feeding_health_intervention) r ON t.intervention_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'feeding_health_intervention', COUNT(*) FROM feeding_health_intervention ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE feeding_harvest_yield ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_feeding_harvest_yield_row_version (row_version);
+
+UPDATE feeding_harvest_yield t JOIN (SELECT harvest_id AS id, ROW_NUMBER() OVER (ORDER BY harvest_id) AS n FROM feeding_harvest_yield) r ON t.harvest_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'feeding_harvest_yield', COUNT(*) FROM feeding_harvest_yield ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE feeding_schedule ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_feeding_schedule_row_version (row_version);
+
+UPDATE feeding_schedule t JOIN (SELECT schedule_id AS id, ROW_NUMBER() OVER (ORDER BY schedule_id) AS n FROM feeding_schedule) r ON t.schedule_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'feeding_schedule', COUNT(*) FROM feeding_schedule ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE drying_batches ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_drying_batches_row_version (row_version);
+
+UPDATE drying_batches t JOIN (SELECT id AS id, ROW_NUMBER() OVER (ORDER BY id) AS n FROM drying_batches) r ON t.id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'drying_batches', COUNT(*) FROM drying_batches ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE drying_input ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_drying_input_row_version (row_version);
+
+UPDATE drying_input t JOIN (SELECT input_id AS id, ROW_NUMBER() OVER (ORDER BY input_id) AS n FROM drying_input) r ON t.input_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'drying_input', COUNT(*) FROM drying_input ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE drying_output ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_drying_output_row_version (row_version);
+
+UPDATE drying_output t JOIN (SELECT output_id AS id, ROW_NUMBER() OVER (ORDER BY output_id) AS n FROM drying_output) r ON t.output_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'drying_output', COUNT(*) FROM drying_output ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE drying_quality_control ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_drying_quality_control_row_version (row_version);
+
+UPDATE drying_quality_control t JOIN (SELECT qc_id AS id, ROW_NUMBER() OVER (ORDER BY qc_id) AS n FROM drying_quality_control) r ON t.qc_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'drying_quality_control', COUNT(*) FROM drying_quality_control ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE fly_facility_cage_monitoring ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_fly_facility_cage_monitoring_row_version (row_version);
+
+UPDATE fly_facility_cage_monitoring t JOIN (SELECT monitoring_id AS id, ROW_NUMBER() OVER (ORDER BY monitoring_id) AS n FROM fly_facility_cage_monitoring) r ON t.monitoring_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'fly_facility_cage_monitoring', COUNT(*) FROM fly_facility_cage_monitoring ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE fly_facility_maintenance ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_fly_facility_maintenance_row_version (row_version);
+
+UPDATE fly_facility_maintenance t JOIN (SELECT maintenance_id AS id, ROW_NUMBER() OVER (ORDER BY maintenance_id) AS n FROM fly_facility_maintenance) r ON t.maintenance_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'fly_facility_maintenance', COUNT(*) FROM fly_facility_maintenance ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE fly_facility_pupae_transition ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_fly_facility_pupae_transition_row_version (row_version);
+
+UPDATE fly_facility_pupae_transition t JOIN (SELECT transition_id AS id, ROW_NUMBER() OVER (ORDER BY transition_id) AS n FROM fly_facility_pupae_transition) r ON t.transition_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'fly_facility_pupae_transition', COUNT(*) FROM fly_facility_pupae_transition ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE fly_facility_egg_collection ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_fly_facility_egg_collection_row_version (row_version);
+
+UPDATE fly_facility_egg_collection t JOIN (SELECT collection_id AS id, ROW_NUMBER() OVER (ORDER BY collection_id) AS n FROM fly_facility_egg_collection) r ON t.collection_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'fly_facility_egg_collection', COUNT(*) FROM fly_facility_egg_collection ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE fly_facility_bait_preparation ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_fly_facility_bait_preparation_row_version (row_version);
+
+UPDATE fly_facility_bait_preparation t JOIN (SELECT bait_id AS id, ROW_NUMBER() OVER (ORDER BY bait_id) AS n FROM fly_facility_bait_preparation) r ON t.bait_id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'fly_facility_bait_preparation', COUNT(*) FROM fly_facility_bait_preparation ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE customers ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_customers_row_version (row_version);
+
+UPDATE customers t JOIN (SELECT id AS id, ROW_NUMBER() OVER (ORDER BY id) AS n FROM customers) r ON t.id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'customers', COUNT(*) FROM customers ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE sales ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_sales_row_version (row_version);
+
+UPDATE sales t JOIN (SELECT id AS id, ROW_NUMBER() OVER (ORDER BY id) AS n FROM sales) r ON t.id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'sales', COUNT(*) FROM sales ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE deliveries ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_deliveries_row_version (row_version);
+
+UPDATE deliveries t JOIN (SELECT id AS id, ROW_NUMBER() OVER (ORDER BY id) AS n FROM deliveries) r ON t.id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'deliveries', COUNT(*) FROM deliveries ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+ALTER TABLE customer_feedback ADD COLUMN row_version BIGINT UNSIGNED NOT NULL DEFAULT 0, ADD COLUMN row_updated_at TIMESTAMP(3) NULL, ADD KEY idx_customer_feedback_row_version (row_version);
+
+UPDATE customer_feedback t JOIN (SELECT id AS id, ROW_NUMBER() OVER (ORDER BY id) AS n FROM customer_feedback) r ON t.id = r.id SET t.row_version = r.n, t.row_updated_at = CURRENT_TIMESTAMP(3);
+
+INSERT INTO sync_table_versions (table_name, version) SELECT 'customer_feedback', COUNT(*) FROM customer_feedback ON DUPLICATE KEY UPDATE version = GREATEST(version, VALUES(version));
+
+DROP TRIGGER IF EXISTS trg_waste_sourcing_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_waste_sourcing_sync_bi BEFORE INSERT ON waste_sourcing FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'waste_sourcing';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'waste_sourcing'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_waste_sourcing_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_waste_sourcing_sync_bu BEFORE UPDATE ON waste_sourcing FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'waste_sourcing';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'waste_sourcing'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_waste_sourcing_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_waste_sourcing_sync_ad AFTER DELETE ON waste_sourcing FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'waste_sourcing';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'waste_sourcing', OLD.sourcing_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'waste_sourcing'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_storage_records_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_storage_records_sync_bi BEFORE INSERT ON storage_records FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'storage_records';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'storage_records'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_storage_records_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_storage_records_sync_bu BEFORE UPDATE ON storage_records FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'storage_records';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'storage_records'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_storage_records_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_storage_records_sync_ad AFTER DELETE ON storage_records FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'storage_records';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'storage_records', OLD.record_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'storage_records'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_processing_records_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_processing_records_sync_bi BEFORE INSERT ON processing_records FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'processing_records';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'processing_records'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_processing_records_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_processing_records_sync_bu BEFORE UPDATE ON processing_records FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'processing_records';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'processing_records'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_processing_records_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_processing_records_sync_ad AFTER DELETE ON processing_records FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'processing_records';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'processing_records', OLD.processing_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'processing_records'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_environmental_monitoring_waste_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_environmental_monitoring_waste_sync_bi BEFORE INSERT ON environmental_monitoring_waste FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'environmental_monitoring_waste';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'environmental_monitoring_waste'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_environmental_monitoring_waste_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_environmental_monitoring_waste_sync_bu BEFORE UPDATE ON environmental_monitoring_waste FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'environmental_monitoring_waste';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'environmental_monitoring_waste'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_environmental_monitoring_waste_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_environmental_monitoring_waste_sync_ad AFTER DELETE ON environmental_monitoring_waste FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'environmental_monitoring_waste';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'environmental_monitoring_waste', OLD.monitoring_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'environmental_monitoring_waste'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_substrate_preparation_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_substrate_preparation_sync_bi BEFORE INSERT ON substrate_preparation FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'substrate_preparation';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'substrate_preparation'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_substrate_preparation_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_substrate_preparation_sync_bu BEFORE UPDATE ON substrate_preparation FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'substrate_preparation';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'substrate_preparation'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_substrate_preparation_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_substrate_preparation_sync_ad AFTER DELETE ON substrate_preparation FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'substrate_preparation';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'substrate_preparation', OLD.id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'substrate_preparation'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_hatchery_batches_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_hatchery_batches_sync_bi BEFORE INSERT ON hatchery_batches FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'hatchery_batches';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'hatchery_batches'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_hatchery_batches_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_hatchery_batches_sync_bu BEFORE UPDATE ON hatchery_batches FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'hatchery_batches';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'hatchery_batches'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_hatchery_batches_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_hatchery_batches_sync_ad AFTER DELETE ON hatchery_batches FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'hatchery_batches';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'hatchery_batches', OLD.batch_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'hatchery_batches'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_hatchery_feeding_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_hatchery_feeding_sync_bi BEFORE INSERT ON hatchery_feeding FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'hatchery_feeding';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'hatchery_feeding'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_hatchery_feeding_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_hatchery_feeding_sync_bu BEFORE UPDATE ON hatchery_feeding FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'hatchery_feeding';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'hatchery_feeding'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_hatchery_feeding_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_hatchery_feeding_sync_ad AFTER DELETE ON hatchery_feeding FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'hatchery_feeding';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'hatchery_feeding', OLD.feeding_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'hatchery_feeding'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_hatchery_monitoring_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_hatchery_monitoring_sync_bi BEFORE INSERT ON hatchery_monitoring FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'hatchery_monitoring';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'hatchery_monitoring'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_hatchery_monitoring_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_hatchery_monitoring_sync_bu BEFORE UPDATE ON hatchery_monitoring FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'hatchery_monitoring';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'hatchery_monitoring'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_hatchery_monitoring_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_hatchery_monitoring_sync_ad AFTER DELETE ON hatchery_monitoring FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'hatchery_monitoring';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'hatchery_monitoring', OLD.monitoring_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'hatchery_monitoring'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_hatchery_cleaning_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_hatchery_cleaning_sync_bi BEFORE INSERT ON hatchery_cleaning FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'hatchery_cleaning';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'hatchery_cleaning'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_hatchery_cleaning_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_hatchery_cleaning_sync_bu BEFORE UPDATE ON hatchery_cleaning FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'hatchery_cleaning';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'hatchery_cleaning'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_hatchery_cleaning_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_hatchery_cleaning_sync_ad AFTER DELETE ON hatchery_cleaning FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'hatchery_cleaning';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'hatchery_cleaning', OLD.cleaning_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'hatchery_cleaning'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_hatchery_problems_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_hatchery_problems_sync_bi BEFORE INSERT ON hatchery_problems FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'hatchery_problems';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'hatchery_problems'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_hatchery_problems_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_hatchery_problems_sync_bu BEFORE UPDATE ON hatchery_problems FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'hatchery_problems';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'hatchery_problems'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_hatchery_problems_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_hatchery_problems_sync_ad AFTER DELETE ON hatchery_problems FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'hatchery_problems';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'hatchery_problems', OLD.problem_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'hatchery_problems'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_feeding_environmental_monitoring_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_feeding_environmental_monitoring_sync_bi BEFORE INSERT ON feeding_environmental_monitoring FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'feeding_environmental_monitoring';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'feeding_environmental_monitoring'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_feeding_environmental_monitoring_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_feeding_environmental_monitoring_sync_bu BEFORE UPDATE ON feeding_environmental_monitoring FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'feeding_environmental_monitoring';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'feeding_environmental_monitoring'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_feeding_environmental_monitoring_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_feeding_environmental_monitoring_sync_ad AFTER DELETE ON feeding_environmental_monitoring FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'feeding_environmental_monitoring';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'feeding_environmental_monitoring', OLD.monitoring_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'feeding_environmental_monitoring'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_feeding_health_intervention_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_feeding_health_intervention_sync_bi BEFORE INSERT ON feeding_health_intervention FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'feeding_health_intervention';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'feeding_health_intervention'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_feeding_health_intervention_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_feeding_health_intervention_sync_bu BEFORE UPDATE ON feeding_health_intervention FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'feeding_health_intervention';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'feeding_health_intervention'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_feeding_health_intervention_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_feeding_health_intervention_sync_ad AFTER DELETE ON feeding_health_intervention FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'feeding_health_intervention';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'feeding_health_intervention', OLD.intervention_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'feeding_health_intervention'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_feeding_harvest_yield_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_feeding_harvest_yield_sync_bi BEFORE INSERT ON feeding_harvest_yield FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'feeding_harvest_yield';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'feeding_harvest_yield'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_feeding_harvest_yield_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_feeding_harvest_yield_sync_bu BEFORE UPDATE ON feeding_harvest_yield FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'feeding_harvest_yield';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'feeding_harvest_yield'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_feeding_harvest_yield_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_feeding_harvest_yield_sync_ad AFTER DELETE ON feeding_harvest_yield FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'feeding_harvest_yield';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'feeding_harvest_yield', OLD.harvest_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'feeding_harvest_yield'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_feeding_schedule_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_feeding_schedule_sync_bi BEFORE INSERT ON feeding_schedule FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'feeding_schedule';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'feeding_schedule'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_feeding_schedule_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_feeding_schedule_sync_bu BEFORE UPDATE ON feeding_schedule FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'feeding_schedule';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'feeding_schedule'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_feeding_schedule_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_feeding_schedule_sync_ad AFTER DELETE ON feeding_schedule FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'feeding_schedule';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'feeding_schedule', OLD.schedule_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'feeding_schedule'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_drying_batches_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_drying_batches_sync_bi BEFORE INSERT ON drying_batches FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'drying_batches';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'drying_batches'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_drying_batches_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_drying_batches_sync_bu BEFORE UPDATE ON drying_batches FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'drying_batches';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'drying_batches'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_drying_batches_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_drying_batches_sync_ad AFTER DELETE ON drying_batches FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'drying_batches';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'drying_batches', OLD.id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'drying_batches'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_drying_input_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_drying_input_sync_bi BEFORE INSERT ON drying_input FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'drying_input';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'drying_input'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_drying_input_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_drying_input_sync_bu BEFORE UPDATE ON drying_input FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'drying_input';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'drying_input'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_drying_input_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_drying_input_sync_ad AFTER DELETE ON drying_input FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'drying_input';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'drying_input', OLD.input_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'drying_input'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_drying_output_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_drying_output_sync_bi BEFORE INSERT ON drying_output FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'drying_output';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'drying_output'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_drying_output_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_drying_output_sync_bu BEFORE UPDATE ON drying_output FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'drying_output';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'drying_output'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_drying_output_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_drying_output_sync_ad AFTER DELETE ON drying_output FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'drying_output';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'drying_output', OLD.output_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'drying_output'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_drying_quality_control_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_drying_quality_control_sync_bi BEFORE INSERT ON drying_quality_control FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'drying_quality_control';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'drying_quality_control'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_drying_quality_control_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_drying_quality_control_sync_bu BEFORE UPDATE ON drying_quality_control FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'drying_quality_control';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'drying_quality_control'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_drying_quality_control_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_drying_quality_control_sync_ad AFTER DELETE ON drying_quality_control FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'drying_quality_control';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'drying_quality_control', OLD.qc_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'drying_quality_control'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_cage_monitoring_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_fly_facility_cage_monitoring_sync_bi BEFORE INSERT ON fly_facility_cage_monitoring FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'fly_facility_cage_monitoring';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'fly_facility_cage_monitoring'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_cage_monitoring_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_fly_facility_cage_monitoring_sync_bu BEFORE UPDATE ON fly_facility_cage_monitoring FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'fly_facility_cage_monitoring';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'fly_facility_cage_monitoring'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_cage_monitoring_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_fly_facility_cage_monitoring_sync_ad AFTER DELETE ON fly_facility_cage_monitoring FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'fly_facility_cage_monitoring';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'fly_facility_cage_monitoring', OLD.monitoring_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'fly_facility_cage_monitoring'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_maintenance_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_fly_facility_maintenance_sync_bi BEFORE INSERT ON fly_facility_maintenance FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'fly_facility_maintenance';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'fly_facility_maintenance'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_maintenance_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_fly_facility_maintenance_sync_bu BEFORE UPDATE ON fly_facility_maintenance FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'fly_facility_maintenance';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'fly_facility_maintenance'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_maintenance_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_fly_facility_maintenance_sync_ad AFTER DELETE ON fly_facility_maintenance FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'fly_facility_maintenance';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'fly_facility_maintenance', OLD.maintenance_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'fly_facility_maintenance'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_pupae_transition_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_fly_facility_pupae_transition_sync_bi BEFORE INSERT ON fly_facility_pupae_transition FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'fly_facility_pupae_transition';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'fly_facility_pupae_transition'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_pupae_transition_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_fly_facility_pupae_transition_sync_bu BEFORE UPDATE ON fly_facility_pupae_transition FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'fly_facility_pupae_transition';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'fly_facility_pupae_transition'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_pupae_transition_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_fly_facility_pupae_transition_sync_ad AFTER DELETE ON fly_facility_pupae_transition FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'fly_facility_pupae_transition';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'fly_facility_pupae_transition', OLD.transition_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'fly_facility_pupae_transition'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_egg_collection_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_fly_facility_egg_collection_sync_bi BEFORE INSERT ON fly_facility_egg_collection FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'fly_facility_egg_collection';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'fly_facility_egg_collection'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_egg_collection_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_fly_facility_egg_collection_sync_bu BEFORE UPDATE ON fly_facility_egg_collection FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'fly_facility_egg_collection';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'fly_facility_egg_collection'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_egg_collection_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_fly_facility_egg_collection_sync_ad AFTER DELETE ON fly_facility_egg_collection FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'fly_facility_egg_collection';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'fly_facility_egg_collection', OLD.collection_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'fly_facility_egg_collection'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_bait_preparation_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_fly_facility_bait_preparation_sync_bi BEFORE INSERT ON fly_facility_bait_preparation FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'fly_facility_bait_preparation';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'fly_facility_bait_preparation'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_bait_preparation_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_fly_facility_bait_preparation_sync_bu BEFORE UPDATE ON fly_facility_bait_preparation FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'fly_facility_bait_preparation';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'fly_facility_bait_preparation'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_bait_preparation_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_fly_facility_bait_preparation_sync_ad AFTER DELETE ON fly_facility_bait_preparation FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'fly_facility_bait_preparation';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'fly_facility_bait_preparation', OLD.bait_id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'fly_facility_bait_preparation'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_customers_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_customers_sync_bi BEFORE INSERT ON customers FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'customers';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'customers'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_customers_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_customers_sync_bu BEFORE UPDATE ON customers FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'customers';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'customers'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_customers_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_customers_sync_ad AFTER DELETE ON customers FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'customers';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'customers', OLD.id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'customers'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_customers_sync_bd;
+
+DELIMITER $$
+CREATE TRIGGER trg_customers_sync_bd BEFORE DELETE ON customers FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + (SELECT COUNT(*) FROM sales WHERE customer_id = OLD.id) WHERE table_name = 'sales';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'sales', c.id, v.version + 1 - ROW_NUMBER() OVER (ORDER BY c.id), CURRENT_TIMESTAMP(3)
+        FROM sales c JOIN sync_table_versions v ON v.table_name = 'sales'
+        WHERE c.customer_id = OLD.id
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+    UPDATE sync_table_versions SET version = version + (SELECT COUNT(*) FROM deliveries WHERE customer_id = OLD.id) WHERE table_name = 'deliveries';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'deliveries', c.id, v.version + 1 - ROW_NUMBER() OVER (ORDER BY c.id), CURRENT_TIMESTAMP(3)
+        FROM deliveries c JOIN sync_table_versions v ON v.table_name = 'deliveries'
+        WHERE c.customer_id = OLD.id
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+    UPDATE sync_table_versions SET version = version + (SELECT COUNT(*) FROM customer_feedback WHERE customer_id = OLD.id) WHERE table_name = 'customer_feedback';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'customer_feedback', c.id, v.version + 1 - ROW_NUMBER() OVER (ORDER BY c.id), CURRENT_TIMESTAMP(3)
+        FROM customer_feedback c JOIN sync_table_versions v ON v.table_name = 'customer_feedback'
+        WHERE c.customer_id = OLD.id
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_sales_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_sales_sync_bi BEFORE INSERT ON sales FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'sales';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'sales'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_sales_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_sales_sync_bu BEFORE UPDATE ON sales FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'sales';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'sales'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_sales_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_sales_sync_ad AFTER DELETE ON sales FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'sales';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'sales', OLD.id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'sales'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_deliveries_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_deliveries_sync_bi BEFORE INSERT ON deliveries FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'deliveries';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'deliveries'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_deliveries_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_deliveries_sync_bu BEFORE UPDATE ON deliveries FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'deliveries';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'deliveries'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_deliveries_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_deliveries_sync_ad AFTER DELETE ON deliveries FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'deliveries';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'deliveries', OLD.id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'deliveries'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_customer_feedback_sync_bi;
+
+DELIMITER $$
+CREATE TRIGGER trg_customer_feedback_sync_bi BEFORE INSERT ON customer_feedback FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'customer_feedback';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'customer_feedback'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_customer_feedback_sync_bu;
+
+DELIMITER $$
+CREATE TRIGGER trg_customer_feedback_sync_bu BEFORE UPDATE ON customer_feedback FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'customer_feedback';
+    SET NEW.row_version = (SELECT version FROM sync_table_versions WHERE table_name = 'customer_feedback'),
+        NEW.row_updated_at = CURRENT_TIMESTAMP(3);
+END$$
+DELIMITER ;
+
+DROP TRIGGER IF EXISTS trg_customer_feedback_sync_ad;
+
+DELIMITER $$
+CREATE TRIGGER trg_customer_feedback_sync_ad AFTER DELETE ON customer_feedback FOR EACH ROW
+BEGIN
+    UPDATE sync_table_versions SET version = version + 1 WHERE table_name = 'customer_feedback';
+    INSERT INTO sync_tombstones (table_name, row_id, row_version, deleted_at)
+        SELECT 'customer_feedback', OLD.id, version, CURRENT_TIMESTAMP(3)
+        FROM sync_table_versions WHERE table_name = 'customer_feedback'
+        ON DUPLICATE KEY UPDATE row_version = VALUES(row_version), deleted_at = VALUES(deleted_at);
+END$$
+DELIMITER ;
+
@@ -0,0 +1,40 @@
+-- Migration for streaming anomaly detection on environmental readings (anomaly_detection.py)
+-- environment_stream_state holds the running EWMA statistics of each
+-- (source, unit, metric) stream; environment_alerts the raised alerts.
+-- first_value/last_value are window functions in MySQL 8, hence *_reading.
+
+CREATE TABLE IF NOT EXISTS environment_stream_state (
+    source VARCHAR(20) NOT NULL,
+    unit_id VARCHAR(255) NOT NULL,
+    metric VARCHAR(50) NOT NULL,
+    reading_count INT NOT NULL,
+    mean DOUBLE NOT NULL,
+    variance DOUBLE NOT NULL,
+    fast_mean DOUBLE NOT NULL,
+    last_reading DOUBLE NULL,
+    last_reading_at DATETIME NULL,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    PRIMARY KEY (source, unit_id, metric)
+);
+
+-- is_open is 1 until the alert is acknowledged and NULL afterwards, so the
+-- unique key allows one open alert per stream and kind
+CREATE TABLE IF NOT EXISTS environment_alerts (
+    alert_id INT AUTO_INCREMENT PRIMARY KEY,
+    source VARCHAR(20) NOT NULL,
+    unit_id VARCHAR(255) NOT NULL,
+    metric VARCHAR(50) NOT NULL,
+    kind ENUM('range', 'spike', 'drift') NOT NULL,
+    first_reading DOUBLE NOT NULL,
+    last_reading DOUBLE NOT NULL,
+    expected DOUBLE NULL,
+    threshold DOUBLE NULL,
+    occurrences INT NOT NULL DEFAULT 1,
+    first_seen_at DATETIME NOT NULL,
+    last_seen_at DATETIME NOT NULL,
+    is_open TINYINT NULL DEFAULT 1,
+    acknowledged_by VARCHAR(255) NULL,
+    acknowledged_at DATETIME NULL,
+    UNIQUE KEY uq_environment_alerts_open (source, unit_id, metric, kind, is_open),
+    INDEX idx_environment_alerts_last_seen (last_seen_at)
+);
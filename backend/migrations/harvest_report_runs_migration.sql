@@ -0,0 +1,18 @@
+-- Migration for harvest report runs (harvest_report.py)
+-- Incremental runs cover feeding_harvest_yield rows with a harvest_id above the
+-- last_harvest_id of the latest sent incremental run.
+
+CREATE TABLE IF NOT EXISTS harvest_report_runs (
+    run_id INT AUTO_INCREMENT PRIMARY KEY,
+    requested_by INT NULL,
+    incremental TINYINT(1) NOT NULL DEFAULT 1,
+    date_from DATE NULL,
+    date_to DATE NULL,
+    status ENUM('queued', 'sent', 'empty', 'failed') NOT NULL DEFAULT 'queued',
+    row_count INT NULL,
+    last_harvest_id INT NULL,
+    error VARCHAR(255) NULL,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    finished_at TIMESTAMP NULL,
+    KEY idx_harvest_report_runs_incremental (incremental, status, last_harvest_id)
+);
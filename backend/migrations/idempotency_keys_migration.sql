@@ -0,0 +1,17 @@
+-- Migration: Idempotency-Key store for replay-safe POSTs (idempotency.py)
+-- Keys and request fingerprints are SHA-256 hashes. status_code stays NULL
+-- while the first request runs; expired rows are purged by the scheduler.
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    user_id INT NOT NULL,
+    key_hash BINARY(32) NOT NULL,
+    request_hash BINARY(32) NOT NULL,
+    claim_id BINARY(16) NOT NULL,
+    status_code SMALLINT NULL,
+    content_type VARCHAR(100) NULL,
+    response_body BLOB NULL,
+    created_at DATETIME NOT NULL,
+    expires_at DATETIME NOT NULL,
+    PRIMARY KEY (user_id, key_hash),
+    KEY idx_idempotency_keys_expires (expires_at)
+) ENGINE=InnoDB;
@@ -0,0 +1,26 @@
+-- Migration for cached larval growth forecasts (forecasting.py)
+-- row_count/last_schedule_id record the feeding rows a forecast was fitted on,
+-- so only trays with new rows are refitted.
+
+CREATE TABLE IF NOT EXISTS larval_growth_forecasts (
+    tray_batch_id VARCHAR(255) PRIMARY KEY,
+    row_count INT NOT NULL,
+    last_schedule_id INT NOT NULL,
+    model_version VARCHAR(50) NOT NULL,
+    coef_a DOUBLE NOT NULL,
+    coef_b DOUBLE NOT NULL,
+    coef_c DOUBLE NOT NULL,
+    rmse_log DOUBLE NULL,
+    current_age_days INT NOT NULL,
+    last_weight_g DECIMAL(10, 2) NULL,
+    harvest_age_days INT NOT NULL,
+    predicted_harvest_date DATE NOT NULL,
+    predicted_weight_g DECIMAL(10, 2) NULL,
+    predicted_feed_kg DECIMAL(10, 2) NULL,
+    predicted_yield_kg DECIMAL(10, 2) NULL,
+    computed_at DATETIME NOT NULL
+);
+
+CREATE INDEX idx_feeding_schedule_tray_age ON feeding_schedule (tray_batch_id, larvae_age_days);
+CREATE INDEX idx_feeding_schedule_date ON feeding_schedule (feeding_date);
+CREATE INDEX idx_feeding_harvest_yield_tray ON feeding_harvest_yield (tray_batch_id);
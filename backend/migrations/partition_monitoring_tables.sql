@@ -0,0 +1,90 @@
+-- Migration: monthly RANGE partitioning for the monitoring tables
+-- Generated with `python partition_maintenance.py convert --dry-run`; rows before
+-- 2026-01-01 land in p_history. Afterwards run `partition_maintenance.py ensure`
+-- monthly to keep partitions ahead of time, and `archive` to detach old months.
+-- Partitioned tables cannot carry foreign keys, so drop any FOREIGN KEY on
+-- recorded_by before running this.
+
+-- fly_facility_cage_monitoring
+ALTER TABLE fly_facility_cage_monitoring DROP PRIMARY KEY, ADD PRIMARY KEY (monitoring_id, monitoring_date);
+
+ALTER TABLE fly_facility_cage_monitoring PARTITION BY RANGE COLUMNS(monitoring_date) (
+    PARTITION p_history VALUES LESS THAN ('2026-01-01'),
+    PARTITION p202601 VALUES LESS THAN ('2026-02-01'),
+    PARTITION p202602 VALUES LESS THAN ('2026-03-01'),
+    PARTITION p202603 VALUES LESS THAN ('2026-04-01'),
+    PARTITION p202604 VALUES LESS THAN ('2026-05-01'),
+    PARTITION p202605 VALUES LESS THAN ('2026-06-01'),
+    PARTITION p202606 VALUES LESS THAN ('2026-07-01'),
+    PARTITION p202607 VALUES LESS THAN ('2026-08-01'),
+    PARTITION p202608 VALUES LESS THAN ('2026-09-01'),
+    PARTITION p202609 VALUES LESS THAN ('2026-10-01'),
+    PARTITION p202610 VALUES LESS THAN ('2026-11-01'),
+    PARTITION p202611 VALUES LESS THAN ('2026-12-01'),
+    PARTITION p202612 VALUES LESS THAN ('2027-01-01'),
+    PARTITION p202701 VALUES LESS THAN ('2027-02-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+-- feeding_environmental_monitoring
+ALTER TABLE feeding_environmental_monitoring DROP PRIMARY KEY, ADD PRIMARY KEY (monitoring_id, monitoring_date);
+
+ALTER TABLE feeding_environmental_monitoring PARTITION BY RANGE COLUMNS(monitoring_date) (
+    PARTITION p_history VALUES LESS THAN ('2026-01-01'),
+    PARTITION p202601 VALUES LESS THAN ('2026-02-01'),
+    PARTITION p202602 VALUES LESS THAN ('2026-03-01'),
+    PARTITION p202603 VALUES LESS THAN ('2026-04-01'),
+    PARTITION p202604 VALUES LESS THAN ('2026-05-01'),
+    PARTITION p202605 VALUES LESS THAN ('2026-06-01'),
+    PARTITION p202606 VALUES LESS THAN ('2026-07-01'),
+    PARTITION p202607 VALUES LESS THAN ('2026-08-01'),
+    PARTITION p202608 VALUES LESS THAN ('2026-09-01'),
+    PARTITION p202609 VALUES LESS THAN ('2026-10-01'),
+    PARTITION p202610 VALUES LESS THAN ('2026-11-01'),
+    PARTITION p202611 VALUES LESS THAN ('2026-12-01'),
+    PARTITION p202612 VALUES LESS THAN ('2027-01-01'),
+    PARTITION p202701 VALUES LESS THAN ('2027-02-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+-- environmental_monitoring_waste
+ALTER TABLE environmental_monitoring_waste DROP PRIMARY KEY, ADD PRIMARY KEY (monitoring_id, monitoring_date);
+
+ALTER TABLE environmental_monitoring_waste PARTITION BY RANGE COLUMNS(monitoring_date) (
+    PARTITION p_history VALUES LESS THAN ('2026-01-01'),
+    PARTITION p202601 VALUES LESS THAN ('2026-02-01'),
+    PARTITION p202602 VALUES LESS THAN ('2026-03-01'),
+    PARTITION p202603 VALUES LESS THAN ('2026-04-01'),
+    PARTITION p202604 VALUES LESS THAN ('2026-05-01'),
+    PARTITION p202605 VALUES LESS THAN ('2026-06-01'),
+    PARTITION p202606 VALUES LESS THAN ('2026-07-01'),
+    PARTITION p202607 VALUES LESS THAN ('2026-08-01'),
+    PARTITION p202608 VALUES LESS THAN ('2026-09-01'),
+    PARTITION p202609 VALUES LESS THAN ('2026-10-01'),
+    PARTITION p202610 VALUES LESS THAN ('2026-11-01'),
+    PARTITION p202611 VALUES LESS THAN ('2026-12-01'),
+    PARTITION p202612 VALUES LESS THAN ('2027-01-01'),
+    PARTITION p202701 VALUES LESS THAN ('2027-02-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
+
+-- hatchery_monitoring
+ALTER TABLE hatchery_monitoring DROP PRIMARY KEY, ADD PRIMARY KEY (monitoring_id, monitoring_date);
+
+ALTER TABLE hatchery_monitoring PARTITION BY RANGE COLUMNS(monitoring_date) (
+    PARTITION p_history VALUES LESS THAN ('2026-01-01'),
+    PARTITION p202601 VALUES LESS THAN ('2026-02-01'),
+    PARTITION p202602 VALUES LESS THAN ('2026-03-01'),
+    PARTITION p202603 VALUES LESS THAN ('2026-04-01'),
+    PARTITION p202604 VALUES LESS THAN ('2026-05-01'),
+    PARTITION p202605 VALUES LESS THAN ('2026-06-01'),
+    PARTITION p202606 VALUES LESS THAN ('2026-07-01'),
+    PARTITION p202607 VALUES LESS THAN ('2026-08-01'),
+    PARTITION p202608 VALUES LESS THAN ('2026-09-01'),
+    PARTITION p202609 VALUES LESS THAN ('2026-10-01'),
+    PARTITION p202610 VALUES LESS THAN ('2026-11-01'),
+    PARTITION p202611 VALUES LESS THAN ('2026-12-01'),
+    PARTITION p202612 VALUES LESS THAN ('2027-01-01'),
+    PARTITION p202701 VALUES LESS THAN ('2027-02-01'),
+    PARTITION p_future VALUES LESS THAN (MAXVALUE)
+);
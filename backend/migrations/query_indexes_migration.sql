@@ -0,0 +1,30 @@
+-- Migration: Indexes proposed by index_advisor.py for the hot lookups
+-- /api/records reads one day of a section with a half-open range on its date
+-- column; these tables had no index on it and were scanned in full. The
+-- hatchery tables already have theirs (feeding_tables_migration.sql), and
+-- batch_id / customer_id lookups use the indexes behind their foreign keys.
+-- feeding_schedule(feeding_date) is covered by idx_feeding_schedule_date
+-- (larval_growth_forecasts_migration.sql).
+-- Verify with: python index_advisor.py check
+
+CREATE INDEX idx_waste_sourcing_collection_date ON waste_sourcing(collection_date);
+CREATE INDEX idx_storage_records_storage_date ON storage_records(storage_date);
+CREATE INDEX idx_processing_records_processing_date ON processing_records(processing_date);
+CREATE INDEX idx_environmental_monitoring_waste_monitoring_date ON environmental_monitoring_waste(monitoring_date);
+CREATE INDEX idx_feeding_environmental_monitoring_monitoring_date ON feeding_environmental_monitoring(monitoring_date);
+CREATE INDEX idx_feeding_health_intervention_health_check_date ON feeding_health_intervention(health_check_date);
+CREATE INDEX idx_feeding_harvest_yield_harvest_date ON feeding_harvest_yield(harvest_date);
+CREATE INDEX idx_feeding_harvest_yield_tray_batch_id ON feeding_harvest_yield(tray_batch_id);
+CREATE INDEX idx_feeding_schedule_tray_batch_id_feeding_date ON feeding_schedule(tray_batch_id, feeding_date);
+CREATE INDEX idx_drying_batches_drying_date ON drying_batches(drying_date);
+CREATE INDEX idx_drying_input_created_at ON drying_input(created_at);
+CREATE INDEX idx_drying_output_created_at ON drying_output(created_at);
+CREATE INDEX idx_drying_quality_control_qc_date ON drying_quality_control(qc_date);
+CREATE INDEX idx_drying_review_approval_review_date ON drying_review_approval(review_date);
+CREATE INDEX idx_fly_facility_cage_monitoring_monitoring_date ON fly_facility_cage_monitoring(monitoring_date);
+CREATE INDEX idx_fly_facility_maintenance_maintenance_date ON fly_facility_maintenance(maintenance_date);
+CREATE INDEX idx_fly_facility_pupae_transition_transition_date ON fly_facility_pupae_transition(transition_date);
+CREATE INDEX idx_fly_facility_egg_collection_collection_date ON fly_facility_egg_collection(collection_date);
+CREATE INDEX idx_fly_facility_bait_preparation_start_date ON fly_facility_bait_preparation(start_date);
+CREATE INDEX idx_sales_date ON sales(date);
+CREATE INDEX idx_deliveries_date ON deliveries(date);
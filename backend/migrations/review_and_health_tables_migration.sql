@@ -0,0 +1,28 @@
+-- Migration: drying review and hatchery health intervention tables
+-- POST /api/drying/review and POST /api/hatchery/health-intervention have
+-- always written to these tables, but no schema defined them. Columns follow
+-- the INSERTs in app.py; run this before search_documents_migration.sql,
+-- whose triggers index the comments columns.
+
+CREATE TABLE IF NOT EXISTS drying_review_approval (
+    review_id INT AUTO_INCREMENT PRIMARY KEY,
+    batch_id VARCHAR(255) NOT NULL,
+    reviewed_by VARCHAR(100) NOT NULL,
+    review_date DATE NOT NULL,
+    approval_status VARCHAR(50) NOT NULL,
+    comments TEXT,
+    recorded_by VARCHAR(100),
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS hatchery_health_interventions (
+    intervention_id INT AUTO_INCREMENT PRIMARY KEY,
+    health_date DATE NOT NULL,
+    health_issue VARCHAR(255) NOT NULL,
+    severity VARCHAR(50) NOT NULL,
+    action_taken TEXT NOT NULL,
+    follow_up_date DATE NULL,
+    resolved BOOLEAN,
+    comments TEXT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
@@ -0,0 +1,33 @@
+-- Migration for the sales analytics aggregate tables
+-- Kept up to date by add_sale/edit_sale/add_feedback/edit_feedback through
+-- sales_analytics.py; the INSERT ... SELECT statements backfill existing data
+-- (same as `python sales_analytics.py rebuild`).
+
+CREATE TABLE IF NOT EXISTS sales_daily_summary (
+    sale_date DATE NOT NULL,
+    customer_id INT NOT NULL,
+    product VARCHAR(100) NOT NULL DEFAULT '',
+    revenue DECIMAL(14, 2) NOT NULL DEFAULT 0,
+    quantity BIGINT NOT NULL DEFAULT 0,
+    sale_count INT NOT NULL DEFAULT 0,
+    PRIMARY KEY (sale_date, customer_id, product),
+    KEY idx_sales_daily_summary_customer (customer_id, sale_date),
+    KEY idx_sales_daily_summary_product (product, sale_date)
+);
+
+CREATE TABLE IF NOT EXISTS customer_feedback_summary (
+    customer_id INT PRIMARY KEY,
+    rating_sum BIGINT NOT NULL DEFAULT 0,
+    rating_count INT NOT NULL DEFAULT 0,
+    feedback_count INT NOT NULL DEFAULT 0
+);
+
+INSERT INTO sales_daily_summary (sale_date, customer_id, product, revenue, quantity, sale_count)
+SELECT date, customer_id, IFNULL(product, ''), SUM(amount), SUM(IFNULL(quantity, 0)), COUNT(*)
+FROM sales
+GROUP BY date, customer_id, IFNULL(product, '');
+
+INSERT INTO customer_feedback_summary (customer_id, rating_sum, rating_count, feedback_count)
+SELECT customer_id, SUM(IFNULL(rating, 0)), COUNT(rating), COUNT(*)
+FROM customer_feedback
+GROUP BY customer_id;
@@ -0,0 +1,17 @@
+-- Migration for the background job scheduler (scheduler.py)
+-- One row per job run; the leader resumes each job's schedule from the latest
+-- scheduled_for after a failover.
+
+CREATE TABLE IF NOT EXISTS scheduler_job_runs (
+    run_id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    job_name VARCHAR(64) NOT NULL,
+    worker VARCHAR(100) NOT NULL,
+    scheduled_for DATETIME NOT NULL,
+    started_at DATETIME NOT NULL,
+    finished_at DATETIME NULL,
+    duration_ms INT NULL,
+    status ENUM('running', 'success', 'failed', 'timeout') NOT NULL DEFAULT 'running',
+    error VARCHAR(500) NULL,
+    KEY idx_scheduler_job_runs_job (job_name, started_at),
+    KEY idx_scheduler_job_runs_started (started_at)
+);
@@ -0,0 +1,354 @@
+-- Migration: cross-section full-text search (search_index.py, GET /api/search)
+-- Generated with `python search_index.py ddl`. The triggers copy the notes,
+-- remarks and comments of each searchable table into search_documents; the
+-- REPLACE ... SELECT statements at the end backfill existing rows.
+-- Run review_and_health_tables_migration.sql first: drying_review_approval and
+-- hatchery_health_interventions are indexed here.
+
+CREATE TABLE IF NOT EXISTS search_documents (
+    source_table VARCHAR(64) NOT NULL,
+    source_id INT NOT NULL,
+    section VARCHAR(20) NOT NULL,
+    record_date DATE NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (source_table, source_id),
+    KEY idx_search_documents_section_date (section, record_date),
+    FULLTEXT KEY ft_search_documents_body (body)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
+
+DROP TRIGGER IF EXISTS trg_waste_sourcing_search_ai;
+
+CREATE TRIGGER trg_waste_sourcing_search_ai AFTER INSERT ON waste_sourcing FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('waste_sourcing', NEW.sourcing_id, 'waste', DATE(NEW.collection_date), CONCAT_WS(' ', NEW.collection_notes));
+
+DROP TRIGGER IF EXISTS trg_waste_sourcing_search_au;
+
+CREATE TRIGGER trg_waste_sourcing_search_au AFTER UPDATE ON waste_sourcing FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('waste_sourcing', NEW.sourcing_id, 'waste', DATE(NEW.collection_date), CONCAT_WS(' ', NEW.collection_notes));
+
+DROP TRIGGER IF EXISTS trg_waste_sourcing_search_ad;
+
+CREATE TRIGGER trg_waste_sourcing_search_ad AFTER DELETE ON waste_sourcing FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'waste_sourcing' AND source_id = OLD.sourcing_id;
+
+DROP TRIGGER IF EXISTS trg_storage_records_search_ai;
+
+CREATE TRIGGER trg_storage_records_search_ai AFTER INSERT ON storage_records FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('storage_records', NEW.record_id, 'waste', DATE(NEW.storage_date), CONCAT_WS(' ', NEW.storage_observations));
+
+DROP TRIGGER IF EXISTS trg_storage_records_search_au;
+
+CREATE TRIGGER trg_storage_records_search_au AFTER UPDATE ON storage_records FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('storage_records', NEW.record_id, 'waste', DATE(NEW.storage_date), CONCAT_WS(' ', NEW.storage_observations));
+
+DROP TRIGGER IF EXISTS trg_storage_records_search_ad;
+
+CREATE TRIGGER trg_storage_records_search_ad AFTER DELETE ON storage_records FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'storage_records' AND source_id = OLD.record_id;
+
+DROP TRIGGER IF EXISTS trg_processing_records_search_ai;
+
+CREATE TRIGGER trg_processing_records_search_ai AFTER INSERT ON processing_records FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('processing_records', NEW.processing_id, 'waste', DATE(NEW.processing_date), CONCAT_WS(' ', NEW.processing_remarks));
+
+DROP TRIGGER IF EXISTS trg_processing_records_search_au;
+
+CREATE TRIGGER trg_processing_records_search_au AFTER UPDATE ON processing_records FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('processing_records', NEW.processing_id, 'waste', DATE(NEW.processing_date), CONCAT_WS(' ', NEW.processing_remarks));
+
+DROP TRIGGER IF EXISTS trg_processing_records_search_ad;
+
+CREATE TRIGGER trg_processing_records_search_ad AFTER DELETE ON processing_records FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'processing_records' AND source_id = OLD.processing_id;
+
+DROP TRIGGER IF EXISTS trg_environmental_monitoring_waste_search_ai;
+
+CREATE TRIGGER trg_environmental_monitoring_waste_search_ai AFTER INSERT ON environmental_monitoring_waste FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('environmental_monitoring_waste', NEW.monitoring_id, 'waste', DATE(NEW.monitoring_date), CONCAT_WS(' ', NEW.pest_details, NEW.mitigation_actions, NEW.remarks));
+
+DROP TRIGGER IF EXISTS trg_environmental_monitoring_waste_search_au;
+
+CREATE TRIGGER trg_environmental_monitoring_waste_search_au AFTER UPDATE ON environmental_monitoring_waste FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('environmental_monitoring_waste', NEW.monitoring_id, 'waste', DATE(NEW.monitoring_date), CONCAT_WS(' ', NEW.pest_details, NEW.mitigation_actions, NEW.remarks));
+
+DROP TRIGGER IF EXISTS trg_environmental_monitoring_waste_search_ad;
+
+CREATE TRIGGER trg_environmental_monitoring_waste_search_ad AFTER DELETE ON environmental_monitoring_waste FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'environmental_monitoring_waste' AND source_id = OLD.monitoring_id;
+
+DROP TRIGGER IF EXISTS trg_hatchery_batches_search_ai;
+
+CREATE TRIGGER trg_hatchery_batches_search_ai AFTER INSERT ON hatchery_batches FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('hatchery_batches', NEW.batch_id, 'hatchery', DATE(NEW.batch_date), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_hatchery_batches_search_au;
+
+CREATE TRIGGER trg_hatchery_batches_search_au AFTER UPDATE ON hatchery_batches FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('hatchery_batches', NEW.batch_id, 'hatchery', DATE(NEW.batch_date), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_hatchery_batches_search_ad;
+
+CREATE TRIGGER trg_hatchery_batches_search_ad AFTER DELETE ON hatchery_batches FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'hatchery_batches' AND source_id = OLD.batch_id;
+
+DROP TRIGGER IF EXISTS trg_hatchery_feeding_search_ai;
+
+CREATE TRIGGER trg_hatchery_feeding_search_ai AFTER INSERT ON hatchery_feeding FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('hatchery_feeding', NEW.feeding_id, 'hatchery', DATE(NEW.feeding_date), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_hatchery_feeding_search_au;
+
+CREATE TRIGGER trg_hatchery_feeding_search_au AFTER UPDATE ON hatchery_feeding FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('hatchery_feeding', NEW.feeding_id, 'hatchery', DATE(NEW.feeding_date), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_hatchery_feeding_search_ad;
+
+CREATE TRIGGER trg_hatchery_feeding_search_ad AFTER DELETE ON hatchery_feeding FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'hatchery_feeding' AND source_id = OLD.feeding_id;
+
+DROP TRIGGER IF EXISTS trg_hatchery_monitoring_search_ai;
+
+CREATE TRIGGER trg_hatchery_monitoring_search_ai AFTER INSERT ON hatchery_monitoring FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('hatchery_monitoring', NEW.monitoring_id, 'hatchery', DATE(NEW.monitoring_date), CONCAT_WS(' ', NEW.adjustments_made));
+
+DROP TRIGGER IF EXISTS trg_hatchery_monitoring_search_au;
+
+CREATE TRIGGER trg_hatchery_monitoring_search_au AFTER UPDATE ON hatchery_monitoring FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('hatchery_monitoring', NEW.monitoring_id, 'hatchery', DATE(NEW.monitoring_date), CONCAT_WS(' ', NEW.adjustments_made));
+
+DROP TRIGGER IF EXISTS trg_hatchery_monitoring_search_ad;
+
+CREATE TRIGGER trg_hatchery_monitoring_search_ad AFTER DELETE ON hatchery_monitoring FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'hatchery_monitoring' AND source_id = OLD.monitoring_id;
+
+DROP TRIGGER IF EXISTS trg_hatchery_cleaning_search_ai;
+
+CREATE TRIGGER trg_hatchery_cleaning_search_ai AFTER INSERT ON hatchery_cleaning FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('hatchery_cleaning', NEW.cleaning_id, 'hatchery', DATE(NEW.cleaning_date), CONCAT_WS(' ', NEW.areas_cleaned, NEW.remarks));
+
+DROP TRIGGER IF EXISTS trg_hatchery_cleaning_search_au;
+
+CREATE TRIGGER trg_hatchery_cleaning_search_au AFTER UPDATE ON hatchery_cleaning FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('hatchery_cleaning', NEW.cleaning_id, 'hatchery', DATE(NEW.cleaning_date), CONCAT_WS(' ', NEW.areas_cleaned, NEW.remarks));
+
+DROP TRIGGER IF EXISTS trg_hatchery_cleaning_search_ad;
+
+CREATE TRIGGER trg_hatchery_cleaning_search_ad AFTER DELETE ON hatchery_cleaning FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'hatchery_cleaning' AND source_id = OLD.cleaning_id;
+
+DROP TRIGGER IF EXISTS trg_hatchery_problems_search_ai;
+
+CREATE TRIGGER trg_hatchery_problems_search_ai AFTER INSERT ON hatchery_problems FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('hatchery_problems', NEW.problem_id, 'hatchery', DATE(NEW.problem_date), CONCAT_WS(' ', NEW.problem_identified, NEW.proposed_solution, NEW.additional_comments));
+
+DROP TRIGGER IF EXISTS trg_hatchery_problems_search_au;
+
+CREATE TRIGGER trg_hatchery_problems_search_au AFTER UPDATE ON hatchery_problems FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('hatchery_problems', NEW.problem_id, 'hatchery', DATE(NEW.problem_date), CONCAT_WS(' ', NEW.problem_identified, NEW.proposed_solution, NEW.additional_comments));
+
+DROP TRIGGER IF EXISTS trg_hatchery_problems_search_ad;
+
+CREATE TRIGGER trg_hatchery_problems_search_ad AFTER DELETE ON hatchery_problems FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'hatchery_problems' AND source_id = OLD.problem_id;
+
+DROP TRIGGER IF EXISTS trg_hatchery_health_interventions_search_ai;
+
+CREATE TRIGGER trg_hatchery_health_interventions_search_ai AFTER INSERT ON hatchery_health_interventions FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('hatchery_health_interventions', NEW.intervention_id, 'hatchery', DATE(NEW.health_date), CONCAT_WS(' ', NEW.health_issue, NEW.action_taken, NEW.comments));
+
+DROP TRIGGER IF EXISTS trg_hatchery_health_interventions_search_au;
+
+CREATE TRIGGER trg_hatchery_health_interventions_search_au AFTER UPDATE ON hatchery_health_interventions FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('hatchery_health_interventions', NEW.intervention_id, 'hatchery', DATE(NEW.health_date), CONCAT_WS(' ', NEW.health_issue, NEW.action_taken, NEW.comments));
+
+DROP TRIGGER IF EXISTS trg_hatchery_health_interventions_search_ad;
+
+CREATE TRIGGER trg_hatchery_health_interventions_search_ad AFTER DELETE ON hatchery_health_interventions FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'hatchery_health_interventions' AND source_id = OLD.intervention_id;
+
+DROP TRIGGER IF EXISTS trg_feeding_environmental_monitoring_search_ai;
+
+CREATE TRIGGER trg_feeding_environmental_monitoring_search_ai AFTER INSERT ON feeding_environmental_monitoring FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('feeding_environmental_monitoring', NEW.monitoring_id, 'feeding', DATE(NEW.monitoring_date), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_feeding_environmental_monitoring_search_au;
+
+CREATE TRIGGER trg_feeding_environmental_monitoring_search_au AFTER UPDATE ON feeding_environmental_monitoring FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('feeding_environmental_monitoring', NEW.monitoring_id, 'feeding', DATE(NEW.monitoring_date), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_feeding_environmental_monitoring_search_ad;
+
+CREATE TRIGGER trg_feeding_environmental_monitoring_search_ad AFTER DELETE ON feeding_environmental_monitoring FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'feeding_environmental_monitoring' AND source_id = OLD.monitoring_id;
+
+DROP TRIGGER IF EXISTS trg_feeding_health_intervention_search_ai;
+
+CREATE TRIGGER trg_feeding_health_intervention_search_ai AFTER INSERT ON feeding_health_intervention FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('feeding_health_intervention', NEW.intervention_id, 'feeding', DATE(NEW.health_check_date), CONCAT_WS(' ', NEW.observed_issue, NEW.action_taken, NEW.comments));
+
+DROP TRIGGER IF EXISTS trg_feeding_health_intervention_search_au;
+
+CREATE TRIGGER trg_feeding_health_intervention_search_au AFTER UPDATE ON feeding_health_intervention FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('feeding_health_intervention', NEW.intervention_id, 'feeding', DATE(NEW.health_check_date), CONCAT_WS(' ', NEW.observed_issue, NEW.action_taken, NEW.comments));
+
+DROP TRIGGER IF EXISTS trg_feeding_health_intervention_search_ad;
+
+CREATE TRIGGER trg_feeding_health_intervention_search_ad AFTER DELETE ON feeding_health_intervention FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'feeding_health_intervention' AND source_id = OLD.intervention_id;
+
+DROP TRIGGER IF EXISTS trg_feeding_harvest_yield_search_ai;
+
+CREATE TRIGGER trg_feeding_harvest_yield_search_ai AFTER INSERT ON feeding_harvest_yield FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('feeding_harvest_yield', NEW.harvest_id, 'feeding', DATE(NEW.harvest_date), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_feeding_harvest_yield_search_au;
+
+CREATE TRIGGER trg_feeding_harvest_yield_search_au AFTER UPDATE ON feeding_harvest_yield FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('feeding_harvest_yield', NEW.harvest_id, 'feeding', DATE(NEW.harvest_date), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_feeding_harvest_yield_search_ad;
+
+CREATE TRIGGER trg_feeding_harvest_yield_search_ad AFTER DELETE ON feeding_harvest_yield FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'feeding_harvest_yield' AND source_id = OLD.harvest_id;
+
+DROP TRIGGER IF EXISTS trg_drying_input_search_ai;
+
+CREATE TRIGGER trg_drying_input_search_ai AFTER INSERT ON drying_input FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('drying_input', NEW.input_id, 'drying', DATE(NEW.created_at), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_drying_input_search_au;
+
+CREATE TRIGGER trg_drying_input_search_au AFTER UPDATE ON drying_input FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('drying_input', NEW.input_id, 'drying', DATE(NEW.created_at), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_drying_input_search_ad;
+
+CREATE TRIGGER trg_drying_input_search_ad AFTER DELETE ON drying_input FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'drying_input' AND source_id = OLD.input_id;
+
+DROP TRIGGER IF EXISTS trg_drying_output_search_ai;
+
+CREATE TRIGGER trg_drying_output_search_ai AFTER INSERT ON drying_output FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('drying_output', NEW.output_id, 'drying', DATE(NEW.created_at), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_drying_output_search_au;
+
+CREATE TRIGGER trg_drying_output_search_au AFTER UPDATE ON drying_output FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('drying_output', NEW.output_id, 'drying', DATE(NEW.created_at), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_drying_output_search_ad;
+
+CREATE TRIGGER trg_drying_output_search_ad AFTER DELETE ON drying_output FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'drying_output' AND source_id = OLD.output_id;
+
+DROP TRIGGER IF EXISTS trg_drying_quality_control_search_ai;
+
+CREATE TRIGGER trg_drying_quality_control_search_ai AFTER INSERT ON drying_quality_control FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('drying_quality_control', NEW.qc_id, 'drying', DATE(NEW.qc_date), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_drying_quality_control_search_au;
+
+CREATE TRIGGER trg_drying_quality_control_search_au AFTER UPDATE ON drying_quality_control FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('drying_quality_control', NEW.qc_id, 'drying', DATE(NEW.qc_date), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_drying_quality_control_search_ad;
+
+CREATE TRIGGER trg_drying_quality_control_search_ad AFTER DELETE ON drying_quality_control FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'drying_quality_control' AND source_id = OLD.qc_id;
+
+DROP TRIGGER IF EXISTS trg_drying_review_approval_search_ai;
+
+CREATE TRIGGER trg_drying_review_approval_search_ai AFTER INSERT ON drying_review_approval FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('drying_review_approval', NEW.review_id, 'drying', DATE(NEW.review_date), CONCAT_WS(' ', NEW.comments));
+
+DROP TRIGGER IF EXISTS trg_drying_review_approval_search_au;
+
+CREATE TRIGGER trg_drying_review_approval_search_au AFTER UPDATE ON drying_review_approval FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('drying_review_approval', NEW.review_id, 'drying', DATE(NEW.review_date), CONCAT_WS(' ', NEW.comments));
+
+DROP TRIGGER IF EXISTS trg_drying_review_approval_search_ad;
+
+CREATE TRIGGER trg_drying_review_approval_search_ad AFTER DELETE ON drying_review_approval FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'drying_review_approval' AND source_id = OLD.review_id;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_cage_monitoring_search_ai;
+
+CREATE TRIGGER trg_fly_facility_cage_monitoring_search_ai AFTER INSERT ON fly_facility_cage_monitoring FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('fly_facility_cage_monitoring', NEW.monitoring_id, 'facility', DATE(NEW.monitoring_date), CONCAT_WS(' ', NEW.damage_notes, NEW.additional_notes));
+
+DROP TRIGGER IF EXISTS trg_fly_facility_cage_monitoring_search_au;
+
+CREATE TRIGGER trg_fly_facility_cage_monitoring_search_au AFTER UPDATE ON fly_facility_cage_monitoring FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('fly_facility_cage_monitoring', NEW.monitoring_id, 'facility', DATE(NEW.monitoring_date), CONCAT_WS(' ', NEW.damage_notes, NEW.additional_notes));
+
+DROP TRIGGER IF EXISTS trg_fly_facility_cage_monitoring_search_ad;
+
+CREATE TRIGGER trg_fly_facility_cage_monitoring_search_ad AFTER DELETE ON fly_facility_cage_monitoring FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'fly_facility_cage_monitoring' AND source_id = OLD.monitoring_id;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_maintenance_search_ai;
+
+CREATE TRIGGER trg_fly_facility_maintenance_search_ai AFTER INSERT ON fly_facility_maintenance FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('fly_facility_maintenance', NEW.maintenance_id, 'facility', DATE(NEW.maintenance_date), CONCAT_WS(' ', NEW.maintenance_notes));
+
+DROP TRIGGER IF EXISTS trg_fly_facility_maintenance_search_au;
+
+CREATE TRIGGER trg_fly_facility_maintenance_search_au AFTER UPDATE ON fly_facility_maintenance FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('fly_facility_maintenance', NEW.maintenance_id, 'facility', DATE(NEW.maintenance_date), CONCAT_WS(' ', NEW.maintenance_notes));
+
+DROP TRIGGER IF EXISTS trg_fly_facility_maintenance_search_ad;
+
+CREATE TRIGGER trg_fly_facility_maintenance_search_ad AFTER DELETE ON fly_facility_maintenance FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'fly_facility_maintenance' AND source_id = OLD.maintenance_id;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_pupae_transition_search_ai;
+
+CREATE TRIGGER trg_fly_facility_pupae_transition_search_ai AFTER INSERT ON fly_facility_pupae_transition FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('fly_facility_pupae_transition', NEW.transition_id, 'facility', DATE(NEW.transition_date), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_fly_facility_pupae_transition_search_au;
+
+CREATE TRIGGER trg_fly_facility_pupae_transition_search_au AFTER UPDATE ON fly_facility_pupae_transition FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('fly_facility_pupae_transition', NEW.transition_id, 'facility', DATE(NEW.transition_date), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_fly_facility_pupae_transition_search_ad;
+
+CREATE TRIGGER trg_fly_facility_pupae_transition_search_ad AFTER DELETE ON fly_facility_pupae_transition FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'fly_facility_pupae_transition' AND source_id = OLD.transition_id;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_egg_collection_search_ai;
+
+CREATE TRIGGER trg_fly_facility_egg_collection_search_ai AFTER INSERT ON fly_facility_egg_collection FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('fly_facility_egg_collection', NEW.collection_id, 'facility', DATE(NEW.collection_date), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_fly_facility_egg_collection_search_au;
+
+CREATE TRIGGER trg_fly_facility_egg_collection_search_au AFTER UPDATE ON fly_facility_egg_collection FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('fly_facility_egg_collection', NEW.collection_id, 'facility', DATE(NEW.collection_date), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_fly_facility_egg_collection_search_ad;
+
+CREATE TRIGGER trg_fly_facility_egg_collection_search_ad AFTER DELETE ON fly_facility_egg_collection FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'fly_facility_egg_collection' AND source_id = OLD.collection_id;
+
+DROP TRIGGER IF EXISTS trg_fly_facility_bait_preparation_search_ai;
+
+CREATE TRIGGER trg_fly_facility_bait_preparation_search_ai AFTER INSERT ON fly_facility_bait_preparation FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('fly_facility_bait_preparation', NEW.bait_id, 'facility', DATE(NEW.start_date), CONCAT_WS(' ', NEW.ingredients_added, NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_fly_facility_bait_preparation_search_au;
+
+CREATE TRIGGER trg_fly_facility_bait_preparation_search_au AFTER UPDATE ON fly_facility_bait_preparation FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('fly_facility_bait_preparation', NEW.bait_id, 'facility', DATE(NEW.start_date), CONCAT_WS(' ', NEW.ingredients_added, NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_fly_facility_bait_preparation_search_ad;
+
+CREATE TRIGGER trg_fly_facility_bait_preparation_search_ad AFTER DELETE ON fly_facility_bait_preparation FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'fly_facility_bait_preparation' AND source_id = OLD.bait_id;
+
+DROP TRIGGER IF EXISTS trg_deliveries_search_ai;
+
+CREATE TRIGGER trg_deliveries_search_ai AFTER INSERT ON deliveries FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('deliveries', NEW.id, 'sales', DATE(NEW.date), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_deliveries_search_au;
+
+CREATE TRIGGER trg_deliveries_search_au AFTER UPDATE ON deliveries FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('deliveries', NEW.id, 'sales', DATE(NEW.date), CONCAT_WS(' ', NEW.notes));
+
+DROP TRIGGER IF EXISTS trg_deliveries_search_ad;
+
+CREATE TRIGGER trg_deliveries_search_ad AFTER DELETE ON deliveries FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'deliveries' AND source_id = OLD.id;
+
+DROP TRIGGER IF EXISTS trg_customer_feedback_search_ai;
+
+CREATE TRIGGER trg_customer_feedback_search_ai AFTER INSERT ON customer_feedback FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('customer_feedback', NEW.id, 'sales', DATE(NEW.date), CONCAT_WS(' ', NEW.feedback));
+
+DROP TRIGGER IF EXISTS trg_customer_feedback_search_au;
+
+CREATE TRIGGER trg_customer_feedback_search_au AFTER UPDATE ON customer_feedback FOR EACH ROW REPLACE INTO search_documents (source_table, source_id, section, record_date, body) VALUES ('customer_feedback', NEW.id, 'sales', DATE(NEW.date), CONCAT_WS(' ', NEW.feedback));
+
+DROP TRIGGER IF EXISTS trg_customer_feedback_search_ad;
+
+CREATE TRIGGER trg_customer_feedback_search_ad AFTER DELETE ON customer_feedback FOR EACH ROW DELETE FROM search_documents WHERE source_table = 'customer_feedback' AND source_id = OLD.id;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'waste_sourcing', t.sourcing_id, 'waste', DATE(t.collection_date), CONCAT_WS(' ', t.collection_notes) FROM waste_sourcing t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'storage_records', t.record_id, 'waste', DATE(t.storage_date), CONCAT_WS(' ', t.storage_observations) FROM storage_records t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'processing_records', t.processing_id, 'waste', DATE(t.processing_date), CONCAT_WS(' ', t.processing_remarks) FROM processing_records t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'environmental_monitoring_waste', t.monitoring_id, 'waste', DATE(t.monitoring_date), CONCAT_WS(' ', t.pest_details, t.mitigation_actions, t.remarks) FROM environmental_monitoring_waste t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'hatchery_batches', t.batch_id, 'hatchery', DATE(t.batch_date), CONCAT_WS(' ', t.notes) FROM hatchery_batches t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'hatchery_feeding', t.feeding_id, 'hatchery', DATE(t.feeding_date), CONCAT_WS(' ', t.notes) FROM hatchery_feeding t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'hatchery_monitoring', t.monitoring_id, 'hatchery', DATE(t.monitoring_date), CONCAT_WS(' ', t.adjustments_made) FROM hatchery_monitoring t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'hatchery_cleaning', t.cleaning_id, 'hatchery', DATE(t.cleaning_date), CONCAT_WS(' ', t.areas_cleaned, t.remarks) FROM hatchery_cleaning t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'hatchery_problems', t.problem_id, 'hatchery', DATE(t.problem_date), CONCAT_WS(' ', t.problem_identified, t.proposed_solution, t.additional_comments) FROM hatchery_problems t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'hatchery_health_interventions', t.intervention_id, 'hatchery', DATE(t.health_date), CONCAT_WS(' ', t.health_issue, t.action_taken, t.comments) FROM hatchery_health_interventions t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'feeding_environmental_monitoring', t.monitoring_id, 'feeding', DATE(t.monitoring_date), CONCAT_WS(' ', t.notes) FROM feeding_environmental_monitoring t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'feeding_health_intervention', t.intervention_id, 'feeding', DATE(t.health_check_date), CONCAT_WS(' ', t.observed_issue, t.action_taken, t.comments) FROM feeding_health_intervention t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'feeding_harvest_yield', t.harvest_id, 'feeding', DATE(t.harvest_date), CONCAT_WS(' ', t.notes) FROM feeding_harvest_yield t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'drying_input', t.input_id, 'drying', DATE(t.created_at), CONCAT_WS(' ', t.notes) FROM drying_input t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'drying_output', t.output_id, 'drying', DATE(t.created_at), CONCAT_WS(' ', t.notes) FROM drying_output t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'drying_quality_control', t.qc_id, 'drying', DATE(t.qc_date), CONCAT_WS(' ', t.notes) FROM drying_quality_control t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'drying_review_approval', t.review_id, 'drying', DATE(t.review_date), CONCAT_WS(' ', t.comments) FROM drying_review_approval t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'fly_facility_cage_monitoring', t.monitoring_id, 'facility', DATE(t.monitoring_date), CONCAT_WS(' ', t.damage_notes, t.additional_notes) FROM fly_facility_cage_monitoring t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'fly_facility_maintenance', t.maintenance_id, 'facility', DATE(t.maintenance_date), CONCAT_WS(' ', t.maintenance_notes) FROM fly_facility_maintenance t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'fly_facility_pupae_transition', t.transition_id, 'facility', DATE(t.transition_date), CONCAT_WS(' ', t.notes) FROM fly_facility_pupae_transition t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'fly_facility_egg_collection', t.collection_id, 'facility', DATE(t.collection_date), CONCAT_WS(' ', t.notes) FROM fly_facility_egg_collection t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'fly_facility_bait_preparation', t.bait_id, 'facility', DATE(t.start_date), CONCAT_WS(' ', t.ingredients_added, t.notes) FROM fly_facility_bait_preparation t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'deliveries', t.id, 'sales', DATE(t.date), CONCAT_WS(' ', t.notes) FROM deliveries t;
+
+REPLACE INTO search_documents (source_table, source_id, section, record_date, body) SELECT 'customer_feedback', t.id, 'sales', DATE(t.date), CONCAT_WS(' ', t.feedback) FROM customer_feedback t;
+
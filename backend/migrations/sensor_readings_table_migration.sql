@@ -0,0 +1,14 @@
+-- Migration for creating the sensor_readings time-series table
+-- Readings from cage and tray sensors are keyed by (device_id, reading_time) so
+-- repeated timestamps from a device collapse into one row and range scans for a
+-- device stay on the clustered primary key.
+
+CREATE TABLE IF NOT EXISTS sensor_readings (
+    device_id VARCHAR(64) NOT NULL,
+    reading_time DATETIME NOT NULL,
+    temperature DECIMAL(5, 2),
+    humidity DECIMAL(5, 2),
+    received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (device_id, reading_time),
+    KEY idx_sensor_readings_time (reading_time)
+);
@@ -0,0 +1,219 @@
+"""Monthly RANGE partitioning and archival for the monitoring tables.
+
+Usage:
+    python partition_maintenance.py convert [--dry-run]
+    python partition_maintenance.py ensure [--months-ahead 3] [--dry-run]
+    python partition_maintenance.py archive --keep-months 12 [--to-file DIR] [--dry-run]
+
+``convert`` partitions each table by month on its date column (run once, see
+migrations/partition_monitoring_tables.sql for the generated DDL).
+``ensure`` splits the catch-all partition so future months exist ahead of time.
+``archive`` swaps old partitions out into ``archive_<table>_<yyyymm>`` tables
+with EXCHANGE PARTITION and optionally writes them to gzipped CSV files.
+"""
+import argparse
+import csv
+import gzip
+import logging
+import os
+import re
+import sys
+from datetime import date
+
+from database import DatabaseConnection
+import delta_sync
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Table -> (primary key column, partitioning date column)
+PARTITIONED_TABLES = {
+    'fly_facility_cage_monitoring': ('monitoring_id', 'monitoring_date'),
+    'feeding_environmental_monitoring': ('monitoring_id', 'monitoring_date'),
+    'environmental_monitoring_waste': ('monitoring_id', 'monitoring_date'),
+    'hatchery_monitoring': ('monitoring_id', 'monitoring_date'),
+}
+
+PARTITION_NAME = re.compile(r'^p(\d{4})(\d{2})$')
+
+
+def month_start(day):
+    return day.replace(day=1)
+
+
+def add_months(day, months):
+    month_index = day.year * 12 + day.month - 1 + months
+    return date(month_index // 12, month_index % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"p{month.year:04d}{month.month:02d}"
+
+
+def partition_clause(month):
+    """Partition holding the given month; bounded by the first of the next month."""
+    return f"PARTITION {partition_name(month)} VALUES LESS THAN ('{add_months(month, 1).isoformat()}')"
+
+
+def convert_statements(table, first_month, last_month):
+    """DDL that turns a plain monitoring table into a monthly partitioned one.
+
+    MySQL requires the partitioning column to be part of every unique key, so
+    the primary key becomes (id, date).
+    """
+    pk_col, date_col = PARTITIONED_TABLES[table]
+    partitions = [f"PARTITION p_history VALUES LESS THAN ('{first_month.isoformat()}')"]
+    month = first_month
+    while month <= last_month:
+        partitions.append(partition_clause(month))
+        month = add_months(month, 1)
+    partitions.append("PARTITION p_future VALUES LESS THAN (MAXVALUE)")
+    partition_sql = ',\n    '.join(partitions)
+    return [
+        f"ALTER TABLE {table} DROP PRIMARY KEY, ADD PRIMARY KEY ({pk_col}, {date_col})",
+        f"ALTER TABLE {table} PARTITION BY RANGE COLUMNS({date_col}) (\n    {partition_sql}\n)",
+    ]
+
+
+def existing_partitions(db, table):
+    rows = db.fetch_all("""
+        SELECT PARTITION_NAME AS name
+        FROM information_schema.PARTITIONS
+        WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s AND PARTITION_NAME IS NOT NULL
+        ORDER BY PARTITION_ORDINAL_POSITION
+    """, (table,))
+    return [row['name'] for row in rows]
+
+
+def monthly_partitions(names):
+    """Map month start date -> partition name for the pYYYYMM partitions."""
+    months = {}
+    for name in names:
+        match = PARTITION_NAME.match(name)
+        if match:
+            months[date(int(match.group(1)), int(match.group(2)), 1)] = name
+    return months
+
+
+def ensure_statements(table, names, months_ahead, today=None):
+    """Split p_future so that every month up to ``months_ahead`` has a partition."""
+    months = monthly_partitions(names)
+    if not months or 'p_future' not in names:
+        return []
+    target = add_months(month_start(today or date.today()), months_ahead)
+    month = add_months(max(months), 1)
+    new_partitions = []
+    while month <= target:
+        new_partitions.append(partition_clause(month))
+        month = add_months(month, 1)
+    if not new_partitions:
+        return []
+    new_partitions.append("PARTITION p_future VALUES LESS THAN (MAXVALUE)")
+    joined = ',\n    '.join(new_partitions)
+    return [f"ALTER TABLE {table} REORGANIZE PARTITION p_future INTO (\n    {joined}\n)"]
+
+
+def run_statements(db, statements, dry_run):
+    for statement in statements:
+        print(statement + ';\n')
+        if not dry_run:
+            db.execute_query(statement)
+
+
+def convert(db, dry_run=False, months_ahead=3):
+    today = date.today()
+    for table, (_, date_col) in PARTITIONED_TABLES.items():
+        if existing_partitions(db, table):
+            logger.info(f"{table} is already partitioned, skipping")
+            continue
+        oldest = db.fetch_one(f"SELECT MIN({date_col}) AS oldest FROM {table}")
+        first_month = month_start(oldest['oldest']) if oldest and oldest['oldest'] else month_start(today)
+        last_month = add_months(month_start(today), months_ahead)
+        run_statements(db, convert_statements(table, first_month, last_month), dry_run)
+
+
+def ensure(db, months_ahead, dry_run=False):
+    for table in PARTITIONED_TABLES:
+        names = existing_partitions(db, table)
+        if not names:
+            logger.warning(f"{table} is not partitioned; run 'convert' first")
+            continue
+        run_statements(db, ensure_statements(table, names, months_ahead), dry_run)
+
+
+def _dump_to_file(db, archive_table, directory):
+    path = os.path.join(directory, f"{archive_table}.csv.gz")
+    conn = db.get_connection()
+    cursor = None
+    try:
+        cursor = conn.cursor()
+        cursor.execute(f"SELECT * FROM {archive_table}")
+        with gzip.open(path, 'wt', newline='', encoding='utf-8') as fh:
+            writer = csv.writer(fh)
+            writer.writerow([col[0] for col in cursor.description])
+            while True:
+                rows = cursor.fetchmany(5000)
+                if not rows:
+                    break
+                writer.writerows(rows)
+    finally:
+        if cursor:
+            cursor.close()
+        conn.close()
+    return path
+
+
+def archive(db, keep_months, to_file=None, dry_run=False):
+    """Detach partitions older than ``keep_months`` into archive tables or files."""
+    cutoff = add_months(month_start(date.today()), -keep_months)
+    for table in PARTITIONED_TABLES:
+        for month, name in sorted(monthly_partitions(existing_partitions(db, table)).items()):
+            if month >= cutoff:
+                break
+            archive_table = f"archive_{table}_{name[1:]}"
+            run_statements(db, [
+                f"CREATE TABLE {archive_table} LIKE {table}",
+                f"ALTER TABLE {archive_table} REMOVE PARTITIONING",
+                f"ALTER TABLE {table} EXCHANGE PARTITION {name} WITH TABLE {archive_table}",
+                f"ALTER TABLE {table} DROP PARTITION {name}",
+            ], dry_run)
+            if not dry_run:
+                # The swapped-out rows leave no tombstones
+                delta_sync.force_reset(db, table)
+            if to_file and not dry_run:
+                path = _dump_to_file(db, archive_table, to_file)
+                db.execute_query(f"DROP TABLE {archive_table}")
+                logger.info(f"Archived {table}.{name} to {path}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='command', required=True)
+    p_convert = sub.add_parser('convert')
+    p_convert.add_argument('--months-ahead', type=int, default=3)
+    p_ensure = sub.add_parser('ensure')
+    p_ensure.add_argument('--months-ahead', type=int, default=3)
+    p_archive = sub.add_parser('archive')
+    p_archive.add_argument('--keep-months', type=int, required=True)
+    p_archive.add_argument('--to-file', metavar='DIR')
+    for p in (p_convert, p_ensure, p_archive):
+        p.add_argument('--dry-run', action='store_true', help='print the DDL without running it')
+    args = parser.parse_args(argv)
+
+    db = DatabaseConnection()
+    if args.command == 'convert':
+        convert(db, dry_run=args.dry_run, months_ahead=args.months_ahead)
+    elif args.command == 'ensure':
+        ensure(db, args.months_ahead, dry_run=args.dry_run)
+    elif args.command == 'archive':
+        if args.to_file:
+            os.makedirs(args.to_file, exist_ok=True)
+        archive(db, args.keep_months, to_file=args.to_file, dry_run=args.dry_run)
+
+
+if __name__ == '__main__':
+    try:
+        main()
+    except Exception as e:
+        logger.error(f"Partition maintenance failed: {e}")
+        sys.exit(1)
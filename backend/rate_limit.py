@@ -0,0 +1,213 @@
+"""Per-route rate limits and concurrency caps shared by the gunicorn workers.
+
+Each API request takes a token from a bucket keyed by (route, user), or by
+(route, IP) before login. Expensive routes also need a slot in a
+concurrency group. The groups together have fewer slots than there are
+workers, so reports and full-table reads cannot occupy every worker while
+a form is waiting. A request that gets no token is answered 429 and one
+that gets no slot 503, both with Retry-After, instead of queueing behind
+the pool. Login and registration attempts are also limited per account
+and per IP.
+
+The buckets and slots live in a small SQLite file on local disk
+(RATE_LIMIT_DB). It is shared by the workers on this host and kept out of
+MySQL, whose pool is the resource being protected. If the file cannot be
+used, requests are let through and the error is logged.
+"""
+import logging
+import math
+import os
+import random
+import sqlite3
+import threading
+import time
+
+from config import (RATE_LIMIT_ENABLED, RATE_LIMIT_DB, RATE_LIMIT_PER_MINUTE, RATE_LIMIT_BURST,
+                    RATE_LIMIT_HEAVY_CONCURRENCY, RATE_LIMIT_SLOT_TIMEOUT)
+
+logger = logging.getLogger(__name__)
+
+# Concurrency group -> slots across all workers on this host
+CONCURRENCY_GROUPS = {
+    'heavy': RATE_LIMIT_HEAVY_CONCURRENCY,
+    'report': 1,
+}
+
+# Endpoint -> (requests per minute per user, burst, concurrency group)
+ROUTE_LIMITS = {
+    'get_records_by_date_and_section': (30, 10, 'heavy'),
+    # Polled and cheap (summary tables, indexed deltas), so no slot
+    'get_dashboard': (30, 10, None),
+    'get_waste_processing_stats': (30, 10, 'heavy'),
+    'get_environmental_stats': (30, 10, 'heavy'),
+    'get_larval_growth_stats': (30, 10, 'heavy'),
+    'get_larval_growth_forecast': (30, 10, 'heavy'),
+    'get_system_efficiency': (30, 10, 'heavy'),
+    'get_daily_report': (30, 10, 'heavy'),
+    'get_harvest_efficiency': (30, 10, 'heavy'),
+    'get_all_waste_sourcing': (20, 5, 'heavy'),
+    'get_all_drying_input': (20, 5, 'heavy'),
+    'get_all_drying_output': (20, 5, 'heavy'),
+    'get_all_drying_qc': (20, 5, 'heavy'),
+    'get_all_drying_remarks': (20, 5, 'heavy'),
+    'get_all_drying_review': (20, 5, 'heavy'),
+    'get_all_feeding_harvest': (20, 5, 'heavy'),
+    'get_sales_analytics': (30, 10, 'heavy'),
+    'batch_api.run_batch': (30, 10, 'heavy'),
+    'search_api.search_records': (60, 20, 'heavy'),
+    # Polled and cheap (summary tables, indexed deltas), so no slot
+    'sync_api.get_changes': (30, 10, None),
+    'lineage_api.get_lineage': (30, 10, 'heavy'),
+    'import_customers_file': (6, 2, 'report'),
+    'send_harvest_report': (2, 2, 'report'),
+}
+
+DEFAULT_LIMIT = (RATE_LIMIT_PER_MINUTE, RATE_LIMIT_BURST, None)
+
+# Not limited here: sensor gateways post for many devices from one address
+# with a shared token, and the ingestion buffer already answers 503 when full
+EXEMPT_ENDPOINTS = frozenset({'sensor_ingestion.ingest_sensor_readings'})
+
+# Login attempts: per account (5 at once, then one a minute) and per IP
+LOGIN_ENDPOINTS = frozenset({'login', 'api_login', 'register', 'api_register'})
+LOGIN_ACCOUNT_LIMIT = (1, 5)
+LOGIN_IP_LIMIT = (10, 30)
+
+# Buckets idle this long are full again and can be forgotten
+BUCKET_IDLE_SECONDS = 3600
+
+SCHEMA = """
+    CREATE TABLE IF NOT EXISTS buckets (
+        key TEXT PRIMARY KEY,
+        tokens REAL NOT NULL,
+        updated REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE TABLE IF NOT EXISTS slots (
+        token TEXT PRIMARY KEY,
+        grp TEXT NOT NULL,
+        started REAL NOT NULL
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_slots_grp ON slots (grp, started);
+"""
+
+
+class Rejected(Exception):
+    """The request is over a limit; answer ``status`` with Retry-After."""
+
+    def __init__(self, status, message, retry_after):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class LocalStore:
+    """Token buckets and concurrency slots in a SQLite file shared by local processes."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            # autocommit mode: every change runs in an explicit BEGIN IMMEDIATE
+            conn = sqlite3.connect(self.path, timeout=1.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.executescript(SCHEMA)
+            self._local.conn, self._local.pid = conn, os.getpid()
+        return conn
+
+    def take(self, key, per_minute, burst, now=None):
+        """Take one token; returns 0 on success or the seconds until one is available."""
+        now = now or time.time()
+        rate = per_minute / 60.0
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated FROM buckets WHERE key = ?", (key,)).fetchone()
+            tokens = burst if row is None else min(burst, row[0] + (now - row[1]) * rate)
+            wait = 0.0
+            if tokens >= 1:
+                tokens -= 1
+            else:
+                wait = (1 - tokens) / rate
+            conn.execute("INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)",
+                         (key, tokens, now))
+            if random.random() < 0.001:
+                conn.execute("DELETE FROM buckets WHERE updated < ?", (now - BUCKET_IDLE_SECONDS,))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+    def acquire(self, group, limit, now=None):
+        """Take a slot in ``group``; returns its token, or None when all are in use.
+
+        Slots of requests that never released them (a killed worker) lapse
+        after RATE_LIMIT_SLOT_TIMEOUT seconds.
+        """
+        now = now or time.time()
+        conn = self._connection()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM slots WHERE grp = ? AND started < ?", (group, now - RATE_LIMIT_SLOT_TIMEOUT))
+            in_use = conn.execute("SELECT COUNT(*) FROM slots WHERE grp = ?", (group,)).fetchone()[0]
+            token = None
+            if in_use < limit:
+                token = f"{os.getpid()}:{threading.get_ident()}:{now}"
+                conn.execute("INSERT INTO slots (token, grp, started) VALUES (?, ?, ?)", (token, group, now))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return token
+
+    def release(self, token):
+        self._connection().execute("DELETE FROM slots WHERE token = ?", (token,))
+
+
+store = LocalStore(RATE_LIMIT_DB)
+
+
+def _take(key, per_minute, burst, message):
+    wait = store.take(key, per_minute, burst)
+    if wait:
+        raise Rejected(429, message, wait)
+
+
+def admit(endpoint, client, ip, account=None):
+    """Check one request against its limits; returns a slot token for release().
+
+    ``client`` identifies the caller (user id or IP) and ``account`` is the
+    e-mail of a login attempt. Raises Rejected when a limit is reached.
+    """
+    if not RATE_LIMIT_ENABLED or endpoint in EXEMPT_ENDPOINTS:
+        return None
+    try:
+        if endpoint in LOGIN_ENDPOINTS:
+            _take(f"login-ip:{ip}", *LOGIN_IP_LIMIT, 'Too many login attempts from this address')
+            if account:
+                _take(f"login-account:{account}", *LOGIN_ACCOUNT_LIMIT, 'Too many login attempts for this account')
+            return None
+        per_minute, burst, group = ROUTE_LIMITS.get(endpoint, DEFAULT_LIMIT)
+        _take(f"{endpoint}:{client}", per_minute, burst, 'Too many requests, please slow down')
+        if group is None:
+            return None
+        token = store.acquire(group, CONCURRENCY_GROUPS[group])
+        if token is None:
+            raise Rejected(503, 'The server is busy with other reports, please retry shortly', 1)
+        return token
+    except sqlite3.Error as e:
+        logger.error(f"Rate limit store unavailable, admitting request: {e}")
+        return None
+
+
+def release(token):
+    if token is None:
+        return
+    try:
+        store.release(token)
+    except sqlite3.Error as e:
+        logger.error(f"Could not release concurrency slot: {e}")
@@ -0,0 +1,205 @@
+"""Incrementally maintained sales and feedback aggregates.
+
+``sales_daily_summary`` holds revenue, quantity and sale count per
+(day, customer, product) and ``customer_feedback_summary`` the rating totals
+per customer. The sales and feedback handlers apply a +1 delta for new rows
+and a -1 delta for the previous version of an edited row inside the same
+transaction as the write, so the analytics API reads O(groups) rows instead of
+every sale.
+
+Usage:
+    python sales_analytics.py rebuild
+"""
+import logging
+import math
+import sys
+from datetime import date
+
+from database import DatabaseConnection
+
+logger = logging.getLogger(__name__)
+
+APPLY_SALE_QUERY = """
+    INSERT INTO sales_daily_summary (sale_date, customer_id, product, revenue, quantity, sale_count)
+    VALUES (%s, %s, %s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        revenue = revenue + VALUES(revenue),
+        quantity = quantity + VALUES(quantity),
+        sale_count = sale_count + VALUES(sale_count)
+"""
+
+PRUNE_SALE_GROUP_QUERY = """
+    DELETE FROM sales_daily_summary
+    WHERE sale_date = %s AND customer_id = %s AND product = %s AND sale_count <= 0
+"""
+
+APPLY_FEEDBACK_QUERY = """
+    INSERT INTO customer_feedback_summary (customer_id, rating_sum, rating_count, feedback_count)
+    VALUES (%s, %s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        rating_sum = rating_sum + VALUES(rating_sum),
+        rating_count = rating_count + VALUES(rating_count),
+        feedback_count = feedback_count + VALUES(feedback_count)
+"""
+
+# group_by name -> (SELECT expression, GROUP BY expression); weeks and months
+# are labelled by their first day
+GROUPINGS = {
+    'day': ("s.sale_date AS day", "s.sale_date"),
+    'week': ("DATE_SUB(s.sale_date, INTERVAL WEEKDAY(s.sale_date) DAY) AS week", "week"),
+    'month': ("DATE_SUB(s.sale_date, INTERVAL DAYOFMONTH(s.sale_date) - 1 DAY) AS month", "month"),
+    'customer': ("s.customer_id, c.name AS customer_name", "s.customer_id, c.name"),
+    'product': ("s.product", "s.product"),
+}
+
+
+def _whole_number(value, name):
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"{name} must be a whole number")
+    try:
+        return int(value)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError(f"{name} must be a whole number") from None
+
+
+def check_sale(sale):
+    """Raise ValueError unless ``sale`` has the fields apply_sale reads, well formed."""
+    if not sale.get('date'):
+        raise ValueError("date is required")
+    _whole_number(sale.get('customer_id'), 'customer_id')
+    if sale.get('quantity') not in (None, ''):
+        _whole_number(sale['quantity'], 'quantity')
+    try:
+        amount = float(sale.get('amount'))
+    except (TypeError, ValueError):
+        amount = math.nan
+    if not math.isfinite(amount):
+        raise ValueError("amount must be a number")
+
+
+def check_feedback(feedback):
+    """Raise ValueError unless ``feedback`` has the fields apply_feedback reads, well formed."""
+    _whole_number(feedback.get('customer_id'), 'customer_id')
+    if feedback.get('rating') not in (None, ''):
+        _whole_number(feedback['rating'], 'rating')
+
+
+def _sale_group(sale):
+    return (sale['date'], int(sale['customer_id']), sale.get('product') or '')
+
+
+def apply_sale(db, sale, sign=1):
+    """Add (sign=1) or retract (sign=-1) one sale from the daily summary.
+
+    ``sale`` needs date, customer_id, product, quantity and amount. Call it
+    inside the transaction that writes the sale.
+    """
+    sale_date, customer_id, product = _sale_group(sale)
+    db.execute_query(APPLY_SALE_QUERY, (
+        sale_date, customer_id, product,
+        sign * float(sale.get('amount') or 0),
+        sign * int(sale.get('quantity') or 0),
+        sign,
+    ))
+    if sign < 0:
+        db.execute_query(PRUNE_SALE_GROUP_QUERY, (sale_date, customer_id, product))
+
+
+def apply_feedback(db, feedback, sign=1):
+    """Add or retract one feedback row from the per-customer rating totals."""
+    rating = feedback.get('rating')
+    has_rating = rating not in (None, '')
+    db.execute_query(APPLY_FEEDBACK_QUERY, (
+        int(feedback['customer_id']),
+        sign * (int(rating) if has_rating else 0),
+        sign * (1 if has_rating else 0),
+        sign,
+    ))
+
+
+def _to_json(value):
+    if isinstance(value, date):
+        return value.isoformat()
+    if value is not None and not isinstance(value, (int, str)):
+        return float(value)
+    return value
+
+
+def sales_summary(db, group_by, date_from=None, date_to=None):
+    """Revenue, quantity and sale count per group from the aggregate table.
+
+    ``group_by`` is a list of GROUPINGS keys. When customers are grouped, the
+    average feedback rating per customer is included.
+    """
+    unknown = [g for g in group_by if g not in GROUPINGS]
+    if unknown or not group_by:
+        raise ValueError(f"group_by must be a combination of: {', '.join(GROUPINGS)}")
+
+    select_cols = [GROUPINGS[g][0] for g in group_by]
+    group_cols = [GROUPINGS[g][1] for g in group_by]
+    joins = ""
+    if 'customer' in group_by:
+        joins = ("JOIN customers c ON c.id = s.customer_id "
+                 "LEFT JOIN customer_feedback_summary f ON f.customer_id = s.customer_id")
+        select_cols.append("MAX(f.rating_sum / NULLIF(f.rating_count, 0)) AS avg_rating")
+
+    where, params = [], []
+    if date_from:
+        where.append("s.sale_date >= %s")
+        params.append(date_from)
+    if date_to:
+        where.append("s.sale_date <= %s")
+        params.append(date_to)
+    where_sql = f"WHERE {' AND '.join(where)}" if where else ""
+
+    query = f"""
+        SELECT {', '.join(select_cols)},
+               SUM(s.revenue) AS revenue,
+               SUM(s.quantity) AS quantity,
+               SUM(s.sale_count) AS sale_count
+        FROM sales_daily_summary s {joins}
+        {where_sql}
+        GROUP BY {', '.join(group_cols)}
+        ORDER BY {', '.join(group_cols)}
+    """
+    rows = db.fetch_all(query, tuple(params) or None)
+    return [{key: _to_json(value) for key, value in row.items()} for row in rows]
+
+
+def feedback_summary(db):
+    rows = db.fetch_all("""
+        SELECT f.customer_id, c.name AS customer_name, f.feedback_count, f.rating_count,
+               f.rating_sum / NULLIF(f.rating_count, 0) AS avg_rating
+        FROM customer_feedback_summary f
+        JOIN customers c ON c.id = f.customer_id
+        ORDER BY c.name
+    """)
+    return [{key: _to_json(value) for key, value in row.items()} for row in rows]
+
+
+def rebuild(db):
+    """Recompute both aggregate tables from sales and customer_feedback."""
+    with db.transaction():
+        db.execute_query("DELETE FROM sales_daily_summary")
+        db.execute_query("""
+            INSERT INTO sales_daily_summary (sale_date, customer_id, product, revenue, quantity, sale_count)
+            SELECT date, customer_id, IFNULL(product, ''), SUM(amount), SUM(IFNULL(quantity, 0)), COUNT(*)
+            FROM sales
+            GROUP BY date, customer_id, IFNULL(product, '')
+        """)
+        db.execute_query("DELETE FROM customer_feedback_summary")
+        db.execute_query("""
+            INSERT INTO customer_feedback_summary (customer_id, rating_sum, rating_count, feedback_count)
+            SELECT customer_id, SUM(IFNULL(rating, 0)), COUNT(rating), COUNT(*)
+            FROM customer_feedback
+            GROUP BY customer_id
+        """)
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    if sys.argv[1:] != ['rebuild']:
+        print(__doc__)
+        sys.exit(1)
+    rebuild(DatabaseConnection())
+    print("Sales analytics tables rebuilt.")
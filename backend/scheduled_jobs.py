@@ -0,0 +1,69 @@
+"""Background jobs run by the scheduler leader (see scheduler.py).
+
+Importing this module registers the jobs; app.py starts the scheduler.
+"""
+import logging
+
+from config import SCHEDULE_HARVEST_REPORT, ANALYTICS_ENABLED, ANALYTICS_REFRESH_INTERVAL
+from database import DatabaseConnection
+import analytics_mirror
+import delta_sync
+import forecasting
+import idempotency
+import harvest_report
+import partition_maintenance
+import sales_analytics
+from scheduler import scheduler, prune_history
+
+logger = logging.getLogger(__name__)
+
+db = DatabaseConnection()
+
+
+@scheduler.job('partition_ensure', cron='15 3 * * *', jitter=120, timeout=900)
+def ensure_partitions():
+    """Keep monthly partitions three months ahead of the monitoring data."""
+    partition_maintenance.ensure(db, months_ahead=3)
+
+
+@scheduler.job('sales_analytics_rebuild', cron='30 2 * * 0', jitter=300, timeout=1800)
+def rebuild_sales_analytics():
+    """Weekly recompute of the sales aggregates to correct any drift."""
+    sales_analytics.rebuild(db)
+
+
+@scheduler.job('larval_forecast_refresh', interval=300, jitter=30, timeout=120)
+def refresh_larval_forecasts():
+    """Refit forecasts of trays that received feeding rows since the last refresh."""
+    forecasting.refresh(db)
+
+
+@scheduler.job('scheduler_history_prune', cron='45 3 * * *', jitter=120, timeout=300)
+def prune_job_history():
+    prune_history(db)
+
+
+@scheduler.job('sync_tombstone_prune', cron='50 3 * * *', jitter=120, timeout=300)
+def prune_sync_tombstones():
+    """Drop delta sync tombstones older than SYNC_TOMBSTONE_DAYS."""
+    delta_sync.prune(db)
+
+
+@scheduler.job('idempotency_key_purge', interval=3600, jitter=300, timeout=300)
+def purge_idempotency_keys():
+    """Delete Idempotency-Key responses past IDEMPOTENCY_TTL_HOURS."""
+    idempotency.purge(db)
+
+
+if ANALYTICS_ENABLED:
+    @scheduler.job('analytics_mirror_refresh', interval=ANALYTICS_REFRESH_INTERVAL, jitter=10, timeout=1800)
+    def refresh_analytics_mirror():
+        """Copy rows changed since the last run into the DuckDB mirror and publish a snapshot."""
+        analytics_mirror.refresh(db)
+
+
+if SCHEDULE_HARVEST_REPORT:
+    @scheduler.job('harvest_report', cron=SCHEDULE_HARVEST_REPORT, jitter=60, timeout=1800)
+    def send_harvest_report():
+        """Email the harvest rows added since the previous report."""
+        harvest_report.run_report(harvest_report.create_run(db=db), db=db)
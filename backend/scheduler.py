@@ -0,0 +1,397 @@
+"""In-process job scheduler with leader election across gunicorn workers.
+
+Every worker starts a Scheduler, but only the one holding the MySQL named
+lock SCHEDULER_LOCK_NAME runs jobs. The lock lives on a dedicated connection
+outside the pool, so it is released as soon as the leader's process or
+connection dies and another worker takes over within SCHEDULER_LEADER_RETRY
+seconds. A new leader derives each job's next run from
+``scheduler_job_runs``, so a scheduled slot runs once even across failovers.
+
+Jobs are registered with the ``job`` decorator::
+
+    @scheduler.job('partition_ensure', cron='15 3 * * *', jitter=60, timeout=600)
+    def ensure_partitions():
+        ...
+
+Timeouts cannot stop a Python thread; a job that overruns is recorded as
+``timeout`` and is not started again until it has returned.
+"""
+import logging
+import os
+import random
+import socket
+import threading
+from datetime import datetime, timedelta
+
+import mysql.connector
+
+from config import (DB_CONFIG, SCHEDULER_LOCK_NAME, SCHEDULER_POLL_INTERVAL,
+                    SCHEDULER_LEADER_RETRY, SCHEDULER_HISTORY_DAYS)
+from database import DatabaseConnection
+
+logger = logging.getLogger(__name__)
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+# How often the leader checks that it still holds the lock
+LOCK_CHECK_INTERVAL = 30
+
+
+class CronSchedule:
+    """Five-field cron expression: minute hour day-of-month month day-of-week.
+
+    Fields accept ``*``, numbers, ranges (``1-5``), steps (``*/15``,
+    ``0-30/10``) and comma lists. Day-of-week 0 and 7 are Sunday. As in cron,
+    when both day fields are restricted a day matching either one is due.
+    """
+
+    FIELDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"cron expression needs 5 fields: {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            self._parse(part, low, high) for part, (low, high) in zip(parts, self.FIELDS))
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = parts[2] == '*'
+        self.any_weekday = parts[4] == '*'
+
+    @staticmethod
+    def _parse(field, low, high):
+        values = set()
+        for item in field.split(','):
+            spec, _, step = item.partition('/')
+            if spec == '*':
+                start, end = low, high
+            elif '-' in spec:
+                start, end = (int(v) for v in spec.split('-', 1))
+            else:
+                # ``5/15`` means every 15 starting at 5
+                start = int(spec)
+                end = high if step else start
+            if not (low <= start <= end <= high):
+                raise ValueError(f"cron field {field!r} out of range {low}-{high}")
+            values.update(range(start, end + 1, int(step or 1)))
+        return values
+
+    def _day_matches(self, moment):
+        in_days = moment.day in self.days
+        in_weekdays = (moment.weekday() + 1) % 7 in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_days and in_weekdays
+        return in_days or in_weekdays
+
+    def next_after(self, moment):
+        """First matching minute strictly after ``moment``."""
+        candidate = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = candidate + timedelta(days=366 * 4)
+        while candidate < limit:
+            if candidate.month not in self.months or not self._day_matches(candidate):
+                candidate = (candidate + timedelta(days=1)).replace(hour=0, minute=0)
+            elif candidate.hour not in self.hours:
+                candidate = (candidate + timedelta(hours=1)).replace(minute=0)
+            elif candidate.minute not in self.minutes:
+                candidate += timedelta(minutes=1)
+            else:
+                return candidate
+        raise ValueError(f"cron expression never matches: {self.expression!r}")
+
+
+class Job:
+    def __init__(self, name, func, interval=None, cron=None, jitter=0, timeout=300):
+        if (interval is None) == (cron is None):
+            raise ValueError(f"job {name} needs exactly one of interval or cron")
+        self.name = name
+        self.func = func
+        self.interval = timedelta(seconds=interval) if interval is not None else None
+        self.cron = CronSchedule(cron) if cron else None
+        self.jitter = jitter
+        self.timeout = timeout
+        # Slot time of the next run and the moment it actually starts (slot + jitter)
+        self.next_slot = None
+        self.start_at = None
+
+    def describe(self):
+        if self.cron:
+            return f"cron {self.cron.expression}"
+        return f"every {int(self.interval.total_seconds())}s"
+
+    def slot_after(self, moment):
+        if self.cron:
+            return self.cron.next_after(moment)
+        return moment + self.interval
+
+    def schedule(self, slot):
+        self.next_slot = slot
+        self.start_at = slot + timedelta(seconds=random.uniform(0, self.jitter))
+
+
+class Scheduler:
+    def __init__(self, db=None, poll_interval=SCHEDULER_POLL_INTERVAL):
+        self.db = db or DatabaseConnection()
+        self.poll_interval = poll_interval
+        self.jobs = {}
+        self._running = {}
+        self._lock_conn = None
+        self._lock_checked = 0.0
+        self._state_lock = threading.Lock()
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    # --- Registration ---
+    def add_job(self, name, func, **options):
+        if name in self.jobs:
+            raise ValueError(f"job {name} is already registered")
+        self.jobs[name] = Job(name, func, **options)
+        return func
+
+    def job(self, name, **options):
+        def decorator(func):
+            return self.add_job(name, func, **options)
+        return decorator
+
+    # --- Leader election ---
+    @property
+    def is_leader(self):
+        return self._lock_conn is not None
+
+    def _acquire_leadership(self):
+        conn = None
+        try:
+            conn = mysql.connector.connect(**DB_CONFIG)
+            cursor = conn.cursor()
+            cursor.execute("SELECT GET_LOCK(%s, 0)", (SCHEDULER_LOCK_NAME,))
+            acquired = cursor.fetchone()[0] == 1
+            cursor.close()
+        except mysql.connector.Error as e:
+            logger.warning(f"Scheduler could not contact the database: {e}")
+            acquired = False
+        if not acquired:
+            if conn is not None:
+                conn.close()
+            return False
+        self._lock_conn = conn
+        self._lock_checked = datetime.now().timestamp()
+        logger.info(f"Scheduler leader is now {WORKER_ID}")
+        self._load_schedule()
+        return True
+
+    def _still_leader(self):
+        now = datetime.now().timestamp()
+        if now - self._lock_checked < LOCK_CHECK_INTERVAL:
+            return True
+        self._lock_checked = now
+        try:
+            cursor = self._lock_conn.cursor()
+            cursor.execute("SELECT IS_USED_LOCK(%s) = CONNECTION_ID()", (SCHEDULER_LOCK_NAME,))
+            held = cursor.fetchone()[0] == 1
+            cursor.close()
+        except mysql.connector.Error as e:
+            logger.warning(f"Scheduler lock connection lost: {e}")
+            held = False
+        if not held:
+            self._release_leadership()
+        return held
+
+    def _release_leadership(self):
+        if self._lock_conn is None:
+            return
+        try:
+            self._lock_conn.close()
+        except mysql.connector.Error:
+            pass
+        self._lock_conn = None
+        logger.info(f"Scheduler leadership released by {WORKER_ID}")
+
+    def _load_schedule(self):
+        """Continue each job's schedule from its last recorded run."""
+        now = datetime.now()
+        # On the primary: a lagging replica could hide the last run and repeat it
+        with self.db.transaction():
+            rows = self.db.fetch_all("""
+                SELECT job_name, MAX(scheduled_for) AS last_slot
+                FROM scheduler_job_runs GROUP BY job_name
+            """)
+        last_slots = {row['job_name']: row['last_slot'] for row in rows}
+        for job in self.jobs.values():
+            last_slot = last_slots.get(job.name)
+            if last_slot is None:
+                # Never run: interval jobs start now, cron jobs at their next slot
+                job.schedule(now if job.interval else job.slot_after(now))
+            else:
+                # Slots missed while nobody was leader run once, right away
+                job.schedule(max(job.slot_after(last_slot), now))
+
+    # --- Running jobs ---
+    def _running_elsewhere(self, job, now):
+        row = self.db.fetch_one("""
+            SELECT run_id FROM scheduler_job_runs
+            WHERE job_name = %s AND status = 'running' AND worker <> %s AND started_at > %s
+            LIMIT 1
+        """, (job.name, WORKER_ID, now - timedelta(seconds=job.timeout)))
+        return row is not None
+
+    def _start(self, job, now):
+        slot = job.next_slot
+        job.schedule(job.slot_after(max(slot, now) if job.interval else slot))
+        if self._running_elsewhere(job, now):
+            logger.warning(f"Job {job.name} is still running on a previous leader, skipping this run")
+            return
+        run_id = self.db.execute_query("""
+            INSERT INTO scheduler_job_runs (job_name, worker, scheduled_for, started_at, status)
+            VALUES (%s, %s, %s, %s, 'running')
+        """, (job.name, WORKER_ID, slot, now))
+        thread = threading.Thread(target=self._execute, args=(job, run_id),
+                                  name=f"job-{job.name}", daemon=True)
+        with self._state_lock:
+            self._running[job.name] = {'run_id': run_id, 'started': now, 'timed_out': False}
+        thread.start()
+
+    def _execute(self, job, run_id):
+        started = datetime.now()
+        status, error = 'success', None
+        try:
+            job.func()
+        except Exception as e:
+            logger.error(f"Job {job.name} failed: {e}")
+            status, error = 'failed', str(e)[:500]
+        finally:
+            duration_ms = int((datetime.now() - started).total_seconds() * 1000)
+            try:
+                # A run already marked as timed out keeps that status
+                self.db.execute_query("""
+                    UPDATE scheduler_job_runs
+                    SET status = IF(status = 'running', %s, status), error = %s,
+                        finished_at = %s, duration_ms = %s
+                    WHERE run_id = %s
+                """, (status, error, datetime.now(), duration_ms, run_id))
+            except Exception as e:
+                logger.error(f"Could not record run {run_id} of job {job.name}: {e}")
+            with self._state_lock:
+                self._running.pop(job.name, None)
+
+    def _check_timeouts(self, now):
+        with self._state_lock:
+            overdue = [(name, state) for name, state in self._running.items()
+                       if not state['timed_out']
+                       and (now - state['started']).total_seconds() > self.jobs[name].timeout]
+            for _, state in overdue:
+                state['timed_out'] = True
+        for name, state in overdue:
+            logger.warning(f"Job {name} exceeded its {self.jobs[name].timeout}s timeout")
+            self.db.execute_query(
+                "UPDATE scheduler_job_runs SET status = 'timeout' WHERE run_id = %s AND status = 'running'",
+                (state['run_id'],))
+
+    def tick(self, now=None):
+        """Start every due job that is not already running."""
+        now = now or datetime.now()
+        self._check_timeouts(now)
+        for job in self.jobs.values():
+            with self._state_lock:
+                running = job.name in self._running
+            if not running and job.start_at is not None and job.start_at <= now:
+                try:
+                    self._start(job, now)
+                except Exception as e:
+                    logger.error(f"Could not start job {job.name}: {e}")
+
+    def _run(self):
+        while not self._stop_event.is_set():
+            try:
+                if not self.is_leader and not self._acquire_leadership():
+                    self._stop_event.wait(SCHEDULER_LEADER_RETRY)
+                    continue
+                if self._still_leader():
+                    self.tick()
+            except Exception as e:
+                # Step down so another worker (or this one, later) starts from a clean schedule
+                logger.error(f"Scheduler error on {WORKER_ID}: {e}")
+                self._release_leadership()
+                self._stop_event.wait(SCHEDULER_LEADER_RETRY)
+                continue
+            self._stop_event.wait(self.poll_interval)
+        self._release_leadership()
+
+    def start(self):
+        if self._thread is None and self.jobs:
+            self._stop_event.clear()
+            self._thread = threading.Thread(target=self._run, name='scheduler', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def snapshot(self):
+        with self._state_lock:
+            running = {name: state['started'].isoformat() for name, state in self._running.items()}
+        return {
+            'worker': WORKER_ID,
+            'leader': self.is_leader,
+            'jobs': [{
+                'name': job.name,
+                'schedule': job.describe(),
+                'timeout': job.timeout,
+                'jitter': job.jitter,
+                'next_run': job.start_at.isoformat() if self.is_leader and job.start_at else None,
+                'running_since': running.get(job.name),
+            } for job in self.jobs.values()],
+        }
+
+
+def job_metrics(db, days=7):
+    """Run counts and duration statistics per job over the last ``days`` days."""
+    since = datetime.now() - timedelta(days=days)
+    rows = db.fetch_all("""
+        SELECT job_name, COUNT(*) AS runs,
+               SUM(status = 'success') AS succeeded, SUM(status = 'failed') AS failed,
+               SUM(status = 'timeout') AS timed_out,
+               AVG(duration_ms) AS avg_ms, MAX(duration_ms) AS max_ms, MAX(started_at) AS last_started
+        FROM scheduler_job_runs WHERE started_at >= %s
+        GROUP BY job_name
+    """, (since,))
+    metrics = {}
+    for row in rows:
+        durations = [r['duration_ms'] for r in db.fetch_all("""
+            SELECT duration_ms FROM scheduler_job_runs
+            WHERE job_name = %s AND started_at >= %s AND duration_ms IS NOT NULL
+            ORDER BY run_id DESC LIMIT 200
+        """, (row['job_name'], since))]
+        durations.sort()
+        metrics[row['job_name']] = {
+            'runs': int(row['runs']),
+            'succeeded': int(row['succeeded'] or 0),
+            'failed': int(row['failed'] or 0),
+            'timed_out': int(row['timed_out'] or 0),
+            'avg_ms': round(float(row['avg_ms']), 1) if row['avg_ms'] is not None else None,
+            'p95_ms': durations[int(0.95 * (len(durations) - 1))] if durations else None,
+            'max_ms': row['max_ms'],
+            'last_started': row['last_started'].isoformat() if row['last_started'] else None,
+        }
+    return metrics
+
+
+def job_runs(db, job_name, limit=50):
+    rows = db.fetch_all("""
+        SELECT run_id, worker, scheduled_for, started_at, finished_at, duration_ms, status, error
+        FROM scheduler_job_runs WHERE job_name = %s
+        ORDER BY run_id DESC LIMIT %s
+    """, (job_name, limit))
+    for row in rows:
+        for key in ('scheduled_for', 'started_at', 'finished_at'):
+            if row[key] is not None:
+                row[key] = row[key].isoformat()
+    return rows
+
+
+def prune_history(db, days=SCHEDULER_HISTORY_DAYS):
+    db.execute_query("DELETE FROM scheduler_job_runs WHERE started_at < %s AND status <> 'running'",
+                     (datetime.now() - timedelta(days=days),))
+
+
+scheduler = Scheduler()
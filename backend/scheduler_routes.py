@@ -0,0 +1,32 @@
+from flask import Blueprint, request, jsonify
+from flask_login import login_required
+import logging
+
+from database import DatabaseConnection
+from scheduler import scheduler, job_metrics, job_runs
+
+logger = logging.getLogger(__name__)
+
+scheduler_api = Blueprint('scheduler_api', __name__)
+db = DatabaseConnection()
+
+
+@scheduler_api.route('/api/scheduler/jobs', methods=['GET'])
+@login_required
+def list_jobs():
+    """Registered jobs with run counts and durations over the last ``days`` days."""
+    days = request.args.get('days', 7, type=int)
+    status = scheduler.snapshot()
+    metrics = job_metrics(db, days=max(1, days))
+    for job in status['jobs']:
+        job['metrics'] = metrics.get(job['name'])
+    return jsonify({'success': True, **status})
+
+
+@scheduler_api.route('/api/scheduler/jobs/<name>/runs', methods=['GET'])
+@login_required
+def list_job_runs(name):
+    if name not in scheduler.jobs:
+        return jsonify({'success': False, 'message': 'Unknown job'}), 404
+    limit = min(500, max(1, request.args.get('limit', 50, type=int)))
+    return jsonify({'success': True, 'runs': job_runs(db, name, limit)})
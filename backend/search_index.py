@@ -0,0 +1,233 @@
+"""Full-text search over the free-text fields of every section.
+
+Notes, remarks and comments from the tables in SEARCHABLE_TABLES are copied
+into ``search_documents`` by AFTER INSERT/UPDATE/DELETE triggers, so a single
+InnoDB FULLTEXT index covers all sections with one relevance ranking. A shared
+table is used instead of per-table FULLTEXT indexes because the monitoring
+tables are partitioned (partition_maintenance.py) and partitioned tables
+cannot carry FULLTEXT indexes.
+
+Usage:
+    python search_index.py ddl       # print the migration (table, triggers, backfill)
+    python search_index.py rebuild   # re-copy every row into search_documents
+"""
+import logging
+import re
+import sys
+from datetime import date, datetime
+
+from database import DatabaseConnection
+
+logger = logging.getLogger(__name__)
+
+# Table -> (section, label, primary key column, date column, text columns)
+SEARCHABLE_TABLES = {
+    'waste_sourcing': ('waste', 'Waste Sourcing', 'sourcing_id', 'collection_date', ('collection_notes',)),
+    'storage_records': ('waste', 'Storage Records', 'record_id', 'storage_date', ('storage_observations',)),
+    'processing_records': ('waste', 'Processing Records', 'processing_id', 'processing_date', ('processing_remarks',)),
+    'environmental_monitoring_waste': ('waste', 'Waste Environmental Monitoring', 'monitoring_id', 'monitoring_date',
+                                       ('pest_details', 'mitigation_actions', 'remarks')),
+    'hatchery_batches': ('hatchery', 'Batch Information', 'batch_id', 'batch_date', ('notes',)),
+    'hatchery_feeding': ('hatchery', 'Feeding Records', 'feeding_id', 'feeding_date', ('notes',)),
+    'hatchery_monitoring': ('hatchery', 'Environmental Monitoring', 'monitoring_id', 'monitoring_date',
+                            ('adjustments_made',)),
+    'hatchery_cleaning': ('hatchery', 'Cleaning & Sanitation', 'cleaning_id', 'cleaning_date',
+                          ('areas_cleaned', 'remarks')),
+    'hatchery_problems': ('hatchery', 'Problems & Solutions', 'problem_id', 'problem_date',
+                          ('problem_identified', 'proposed_solution', 'additional_comments')),
+    'hatchery_health_interventions': ('hatchery', 'Health Interventions', 'intervention_id', 'health_date',
+                                      ('health_issue', 'action_taken', 'comments')),
+    'feeding_environmental_monitoring': ('feeding', 'Environmental Monitoring', 'monitoring_id', 'monitoring_date',
+                                         ('notes',)),
+    'feeding_health_intervention': ('feeding', 'Health & Intervention', 'intervention_id', 'health_check_date',
+                                    ('observed_issue', 'action_taken', 'comments')),
+    'feeding_harvest_yield': ('feeding', 'Harvest & Yield', 'harvest_id', 'harvest_date', ('notes',)),
+    'drying_input': ('drying', 'Input Records', 'input_id', 'created_at', ('notes',)),
+    'drying_output': ('drying', 'Output Records', 'output_id', 'created_at', ('notes',)),
+    'drying_quality_control': ('drying', 'Quality Control', 'qc_id', 'qc_date', ('notes',)),
+    'drying_review_approval': ('drying', 'Review & Approval', 'review_id', 'review_date', ('comments',)),
+    'fly_facility_cage_monitoring': ('facility', 'Cage Monitoring', 'monitoring_id', 'monitoring_date',
+                                     ('damage_notes', 'additional_notes')),
+    'fly_facility_maintenance': ('facility', 'Facility Maintenance', 'maintenance_id', 'maintenance_date',
+                                 ('maintenance_notes',)),
+    'fly_facility_pupae_transition': ('facility', 'Pupae Transition', 'transition_id', 'transition_date', ('notes',)),
+    'fly_facility_egg_collection': ('facility', 'Egg Collection', 'collection_id', 'collection_date', ('notes',)),
+    'fly_facility_bait_preparation': ('facility', 'Bait Preparation', 'bait_id', 'start_date',
+                                      ('ingredients_added', 'notes')),
+    'deliveries': ('sales', 'Deliveries', 'id', 'date', ('notes',)),
+    'customer_feedback': ('sales', 'Customer Feedback', 'id', 'date', ('feedback',)),
+}
+
+SECTIONS = sorted({section for section, *_ in SEARCHABLE_TABLES.values()})
+
+# InnoDB ignores shorter words (innodb_ft_min_token_size)
+MIN_TOKEN_SIZE = 3
+SNIPPET_WIDTH = 160
+BOOLEAN_OPERATORS = re.compile(r'[+\-"*<>~()]')
+WORD = re.compile(r'\w+', re.UNICODE)
+# A quoted phrase or a word with optional trailing *, either optionally led by
+# + or - at the start of a term; anything else is dropped
+TERM = re.compile(r'(?:(?<![^\s(])([+\-]))?(?:"([^"]*)"|(\w+)(\*?))', re.UNICODE)
+
+CREATE_TABLE = """CREATE TABLE IF NOT EXISTS search_documents (
+    source_table VARCHAR(64) NOT NULL,
+    source_id INT NOT NULL,
+    section VARCHAR(20) NOT NULL,
+    record_date DATE NULL,
+    body TEXT NOT NULL,
+    PRIMARY KEY (source_table, source_id),
+    KEY idx_search_documents_section_date (section, record_date),
+    FULLTEXT KEY ft_search_documents_body (body)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4"""
+
+
+def _document_values(table, row_alias):
+    """SQL expressions for one search_documents row taken from NEW/OLD or a table."""
+    section, _, pk_col, date_col, text_cols = SEARCHABLE_TABLES[table]
+    body = ', '.join(f"{row_alias}.{col}" for col in text_cols)
+    return (f"'{table}', {row_alias}.{pk_col}, '{section}', DATE({row_alias}.{date_col}), "
+            f"CONCAT_WS(' ', {body})")
+
+
+def trigger_statements(table):
+    """Single-statement triggers that keep search_documents in sync with ``table``."""
+    pk_col = SEARCHABLE_TABLES[table][2]
+    upsert = ("REPLACE INTO search_documents (source_table, source_id, section, record_date, body) "
+              f"VALUES ({_document_values(table, 'NEW')})")
+    return [
+        f"DROP TRIGGER IF EXISTS trg_{table}_search_ai",
+        f"CREATE TRIGGER trg_{table}_search_ai AFTER INSERT ON {table} FOR EACH ROW {upsert}",
+        f"DROP TRIGGER IF EXISTS trg_{table}_search_au",
+        f"CREATE TRIGGER trg_{table}_search_au AFTER UPDATE ON {table} FOR EACH ROW {upsert}",
+        f"DROP TRIGGER IF EXISTS trg_{table}_search_ad",
+        f"CREATE TRIGGER trg_{table}_search_ad AFTER DELETE ON {table} FOR EACH ROW "
+        f"DELETE FROM search_documents WHERE source_table = '{table}' AND source_id = OLD.{pk_col}",
+    ]
+
+
+def backfill_statement(table):
+    return ("REPLACE INTO search_documents (source_table, source_id, section, record_date, body) "
+            f"SELECT {_document_values(table, 't')} FROM {table} t")
+
+
+def migration_statements():
+    statements = [CREATE_TABLE]
+    for table in SEARCHABLE_TABLES:
+        statements.extend(trigger_statements(table))
+    statements.extend(backfill_statement(table) for table in SEARCHABLE_TABLES)
+    return statements
+
+
+def rebuild(db):
+    """Re-copy every searchable row, e.g. after adding a table to SEARCHABLE_TABLES."""
+    with db.transaction():
+        db.execute_query("DELETE FROM search_documents")
+        for table in SEARCHABLE_TABLES:
+            db.execute_query(backfill_statement(table))
+
+
+def boolean_query(text):
+    """Turn free text into a BOOLEAN MODE query.
+
+    Plain words are all required and prefix-matched, so ``mites ammonia``
+    finds rows containing both ``mite(s)`` and ``ammonia``. Input that
+    already uses boolean syntax keeps its quoted phrases, leading + and - and
+    trailing *; other operators and unbalanced quotes are dropped, since
+    MySQL rejects a malformed query outright.
+    """
+    text = text.strip()
+    if not BOOLEAN_OPERATORS.search(text):
+        words = [w for w in WORD.findall(text) if len(w) >= MIN_TOKEN_SIZE]
+        return ' '.join(f'+{w}*' for w in words)
+    terms = []
+    for match in TERM.finditer(text):
+        operator, phrase, word, star = match.groups(default='')
+        if match.group(2) is not None:
+            words = WORD.findall(phrase)
+            if words:
+                terms.append(f'{operator}"{" ".join(words)}"')
+        elif len(word) >= MIN_TOKEN_SIZE:
+            terms.append(f'{operator}{word}{star}')
+    return ' '.join(terms)
+
+
+def query_terms(text):
+    return [w.lower() for w in WORD.findall(text) if len(w) >= MIN_TOKEN_SIZE]
+
+
+def make_snippet(body, terms, width=SNIPPET_WIDTH):
+    """Window of ``body`` around the first matching term."""
+    body = ' '.join(body.split())
+    lowered = body.lower()
+    hits = [pos for pos in (lowered.find(term) for term in terms) if pos >= 0]
+    start = max(0, min(hits) - width // 4) if hits else 0
+    if start:
+        space = body.find(' ', start)
+        start = space + 1 if 0 <= space < start + 20 else start
+    end = min(len(body), start + width)
+    snippet = body[start:end]
+    return ('…' if start else '') + snippet + ('…' if end < len(body) else '')
+
+
+def search(db, text, sections=None, date_from=None, date_to=None, page=1, per_page=20):
+    """Ranked matches with snippets; returns (results, has_more).
+
+    Raises ValueError for an empty query or an unknown section.
+    """
+    match = boolean_query(text or '')
+    if not match:
+        raise ValueError(f'Query must contain a word of at least {MIN_TOKEN_SIZE} characters')
+    unknown = [s for s in sections or [] if s not in SECTIONS]
+    if unknown:
+        raise ValueError(f"section must be one of: {', '.join(SECTIONS)}")
+
+    where, params = ["MATCH(body) AGAINST (%s IN BOOLEAN MODE)"], [match]
+    if sections:
+        where.append(f"section IN ({', '.join(['%s'] * len(sections))})")
+        params.extend(sections)
+    if date_from:
+        where.append("record_date >= %s")
+        params.append(date_from)
+    if date_to:
+        where.append("record_date <= %s")
+        params.append(date_to)
+
+    # One extra row tells the client whether another page exists without a COUNT(*)
+    query = f"""
+        SELECT source_table, source_id, section, record_date, body,
+               MATCH(body) AGAINST (%s IN BOOLEAN MODE) AS score
+        FROM search_documents
+        WHERE {' AND '.join(where)}
+        ORDER BY score DESC, record_date DESC
+        LIMIT %s OFFSET %s
+    """
+    rows = db.fetch_all(query, tuple([match] + params + [per_page + 1, (page - 1) * per_page]))
+
+    terms = query_terms(text)
+    results = []
+    for row in rows[:per_page]:
+        record_date = row['record_date']
+        results.append({
+            'section': row['section'],
+            'table': row['source_table'],
+            'label': SEARCHABLE_TABLES.get(row['source_table'], (None, row['source_table']))[1],
+            'id': row['source_id'],
+            'date': record_date.isoformat() if isinstance(record_date, (date, datetime)) else record_date,
+            'score': round(float(row['score']), 4),
+            'snippet': make_snippet(row['body'], terms),
+        })
+    return results, len(rows) > per_page
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    command = sys.argv[1:]
+    if command == ['ddl']:
+        for statement in migration_statements():
+            print(statement + ';\n')
+    elif command == ['rebuild']:
+        rebuild(DatabaseConnection())
+        print("Search index rebuilt.")
+    else:
+        print(__doc__)
+        sys.exit(1)
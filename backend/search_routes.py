@@ -0,0 +1,56 @@
+from flask import Blueprint, request, jsonify
+from flask_login import login_required
+import logging
+from datetime import datetime
+
+from database import DatabaseConnection
+from search_index import search, SECTIONS
+
+logger = logging.getLogger(__name__)
+
+search_api = Blueprint('search_api', __name__)
+db = DatabaseConnection()
+
+MAX_PER_PAGE = 100
+
+
+def _date_arg(name):
+    """Query parameter ``name`` as a date; ValueError unless it is YYYY-MM-DD."""
+    value = request.args.get(name)
+    if not value:
+        return None
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f"Invalid '{name}' date, please use YYYY-MM-DD") from None
+
+
+@search_api.route('/api/search', methods=['GET'])
+@login_required
+def search_records():
+    """Search notes, remarks and comments across sections.
+
+    Query parameters: q (required), section (comma-separated), from, to
+    (YYYY-MM-DD, inclusive), page and per_page.
+    """
+    sections = [s.strip() for s in request.args.get('section', '').split(',') if s.strip()]
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = min(MAX_PER_PAGE, max(1, int(request.args.get('per_page', 20))))
+        results, has_more = search(
+            db, request.args.get('q', ''), sections=sections,
+            date_from=_date_arg('from'), date_to=_date_arg('to'),
+            page=page, per_page=per_page)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e), 'sections': SECTIONS}), 400
+    except Exception as e:
+        logger.error(f"Search failed: {e}")
+        return jsonify({'success': False, 'message': 'Search failed'}), 500
+
+    return jsonify({
+        'success': True,
+        'results': results,
+        'page': page,
+        'per_page': per_page,
+        'has_more': has_more
+    })
@@ -0,0 +1,319 @@
+"""Buffered ingestion of high-frequency cage and tray sensor readings.
+
+Sensors send compact batches either as JSON lines or as fixed-size binary
+records. Readings are deduplicated on (device_id, reading_time), held in a
+bounded in-memory buffer and bulk-written to ``sensor_readings`` by a
+background flusher, which also feeds them to the anomaly detector. When the
+buffer is full new batches are refused so the sender can back off and retry,
+instead of the worker queueing without limit. A batch that fails on a lost
+connection goes back to the front of the buffer; one the database refuses as
+bad data is written to the ``sensor_ingestion.dead_letter`` log instead.
+
+Run ``python sensor_ingestion.py`` to start the plain TCP listener, which can
+be exercised locally with ``nc 127.0.0.1 7070``.
+"""
+import atexit
+import json
+import logging
+import math
+import socketserver
+import struct
+import threading
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from mysql.connector import errors as mysql_errors
+
+import anomaly_detection
+from database import DatabaseConnection
+from config import (
+    SENSOR_TCP_HOST, SENSOR_TCP_PORT, SENSOR_BUFFER_MAX,
+    SENSOR_FLUSH_BATCH, SENSOR_FLUSH_INTERVAL
+)
+
+logger = logging.getLogger(__name__)
+# Batches the database refused as bad data; route this logger to keep them
+dead_letter_logger = logging.getLogger(__name__ + '.dead_letter')
+
+# 16-byte device id, uint32 epoch seconds, int16 temperature in hundredths of a
+# degree and uint16 humidity in hundredths of a percent: 24 bytes per reading.
+BINARY_RECORD = struct.Struct('<16sIhH')
+
+INSERT_READINGS_QUERY = """
+    INSERT IGNORE INTO sensor_readings (device_id, reading_time, temperature, humidity)
+    VALUES (%s, %s, %s, %s)
+"""
+
+# temperature and humidity are DECIMAL(5, 2)
+READING_LIMIT = 999.99
+
+# Errors caused by the rows themselves; sending the same batch again cannot
+# succeed, unlike a lost connection or an exhausted pool
+DATA_ERRORS = (mysql_errors.DataError, mysql_errors.IntegrityError,
+               mysql_errors.ProgrammingError, ValueError, TypeError)
+
+
+class BufferFull(Exception):
+    """Raised when a batch does not fit in the ingestion buffer."""
+
+    def __init__(self, retry_after):
+        super().__init__(f"Sensor buffer full, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+def _to_reading_time(value):
+    """Convert an epoch number or ISO-8601 string to a naive UTC datetime."""
+    if isinstance(value, (int, float)):
+        return datetime.fromtimestamp(value, timezone.utc).replace(tzinfo=None, microsecond=0)
+    parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed.replace(microsecond=0)
+
+
+def _optional_float(value):
+    if value is None:
+        return None
+    number = float(value)
+    if not math.isfinite(number) or abs(number) > READING_LIMIT:
+        raise ValueError(f'reading {value!r} out of range')
+    return number
+
+
+def parse_reading(item):
+    """Build a (device_id, reading_time, temperature, humidity) tuple from a dict."""
+    device_id = str(item.get('device_id') or item.get('device') or '').strip()
+    timestamp = item.get('ts', item.get('timestamp'))
+    if not device_id or timestamp is None:
+        raise ValueError('device and ts are required')
+    return (
+        device_id[:64],
+        _to_reading_time(timestamp),
+        _optional_float(item.get('temperature', item.get('t'))),
+        _optional_float(item.get('humidity', item.get('h'))),
+    )
+
+
+def parse_json_lines(payload):
+    """Parse newline-delimited JSON; each line is a reading or a list of readings.
+
+    Returns (readings, rejected_count).
+    """
+    if isinstance(payload, bytes):
+        payload = payload.decode('utf-8', errors='replace')
+    readings = []
+    rejected = 0
+    for line in payload.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            parsed = json.loads(line)
+        except ValueError:
+            rejected += 1
+            continue
+        for item in parsed if isinstance(parsed, list) else [parsed]:
+            try:
+                readings.append(parse_reading(item))
+            except (ValueError, TypeError, AttributeError, OverflowError):
+                rejected += 1
+    return readings, rejected
+
+
+def parse_binary(payload):
+    """Parse a concatenation of BINARY_RECORD structs.
+
+    Returns (readings, rejected_count); a trailing partial record is rejected.
+    """
+    usable = len(payload) - len(payload) % BINARY_RECORD.size
+    readings = []
+    for device_raw, epoch, temp_centi, hum_centi in BINARY_RECORD.iter_unpack(payload[:usable]):
+        device_id = device_raw.rstrip(b'\x00').decode('ascii', errors='replace')
+        readings.append((device_id, _to_reading_time(epoch), temp_centi / 100.0, hum_centi / 100.0))
+    return readings, (1 if usable != len(payload) else 0)
+
+
+def encode_binary(readings):
+    """Encode (device_id, epoch, temperature, humidity) tuples as binary records."""
+    return b''.join(
+        BINARY_RECORD.pack(device_id.encode('ascii')[:16], int(epoch),
+                           int(round(temperature * 100)), int(round(humidity * 100)))
+        for device_id, epoch, temperature, humidity in readings
+    )
+
+
+class ReadingBuffer:
+    """Bounded, deduplicating buffer flushed to the database in bulk."""
+
+    def __init__(self, db=None, max_size=SENSOR_BUFFER_MAX,
+                 flush_batch=SENSOR_FLUSH_BATCH, flush_interval=SENSOR_FLUSH_INTERVAL):
+        self.db = db or DatabaseConnection()
+        self.max_size = max_size
+        self.flush_batch = flush_batch
+        self.flush_interval = flush_interval
+        self._pending = OrderedDict()
+        self._lock = threading.Lock()
+        self._wakeup = threading.Condition(self._lock)
+        self._thread = None
+        self._stopping = False
+        self.stats = {'accepted': 0, 'duplicates': 0, 'refused': 0, 'written': 0,
+                      'flush_errors': 0, 'dead_lettered': 0}
+
+    def add(self, readings):
+        """Queue readings, dropping repeats of a (device, timestamp) pair.
+
+        Repeats that arrive after a flush are dropped by INSERT IGNORE against
+        the (device_id, reading_time) primary key. The whole batch is refused
+        with BufferFull if it does not fit, so a sender can retry it
+        unchanged. Returns (accepted, duplicates).
+        """
+        with self._lock:
+            fresh = OrderedDict()
+            for reading in readings:
+                key = (reading[0], reading[1])
+                if key not in self._pending and key not in fresh:
+                    fresh[key] = reading
+            duplicates = len(readings) - len(fresh)
+            if len(self._pending) + len(fresh) > self.max_size:
+                self.stats['refused'] += len(readings)
+                raise BufferFull(retry_after=max(1, int(self.flush_interval * 2)))
+            self._pending.update(fresh)
+            self.stats['accepted'] += len(fresh)
+            self.stats['duplicates'] += duplicates
+            if len(self._pending) >= self.flush_batch:
+                self._wakeup.notify()
+        return len(fresh), duplicates
+
+    def _take_batch(self):
+        batch = []
+        while self._pending and len(batch) < self.flush_batch:
+            batch.append(self._pending.popitem(last=False)[1])
+        return batch
+
+    def flush(self):
+        """Write everything currently buffered. Returns the number of rows sent."""
+        sent = 0
+        while True:
+            with self._lock:
+                batch = self._take_batch()
+            if not batch:
+                return sent
+            try:
+                with self.db.transaction():
+                    self.db.execute_many(INSERT_READINGS_QUERY, batch)
+                    anomaly_detection.observe_many(
+                        self.db, 'sensor', [(r[0], r[1], {'temperature': r[2], 'humidity': r[3]}) for r in batch],
+                        monotonic=True)
+            except DATA_ERRORS as e:
+                # Requeueing would block every later reading behind this batch
+                logger.error(f"Dropping {len(batch)} sensor readings the database refused: {e}")
+                for reading in batch:
+                    dead_letter_logger.error(json.dumps(
+                        [reading[0], reading[1].isoformat(), reading[2], reading[3]]))
+                with self._lock:
+                    self.stats['flush_errors'] += 1
+                    self.stats['dead_lettered'] += len(batch)
+                continue
+            except Exception as e:
+                logger.error(f"Failed to flush {len(batch)} sensor readings: {e}")
+                with self._lock:
+                    self.stats['flush_errors'] += 1
+                    # Put the batch back in front so nothing is lost on a transient error
+                    restored = OrderedDict(((r[0], r[1]), r) for r in batch)
+                    restored.update(self._pending)
+                    self._pending = restored
+                return sent
+            sent += len(batch)
+            with self._lock:
+                self.stats['written'] += len(batch)
+
+    def _run(self):
+        while True:
+            with self._lock:
+                if not self._stopping and len(self._pending) < self.flush_batch:
+                    self._wakeup.wait(self.flush_interval)
+                stopping = self._stopping
+            self.flush()
+            if stopping:
+                return
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='sensor-flusher', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        with self._lock:
+            self._stopping = True
+            self._wakeup.notify()
+        if self._thread is not None:
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def snapshot(self):
+        with self._lock:
+            return {'buffered': len(self._pending), 'capacity': self.max_size, **self.stats}
+
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_buffer():
+    """Return this process's buffer, starting its flusher on first use."""
+    global _buffer
+    with _buffer_lock:
+        if _buffer is None:
+            _buffer = ReadingBuffer().start()
+            atexit.register(_buffer.stop)
+        return _buffer
+
+
+class SensorTCPHandler(socketserver.StreamRequestHandler):
+    """One JSON reading or JSON list of readings per line.
+
+    Replies ``OK <accepted> <duplicates> <rejected>``, ``BUSY <retry_after>``
+    or ``ERR <message>`` for every line received.
+    """
+
+    def handle(self):
+        buffer = self.server.buffer
+        for raw in self.rfile:
+            readings, rejected = parse_json_lines(raw)
+            if not readings and rejected:
+                self.wfile.write(b'ERR invalid reading\n')
+                continue
+            try:
+                accepted, duplicates = buffer.add(readings)
+            except BufferFull as e:
+                self.wfile.write(f'BUSY {e.retry_after}\n'.encode())
+                continue
+            self.wfile.write(f'OK {accepted} {duplicates} {rejected}\n'.encode())
+
+
+class SensorTCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, address, buffer):
+        super().__init__(address, SensorTCPHandler)
+        self.buffer = buffer
+
+
+def serve_tcp(host=SENSOR_TCP_HOST, port=SENSOR_TCP_PORT, buffer=None):
+    """Run the line-oriented TCP listener until interrupted."""
+    buffer = buffer or get_buffer()
+    with SensorTCPServer((host, port), buffer) as server:
+        logger.info(f"Sensor listener on {host}:{port}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            buffer.stop()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO)
+    serve_tcp()
@@ -0,0 +1,52 @@
+from flask import Blueprint, request, jsonify
+from flask_login import login_required
+import hmac
+import logging
+
+from config import SENSOR_INGEST_TOKEN
+from sensor_ingestion import get_buffer, parse_binary, parse_json_lines, BufferFull
+
+logger = logging.getLogger(__name__)
+
+sensor_ingestion = Blueprint('sensor_ingestion', __name__)
+
+
+def _token_ok():
+    token = request.headers.get('X-Sensor-Token', '')
+    return bool(SENSOR_INGEST_TOKEN) and hmac.compare_digest(token, SENSOR_INGEST_TOKEN)
+
+
+@sensor_ingestion.route('/api/sensors/readings', methods=['POST'])
+def ingest_sensor_readings():
+    """Accept a batch of readings as JSON lines or binary records."""
+    if not _token_ok():
+        return jsonify({'success': False, 'message': 'Invalid sensor token'}), 401
+
+    payload = request.get_data(cache=False)
+    if request.mimetype == 'application/octet-stream':
+        readings, rejected = parse_binary(payload)
+    else:
+        readings, rejected = parse_json_lines(payload)
+
+    if not readings:
+        return jsonify({'success': False, 'message': 'No valid readings', 'rejected': rejected}), 400
+
+    try:
+        accepted, duplicates = get_buffer().add(readings)
+    except BufferFull as e:
+        response = jsonify({'success': False, 'message': 'Ingestion buffer full, retry later'})
+        response.headers['Retry-After'] = str(e.retry_after)
+        return response, 503
+
+    return jsonify({
+        'success': True,
+        'accepted': accepted,
+        'duplicates': duplicates,
+        'rejected': rejected
+    }), 202
+
+
+@sensor_ingestion.route('/api/sensors/status', methods=['GET'])
+@login_required
+def sensor_ingestion_status():
+    return jsonify(get_buffer().snapshot())
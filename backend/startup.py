@@ -0,0 +1,81 @@
+"""Startup timings and the post-start warmup.
+
+Importing app.py only builds the Flask app. The database pool, the
+scheduler and the numpy-backed forecasting module start on first use, or
+earlier on a warmup thread that runs once the worker has booted, so a cold
+worker can answer its first request without waiting for them. Each phase
+is timed here and the timings are reported by /readyz and by
+``startup_profile.py``.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from config import STARTUP_WARMUP, STARTUP_WARMUP_DELAY
+
+logger = logging.getLogger(__name__)
+
+STARTED_AT = time.monotonic()
+
+_timings = OrderedDict()
+_lock = threading.Lock()
+_first_request = None
+_warmup_thread = None
+
+
+def record(name, seconds):
+    with _lock:
+        _timings.setdefault(name, round(seconds * 1000, 1))
+
+
+@contextmanager
+def timed(name):
+    """Record how long the block took in milliseconds; the first run of ``name`` wins."""
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        record(name, time.monotonic() - started)
+
+
+def mark_first_request():
+    """Called after every response; only the first one is recorded."""
+    global _first_request
+    if _first_request is None:
+        _first_request = time.monotonic() - STARTED_AT
+
+
+def report():
+    with _lock:
+        phases = dict(_timings)
+    return {
+        'phases_ms': phases,
+        'first_request_seconds': None if _first_request is None else round(_first_request, 3),
+        'warmup_done': _warmup_thread is not None and not _warmup_thread.is_alive(),
+    }
+
+
+def _warm_up(tasks, delay=0):
+    time.sleep(delay)
+    for name, task in tasks:
+        try:
+            with timed(f"warmup:{name}"):
+                task()
+        except Exception as e:
+            # Must not kill the worker; the pool retries on the first query and reports the error there
+            logger.warning(f"Warmup of {name} failed: {e}")
+
+
+def start_warmup(tasks):
+    """Run (name, callable) tasks once on a background thread, or right away if STARTUP_WARMUP is off."""
+    global _warmup_thread
+    if _warmup_thread is not None:
+        return
+    delay = STARTUP_WARMUP_DELAY if STARTUP_WARMUP else 0
+    _warmup_thread = threading.Thread(target=_warm_up, args=(list(tasks), delay), name='startup-warmup', daemon=True)
+    if STARTUP_WARMUP:
+        _warmup_thread.start()
+    else:
+        _warmup_thread.run()
@@ -0,0 +1,122 @@
+"""Cold-start report: import cost per module, init phases and time to first request.
+
+Starts a fresh interpreter with ``-X importtime``, imports app.py, serves one
+request through the test client, waits for the warmup thread, and then
+prints:
+
+- import time per top-level package (self time summed, so nothing is
+  counted twice) and per backend module (cumulative);
+- the init phases recorded by startup.py (pool, scheduler, forecasting);
+- the time from the start of the script to the first response.
+
+Exits 1 when the first response took longer than STARTUP_TARGET_SECONDS,
+so it can run in CI next to ``index_advisor.py check``.
+
+Usage:
+    python startup_profile.py [--path /login] [--top 15] [--target 1.5]
+"""
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+import time
+
+from config import STARTUP_TARGET_SECONDS
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+IMPORT_LINE = re.compile(r'^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|\s*(\S+)')
+
+# Runs in the child; the timer starts before anything of ours is imported
+CHILD = """
+import json, sys, time
+started = time.perf_counter()
+import app
+imported = time.perf_counter()
+response = app.app.test_client().get(sys.argv[1])
+served = time.perf_counter()
+import startup
+deadline = time.monotonic() + 30
+while not startup.report()['warmup_done'] and time.monotonic() < deadline:
+    time.sleep(0.05)
+print(json.dumps({'import_seconds': imported - started, 'first_request_seconds': served - started,
+                  'status': response.status_code, 'startup': startup.report()}))
+"""
+
+
+def profile(path):
+    """Run the child interpreter; returns (result dict, import lines, wall seconds)."""
+    started = time.perf_counter()
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', CHILD, path],
+                          cwd=BACKEND_DIR, capture_output=True, text=True)
+    wall = time.perf_counter() - started
+    imports, errors = [], []
+    for line in proc.stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if match:
+            self_us, cumulative_us, name = match.groups()
+            imports.append((name, int(self_us), int(cumulative_us)))
+        elif not line.startswith('import time:'):
+            errors.append(line)
+    result_line = proc.stdout.strip().splitlines()[-1] if proc.stdout.strip() else ''
+    if proc.returncode != 0 or not result_line.startswith('{'):
+        raise RuntimeError('\n'.join(errors[-20:]) or f"child exited with {proc.returncode}")
+    return json.loads(result_line), imports, wall
+
+
+def by_package(imports):
+    totals = {}
+    for name, self_us, _ in imports:
+        package = name.split('.')[0]
+        totals[package] = totals.get(package, 0) + self_us
+    return sorted(totals.items(), key=lambda item: item[1], reverse=True)
+
+
+def backend_modules(imports):
+    local = {name[:-3] for name in os.listdir(BACKEND_DIR) if name.endswith('.py')}
+    return sorted(((name, cumulative) for name, _, cumulative in imports if name in local),
+                  key=lambda item: item[1], reverse=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Measure cold-start cost of app.py')
+    parser.add_argument('--path', default='/login', help='request served first (default /login)')
+    parser.add_argument('--top', type=int, default=15, help='rows per table')
+    parser.add_argument('--target', type=float, default=STARTUP_TARGET_SECONDS,
+                        help='seconds allowed until the first response')
+    args = parser.parse_args(argv)
+
+    try:
+        result, imports, wall = profile(args.path)
+    except RuntimeError as e:
+        print(f"Could not start the app:\n{e}")
+        return 2
+
+    total_us = sum(self_us for _, self_us, _ in imports)
+    print(f"Imports: {len(imports)} modules, {total_us / 1000:.1f} ms\n")
+    print('Top-level packages (self time):')
+    for package, self_us in by_package(imports)[:args.top]:
+        print(f"  {package:<32} {self_us / 1000:8.1f} ms  {100 * self_us / max(total_us, 1):5.1f}%")
+    print('\nBackend modules (cumulative, includes what they import):')
+    for name, cumulative in backend_modules(imports)[:args.top]:
+        print(f"  {name:<32} {cumulative / 1000:8.1f} ms")
+
+    phases = result['startup']['phases_ms']
+    print('\nInit phases:')
+    for name, ms in phases.items():
+        print(f"  {name:<32} {ms:8.1f} ms")
+    if not phases:
+        print('  (none recorded)')
+
+    first = result['first_request_seconds']
+    print(f"\nimport app:        {result['import_seconds'] * 1000:8.1f} ms")
+    print(f"first request:     {first * 1000:8.1f} ms  (GET {args.path} -> {result['status']})")
+    print(f"process wall time: {wall * 1000:8.1f} ms  (interpreter start to exit, importtime overhead included)")
+    within = first <= args.target
+    print(f"target:            {args.target * 1000:8.1f} ms  {'OK' if within else 'OVER'}")
+    return 0 if within else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,39 @@
+from flask import Blueprint, request, jsonify
+from flask_login import login_required
+import logging
+
+from config import SYNC_MAX_ROWS
+from database import DatabaseConnection
+from delta_sync import changes, parse_since, SYNC_TABLES
+
+logger = logging.getLogger(__name__)
+
+sync_api = Blueprint('sync_api', __name__)
+db = DatabaseConnection()
+
+
+@sync_api.route('/api/sync', methods=['GET'])
+@login_required
+def get_changes():
+    """Rows created, changed or deleted since the client's watermarks.
+
+    Query parameters: since (``table:version,...``; missing tables load in
+    full), tables (comma-separated, default all) and limit (changes per
+    table). Send each table's returned ``version`` as its next watermark.
+    """
+    tables = [t.strip() for t in request.args.get('tables', '').split(',') if t.strip()]
+    try:
+        since = parse_since(request.args.get('since'))
+        limit = min(SYNC_MAX_ROWS, max(1, int(request.args.get('limit', SYNC_MAX_ROWS))))
+        result = changes(db, since, tables=tables or None, limit=limit)
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e), 'tables': list(SYNC_TABLES)}), 400
+    except Exception as e:
+        logger.error(f"Sync failed: {e}")
+        return jsonify({'success': False, 'message': 'Sync failed'}), 500
+
+    return jsonify({
+        'success': True,
+        'tables': result,
+        'has_more': any(table['has_more'] for table in result.values())
+    })
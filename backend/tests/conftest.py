@@ -0,0 +1,134 @@
+"""Shared fixtures: the Flask app with a logged-in client and a fake database.
+
+``fake_db`` replaces the statement methods of the DatabaseConnection
+singleton, so every module's ``db`` talks to it. Reads are answered from
+canned rows matched by regex; writes are recorded and only kept when their
+transaction commits. Nothing here needs a MySQL server. Tests that do need
+one (``test_index_advisor.py``) skip when it cannot be reached.
+"""
+import os
+import re
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# Set before config.py is imported by anything
+_scratch = tempfile.mkdtemp(prefix='bsf_tests_')
+os.environ.setdefault('SCHEDULER_ENABLED', 'false')
+os.environ.setdefault('ANALYTICS_ENABLED', 'false')
+os.environ.setdefault('RATE_LIMIT_DB', os.path.join(_scratch, 'rate_limit.sqlite3'))
+os.environ.setdefault('IMAGE_CACHE_DIR', os.path.join(_scratch, 'image_cache'))
+os.environ.setdefault('ANALYTICS_DIR', os.path.join(_scratch, 'analytics'))
+
+
+class FakeDB:
+    """The MySQL side of DatabaseConnection, in memory."""
+
+    def __init__(self):
+        self.writes = []      # (query, params) of committed writes, in order
+        self.reads = []       # (query, params) of every read
+        self.rollbacks = 0
+        self._pending = None  # writes of the open transaction
+        self._responses = []  # (pattern, rows or callable), newest first
+        self._failures = []   # (pattern, exception)
+
+    def respond(self, pattern, rows):
+        """Answer reads matching ``pattern`` with ``rows`` (or ``rows(query, params)``)."""
+        self._responses.insert(0, (re.compile(pattern, re.I | re.S), rows))
+
+    def fail(self, pattern, error):
+        """Raise ``error`` for any statement matching ``pattern``."""
+        self._failures.insert(0, (re.compile(pattern, re.I | re.S), error))
+
+    def written(self, pattern):
+        return [(query, params) for query, params in self.writes if re.search(pattern, query, re.I | re.S)]
+
+    def _check(self, query):
+        for pattern, error in self._failures:
+            if pattern.search(query):
+                raise error
+
+    def _answer(self, query, params):
+        self._check(query)
+        self.reads.append((query, params))
+        for pattern, rows in self._responses:
+            if pattern.search(query):
+                rows = rows(query, params) if callable(rows) else rows
+                return [dict(row) for row in rows]
+        return []
+
+    def _write(self, query, params):
+        self._check(query)
+        (self._pending if self._pending is not None else self.writes).append((query, params))
+
+    def fetch_all(self, query, params=None):
+        return self._answer(query, params)
+
+    def fetch_one(self, query, params=None):
+        rows = self._answer(query, params)
+        return rows[0] if rows else None
+
+    def execute_query(self, query, params=None):
+        self._write(query, params)
+        return 1
+
+    def execute_many(self, query, seq_of_params):
+        rows = list(seq_of_params)
+        for params in rows:
+            self._write(query, params)
+        return len(rows)
+
+    def in_transaction(self):
+        return self._pending is not None
+
+    @contextmanager
+    def transaction(self):
+        if self._pending is not None:
+            yield self
+            return
+        self._pending = []
+        try:
+            yield self
+        except BaseException:
+            self.rollbacks += 1
+            raise
+        else:
+            self.writes.extend(self._pending)
+        finally:
+            self._pending = None
+
+
+@pytest.fixture
+def fake_db(monkeypatch):
+    from database import DatabaseConnection
+    fake = FakeDB()
+    instance = DatabaseConnection()
+    for name in ('fetch_all', 'fetch_one', 'execute_query', 'execute_many', 'in_transaction', 'transaction'):
+        monkeypatch.setattr(instance, name, getattr(fake, name))
+    return fake
+
+
+@pytest.fixture
+def flask_app(fake_db, monkeypatch):
+    import app as app_module
+    user = app_module.User(1, 'tester', 'tester@example.com', 'x', full_name='Test User')
+    monkeypatch.setattr(app_module, 'get_user_by_id', lambda user_id: user if user_id == 1 else None)
+    # 'strong' protection would drop the hand-made session below
+    monkeypatch.setattr(app_module.login_manager, 'session_protection', None)
+    app_module.app.config.update(TESTING=True, WTF_CSRF_ENABLED=False)
+    return app_module.app
+
+
+@pytest.fixture
+def client(flask_app):
+    """Test client with a logged-in session."""
+    client = flask_app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = '1'
+        session['_fresh'] = True
+    return client
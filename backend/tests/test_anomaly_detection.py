@@ -0,0 +1,50 @@
+import os
+import re
+
+import anomaly_detection
+
+MIGRATION = os.path.join(os.path.dirname(__file__), '..', 'migrations', 'environment_alerts_migration.sql')
+# Window functions added to MySQL 8.0's reserved words
+RESERVED = ('first_value', 'last_value', 'nth_value', 'lag', 'lead', 'rank', 'row_number')
+
+
+def reading(**overrides):
+    body = {'monitoring_date': '2026-03-01', 'monitoring_time': '09:30', 'temperature': '28',
+            'humidity': '60', 'odor_level': 'low', 'pest_presence': 'none'}
+    body.update(overrides)
+    return body
+
+
+def test_no_reserved_column_names():
+    sql = [anomaly_detection.SELECT_STATE_QUERY, anomaly_detection.UPSERT_STATE_QUERY,
+           anomaly_detection.RAISE_ALERT_QUERY, open(MIGRATION).read()]
+    for text in sql:
+        text = re.sub(r'--[^\n]*', '', text)
+        for word in RESERVED:
+            assert not re.search(rf'\b{word}\b', text, re.I), word
+
+
+def test_monitoring_post_feeds_the_detector(client, fake_db):
+    response = client.post('/api/environmental-monitoring', json=reading())
+
+    assert response.status_code == 201
+    assert fake_db.written(r'INSERT INTO environmental_monitoring\b')
+    state = fake_db.written(r'INSERT INTO environment_stream_state')
+    assert sorted(params[2] for _, params in state) == ['humidity', 'temperature']
+    assert not fake_db.written(r'INSERT INTO environment_alerts')
+
+
+def test_out_of_range_reading_raises_alert(client, fake_db):
+    response = client.post('/api/environmental-monitoring', json=reading(temperature='60'))
+
+    assert response.status_code == 201
+    alerts = fake_db.written(r'INSERT INTO environment_alerts')
+    assert [(params[2], params[3], params[5]) for _, params in alerts] == [('temperature', 'range', 60.0)]
+
+
+def test_spike_after_warmup():
+    state = {'reading_count': 0, 'mean': 0.0, 'variance': 0.0, 'fast_mean': 0.0}
+    for value in [30.0, 30.2, 29.8] * 5:
+        assert anomaly_detection.update(state, value, 'sensor', 'temperature') == []
+    kinds = [kind for kind, _, _ in anomaly_detection.update(state, 34.5, 'sensor', 'temperature')]
+    assert 'spike' in kinds
@@ -0,0 +1,76 @@
+import backup
+
+
+class ScriptedCursor:
+    """Returns the next scripted result for each execute()."""
+
+    def __init__(self, *results):
+        self.results = list(results)
+        self.current = None
+
+    def execute(self, query, params=None):
+        self.current = self.results.pop(0)
+
+    def fetchall(self):
+        return self.current
+
+    def fetchone(self):
+        return self.current[0]
+
+
+def test_table_info_keeps_default_generated_columns():
+    cursor = ScriptedCursor(
+        [('id', 'int', ''), ('created_at', 'timestamp', ''), ('updated_at', 'timestamp', ''),
+         ('total_kg', 'decimal', '(`wet_kg` + `dry_kg`)')],
+        [('id', 'int')],
+        [('sales', 'CREATE TABLE `sales` (...)')],
+    )
+
+    info = backup._table_info(cursor, 'sales')
+
+    assert info['columns'] == ['id', 'created_at', 'updated_at']
+    assert info['range_key'] == 'id'
+
+
+class RowsConnection:
+    """Connection whose cursor serves ``rows`` and records executemany() calls."""
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.inserted = []
+
+    def cursor(self, raw=False):
+        return RowsCursor(self)
+
+
+class RowsCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.sql = None
+
+    def execute(self, sql, params=()):
+        self.sql = sql
+
+    def fetchmany(self, size):
+        batch, self.conn.rows = self.conn.rows[:size], self.conn.rows[size:]
+        return batch
+
+    def executemany(self, sql, rows):
+        self.conn.inserted.append((sql, list(rows)))
+
+    def close(self):
+        pass
+
+
+def test_dump_and_restore_keep_timestamps_and_escapes(tmp_path):
+    info = {'columns': ['id', 'notes', 'created_at'], 'hex_columns': [], 'order_by': ['id'], 'range_key': 'id'}
+    dumped = RowsConnection([(b'1', b'tab\there\nnew line', b'2026-01-05 08:00:00'), (b'2', None, b'2026-01-06 09:30:00')])
+
+    _, chunk = backup._dump_chunk(dumped, str(tmp_path), 'waste_sourcing', info, 1, None, None)
+    restored = RowsConnection()
+    backup._insert_chunk(restored, 'waste_sourcing', info, str(tmp_path / chunk['file']))
+
+    assert chunk['rows'] == 2
+    [(sql, rows)] = restored.inserted
+    assert '`created_at`' in sql
+    assert rows == [('1', 'tab\there\nnew line', '2026-01-05 08:00:00'), ('2', None, '2026-01-06 09:30:00')]
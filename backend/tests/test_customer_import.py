@@ -0,0 +1,22 @@
+from customer_import import customer_key, import_customers
+
+
+def test_contact_keys_customers_without_email():
+    assert customer_key(('Ann', '0711', None, None)) != customer_key(('Ann', '0722', None, None))
+    # The contact only counts without an email
+    assert customer_key(('Ann', '0711', 'ann@example.com', None)) == \
+        customer_key(('Ann', '0722', 'ann@example.com', None))
+    assert customer_key(('Ann', None, None, None)) != customer_key(('Ann', None, 'ann@example.com', None))
+
+
+def test_same_name_customers_without_email_are_both_imported(fake_db):
+    report = import_customers([
+        {'name': 'Ann', 'phone': '0711'},
+        {'name': 'Ann', 'phone': '0722'},
+        {'name': 'ann ', 'phone': '0711', 'address': 'Market street'},
+    ], db=fake_db)
+
+    assert report['inserted'] == 2
+    assert report['duplicates_in_file'] == 1
+    upserts = fake_db.written(r'INSERT INTO customers')
+    assert sorted(params[1] for _, params in upserts) == ['0711', '0722']
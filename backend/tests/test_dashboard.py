@@ -0,0 +1,61 @@
+from datetime import date
+
+
+def test_dashboard_endpoint_builds_payload(client, fake_db):
+    this_month = date.today().strftime('%Y-%m')
+    fake_db.respond(r'FROM production_daily_summary\s+GROUP BY stage', [
+        {'stage': 'waste', 'kg': 100, 'records': 4, 'recent_kg': 40, 'today_kg': 10},
+        {'stage': 'larvae', 'kg': 20, 'records': 2, 'recent_kg': 20, 'today_kg': 0},
+    ])
+    fake_db.respond(r'AS month', [{'month': this_month, 'stage': 'waste', 'kg': 40}])
+
+    response = client.get('/api/dashboard?months=3')
+
+    assert response.status_code == 200
+    body = response.get_json()
+    assert body['success'] is True
+    assert body['totals']['waste'] == 100.0
+    assert body['kpis']['waste_to_larvae'] == 0.2
+    assert body['monthly']['months'][-1] == this_month
+    assert body['monthly']['waste'][-1] == 40.0
+
+
+def test_monthly_series_query_has_no_escaped_percent(client, fake_db):
+    client.get('/api/dashboard')
+    monthly = [query for query, _ in fake_db.reads if 'AS month' in query]
+    assert monthly and '%%' not in monthly[0]
+
+
+def test_waste_sourcing_updates_daily_summary(client, fake_db):
+    response = client.post('/api/waste-sourcing', json={
+        'collectionDate': '2026-01-05', 'collectionTime': '08:00', 'sourceType': 'market',
+        'sourceName': 'Central', 'wasteType': 'fruit', 'wasteWeight': '12.5',
+        'segregationStatus': 'segregated', 'collectionPersonnel': 'Ann', 'recordedBy': 'tester',
+    })
+
+    assert response.status_code == 201
+    summary = fake_db.written(r'INSERT INTO production_daily_summary')
+    assert [params for _, params in summary] == [('2026-01-05', 'waste', 12.5)]
+
+
+def test_drying_input_updates_batch_summary(client, fake_db):
+    response = client.post('/api/drying/input', json={
+        'batchId': 'DB-1', 'wetHarvested': 30, 'wetPlaced': 25, 'driedByPersonnel': 'Ann', 'sandUsed': 10,
+    })
+
+    assert response.status_code == 200
+    assert fake_db.written(r'INSERT INTO drying_input')
+    batch = fake_db.written(r'INSERT INTO drying_batch_summary')
+    assert batch and batch[0][1][:5] == ('DB-1', 25.0, 0, 1, 0)
+
+
+def test_failed_summary_rolls_back_the_insert(client, fake_db):
+    fake_db.fail(r'INSERT INTO drying_batch_summary', RuntimeError('summary table missing'))
+
+    response = client.post('/api/drying/input', json={
+        'batchId': 'DB-2', 'wetHarvested': 30, 'wetPlaced': 25, 'driedByPersonnel': 'Ann', 'sandUsed': 10,
+    })
+
+    assert response.status_code == 500
+    assert response.get_json()['success'] is False
+    assert not fake_db.written(r'INSERT INTO drying_input')
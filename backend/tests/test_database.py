@@ -0,0 +1,81 @@
+import pytest
+
+import database
+from database import DatabaseConnection
+
+
+class PoolConnection:
+    in_transaction = False
+
+    def start_transaction(self):
+        self.in_transaction = True
+
+    def commit(self):
+        self.in_transaction = False
+
+    def rollback(self):
+        self.in_transaction = False
+
+    def cursor(self, dictionary=False):
+        return PoolCursor()
+
+    def close(self):
+        pass
+
+
+class PoolCursor:
+    lastrowid = 1
+    rowcount = 1
+
+    def execute(self, query, params=()):
+        pass
+
+    def executemany(self, query, rows):
+        pass
+
+    def fetchall(self):
+        return [{'version': 1}]
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def db(monkeypatch):
+    instance = DatabaseConnection()
+    monkeypatch.setattr(database, 'DB_PREPARED_STATEMENTS', False)
+    monkeypatch.setattr(instance, 'get_connection', lambda readonly=False: PoolConnection())
+    instance.set_primary_until(0)
+    instance.begin_request()
+    yield instance
+    instance.end_request()
+    instance.set_primary_until(0)
+
+
+def test_read_only_transaction_keeps_reads_on_replicas(db):
+    with db.transaction():
+        db.fetch_all("SELECT version FROM sync_table_versions")
+        db.fetch_one("SELECT COUNT(*) FROM environment_alerts")
+
+    assert db.get_primary_until() == 0
+
+
+@pytest.mark.parametrize('write', ['execute_query', 'execute_many'])
+def test_transaction_that_writes_sticks_to_the_primary(db, write):
+    with db.transaction():
+        db.fetch_one("SELECT 1")
+        if write == 'execute_query':
+            db.execute_query("UPDATE sync_table_versions SET version = version + 1")
+        else:
+            db.execute_many("INSERT INTO sales_daily_summary VALUES (%s)", [(1,)])
+
+    assert db.get_primary_until() > 0
+
+
+def test_rolled_back_write_does_not_stick(db):
+    with pytest.raises(RuntimeError):
+        with db.transaction():
+            db.execute_query("UPDATE sync_table_versions SET version = version + 1")
+            raise RuntimeError
+
+    assert db.get_primary_until() == 0
@@ -0,0 +1,36 @@
+import re
+
+import delta_sync
+
+
+def _counter_after_reset(fake_db, version):
+    """Apply force_reset's UPDATE to a counter at ``version``, as MySQL would."""
+    delta_sync.force_reset(fake_db, 'waste_sourcing')
+    [(query, _)] = fake_db.written(r'UPDATE sync_table_versions')
+    counter = {'version': version, 'pruned_version': 0}
+    # Single-table UPDATE assigns left to right, each expression seeing earlier assignments
+    for column, expression in re.findall(r'(\w+) = (version(?: \+ 1)?)', query.split('WHERE')[0]):
+        counter[column] = counter['version'] + (1 if '+ 1' in expression else 0)
+    return counter
+
+
+def test_force_reset_resets_up_to_date_clients(client, fake_db):
+    counter = _counter_after_reset(fake_db, version=10)
+    fake_db.respond(r'FROM sync_table_versions', [{'table_name': 'waste_sourcing', **counter}])
+
+    response = client.get('/api/sync?since=waste_sourcing:10&tables=waste_sourcing')
+
+    assert response.status_code == 200
+    synced = response.get_json()['tables']['waste_sourcing']
+    assert synced['reset'] is True
+    assert synced['version'] == 11
+    assert fake_db.written(r'DELETE FROM sync_tombstones')
+
+
+def test_client_is_not_reset_again_after_reloading(client, fake_db):
+    counter = _counter_after_reset(fake_db, version=10)
+    fake_db.respond(r'FROM sync_table_versions', [{'table_name': 'waste_sourcing', **counter}])
+
+    response = client.get('/api/sync?since=waste_sourcing:11&tables=waste_sourcing')
+
+    assert response.get_json()['tables']['waste_sourcing']['reset'] is False
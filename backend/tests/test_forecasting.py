@@ -0,0 +1,88 @@
+from datetime import date
+
+import numpy as np
+
+import forecasting
+
+
+def steep_rows(tray='T1'):
+    """Weighings whose log bends sharply upward, so the fitted curve explodes."""
+    return [{'tray_batch_id': tray, 'feeding_date': date(2026, 1, day), 'larvae_age_days': day,
+             'larvae_weight_g': float(np.exp(12 * (day / 10) ** 2)), 'feed_quantity_kg': 1}
+            for day in (2, 4, 6, 8)]
+
+
+def model(target_log_weight=None, prior=(0.0, 1.0, 0.0)):
+    return forecasting.HarvestModel(np.array(prior), target_log_weight,
+                                    float(forecasting.FORECAST_MAX_AGE_DAYS), None, 'test')
+
+
+def test_forecast_weight_fits_the_column():
+    [result] = forecasting.forecast(forecasting.SeriesBatch(steep_rows()), model())
+
+    assert result['predicted_weight_g'] <= forecasting.DECIMAL_MAX
+    assert forecasting._storable(result)
+
+
+def test_forecast_weight_is_capped_near_the_harvest_target():
+    rows = [{'tray_batch_id': 'T1', 'feeding_date': date(2026, 1, day), 'larvae_age_days': day,
+             'larvae_weight_g': weight, 'feed_quantity_kg': 1}
+            for day, weight in ((2, 10), (4, 100), (6, 1000), (8, 500))]
+    # A steep prior puts the curve far above the last weighing at the harvest age
+    [result] = forecasting.forecast(forecasting.SeriesBatch(rows), model(np.log(5), prior=(0.0, 15.0, 0.0)))
+
+    # Capped at the larger of MAX_OVER_TARGET x the target and the last weighing
+    assert result['harvest_age_days'] == 8
+    assert result['predicted_weight_g'] == 500.0
+
+
+def test_non_finite_and_out_of_range_rows_are_not_storable():
+    [result] = forecasting.forecast(forecasting.SeriesBatch(steep_rows()), model())
+
+    assert not forecasting._storable({**result, 'predicted_feed_kg': float('inf')})
+    assert not forecasting._storable({**result, 'predicted_yield_kg': forecasting.DECIMAL_MAX * 10})
+    assert not forecasting._storable({**result, 'coefs': np.array([np.nan, 1.0, 0.0])})
+
+
+def test_refresh_skips_unstorable_trays(fake_db, monkeypatch):
+    monkeypatch.setattr(forecasting, 'harvest_model', lambda db: model())
+    fake_db.respond(r'FROM feeding_schedule s', [
+        {'tray_batch_id': 'T1', 'row_count': 4, 'last_schedule_id': 4},
+        {'tray_batch_id': 'T2', 'row_count': 4, 'last_schedule_id': 8},
+    ])
+    fake_db.respond(r'SELECT tray_batch_id, feeding_date', steep_rows('T1') + steep_rows('T2'))
+    real_forecast = forecasting.forecast
+
+    def one_overflowing(batch, harvest_model):
+        results = real_forecast(batch, harvest_model)
+        results[1]['predicted_feed_kg'] = float('inf')
+        return results
+    monkeypatch.setattr(forecasting, 'forecast', one_overflowing)
+
+    forecasting.refresh(forecasting.DatabaseConnection())
+
+    upserts = fake_db.written(r'INSERT INTO larval_growth_forecasts')
+    assert [params[0] for _, params in upserts] == ['T1']
+
+
+def test_forecast_endpoint_reads_the_cache_when_the_scheduler_runs(client, fake_db, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module, 'SCHEDULER_ENABLED', True)
+    refreshed = []
+    monkeypatch.setattr(forecasting, 'refresh', lambda db: refreshed.append(db))
+
+    assert client.get('/api/statistics/larval-growth/forecast').status_code == 200
+    assert refreshed == []
+
+    assert client.get('/api/statistics/larval-growth/forecast?refresh=1').status_code == 200
+    assert len(refreshed) == 1
+
+
+def test_forecast_endpoint_refreshes_without_a_scheduler(client, fake_db, monkeypatch):
+    import app as app_module
+    monkeypatch.setattr(app_module, 'SCHEDULER_ENABLED', False)
+    refreshed = []
+    monkeypatch.setattr(forecasting, 'refresh', lambda db: refreshed.append(db))
+
+    assert client.get('/api/statistics/larval-growth/forecast').status_code == 200
+    assert len(refreshed) == 1
@@ -0,0 +1,135 @@
+from datetime import date
+
+import pytest
+
+import harvest_report
+
+
+class FakeConnection:
+    """Answers GET_LOCK and streams the CSV rows; ``dedicated`` is outside the pool."""
+
+    def __init__(self, log, rows=(), lock_granted=True, dedicated=False):
+        self.log = log
+        self.rows = list(rows)
+        self.lock_granted = lock_granted
+        self.dedicated = dedicated
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.result = []
+
+    def execute(self, query, params=()):
+        if 'LOCK' in query and not self.conn.dedicated:
+            self.conn.log.append('lock on a pooled connection')
+        self.conn.log.append(query.split(' FROM ')[0])
+        if 'GET_LOCK' in query:
+            self.result = [(1 if self.conn.lock_granted else 0,)]
+        elif 'RELEASE_LOCK' in query:
+            self.result = [(1,)]
+        else:
+            self.result = self.conn.rows
+
+    def fetchone(self):
+        return self.result[0]
+
+    def fetchmany(self, size):
+        batch, self.result = self.result[:size], self.result[size:]
+        return batch
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def report_db(fake_db, monkeypatch):
+    fake_db.log = []
+    fake_db.connection_options = {}
+    fake_db.get_connection = lambda: FakeConnection(fake_db.log, **fake_db.connection_options)
+    monkeypatch.setattr(harvest_report.mysql.connector, 'connect',
+                        lambda **config: FakeConnection(fake_db.log, dedicated=True, **fake_db.connection_options))
+    monkeypatch.setattr(harvest_report, 'send_email', lambda *args, **kwargs: True)
+    return fake_db
+
+
+def _queued_run(status='queued'):
+    return [{'run_id': 7, 'incremental': 1, 'date_from': None, 'date_to': None, 'status': status}]
+
+
+def test_run_holds_the_lock_from_watermark_to_finish(report_db):
+    report_db.connection_options = {'rows': [(41, 'T1', date(2026, 1, 2), 'L5', 3.5, 'dried', 4, '')]}
+    report_db.respond(r'FROM harvest_report_runs WHERE run_id', _queued_run())
+    report_db.respond(r'MAX\(last_harvest_id\)', [{'last_id': 40}])
+    report_db.respond(r'MIN\(harvest_date\)', [{'row_count': 1, 'total_kg': 3.5,
+                                                      'first_date': None, 'last_date': None}])
+    events = report_db.log
+    report_db.execute_query = lambda query, params=None: events.append(('write', params))
+
+    harvest_report.run_report(7, db=report_db)
+
+    assert events[0] == 'SELECT GET_LOCK(%s, %s)'
+    assert events[-1] == 'SELECT RELEASE_LOCK(%s)'
+    assert events[-2] == ('write', (1, 41, 'sent', 7))
+    watermark = [params for query, params in report_db.reads if 'MAX(last_harvest_id)' in query]
+    assert len(watermark) == 1
+
+
+def test_run_finished_elsewhere_is_skipped(report_db):
+    report_db.respond(r'FROM harvest_report_runs WHERE run_id', _queued_run(status='sent'))
+
+    harvest_report.run_report(7, db=report_db)
+
+    assert report_db.log == ['SELECT GET_LOCK(%s, %s)', 'SELECT RELEASE_LOCK(%s)']
+    assert report_db.written(r'UPDATE harvest_report_runs') == []
+
+
+def test_lock_timeout_fails_the_run(report_db):
+    report_db.connection_options = {'lock_granted': False}
+
+    harvest_report.run_report(7, db=report_db)
+
+    assert report_db.reads == []
+    [(_, params)] = report_db.written(r'UPDATE harvest_report_runs')
+    assert params[1] == 'failed' and params[-1] == 7
+
+
+def test_resume_queued_resubmits_runs(fake_db, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(harvest_report._executor, 'submit', lambda fn, run_id: submitted.append(run_id))
+    fake_db.respond(r"status = 'queued'", [{'run_id': 3}, {'run_id': 5}])
+
+    assert harvest_report.resume_queued(fake_db) == 2
+    assert submitted == [3, 5]
+
+
+def test_report_request_is_refused_when_the_queue_is_full(client, fake_db, monkeypatch):
+    monkeypatch.setattr(harvest_report._executor, 'submit', lambda *args: pytest.fail('nothing should be queued'))
+    fake_db.respond(r"COUNT\(\*\) AS queued", [{'queued': harvest_report.HARVEST_REPORT_MAX_QUEUED}])
+
+    response = client.post('/api/send-harvest-report', json={})
+
+    assert response.status_code == 503
+    assert response.headers['Retry-After']
+    assert fake_db.written(r'INSERT INTO harvest_report_runs') == []
+
+
+def test_report_request_is_queued_below_the_limit(client, fake_db, monkeypatch):
+    submitted = []
+    monkeypatch.setattr(harvest_report._executor, 'submit', lambda fn, run_id: submitted.append(run_id))
+    fake_db.respond(r"COUNT\(\*\) AS queued", [{'queued': 0}])
+
+    response = client.post('/api/send-harvest-report', json={})
+
+    assert response.status_code == 202
+    assert len(fake_db.written(r'INSERT INTO harvest_report_runs')) == 1
+    assert submitted == [1]
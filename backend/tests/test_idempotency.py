@@ -0,0 +1,77 @@
+import json
+
+import pytest
+
+import idempotency
+
+CLAIM_ID = b'c' * 16
+OTHER_CLAIM = b'o' * 16
+WASTE = json.dumps({
+    'collectionDate': '2026-01-05', 'collectionTime': '08:00', 'sourceType': 'market',
+    'sourceName': 'Central', 'wasteType': 'fruit', 'wasteWeight': '12.5',
+    'segregationStatus': 'segregated', 'collectionPersonnel': 'Ann', 'recordedBy': 'tester',
+})
+REQUEST_HASH = idempotency.fingerprint('POST', '/api/waste-sourcing', b'', WASTE.encode())
+
+
+@pytest.fixture(autouse=True)
+def fixed_claim_id(monkeypatch):
+    monkeypatch.setattr(idempotency.os, 'urandom', lambda size: CLAIM_ID)
+
+
+def _post(client, key='entry-1'):
+    return client.post('/api/waste-sourcing', data=WASTE, content_type='application/json',
+                       headers={'Idempotency-Key': key})
+
+
+def _stored_row(claim_id, status_code=None, body=None):
+    return [{'request_hash': REQUEST_HASH, 'claim_id': claim_id, 'status_code': status_code,
+             'content_type': 'application/json', 'response_body': body}]
+
+
+def test_first_request_runs_and_stores_its_response(client, fake_db):
+    fake_db.respond(r'FROM idempotency_keys', _stored_row(CLAIM_ID))
+
+    response = _post(client)
+
+    assert response.status_code == 201
+    assert len(fake_db.written(r'INSERT INTO waste_sourcing')) == 1
+    [(_, params)] = fake_db.written(r'UPDATE idempotency_keys')
+    assert params[0] == 201 and b'created successfully' in params[2]
+
+
+def test_retry_replays_without_running_the_handler(client, fake_db):
+    fake_db.respond(r'FROM idempotency_keys', _stored_row(OTHER_CLAIM, 201, b'{"success": true}'))
+
+    response = _post(client)
+
+    assert response.status_code == 201
+    assert response.headers['Idempotent-Replayed'] == 'true'
+    assert fake_db.written(r'INSERT INTO waste_sourcing') == []
+
+
+def test_request_still_running_answers_409(client, fake_db):
+    fake_db.respond(r'FROM idempotency_keys', _stored_row(OTHER_CLAIM))
+
+    response = _post(client)
+
+    assert response.status_code == 409
+    assert fake_db.written(r'INSERT INTO waste_sourcing') == []
+
+
+def test_large_response_keeps_the_key_with_a_note(fake_db):
+    claim = (1, b'k' * 32, CLAIM_ID)
+
+    idempotency.complete(fake_db, claim, 200, 'application/json', b'x' * (idempotency.MAX_STORED_RESPONSE + 1))
+
+    assert fake_db.written(r'DELETE FROM idempotency_keys') == []
+    [(_, params)] = fake_db.written(r'UPDATE idempotency_keys')
+    assert params[0] == 200 and params[1] == 'application/json'
+    assert json.loads(params[2])['success'] is True
+
+
+def test_server_error_frees_the_key(fake_db):
+    idempotency.complete(fake_db, (1, b'k' * 32, CLAIM_ID), 503, 'application/json', b'{}')
+
+    assert fake_db.written(r'UPDATE idempotency_keys') == []
+    assert len(fake_db.written(r'DELETE FROM idempotency_keys')) == 1
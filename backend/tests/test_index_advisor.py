@@ -0,0 +1,26 @@
+"""Hot lookups must use an index on a migrated database.
+
+Needs the MySQL server from DB_HOST/DB_NAME with the migrations applied
+(and ideally insert_test_data.py); skipped when it cannot be reached.
+"""
+import mysql.connector
+import pytest
+
+import index_advisor
+from config import DB_CONFIG
+
+
+@pytest.fixture
+def cursor():
+    try:
+        conn = mysql.connector.connect(connection_timeout=3, **DB_CONFIG)
+    except mysql.connector.Error as e:
+        pytest.skip(f"no database to EXPLAIN against: {e}")
+    try:
+        yield conn.cursor()
+    finally:
+        conn.close()
+
+
+def test_hot_queries_use_indexes(cursor):
+    assert index_advisor.hot_regressions(cursor, max_scan_rows=1000) == []
@@ -0,0 +1,21 @@
+import rate_limit
+
+
+def test_full_table_reads_need_a_heavy_slot():
+    for endpoint in ('get_all_drying_input', 'get_all_drying_remarks', 'get_all_drying_review'):
+        assert rate_limit.ROUTE_LIMITS[endpoint][2] == 'heavy'
+
+
+def test_polled_summaries_take_no_slot():
+    for endpoint in ('get_dashboard', 'sync_api.get_changes'):
+        assert rate_limit.ROUTE_LIMITS[endpoint][2] is None
+
+
+def test_sensor_ingestion_is_not_limited_by_address(monkeypatch):
+    monkeypatch.setattr(rate_limit, 'RATE_LIMIT_ENABLED', True)
+    taken = []
+    monkeypatch.setattr(rate_limit, '_take', lambda *args: taken.append(args))
+
+    for _ in range(3):
+        assert rate_limit.admit('sensor_ingestion.ingest_sensor_readings', 'ip:10.0.0.5', '10.0.0.5') is None
+    assert taken == []
@@ -0,0 +1,37 @@
+import pytest
+
+SALE = {'date': '2026-01-05', 'customer_id': 4, 'product': 'Dried larvae', 'quantity': '3', 'amount': '45.50'}
+
+
+def test_sale_updates_daily_summary(client, fake_db):
+    response = client.post('/api/sales', json=SALE)
+
+    assert response.status_code == 200
+    [(_, params)] = fake_db.written(r'INSERT INTO sales_daily_summary')
+    assert params == ('2026-01-05', 4, 'Dried larvae', 45.5, 3, 1)
+
+
+@pytest.mark.parametrize('field, value', [
+    ('quantity', 'three'), ('quantity', 2.5), ('amount', 'free'), ('amount', None), ('customer_id', 'abc'),
+])
+def test_malformed_sale_is_a_bad_request(client, fake_db, field, value):
+    response = client.post('/api/sales', json={**SALE, field: value})
+
+    assert response.status_code == 400
+    assert field in response.get_json()['error']
+    assert fake_db.writes == []
+
+
+def test_malformed_sale_edit_is_a_bad_request(client, fake_db):
+    response = client.put('/api/sales/9', json={**SALE, 'quantity': '3 bags'})
+
+    assert response.status_code == 400
+    assert fake_db.writes == []
+
+
+def test_malformed_feedback_rating_is_a_bad_request(client, fake_db):
+    response = client.post('/api/feedback', json={'date': '2026-01-05', 'customer_id': 4,
+                                                  'feedback': 'Good', 'rating': 'great'})
+
+    assert response.status_code == 400
+    assert fake_db.writes == []
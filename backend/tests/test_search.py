@@ -0,0 +1,51 @@
+from datetime import date
+
+import pytest
+
+import search_index
+
+
+def test_review_and_health_comments_are_indexed():
+    assert 'comments' in search_index.SEARCHABLE_TABLES['drying_review_approval'][4]
+    assert 'comments' in search_index.SEARCHABLE_TABLES['hatchery_health_interventions'][4]
+
+
+@pytest.mark.parametrize('text, expected', [
+    ('mites ammonia', '+mites* +ammonia*'),
+    ('"strong ammonia" +mites -ants', '"strong ammonia" +mites -ants'),
+    ('"ammonia smell', 'ammonia smell'),
+    ('bio-waste odo*', 'bio waste odo*'),
+    ('(mites) ~ants @3 >>', 'mites ants'),
+])
+def test_boolean_query_keeps_only_well_formed_operators(text, expected):
+    assert search_index.boolean_query(text) == expected
+
+
+def test_search_with_unbalanced_quote_is_sanitized(client, fake_db):
+    response = client.get('/api/search?q="ammonia')
+
+    assert response.status_code == 200
+    assert fake_db.reads[-1][1][0] == 'ammonia'
+
+
+def test_search_with_only_operators_is_a_bad_request(client, fake_db):
+    response = client.get('/api/search?q=""+-')
+
+    assert response.status_code == 400
+    assert fake_db.reads == []
+
+
+@pytest.mark.parametrize('arg', ['from=2026-13-01', 'to=yesterday', "from=2026-01-01' OR 1=1"])
+def test_search_with_a_malformed_date_is_a_bad_request(client, fake_db, arg):
+    response = client.get(f'/api/search?q=mites&{arg}')
+
+    assert response.status_code == 400
+    assert fake_db.reads == []
+
+
+def test_search_dates_are_passed_as_dates(client, fake_db):
+    response = client.get('/api/search?q=mites&from=2026-01-01&to=2026-01-31')
+
+    assert response.status_code == 200
+    params = fake_db.reads[-1][1]
+    assert date(2026, 1, 1) in params and date(2026, 1, 31) in params
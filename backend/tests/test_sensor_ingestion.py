@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pytest
+from mysql.connector import errors as mysql_errors
+
+import sensor_ingestion
+import sensor_routes
+
+
+@pytest.mark.parametrize('value', [float('nan'), float('inf'), '-Infinity', 1000, -1000.5])
+def test_parse_reading_rejects_values_outside_the_column(value):
+    with pytest.raises(ValueError):
+        sensor_ingestion.parse_reading({'device': 'cage-1', 'ts': 1767225600, 'temperature': value})
+
+
+def test_parse_reading_accepts_limits():
+    reading = sensor_ingestion.parse_reading({'device': 'cage-1', 'ts': 1767225600, 't': 999.99, 'h': None})
+    assert reading[2:] == (999.99, None)
+
+
+def test_endpoint_refuses_non_finite_readings(flask_app, monkeypatch):
+    monkeypatch.setattr(sensor_routes, 'SENSOR_INGEST_TOKEN', 'secret')
+    monkeypatch.setattr(sensor_routes, 'get_buffer', lambda: pytest.fail('nothing should be buffered'))
+
+    response = flask_app.test_client().post(
+        '/api/sensors/readings', headers={'X-Sensor-Token': 'secret'},
+        data='{"device": "cage-1", "ts": 1767225600, "t": NaN}\n'
+             '{"device": "cage-1", "ts": 1767225660, "h": Infinity}\n')
+
+    assert response.status_code == 400
+    assert response.get_json()['rejected'] == 2
+
+
+def _reading(minute):
+    return ('cage-1', datetime(2026, 1, 1, 0, minute), 25.0, 60.0)
+
+
+def test_flush_dead_letters_batches_refused_as_bad_data(fake_db, caplog):
+    fake_db.fail(r'INSERT IGNORE INTO sensor_readings', mysql_errors.DataError('Out of range value'))
+    buffer = sensor_ingestion.ReadingBuffer(db=fake_db, max_size=10, flush_batch=2)
+    buffer.add([_reading(0), _reading(1), _reading(2)])
+
+    with caplog.at_level('ERROR', logger='sensor_ingestion.dead_letter'):
+        assert buffer.flush() == 0
+
+    snapshot = buffer.snapshot()
+    assert snapshot['buffered'] == 0
+    assert snapshot['dead_lettered'] == 3
+    assert len([r for r in caplog.records if r.name == 'sensor_ingestion.dead_letter']) == 3
+
+
+def test_flush_requeues_batches_on_connection_errors(fake_db):
+    fake_db.fail(r'INSERT IGNORE INTO sensor_readings', mysql_errors.OperationalError('Lost connection'))
+    buffer = sensor_ingestion.ReadingBuffer(db=fake_db, max_size=10, flush_batch=2)
+    buffer.add([_reading(0), _reading(1), _reading(2)])
+
+    assert buffer.flush() == 0
+
+    snapshot = buffer.snapshot()
+    assert snapshot['buffered'] == 3
+    assert snapshot['dead_lettered'] == 0
+    assert list(buffer._pending)[0] == ('cage-1', datetime(2026, 1, 1, 0, 0))
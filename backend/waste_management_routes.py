@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify
 from database import DatabaseConnection
+import anomaly_detection
+import dashboard
 import json
 from datetime import datetime
 
@@ -49,7 +51,9 @@ def create_waste_sourcing():
             data['recordedBy']
         )
         
-        db.execute_query(query, params)
+        with db.transaction():
+            db.execute_query(query, params)
+            dashboard.apply(db, 'waste', data['collectionDate'], float(data['wasteWeight']))
         return jsonify({'message': 'Waste sourcing record created successfully'}), 201
         
     except Exception as e:
@@ -198,7 +202,11 @@ def create_environmental_monitoring():
             data.get('remarks')
         )
         
-        db.execute_query(query, params)
+        with db.transaction():
+            db.execute_query(query, params)
+            anomaly_detection.observe(
+                db, 'waste', 'waste', f"{data['monitoring_date']} {data['monitoring_time']}",
+                temperature=params[2], humidity=params[3])
         return jsonify({'message': 'Environmental monitoring record created successfully'}), 201
         
     except Exception as e:
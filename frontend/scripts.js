@@ -1,29 +1,31 @@
 // Larvae Feeding & Facility Section JavaScript
 
-document.addEventListener('DOMContentLoaded', function() {
+// Runs once for each section fragment as it is loaded (sections.js); scope finds
+// elements of that fragment only, so nothing is bound twice
+Sections.ready(function(scope) {
     // Track form submission states to prevent multiple submissions
     const formSubmissionStates = new Map();
     
     // Form elements
     const forms = {
         // Waste Management
-        wasteSourcing: document.getElementById('wasteSourcingForm'),
-        storageRecords: document.getElementById('storageRecordsForm'),
-        processingRecords: document.getElementById('processingRecordsForm'),
-        wasteEnvironmentalMonitoring: document.getElementById('wasteEnvironmentalMonitoringForm'),
+        wasteSourcing: scope.getElementById('wasteSourcingForm'),
+        storageRecords: scope.getElementById('storageRecordsForm'),
+        processingRecords: scope.getElementById('processingRecordsForm'),
+        wasteEnvironmentalMonitoring: scope.getElementById('wasteEnvironmentalMonitoringForm'),
         // Feeding
-        feedingRecords: document.getElementById('feedingRecordsForm'),
-        feedingEnvironmentalMonitoring: document.getElementById('environmentalMonitoringForm'),
-        substratePreparation: document.getElementById('substratePreparationForm'),
-        healthIntervention: document.getElementById('healthInterventionForm'),
-        harvestYield: document.getElementById('harvestYieldForm'),
-        feedingSchedule: document.getElementById('feedingScheduleForm'),
+        feedingRecords: scope.getElementById('feedingRecordsForm'),
+        feedingEnvironmentalMonitoring: scope.getElementById('environmentalMonitoringForm'),
+        substratePreparation: scope.getElementById('substratePreparationForm'),
+        healthIntervention: scope.getElementById('healthInterventionForm'),
+        harvestYield: scope.getElementById('harvestYieldForm'),
+        feedingSchedule: scope.getElementById('feedingScheduleForm'),
         // Facility
-        cageMonitoring: document.getElementById('cageMonitoringForm'),
-        facilityMaintenance: document.getElementById('facilityMaintenanceForm'),
-        pupaeTransition: document.getElementById('pupaeTransitionForm'),
-        eggCollection: document.getElementById('eggCollectionForm'),
-        baitPreparation: document.getElementById('baitPreparationForm')
+        cageMonitoring: scope.getElementById('cageMonitoringForm'),
+        facilityMaintenance: scope.getElementById('facilityMaintenanceForm'),
+        pupaeTransition: scope.getElementById('pupaeTransitionForm'),
+        eggCollection: scope.getElementById('eggCollectionForm'),
+        baitPreparation: scope.getElementById('baitPreparationForm')
     };
 
     // API endpoints
@@ -111,6 +113,27 @@ document.addEventListener('DOMContentLoaded', function() {
         return Object.keys(errors).length > 0 ? errors : null;
     }
 
+    // One Idempotency-Key per form entry: a retry after a network failure
+    // reuses it so the server replays its first answer instead of saving twice
+    function idempotencyKey(form) {
+        if (!form.dataset.idempotencyKey) {
+            form.dataset.idempotencyKey = window.crypto && crypto.randomUUID
+                ? crypto.randomUUID()
+                : `${Date.now().toString(36)}-${Math.random().toString(36).slice(2)}`;
+        }
+        return form.dataset.idempotencyKey;
+    }
+
+    // Once the server has answered, the next submission is a new entry. A 409
+    // means the first request with this key is still running, so the key is
+    // kept and the next click gets that request's answer instead of saving twice.
+    // Returns whether the key was dropped.
+    function settleIdempotencyKey(form, response) {
+        if (response.status === 409) return false;
+        delete form.dataset.idempotencyKey;
+        return true;
+    }
+
     // Handle form submission
     async function handleSubmit(form, formType) {
         // Prevent multiple submissions
@@ -179,10 +202,11 @@ document.addEventListener('DOMContentLoaded', function() {
 
             const response = await fetch(apiUrl, {
                 method: 'POST',
-                headers: { 'Content-Type': 'application/json' },
+                headers: { 'Content-Type': 'application/json', 'Idempotency-Key': idempotencyKey(form) },
                 body: JSON.stringify(data),
                 credentials: 'include'
             });
+            settleIdempotencyKey(form, response);
 
             const result = await response.json();
 
@@ -241,7 +265,7 @@ document.addEventListener('DOMContentLoaded', function() {
     });
 
     // Handle records filtering
-    const recordsFilterForm = document.getElementById('recordsFilterForm');
+    const recordsFilterForm = scope.getElementById('recordsFilterForm');
     if (recordsFilterForm) {
         recordsFilterForm.addEventListener('submit', async function(e) {
             e.preventDefault();
@@ -413,8 +437,8 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     // --- Harvest Efficiency Analysis ---
-    const analyzeBtn = document.getElementById('analyzeHarvestEfficiencyBtn');
-    const chartCanvas = document.getElementById('harvestEfficiencyChart');
+    const analyzeBtn = scope.getElementById('analyzeHarvestEfficiencyBtn');
+    const chartCanvas = scope.getElementById('harvestEfficiencyChart');
     let efficiencyChart = null; 
 
     if (analyzeBtn) {
@@ -604,17 +628,19 @@ document.addEventListener('DOMContentLoaded', function() {
     }
 
     // --- Customers, Sales, Deliveries, Feedback Section Logic ---
-    const customerForm = document.getElementById('customerForm');
-    const customerTableBody = document.querySelector('#customerTable tbody');
-    const salesForm = document.getElementById('salesForm');
-    const salesTableBody = document.querySelector('#salesTable tbody');
-    const saleCustomerSelect = document.getElementById('saleCustomer');
-    const deliveryForm = document.getElementById('deliveryForm');
-    const deliveryTableBody = document.querySelector('#deliveryTable tbody');
-    const deliveryCustomerSelect = document.getElementById('deliveryCustomer');
-    const feedbackForm = document.getElementById('feedbackForm');
-    const feedbackTableBody = document.querySelector('#feedbackTable tbody');
-    const feedbackCustomerSelect = document.getElementById('feedbackCustomer');
+    const customerForm = scope.getElementById('customerForm');
+    const customerTableBody = scope.querySelector('#customerTable tbody');
+    const salesForm = scope.getElementById('salesForm');
+    const salesTableBody = scope.querySelector('#salesTable tbody');
+    const saleCustomerSelect = scope.getElementById('saleCustomer');
+    const deliveryForm = scope.getElementById('deliveryForm');
+    const deliveryTableBody = scope.querySelector('#deliveryTable tbody');
+    const deliveryCustomerSelect = scope.getElementById('deliveryCustomer');
+    const feedbackForm = scope.getElementById('feedbackForm');
+    const feedbackTableBody = scope.querySelector('#feedbackTable tbody');
+    const feedbackCustomerSelect = scope.getElementById('feedbackCustomer');
+    // Everything below belongs to the sales fragment
+    if (!customerForm) return;
 
     let customers = [];
     let sales = [];
@@ -707,8 +733,8 @@ document.addEventListener('DOMContentLoaded', function() {
           email: newCustomerForm.email.value.trim(),
           address: newCustomerForm.address.value.trim()
         };
-        await fetch('/api/customers', {method: 'POST', headers: {'Content-Type': 'application/json'}, body: JSON.stringify(data)});
-        newCustomerForm.reset();
+        const response = await fetch('/api/customers', {method: 'POST', headers: {'Content-Type': 'application/json', 'Idempotency-Key': idempotencyKey(newCustomerForm)}, body: JSON.stringify(data)});
+        if (settleIdempotencyKey(newCustomerForm, response)) newCustomerForm.reset();
         if (btn) btn.disabled = false;
         fetchCustomers();
       }, { once: true });
@@ -723,8 +749,8 @@ document.addEventListener('DOMContentLoaded', function() {
           quantity: salesForm.quantity.value,
           amount: salesForm.amount.value
         };
-        await fetch('/api/sales', {method: 'POST', headers: {'Content-Type': 'application/json'}, body: JSON.stringify(data)});
-        salesForm.reset();
+        const response = await fetch('/api/sales', {method: 'POST', headers: {'Content-Type': 'application/json', 'Idempotency-Key': idempotencyKey(salesForm)}, body: JSON.stringify(data)});
+        if (settleIdempotencyKey(salesForm, response)) salesForm.reset();
         fetchSales();
       });
     }
@@ -739,8 +765,8 @@ document.addEventListener('DOMContentLoaded', function() {
           status: deliveryForm.status.value,
           notes: deliveryForm.notes.value.trim()
         };
-        await fetch('/api/deliveries', {method: 'POST', headers: {'Content-Type': 'application/json'}, body: JSON.stringify(data)});
-        deliveryForm.reset();
+        const response = await fetch('/api/deliveries', {method: 'POST', headers: {'Content-Type': 'application/json', 'Idempotency-Key': idempotencyKey(deliveryForm)}, body: JSON.stringify(data)});
+        if (settleIdempotencyKey(deliveryForm, response)) deliveryForm.reset();
         fetchDeliveries();
       });
     }
@@ -753,8 +779,8 @@ document.addEventListener('DOMContentLoaded', function() {
           feedback: feedbackForm.feedback.value.trim(),
           rating: feedbackForm.rating.value
         };
-        await fetch('/api/feedback', {method: 'POST', headers: {'Content-Type': 'application/json'}, body: JSON.stringify(data)});
-        feedbackForm.reset();
+        const response = await fetch('/api/feedback', {method: 'POST', headers: {'Content-Type': 'application/json', 'Idempotency-Key': idempotencyKey(feedbackForm)}, body: JSON.stringify(data)});
+        if (settleIdempotencyKey(feedbackForm, response)) feedbackForm.reset();
         fetchFeedback();
       });
     }
@@ -823,37 +849,42 @@ document.addEventListener('DOMContentLoaded', function() {
       fetchFeedback();
     };
 
-    // Ensure correct rendering when switching sections
-    window.showSection = function(sectionId, element) {
-      // Hide all sections
-      document.querySelectorAll('.section').forEach(section => {
-        section.classList.remove('active');
-      });
-      // Remove active class from all nav links
-      document.querySelectorAll('.nav-link').forEach(link => {
-        link.classList.remove('active');
-      });
-      // Show selected section
-      const section = document.getElementById(sectionId);
-      if (section) {
-        section.classList.add('active');
-        // If switching to customers or sales, re-render to ensure up-to-date display
-        if (sectionId === 'customers') {
-          renderCustomers();
-        } else if (sectionId === 'sales') {
-          renderCustomers(); // update dropdown
-          renderSales();
-        }
-      }
-      // Add active class to clicked nav link
-      if (element) {
-        element.classList.add('active');
+    // Re-render when switching to customers or sales, to ensure up-to-date display
+    document.addEventListener('section:shown', function(e) {
+      if (e.detail.id === 'customers') {
+        renderCustomers();
+      } else if (e.detail.id === 'sales') {
+        renderCustomers(); // update dropdown
+        renderSales();
       }
-    };
+    });
 
-    // Initial load
-    fetchCustomers();
-    fetchSales();
-    fetchDeliveries();
-    fetchFeedback();
+    // Initial load: all four lists in one round trip
+    async function loadSalesSection() {
+      const res = await fetch('/api/batch', {
+        method: 'POST',
+        credentials: 'include',
+        headers: {'Content-Type': 'application/json'},
+        body: JSON.stringify({requests: [
+          {id: 'customers', path: '/api/customers'},
+          {id: 'sales', path: '/api/sales'},
+          {id: 'deliveries', path: '/api/deliveries'},
+          {id: 'feedback', path: '/api/feedback'}
+        ]})
+      });
+      const data = await res.json();
+      if (!res.ok || !data.success) throw new Error(data.message || 'Failed to load sales data');
+      const bodies = {};
+      data.responses.forEach(r => { bodies[r.id] = r.status === 200 ? r.body : []; });
+      customers = bodies.customers;
+      sales = bodies.sales;
+      deliveries = bodies.deliveries;
+      feedbacks = bodies.feedback;
+      updateCustomerDropdowns();
+      renderCustomers();
+      renderSales();
+      renderDeliveries();
+      renderFeedback();
+    }
+    loadSalesSection().catch(error => console.error('Error loading sales data:', error));
 });
\ No newline at end of file
@@ -0,0 +1,153 @@
+// Section fragments for the dashboard.
+//
+// index.html is a shell with an empty placeholder per section. The markup and
+// scripts of each section live in sections/<fragment>.html and are fetched the
+// first time the section is shown. Once the first section is on screen, the
+// remaining fragments are prefetched while the browser is idle.
+// Fragments are requested with cache: 'no-cache', so the browser keeps its copy
+// and revalidates it with the ETag; an unchanged fragment costs a 304.
+//
+// Page scripts register their setup with Sections.ready(function(scope) {...}).
+// It runs once for each fragment as it arrives, and scope.getElementById /
+// scope.querySelector only see that fragment's elements, so no handler is
+// bound twice.
+const Sections = (function() {
+  // Section id -> fragment file
+  const FRAGMENTS = {
+    waste: 'waste',
+    hatchery: 'hatchery',
+    feeding: 'feeding',
+    drying: 'drying',
+    facility: 'facility',
+    records: 'records',
+    report: 'report',
+    customers: 'sales',
+    sales: 'sales',
+    deliveries: 'sales',
+    feedback: 'sales'
+  };
+
+  const initializers = [];
+  const fetched = {};   // fragment -> Promise of its HTML
+  const loaded = {};    // fragment -> Promise resolved once it is in the page
+
+  function fetchFragment(name) {
+    if (!fetched[name]) {
+      fetched[name] = fetch(`sections/${name}.html`, { cache: 'no-cache', credentials: 'same-origin' })
+        .then(response => {
+          if (!response.ok) throw new Error(`Could not load section ${name} (${response.status})`);
+          return response.text();
+        })
+        .catch(error => {
+          delete fetched[name];
+          throw error;
+        });
+    }
+    return fetched[name];
+  }
+
+  function scopeOf(sections) {
+    return {
+      getElementById(id) {
+        return this.querySelector(`#${id}`);
+      },
+      querySelector(selector) {
+        for (const section of sections) {
+          const found = section.matches(selector) ? section : section.querySelector(selector);
+          if (found) return found;
+        }
+        return null;
+      }
+    };
+  }
+
+  // Scripts inserted through innerHTML never run, so each one is recreated;
+  // external ones are awaited so the inline scripts after them can use them
+  function runScript(original) {
+    return new Promise(resolve => {
+      const script = document.createElement('script');
+      Array.from(original.attributes).forEach(attr => script.setAttribute(attr.name, attr.value));
+      if (original.src) {
+        script.onload = resolve;
+        script.onerror = () => {
+          console.error(`Could not load ${original.src}`);
+          resolve();
+        };
+      } else {
+        script.textContent = original.textContent;
+      }
+      document.body.appendChild(script);
+      if (!original.src) resolve();
+    });
+  }
+
+  async function insert(html) {
+    const template = document.createElement('template');
+    template.innerHTML = html;
+    const scripts = Array.from(template.content.querySelectorAll('script'));
+    scripts.forEach(script => script.remove());
+    const sections = Array.from(template.content.querySelectorAll('.section'));
+    sections.forEach(section => {
+      const placeholder = document.getElementById(section.id);
+      if (!placeholder) return;
+      section.classList.toggle('active', placeholder.classList.contains('active'));
+      placeholder.replaceWith(section);
+    });
+    const scope = scopeOf(sections);
+    initializers.forEach(init => {
+      try {
+        init(scope);
+      } catch (error) {
+        console.error('Section setup failed:', error);
+      }
+    });
+    for (const script of scripts) {
+      await runScript(script);
+    }
+  }
+
+  function load(sectionId) {
+    const name = FRAGMENTS[sectionId];
+    if (!name) return Promise.resolve();
+    if (!loaded[name]) {
+      loaded[name] = fetchFragment(name).then(insert).catch(error => {
+        delete loaded[name];
+        const placeholder = document.getElementById(sectionId);
+        if (placeholder) {
+          placeholder.innerHTML = `<p class="text-danger">${error.message}. <a href="#" onclick="Sections.show('${sectionId}'); return false;">Retry</a></p>`;
+        }
+        throw error;
+      });
+    }
+    return loaded[name];
+  }
+
+  function show(sectionId) {
+    return load(sectionId)
+      .then(() => document.dispatchEvent(new CustomEvent('section:shown', { detail: { id: sectionId } })))
+      .catch(error => console.error(error));
+  }
+
+  function ready(init) {
+    initializers.push(init);
+  }
+
+  // One fragment per idle period; skipped when the tablet asks to save data
+  function prefetchWhenIdle() {
+    if (navigator.connection && navigator.connection.saveData) return;
+    const idle = window.requestIdleCallback || (callback => setTimeout(callback, 1000));
+    const pending = Array.from(new Set(Object.values(FRAGMENTS)));
+    (function next() {
+      const name = pending.shift();
+      if (!name) return;
+      idle(() => fetchFragment(name).catch(() => {}).then(next));
+    })();
+  }
+
+  document.addEventListener('DOMContentLoaded', function() {
+    const active = document.querySelector('.section.active');
+    (active ? show(active.id) : Promise.resolve()).then(prefetchWhenIdle);
+  });
+
+  return { ready, load, show };
+})();